@@ -0,0 +1,84 @@
+import argparse
+import struct
+import time
+from binascii import crc32
+
+from botocore.eventstream import EventStreamBuffer
+
+
+def encode_header(name, value):
+    name = name.encode('utf-8')
+    value = value.encode('utf-8')
+    # Header type 7 is a utf-8 string
+    return bytes([len(name)]) + name + b'\x07' + struct.pack('!H', len(value)) + value
+
+
+def encode_message(headers, payload):
+    header_bytes = b''.join(encode_header(name, value) for name, value in headers.items())
+    total_length = 12 + len(header_bytes) + len(payload) + 4
+    prelude = struct.pack('!II', total_length, len(header_bytes))
+    prelude += struct.pack('!I', crc32(prelude) & 0xFFFFFFFF)
+    message = prelude + header_bytes + payload
+    return message + struct.pack('!I', crc32(message) & 0xFFFFFFFF)
+
+
+def make_block(payload_size, block_size):
+    """Messages adding up to about `block_size` bytes, streamed over and over."""
+    headers = {
+        ':message-type': 'event',
+        ':event-type': 'chunk',
+        ':content-type': 'application/json',
+    }
+    message = encode_message(headers, b'x' * payload_size)
+    count = max(1, block_size // len(message))
+    return message * count, count
+
+
+def iter_chunks(block, total_bytes, chunk_size):
+    # Chunks straddle message boundaries, like network reads do
+    stream = block * (chunk_size // len(block) + 2)
+    sent = 0
+    offset = 0
+    while sent < total_bytes:
+        yield stream[offset : offset + chunk_size]
+        offset = (offset + chunk_size) % len(block)
+        sent += chunk_size
+
+
+def run_benchmark(payload_size, chunk_size, total_mb):
+    block, messages_per_block = make_block(payload_size, 1024 * 1024)
+    total_bytes = total_mb * 1024 * 1024
+    buffer = EventStreamBuffer()
+    messages = 0
+    max_buffer = 0
+
+    start = time.perf_counter()
+    for chunk in iter_chunks(block, total_bytes, chunk_size):
+        buffer.add_data(chunk)
+        max_buffer = max(max_buffer, len(buffer._data))
+        for _ in buffer:
+            messages += 1
+    elapsed = time.perf_counter() - start
+
+    return messages, elapsed, max_buffer
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Throughput of the event stream parser on long streams")
+    parser.add_argument("--total-mb", type=int, default=128, help="Size of each stream in MiB")
+    parser.add_argument("--payload-sizes", type=int, nargs="*", default=[64, 1024, 64 * 1024, 1024 * 1024])
+    parser.add_argument("--chunk-sizes", type=int, nargs="*", default=[1024, 16 * 1024, 1024 * 1024])
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    for payload_size in args.payload_sizes:
+        for chunk_size in args.chunk_sizes:
+            messages, elapsed, max_buffer = run_benchmark(payload_size, chunk_size, args.total_mb)
+            print(
+                f"payload {payload_size:>8} B  chunk {chunk_size:>8} B  "
+                f"{args.total_mb / elapsed:8.1f} MiB/s  {messages / elapsed:10.0f} msg/s  "
+                f"max buffer {max_buffer / 1024:8.1f} KiB"
+            )
@@ -0,0 +1,92 @@
+import argparse
+import sys
+import timeit
+from pathlib import Path
+
+root = str(Path(__file__).resolve().parents[1])
+sys.path.append(root)
+
+from src.tools.executor.local_python_executor import (
+    BASE_PYTHON_TOOLS,
+    evaluate_python_code,
+    parse_code,
+)
+
+BENCHMARKS = {
+    "loop": """
+total = 0
+for i in range(2000):
+    if i % 3 == 0:
+        total += i * 2
+    elif i % 5 == 0:
+        total -= i
+total
+""",
+    "while_loop": """
+i = 0
+acc = []
+while i < 1000:
+    acc.append(i % 7)
+    i += 1
+len(acc)
+""",
+    "comprehensions": """
+rows = [{"id": i, "status": "open" if i % 4 else "closed", "priority": i % 5} for i in range(500)]
+open_ids = [row["id"] for row in rows if row["status"] == "open"]
+by_priority = {p: len([r for r in rows if r["priority"] == p]) for p in range(5)}
+statuses = {row["status"] for row in rows}
+(len(open_ids), by_priority, statuses)
+""",
+    "tool_calls": """
+results = []
+for i in range(300):
+    ticket = get_ticket(i)
+    results.append(score(ticket["priority"], weight=2))
+sum(results)
+""",
+    "functions": """
+def fib(n):
+    if n < 2:
+        return n
+    return fib(n - 1) + fib(n - 2)
+fib(14)
+""",
+}
+
+
+def get_ticket(ticket_id):
+    return {"id": ticket_id, "priority": ticket_id % 5}
+
+
+def score(priority, weight=1):
+    return priority * weight
+
+
+def run_benchmark(code: str):
+    static_tools = {**BASE_PYTHON_TOOLS, "get_ticket": get_ticket, "score": score}
+    evaluate_python_code(code, static_tools=static_tools, custom_tools={}, state={})
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Microbenchmarks for the local Python executor")
+    parser.add_argument("--number", type=int, default=20, help="Runs per measurement")
+    parser.add_argument("--repeat", type=int, default=5, help="Measurements per benchmark")
+    parser.add_argument("--only", nargs="*", default=None, help="Benchmarks to run")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    for name, code in BENCHMARKS.items():
+        if args.only and name not in args.only:
+            continue
+        # The first run parses and compiles the program, later runs reuse it
+        first = timeit.timeit(lambda: run_benchmark(code), number=1)
+        times = timeit.repeat(lambda: run_benchmark(code), number=args.number, repeat=args.repeat)
+        best = min(times) / args.number
+        print(f"{name:<16} first run {first * 1000:8.2f} ms   cached {best * 1000:8.2f} ms/run")
+
+    code = BENCHMARKS["comprehensions"]
+    parse_time = min(timeit.repeat(lambda: parse_code(code), number=1000, repeat=args.repeat)) / 1000
+    print(f"{'parse (cached)':<16} {parse_time * 1e6:8.2f} us")
@@ -0,0 +1,80 @@
+import argparse
+import time
+import tracemalloc
+
+from botocore.paginate import Paginator, _compile_expression
+
+PAGINATION_CONFIG = {
+    'input_token': 'Marker',
+    'output_token': 'NextMarker',
+    'result_key': 'Contents',
+}
+EXPRESSION = 'Contents[?Size > `900`].Key'
+
+
+def make_listing(total_items, page_size):
+    """A paginated method listing `total_items` synthetic objects."""
+
+    def list_objects(**kwargs):
+        start = int(kwargs.get('Marker', 0))
+        end = min(start + page_size, total_items)
+        page = {
+            'Contents': [
+                {
+                    'Key': f'prefix/object-{i:08d}',
+                    'Size': i % 1000,
+                    'ETag': f'"{i:032x}"',
+                    'StorageClass': 'STANDARD',
+                }
+                for i in range(start, end)
+            ]
+        }
+        if end < total_items:
+            page['NextMarker'] = str(end)
+        return page
+
+    return list_objects
+
+
+def full_result(method, read_ahead):
+    pages = Paginator(method, PAGINATION_CONFIG, None).paginate(
+        PaginationConfig={'ReadAhead': read_ahead}
+    )
+    return len(_compile_expression(EXPRESSION).search(pages.build_full_result()))
+
+
+def streaming_search(method, read_ahead):
+    pages = Paginator(method, PAGINATION_CONFIG, None).paginate(
+        PaginationConfig={'ReadAhead': read_ahead}
+    )
+    return sum(1 for _ in pages.search(EXPRESSION))
+
+
+def measure(func, method, read_ahead):
+    tracemalloc.start()
+    start = time.perf_counter()
+    matches = func(method, read_ahead)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return matches, elapsed, peak
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Memory use of searching a large paginated listing")
+    parser.add_argument("--items", type=int, default=1_000_000, help="Items in the listing")
+    parser.add_argument("--page-size", type=int, default=1000, help="Items per page")
+    parser.add_argument("--read-ahead", type=int, default=0, help="Pages fetched ahead")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    method = make_listing(args.items, args.page_size)
+
+    for name, func in (('build_full_result', full_result), ('search', streaming_search)):
+        matches, elapsed, peak = measure(func, method, args.read_ahead)
+        print(
+            f"{name:<18} {matches:>9} matches  {elapsed:7.2f} s  "
+            f"peak {peak / (1024 * 1024):9.1f} MiB"
+        )
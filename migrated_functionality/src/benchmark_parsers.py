@@ -0,0 +1,220 @@
+import argparse
+import json
+import timeit
+import tracemalloc
+
+import botocore.session
+from botocore.model import ServiceModel
+from botocore.parsers import PROTOCOL_PARSERS
+
+S3_NAMESPACE = 'http://s3.amazonaws.com/doc/2006-03-01/'
+EC2_NAMESPACE = 'http://ec2.amazonaws.com/doc/2016-11-15/'
+IAM_NAMESPACE = 'https://iam.amazonaws.com/doc/2010-05-08/'
+
+
+def s3_list_objects_v2(items):
+    contents = ''.join(
+        f'<Contents><Key>photos/2024/{i:08d}.jpg</Key>'
+        f'<LastModified>2024-01-02T03:04:05.000Z</LastModified>'
+        f'<ETag>&quot;{i:032x}&quot;</ETag><ChecksumAlgorithm>CRC32</ChecksumAlgorithm>'
+        f'<Size>{i * 37}</Size><StorageClass>STANDARD</StorageClass>'
+        f'<Owner><ID>{"a" * 64}</ID><DisplayName>owner</DisplayName></Owner></Contents>'
+        for i in range(items)
+    )
+    body = (
+        f'<?xml version="1.0" encoding="UTF-8"?>'
+        f'<ListBucketResult xmlns="{S3_NAMESPACE}"><Name>bucket</Name><Prefix>photos/</Prefix>'
+        f'<KeyCount>{items}</KeyCount><MaxKeys>{items}</MaxKeys><IsTruncated>true</IsTruncated>'
+        f'{contents}<NextContinuationToken>token</NextContinuationToken></ListBucketResult>'
+    )
+    return 's3', 'ListObjectsV2', body.encode('utf-8')
+
+
+def ec2_describe_instances(items):
+    def instance(i):
+        tags = ''.join(
+            f'<item><key>tag-{j}</key><value>value-{i}-{j}</value></item>'
+            for j in range(4)
+        )
+        return (
+            f'<item><instanceId>i-{i:017x}</instanceId><imageId>ami-0123456789abcdef0</imageId>'
+            f'<instanceState><code>16</code><name>running</name></instanceState>'
+            f'<privateDnsName>ip-10-0-{i % 256}-{i // 256 % 256}.ec2.internal</privateDnsName>'
+            f'<instanceType>m5.large</instanceType><launchTime>2024-01-02T03:04:05.000Z</launchTime>'
+            f'<placement><availabilityZone>us-east-1a</availabilityZone><tenancy>default</tenancy></placement>'
+            f'<monitoring><state>disabled</state></monitoring><subnetId>subnet-0123</subnetId>'
+            f'<vpcId>vpc-0123</vpcId><privateIpAddress>10.0.{i % 256}.{i // 256 % 256}</privateIpAddress>'
+            f'<sourceDestCheck>true</sourceDestCheck><groupSet><item><groupId>sg-0123</groupId>'
+            f'<groupName>default</groupName></item></groupSet><architecture>x86_64</architecture>'
+            f'<rootDeviceType>ebs</rootDeviceType><rootDeviceName>/dev/xvda</rootDeviceName>'
+            f'<ebsOptimized>false</ebsOptimized><tagSet>{tags}</tagSet>'
+            f'<cpuOptions><coreCount>1</coreCount><threadsPerCore>2</threadsPerCore></cpuOptions></item>'
+        )
+
+    reservations = ''.join(
+        f'<item><reservationId>r-{i:017x}</reservationId><ownerId>123456789012</ownerId>'
+        f'<groupSet/><instancesSet>{instance(2 * i)}{instance(2 * i + 1)}</instancesSet></item>'
+        for i in range(items // 2)
+    )
+    body = (
+        f'<?xml version="1.0" encoding="UTF-8"?>'
+        f'<DescribeInstancesResponse xmlns="{EC2_NAMESPACE}"><requestId>request-id</requestId>'
+        f'<reservationSet>{reservations}</reservationSet></DescribeInstancesResponse>'
+    )
+    return 'ec2', 'DescribeInstances', body.encode('utf-8')
+
+
+def iam_list_roles(items):
+    roles = ''.join(
+        f'<member><Path>/service-role/</Path><RoleName>role-{i}</RoleName>'
+        f'<RoleId>AROA{i:016X}</RoleId><Arn>arn:aws:iam::123456789012:role/role-{i}</Arn>'
+        f'<CreateDate>2024-01-02T03:04:05Z</CreateDate><MaxSessionDuration>3600</MaxSessionDuration>'
+        f'<AssumeRolePolicyDocument>%7B%22Version%22%3A%222012-10-17%22%7D</AssumeRolePolicyDocument>'
+        f'</member>'
+        for i in range(items)
+    )
+    body = (
+        f'<ListRolesResponse xmlns="{IAM_NAMESPACE}"><ListRolesResult>'
+        f'<IsTruncated>false</IsTruncated><Roles>{roles}</Roles></ListRolesResult>'
+        f'<ResponseMetadata><RequestId>request-id</RequestId></ResponseMetadata></ListRolesResponse>'
+    )
+    return 'iam', 'ListRoles', body.encode('utf-8')
+
+
+def dynamodb_query(items):
+    body = {
+        'Count': items,
+        'ScannedCount': items,
+        'Items': [
+            {
+                'pk': {'S': f'user#{i}'},
+                'sk': {'S': f'order#{i:06d}'},
+                'total': {'N': str(i * 3)},
+                'paid': {'BOOL': i % 2 == 0},
+                'tags': {'SS': ['a', 'b', 'c']},
+                'payload': {'B': 'AAECAwQFBgc='},
+                'lines': {
+                    'L': [
+                        {'M': {'sku': {'S': f'sku-{j}'}, 'qty': {'N': '1'}}}
+                        for j in range(3)
+                    ]
+                },
+            }
+            for i in range(items)
+        ],
+    }
+    return 'dynamodb', 'Query', json.dumps(body).encode('utf-8')
+
+
+def lambda_list_functions(items):
+    body = {
+        'Functions': [
+            {
+                'FunctionName': f'function-{i}',
+                'FunctionArn': f'arn:aws:lambda:us-east-1:123456789012:function:function-{i}',
+                'Runtime': 'python3.12',
+                'Role': 'arn:aws:iam::123456789012:role/lambda',
+                'Handler': 'app.handler',
+                'CodeSize': 1024 * i,
+                'Timeout': 30,
+                'MemorySize': 128,
+                'LastModified': '2024-01-02T03:04:05.000+0000',
+                'CodeSha256': 'a' * 44,
+                'Version': '$LATEST',
+                'Environment': {'Variables': {'STAGE': 'prod', 'LOG_LEVEL': 'info'}},
+                'TracingConfig': {'Mode': 'PassThrough'},
+                'Architectures': ['x86_64'],
+                'EphemeralStorage': {'Size': 512},
+                'LoggingConfig': {'LogFormat': 'Text', 'LogGroup': f'/aws/lambda/function-{i}'},
+            }
+            for i in range(items)
+        ]
+    }
+    return 'lambda', 'ListFunctions', json.dumps(body).encode('utf-8')
+
+
+CASES = [
+    s3_list_objects_v2,
+    ec2_describe_instances,
+    iam_list_roles,
+    dynamodb_query,
+    lambda_list_functions,
+]
+
+
+def walking_parser(protocol):
+    """The parser of a protocol, walking the output shape on each call."""
+
+    class WalkingParser(PROTOCOL_PARSERS[protocol]):
+        @classmethod
+        def _supports_compiled_shapes(cls):
+            return False
+
+    return WalkingParser()
+
+
+def incremental_parser(protocol):
+    parser_cls = PROTOCOL_PARSERS[protocol]
+    if not hasattr(parser_cls, 'INCREMENTAL_PARSE_THRESHOLD'):
+        return None
+    return parser_cls(incremental_parse_threshold=0)
+
+
+def peak_memory(parser, response, shape):
+    tracemalloc.start()
+    parser.parse(response, shape)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Response parsing: shape walker vs compiled vs incremental XML parsers")
+    parser.add_argument("--items", type=int, default=1000, help="List items per response")
+    parser.add_argument("--number", type=int, default=5, help="Parses per measurement")
+    parser.add_argument("--repeat", type=int, default=5, help="Measurements per case")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    loader = botocore.session.get_session().get_component('data_loader')
+
+    for case in CASES:
+        service_name, operation_name, body = case(args.items)
+        service_model = ServiceModel(
+            loader.load_service_model(service_name, 'service-2'), service_name
+        )
+        shape = service_model.operation_model(operation_name).output_shape
+        protocol = service_model.metadata['protocol']
+        response = {
+            'body': body,
+            'headers': {'x-amzn-requestid': 'request-id'},
+            'status_code': 200,
+            'context': {},
+        }
+        parsers = {
+            'walker': walking_parser(protocol),
+            'compiled': PROTOCOL_PARSERS[protocol](),
+            'incremental': incremental_parser(protocol),
+        }
+        expected = parsers['walker'].parse(response, shape)
+
+        print(f'{service_name}.{operation_name} ({protocol}, {len(body) / 1024:.0f} KiB)')
+        walker_time = None
+        for name, parser in parsers.items():
+            if parser is None:
+                continue
+            assert parser.parse(response, shape) == expected
+            times = timeit.repeat(
+                lambda: parser.parse(response, shape),
+                number=args.number,
+                repeat=args.repeat,
+            )
+            elapsed = min(times) / args.number * 1e3
+            walker_time = walker_time or elapsed
+            peak = peak_memory(parser, response, shape)
+            print(
+                f"  {name:<12} {elapsed:9.2f} ms   x{walker_time / elapsed:.2f}"
+                f"   peak {peak / (1024 * 1024):7.1f} MiB"
+            )
@@ -0,0 +1,147 @@
+import argparse
+import datetime
+import timeit
+
+import botocore.session
+from botocore.model import ServiceModel
+from botocore.serialize import SERIALIZERS
+
+
+def dynamodb_batch_write_item():
+    items = [
+        {
+            'PutRequest': {
+                'Item': {
+                    'pk': {'S': f'user#{i}'},
+                    'sk': {'S': f'order#{i:06d}'},
+                    'total': {'N': str(i * 3)},
+                    'tags': {'SS': ['a', 'b', 'c']},
+                    'payload': {'B': b'\x00' * 64},
+                    'lines': {
+                        'L': [
+                            {'M': {'sku': {'S': f'sku-{j}'}, 'qty': {'N': '1'}}}
+                            for j in range(5)
+                        ]
+                    },
+                }
+            }
+        }
+        for i in range(25)
+    ]
+    return 'dynamodb', 'BatchWriteItem', {'RequestItems': {'orders': items}}
+
+
+def logs_put_log_events():
+    events = [
+        {'timestamp': 1700000000000 + i, 'message': f'line {i} ' + 'x' * 80}
+        for i in range(500)
+    ]
+    return 'logs', 'PutLogEvents', {
+        'logGroupName': 'group',
+        'logStreamName': 'stream',
+        'logEvents': events,
+    }
+
+
+def sns_publish_batch():
+    entries = [
+        {
+            'Id': f'id-{i}',
+            'Message': f'message {i}',
+            'MessageAttributes': {
+                'kind': {'DataType': 'String', 'StringValue': 'order'},
+                'blob': {'DataType': 'Binary', 'BinaryValue': b'\x01\x02'},
+            },
+        }
+        for i in range(10)
+    ]
+    return 'sns', 'PublishBatch', {
+        'TopicArn': 'arn:aws:sns:us-east-1:123456789012:topic',
+        'PublishBatchRequestEntries': entries,
+    }
+
+
+def ec2_create_tags():
+    return 'ec2', 'CreateTags', {
+        'Resources': [f'i-{i:017x}' for i in range(200)],
+        'Tags': [{'Key': f'key-{i}', 'Value': f'value-{i}'} for i in range(20)],
+    }
+
+
+def iot_data_update_thing_shadow():
+    return 'iot-data', 'UpdateThingShadow', {
+        'thingName': 'thing',
+        'payload': b'{"state": {"desired": {"on": true}}}',
+    }
+
+
+def lambda_create_event_source_mapping():
+    return 'lambda', 'CreateEventSourceMapping', {
+        'FunctionName': 'function',
+        'EventSourceArn': 'arn:aws:sqs:us-east-1:123456789012:queue',
+        'BatchSize': 100,
+        'StartingPositionTimestamp': datetime.datetime(2024, 1, 1),
+        'FilterCriteria': {
+            'Filters': [{'Pattern': f'{{"n": [{i}]}}'} for i in range(5)]
+        },
+    }
+
+
+CASES = [
+    dynamodb_batch_write_item,
+    logs_put_log_events,
+    sns_publish_batch,
+    ec2_create_tags,
+    iot_data_update_thing_shadow,
+    lambda_create_event_source_mapping,
+]
+
+
+def walking_serializer(protocol):
+    """The serializer of a protocol, walking the input shape on each call."""
+
+    class WalkingSerializer(SERIALIZERS[protocol]):
+        @classmethod
+        def _supports_compiled_shapes(cls):
+            return False
+
+    return WalkingSerializer()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Request serialization: shape walker vs compiled serializers")
+    parser.add_argument("--number", type=int, default=200, help="Requests per measurement")
+    parser.add_argument("--repeat", type=int, default=5, help="Measurements per case")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    loader = botocore.session.get_session().get_component('data_loader')
+
+    for case in CASES:
+        service_name, operation_name, params = case()
+        service_model = ServiceModel(
+            loader.load_service_model(service_name, 'service-2'), service_name
+        )
+        operation_model = service_model.operation_model(operation_name)
+        protocol = service_model.metadata['protocol']
+        walking = walking_serializer(protocol)
+        compiled = SERIALIZERS[protocol]()
+        assert walking.serialize_to_request(
+            params, operation_model
+        ) == compiled.serialize_to_request(params, operation_model)
+
+        results = []
+        for serializer in (walking, compiled):
+            times = timeit.repeat(
+                lambda: serializer.serialize_to_request(params, operation_model),
+                number=args.number,
+                repeat=args.repeat,
+            )
+            results.append(min(times) / args.number * 1e6)
+        name = f'{service_name}.{operation_name} ({protocol})'
+        print(
+            f"{name:<48} walker {results[0]:9.1f} us   compiled {results[1]:9.1f} us"
+            f"   x{results[0] / results[1]:.2f}"
+        )
@@ -4,8 +4,12 @@
 将多轮对话压缩成摘要，以减少token消耗并保持关键信息。
 """
 
+import asyncio
+import time
+from bisect import bisect_left
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Callable, Dict, List, Optional
 
 from agentlang.chat_history.chat_history_models import (
     AssistantMessage,
@@ -16,9 +20,100 @@ from agentlang.chat_history.chat_history_models import (
 )
 from agentlang.context.application_context import ApplicationContext
 from agentlang.logger import get_logger
+from .token_utils import tokenizer_registry
 
 logger = get_logger(__name__)
 
+class MessageTokenIndex:
+    """
+    消息token前缀和索引。
+
+    维护消息列表的累计token数（prefix[i] 为前 i 条消息的token总数），
+    追加消息为 O(1)，按token预算查找分割点为二分查找，避免每次全量重新计数。
+    """
+
+    def __init__(self, count_tokens: Callable[[ChatMessage], int]):
+        """
+        初始化token索引
+
+        Args:
+            count_tokens: 计算单条消息token数量的函数
+        """
+        self._count_tokens = count_tokens
+        self.prefix: List[int] = [0]
+        # 最后一条已索引的消息对象，用于判断新列表是否仍以已索引消息为前缀
+        self._last: Optional[ChatMessage] = None
+
+    def __len__(self) -> int:
+        return len(self.prefix) - 1
+
+    @property
+    def total_tokens(self) -> int:
+        """当前所有消息的token总数"""
+        return self.prefix[-1]
+
+    def append(self, message: ChatMessage) -> None:
+        """追加一条消息，O(1)"""
+        self._last = message
+        self.prefix.append(self.prefix[-1] + self._count_tokens(message))
+
+    def reset(self, messages: List[ChatMessage] = ()) -> None:
+        """按给定消息列表重建索引"""
+        self.prefix = [0]
+        self._last = None
+        for message in messages:
+            self.append(message)
+
+    def sync(self, messages: List[ChatMessage]) -> None:
+        """
+        与消息列表同步：若列表仍以已索引的消息为前缀，只追加新增消息；
+        否则（例如历史被压缩或截断）重建索引。
+
+        前缀只按长度和最后一条已索引消息的对象标识判断，O(1)，不逐条比较。
+        原地替换中间消息而不改变该消息的改写方需调用 reset()。
+        """
+        indexed = len(self)
+        is_prefix = len(messages) >= indexed and (indexed == 0 or messages[indexed - 1] is self._last)
+        if not is_prefix:
+            self.reset(messages)
+            return
+        for message in messages[indexed:]:
+            self.append(message)
+
+    def tokens_between(self, start: int, end: int) -> int:
+        """消息区间 [start, end) 的token数"""
+        return self.prefix[end] - self.prefix[start]
+
+    def suffix_start_within(self, budget: int, lo: int = 0) -> int:
+        """
+        二分查找最小的下标 i（i >= lo），使得消息 [i, n) 的token数不超过 budget。
+
+        Returns:
+            int: 分割下标，n 表示没有任何后缀消息能放入预算
+        """
+        # suffix(i) = total - prefix[i] <= budget  <=>  prefix[i] >= total - budget
+        return bisect_left(self.prefix, self.total_tokens - budget, lo, len(self.prefix) - 1)
+
+@dataclass
+class BackgroundCompression:
+    """
+    一次进行中的后台压缩任务及其对应的历史快照。
+    """
+    task: asyncio.Task
+    to_preserved: List[ChatMessage]
+    to_compress: List[ChatMessage]
+    recent_messages: List[ChatMessage]
+    # 启动时的历史消息快照（浅拷贝），用于判断历史是否已分叉
+    snapshot: List[ChatMessage]
+    started_at: float = field(default_factory=time.monotonic)
+    # 压缩任务完成的时间，由任务的完成回调记录
+    finished_at: Optional[float] = None
+    turns_served: int = 0
+
+    def mark_finished(self, task: asyncio.Task) -> None:
+        """任务完成回调：记录完成时间"""
+        self.finished_at = time.monotonic()
+
 class ChatHistoryCompressor:
     """
     聊天历史压缩器，用于将多轮对话压缩成摘要。
@@ -41,17 +136,57 @@ class ChatHistoryCompressor:
         self.config = compression_config
         self.last_compression_message_count = 0
         self.last_compression_token_count = 0
+        # 增量维护的消息token前缀和
+        self.token_index = MessageTokenIndex(self._count_message_tokens)
+        # 后台压缩状态与统计
+        self.background: Optional[BackgroundCompression] = None
+        self.background_stats: Dict[str, Any] = {
+            "started": 0,
+            "applied": 0,
+            "cancelled": 0,
+            "failed": 0,
+            "turns_served_while_pending": 0,
+            "hidden_latency_seconds": 0.0,
+            "last_compression_seconds": 0.0,
+        }
+
+    def track_messages(self, all_messages: List[ChatMessage]) -> int:
+        """
+        将token索引与当前消息列表同步，只对新增消息计数
+
+        Args:
+            all_messages: 当前所有消息列表
+
+        Returns:
+            int: 当前token总数
+        """
+        self.token_index.sync(all_messages)
+        return self.token_index.total_tokens
+
+    def should_compress_messages(self, all_messages: List[ChatMessage], force: bool = False) -> bool:
+        """
+        基于增量token索引判断给定消息列表是否需要压缩
+
+        Args:
+            all_messages: 当前所有消息列表
+            force: 是否强制压缩，不考虑阈值
+
+        Returns:
+            bool: 是否需要压缩
+        """
+        token_count = self.track_messages(all_messages)
+        return self.should_compress(len(all_messages), token_count, force)
 
     def should_compress(self,
                          message_count: int,
-                         token_count: int,
+                         token_count: Optional[int] = None,
                          force: bool = False) -> bool:
         """
         判断是否需要进行压缩
 
         Args:
             message_count: 当前消息数量
-            token_count: 当前token数量
+            token_count: 当前token数量，为None时使用增量token索引的总数
             force: 是否强制压缩，不考虑阈值
 
         Returns:
@@ -66,6 +201,9 @@ class ChatHistoryCompressor:
         if force:
             return True
 
+        if token_count is None:
+            token_count = self.token_index.total_tokens
+
         # 检查是否超过消息数阈值
         need_compression = message_count > self.config.message_threshold
         # 检查是否超过token数阈值
@@ -88,18 +226,164 @@ class ChatHistoryCompressor:
 
         return need_compression
 
-    def _filter_messages_to_compress(self,
-                                    all_messages: List[ChatMessage]) -> tuple[List[ChatMessage], List[ChatMessage], List[ChatMessage]]:
+    def should_start_background_compression(self, message_count: int, token_count: int) -> bool:
         """
-        筛选需要压缩的消息和需要保留的消息
+        判断是否达到后台压缩的软阈值
 
         Args:
-            all_messages: 所有消息列表
+            message_count: 当前消息数量
+            token_count: 当前token数量
 
         Returns:
-            tuple: (要保留的第一条系统消息, 要压缩的消息列表, 最近的消息列表)
+            bool: 是否应开始后台压缩
+        """
+        if not self.config.enable_compression or not self.config.background_compression:
+            return False
+        if self.background is not None:
+            return False
+        if message_count - self.last_compression_message_count < self.config.compression_cooldown:
+            return False
+
+        ratio = self.config.background_compression_ratio
+        return (message_count > self.config.message_threshold * ratio
+                or token_count > self.config.token_threshold * ratio)
+
+    def maybe_start_background_compression(self, all_messages: List[ChatMessage]) -> bool:
+        """
+        历史达到软阈值时在后台启动压缩，当前轮次继续使用未压缩的历史
+
+        Args:
+            all_messages: 当前所有消息列表
+
+        Returns:
+            bool: 是否启动了新的后台压缩
+        """
+        token_count = self.track_messages(all_messages)
+        if not self.should_start_background_compression(len(all_messages), token_count):
+            return False
+
+        # 消息的 json 转储在后台任务中进行，不阻塞当前轮次
+        to_preserved, to_compress, recent_messages = self._filter_messages_to_compress(
+            all_messages, dump_messages=False
+        )
+        if not to_compress:
+            return False
+
+        snapshot = list(all_messages)
+        task = asyncio.create_task(self._compress_in_background(snapshot, to_compress, to_preserved))
+        self.background = BackgroundCompression(
+            task=task,
+            to_preserved=to_preserved,
+            to_compress=to_compress,
+            recent_messages=recent_messages,
+            snapshot=snapshot,
+        )
+        task.add_done_callback(self.background.mark_finished)
+        self.background_stats["started"] += 1
+        logger.info(f"{self.config.agent_name} 开始后台压缩，待压缩消息数: {len(to_compress)}，token数: {token_count}")
+        return True
+
+    async def _compress_in_background(self,
+                                      snapshot: List[ChatMessage],
+                                      to_compress: List[ChatMessage],
+                                      to_preserved: List[ChatMessage]) -> Optional[AssistantMessage]:
+        """
+        后台压缩任务：先在线程中转储消息快照，再压缩消息
+
+        Args:
+            snapshot: 启动时的历史消息快照
+            to_compress: 要压缩的消息列表
+            to_preserved: 要保留的消息列表
+
+        Returns:
+            Optional[AssistantMessage]: 压缩后的助手消息，如果压缩失败则返回None
+        """
+        try:
+            await asyncio.to_thread(self._dump_messages, snapshot)
+        except Exception as e:
+            logger.warning(f"储存压缩前的消息失败: {e}")
+        return await self.compress_messages(to_compress, to_preserved)
+
+    def _is_diverged(self, all_messages: List[ChatMessage]) -> bool:
+        """判断当前历史是否已不再以后台压缩启动时的快照为前缀"""
+        snapshot = self.background.snapshot
+        if len(all_messages) < len(snapshot):
+            return True
+        return any(current is not original for current, original in zip(all_messages, snapshot))
+
+    def cancel_background_compression(self) -> None:
+        """取消进行中的后台压缩"""
+        if self.background is None:
+            return
+        if not self.background.task.done():
+            self.background.task.cancel()
+        self.background = None
+        self.background_stats["cancelled"] += 1
+
+    def poll_background_compression(self, all_messages: List[ChatMessage]) -> Optional[List[ChatMessage]]:
+        """
+        检查后台压缩结果。压缩完成且历史未分叉时，返回替换后的新历史：
+        保留消息 + 摘要 + 最近消息 + 压缩期间新增的消息；否则返回None，继续使用原历史。
+        若历史在压缩期间被改写，则取消后台压缩。
+
+        Args:
+            all_messages: 当前所有消息列表
+
+        Returns:
+            Optional[List[ChatMessage]]: 压缩后的新历史，未就绪时为None
+        """
+        background = self.background
+        if background is None:
+            return None
+
+        if self._is_diverged(all_messages):
+            logger.info(f"{self.config.agent_name} 历史已变化，取消后台压缩")
+            self.cancel_background_compression()
+            # 历史可能在中间被改写，sync 无法识别，重建索引
+            self.token_index.reset(all_messages)
+            return None
+
+        if not background.task.done():
+            background.turns_served += 1
+            self.background_stats["turns_served_while_pending"] += 1
+            return None
+
+        self.background = None
+        # 按任务实际完成时间计算耗时，而不是到本次轮询为止的时间
+        finished_at = background.finished_at if background.finished_at is not None else time.monotonic()
+        elapsed = finished_at - background.started_at
+        self.background_stats["last_compression_seconds"] = elapsed
+
+        compressed_message = None
+        if not background.task.cancelled() and background.task.exception() is None:
+            compressed_message = background.task.result()
+        if compressed_message is None:
+            self.background_stats["failed"] += 1
+            return None
+
+        # 压缩耗时未阻塞对话轮次，计为被隐藏的延迟
+        self.background_stats["applied"] += 1
+        self.background_stats["hidden_latency_seconds"] += elapsed
+
+        new_messages = all_messages[len(background.snapshot):]
+        compressed_history = (
+            background.to_preserved
+            + [compressed_message]
+            + background.recent_messages
+            + new_messages
+        )
+        self.update_compression_stats(len(compressed_history), self.track_messages(compressed_history))
+        logger.info(f"{self.config.agent_name} 后台压缩完成，耗时 {elapsed:.2f}s，"
+                    f"期间服务轮次: {background.turns_served}，压缩后消息数: {len(compressed_history)}")
+        return compressed_history
+
+    def _dump_messages(self, all_messages: List[ChatMessage]) -> None:
+        """
+        将压缩前的全部消息储存到 chat_history/compressed 目录下的 json 文件
+
+        Args:
+            all_messages: 所有消息列表
         """
-        # 储存 all_messages 到一个 json 文件
         import json
         import os
 
@@ -108,14 +392,28 @@ class ChatHistoryCompressor:
         logs_dir = os.path.join(path_manager.get_chat_history_dir(), 'compressed')
         os.makedirs(logs_dir, exist_ok=True)
 
-        # 保存到logs目录
         # 添加时间戳到文件名
-        import datetime
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         log_file_path = os.path.join(logs_dir, f'{self.config.agent_name}_{self.config.agent_id}_{timestamp}_messages.json')
         with open(log_file_path, 'w') as f:
             json.dump([msg.to_dict() for msg in all_messages], f, ensure_ascii=False)
 
+    def _filter_messages_to_compress(self,
+                                    all_messages: List[ChatMessage],
+                                    dump_messages: bool = True) -> tuple[List[ChatMessage], List[ChatMessage], List[ChatMessage]]:
+        """
+        筛选需要压缩的消息和需要保留的消息
+
+        Args:
+            all_messages: 所有消息列表
+            dump_messages: 是否同步将全部消息储存到 json 文件
+
+        Returns:
+            tuple: (要保留的第一条系统消息, 要压缩的消息列表, 最近的消息列表)
+        """
+        if dump_messages:
+            self._dump_messages(all_messages)
+
         # 直接取前两条消息（不压缩）
         to_preserved = all_messages[:2] if len(all_messages) >= 2 else all_messages.copy()
 
@@ -129,7 +427,18 @@ class ChatHistoryCompressor:
         ]
 
         # 确保保留最近的N轮对话
-        preserve_count = min(len(to_compress), self.config.preserve_recent_turns)
+        preserve_count = self.config.preserve_recent_turns
+
+        # 若配置了最近消息的token预算，在前缀和上二分查找能放入预算的最早消息，尽量多保留
+        preserve_recent_tokens = self.config.preserve_recent_tokens
+        if preserve_recent_tokens and len(all_messages) > 2:
+            self.token_index.sync(all_messages)
+            split = self.token_index.suffix_start_within(preserve_recent_tokens, lo=2)
+            within_budget = sum(1 for msg in all_messages[split:] if msg.role != "system")
+            preserve_count = max(preserve_count, within_budget)
+
+        preserve_count = min(len(to_compress), preserve_count)
+        recent_messages = []
         if preserve_count > 0:
             recent_messages = to_compress[-preserve_count:]
             to_compress = to_compress[:-preserve_count]
@@ -337,32 +646,23 @@ class ChatHistoryCompressor:
                     total_tokens += message.token_usage.prompt_tokens or 0
                 return total_tokens
 
-            # 否则基于消息内容计算
-            import tiktoken
-
-            # 获取编码器，默认使用gpt-3.5-turbo的编码器
-            try:
-                encoding = tiktoken.encoding_for_model("gpt-3.5-turbo")
-            except KeyError:
-                # 如果模型不存在，使用cl100k_base编码器
-                encoding = tiktoken.get_encoding("cl100k_base")
-
-            # 计算消息内容的token数量
-            content = message.content or ""
+            # 否则基于消息内容计算，编码器与计数结果由全局 tokenizer 注册表缓存
+            parts = [message.content or ""]
 
             # 考虑工具调用的token数量
-            tool_calls_tokens = 0
             if hasattr(message, "tool_calls") and message.tool_calls:
                 for tool_call in message.tool_calls:
                     if hasattr(tool_call, "function") and tool_call.function:
                         # 计算函数名和参数的token
-                        function_name = tool_call.function.name or ""
-                        function_args = tool_call.function.arguments or "{}"
-                        tool_calls_tokens += len(encoding.encode(function_name))
-                        tool_calls_tokens += len(encoding.encode(function_args))
+                        parts.append(tool_call.function.name or "")
+                        parts.append(tool_call.function.arguments or "{}")
+
+            # 以消息ID（没有时用对象标识）+ 内容哈希做缓存键，同一条消息不会重复分词
+            message_id = getattr(message, "id", None) or id(message)
+            content_tokens = tokenizer_registry.count_message(message_id, parts, model="gpt-3.5-turbo")
 
             # 总token数 = 内容token + 工具调用token + 基础消息结构token(约4个)
-            return len(encoding.encode(content)) + tool_calls_tokens + 4
+            return content_tokens + 4
 
         except Exception as e:
             # 计算失败时给出警告并返回估计值
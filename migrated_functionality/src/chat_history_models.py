@@ -41,6 +41,10 @@ class CompressionConfig:
     compression_cooldown: int = 6  # 两次压缩间隔的最小消息数
     compression_batch_size: int = 10  # 每批压缩的最大消息数
     llm_for_compression: str = "gpt-4.1-mini"  # 用于压缩的LLM模型
+    preserve_recent_tokens: int = 0  # 最近消息的token预算，在此预算内的最近消息不压缩，0表示不启用
+    # 后台压缩配置
+    background_compression: bool = False  # 是否在后台预先压缩，不阻塞当前对话轮次
+    background_compression_ratio: float = 0.8  # 达到阈值的该比例（软阈值）时开始后台压缩
     def __post_init__(self):
         """参数验证和规范化"""
         # 验证压缩率范围
@@ -52,6 +56,8 @@ class CompressionConfig:
             raise ValueError("消息数量阈值不能为负数")
         if self.preserve_recent_turns < 0:
             raise ValueError("保留的对话轮数不能为负数")
+        if not 0 < self.background_compression_ratio <= 1:
+            raise ValueError("后台压缩软阈值比例必须在 0-1 之间")
 
         # 如果token_threshold为0，根据当前使用的模型上下文长度设置默认值
         if self.token_threshold <= 0:
@@ -13,8 +13,10 @@ import logging
 import time
 import json
 import re
+from bisect import bisect_right
+from collections import deque
 from typing import Dict, List, Optional, Any, Tuple
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
 
 from ..memory.manager import MemoryManager
@@ -55,6 +57,176 @@ class EmpathyAnalysis:
     human_handoff_required: bool
 
 
+DEFAULT_PII_PATTERNS = {
+    "email": r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
+    "phone": r'\b\d{3}-\d{3}-\d{4}\b',
+    "ssn": r'\b\d{3}-\d{2}-\d{4}\b',
+    "credit_card": r'\b\d{4}[\s-]?\d{4}[\s-]?\d{4}[\s-]?\d{4}\b'
+}
+
+DEFAULT_MEDICAL_KEYWORDS = ["diagnosis", "prescription", "medication", "treatment", "symptoms"]
+
+# Joins messages for batch scans; none of the PII patterns or keywords can match across it
+_BATCH_SEPARATOR = "\x00"
+
+
+class AhoCorasick:
+    """Aho-Corasick automaton for finding many keywords in one pass over a text"""
+    
+    def __init__(self, keywords: List[str]):
+        self.keywords = list(keywords)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+        
+        for index, keyword in enumerate(self.keywords):
+            state = 0
+            for char in keyword:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                state = next_state
+            self._output[state].append(index)
+        
+        # Breadth-first construction of failure links
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+    
+    def iter_matches(self, text: str):
+        """Yield (end_position, keyword_index) for every keyword occurrence in text"""
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for index in output[state]:
+                yield position + 1, index
+
+
+@dataclass
+class ComplianceScanResult:
+    """Compliance scan results for a single message"""
+    pii_matches: Dict[str, List[str]] = field(default_factory=dict)
+    pii_spans: List[Tuple[int, int, str]] = field(default_factory=list)
+    medical_keywords: List[str] = field(default_factory=list)
+    
+    def pii_detection(self) -> Dict[str, Any]:
+        return {
+            "detected": len(self.pii_matches) > 0,
+            "pii_types": list(self.pii_matches.keys()),
+            "matches": self.pii_matches,
+            "spans": self.pii_spans
+        }
+    
+    def medical_detection(self) -> Dict[str, Any]:
+        return {
+            "detected": len(self.medical_keywords) > 0,
+            "medical_keywords": self.medical_keywords,
+            "requires_disclaimer": len(self.medical_keywords) > 0
+        }
+
+
+class ComplianceScanner:
+    """
+    Precompiled PII and medical-keyword scanner
+    
+    All PII patterns are combined into a single alternation regex, so a
+    message is scanned for every PII type in one pass; medical keywords are
+    found with an Aho-Corasick automaton. Where matches of different PII
+    types would overlap, the leftmost match wins, then the earlier pattern.
+    """
+    
+    def __init__(self, pii_patterns: Optional[Dict[str, str]] = None,
+                 medical_keywords: Optional[List[str]] = None):
+        self.pii_patterns = dict(pii_patterns or DEFAULT_PII_PATTERNS)
+        self.pii_regex = re.compile("|".join(
+            f"(?P<{pii_type}>{pattern})" for pii_type, pattern in self.pii_patterns.items()
+        ))
+        self.medical_automaton = AhoCorasick(
+            [keyword.lower() for keyword in (medical_keywords or DEFAULT_MEDICAL_KEYWORDS)]
+        )
+    
+    def scan(self, message: str) -> ComplianceScanResult:
+        """Scan one message for PII and medical keywords"""
+        return self.scan_batch([message])[0]
+    
+    def scan_batch(self, messages: List[str]) -> List[ComplianceScanResult]:
+        """Scan many messages with one regex pass and one automaton pass"""
+        results = [ComplianceScanResult() for _ in messages]
+        if not messages:
+            return results
+        
+        text = _BATCH_SEPARATOR.join(messages)
+        offsets = []
+        offset = 0
+        for message in messages:
+            offsets.append(offset)
+            offset += len(message) + len(_BATCH_SEPARATOR)
+        
+        for match in self.pii_regex.finditer(text):
+            index = bisect_right(offsets, match.start()) - 1
+            result = results[index]
+            pii_type = match.lastgroup
+            result.pii_matches.setdefault(pii_type, []).append(match.group())
+            result.pii_spans.append((match.start() - offsets[index], match.end() - offsets[index], pii_type))
+        
+        # Lowercasing can change a message's length (e.g. 'İ'), so the
+        # lowercased messages get their own offsets
+        lowered = [message.lower() for message in messages]
+        lowered_offsets = []
+        offset = 0
+        for message in lowered:
+            lowered_offsets.append(offset)
+            offset += len(message) + len(_BATCH_SEPARATOR)
+        
+        found = [set() for _ in messages]
+        for end, keyword_index in self.medical_automaton.iter_matches(_BATCH_SEPARATOR.join(lowered)):
+            found[bisect_right(lowered_offsets, end - 1) - 1].add(keyword_index)
+        
+        keywords = self.medical_automaton.keywords
+        for result, keyword_indexes in zip(results, found):
+            result.medical_keywords = [keywords[i] for i in sorted(keyword_indexes)]
+        
+        return results
+    
+    @staticmethod
+    def redact(message: str, spans: List[Tuple[int, int, str]]) -> str:
+        """Replace PII spans in a single pass, merging overlapping spans"""
+        if not spans:
+            return message
+        
+        parts = []
+        position = 0
+        current_start, current_end, current_type = None, None, None
+        for start, end, pii_type in sorted(spans):
+            if current_end is not None and start < current_end:
+                current_end = max(current_end, end)
+                continue
+            if current_end is not None:
+                parts.append(message[position:current_start])
+                parts.append(f"[{current_type.upper()}_REDACTED]")
+                position = current_end
+            current_start, current_end, current_type = start, end, pii_type
+        
+        parts.append(message[position:current_start])
+        parts.append(f"[{current_type.upper()}_REDACTED]")
+        parts.append(message[current_end:])
+        return "".join(parts)
+
+
 class ChatbotCommands:
     """
     Comprehensive Chatbot Command System
@@ -76,6 +248,7 @@ class ChatbotCommands:
         
         self.logger = logging.getLogger(__name__)
         self.active_sessions: Dict[str, ChatbotSession] = {}
+        self.compliance_scanner = ComplianceScanner()
         self.command_handlers = {
             "empathy_engine": self._empathy_engine,
             "memory_guardian": self._memory_guardian,
@@ -217,41 +390,58 @@ class ChatbotCommands:
         content, automatically redacting or flagging as appropriate.
         """
         try:
-            message = parameters.get("message", "")
             platform = parameters.get("platform", "web_chat")
             
-            # Scan for PII
-            pii_detection = await self._scan_for_pii(message)
-            
-            # Scan for medical advice
-            medical_detection = await self._scan_for_medical_advice(message)
-            
-            # Scan for other compliance issues
-            compliance_scan = await self.compliance_manager.scan_message(message, platform)
-            
-            # Generate redacted message if needed
-            redacted_message = message
-            redaction_applied = False
+            # Batch mode: scan all messages in one pass
+            if "messages" in parameters:
+                messages = parameters["messages"]
+                scan_results = self.compliance_scanner.scan_batch(messages)
+                return {
+                    "status": "scanned",
+                    "results": [
+                        await self._build_firewall_result(message, scan_result, platform)
+                        for message, scan_result in zip(messages, scan_results)
+                    ]
+                }
             
-            if pii_detection["detected"] or medical_detection["detected"]:
-                redacted_message = await self._apply_redaction(message, pii_detection, medical_detection)
-                redaction_applied = True
+            message = parameters.get("message", "")
             
-            return {
-                "status": "scanned",
-                "original_message": message,
-                "redacted_message": redacted_message,
-                "redaction_applied": redaction_applied,
-                "pii_detection": pii_detection,
-                "medical_detection": medical_detection,
-                "compliance_scan": compliance_scan,
-                "compliance_score": compliance_scan.get("compliance_score", 1.0)
-            }
+            # Scan for PII and medical advice
+            scan_result = self.compliance_scanner.scan(message)
+            return await self._build_firewall_result(message, scan_result, platform)
             
         except Exception as e:
             self.logger.error(f"Compliance firewall error: {e}")
             return {"status": "error", "error": str(e)}
     
+    async def _build_firewall_result(self, message: str, scan_result: ComplianceScanResult,
+                                     platform: str) -> Dict[str, Any]:
+        """Build the compliance firewall result for one scanned message"""
+        pii_detection = scan_result.pii_detection()
+        medical_detection = scan_result.medical_detection()
+        
+        # Scan for other compliance issues
+        compliance_scan = await self.compliance_manager.scan_message(message, platform)
+        
+        # Generate redacted message if needed
+        redacted_message = message
+        redaction_applied = False
+        
+        if pii_detection["detected"] or medical_detection["detected"]:
+            redacted_message = await self._apply_redaction(message, pii_detection, medical_detection)
+            redaction_applied = True
+        
+        return {
+            "status": "scanned",
+            "original_message": message,
+            "redacted_message": redacted_message,
+            "redaction_applied": redaction_applied,
+            "pii_detection": pii_detection,
+            "medical_detection": medical_detection,
+            "compliance_scan": compliance_scan,
+            "compliance_score": compliance_scan.get("compliance_score", 1.0)
+        }
+    
     async def _upsell_whisperer(self, parameters: Dict[str, Any], 
                                execution_context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
@@ -565,53 +755,20 @@ class ChatbotCommands:
     
     async def _scan_for_pii(self, message: str) -> Dict[str, Any]:
         """Scan message for personally identifiable information"""
-        # Simple PII detection patterns
-        pii_patterns = {
-            "email": r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
-            "phone": r'\b\d{3}-\d{3}-\d{4}\b',
-            "ssn": r'\b\d{3}-\d{2}-\d{4}\b',
-            "credit_card": r'\b\d{4}[\s-]?\d{4}[\s-]?\d{4}[\s-]?\d{4}\b'
-        }
-        
-        detected_pii = {}
-        for pii_type, pattern in pii_patterns.items():
-            matches = re.findall(pattern, message)
-            if matches:
-                detected_pii[pii_type] = matches
-        
-        return {
-            "detected": len(detected_pii) > 0,
-            "pii_types": list(detected_pii.keys()),
-            "matches": detected_pii
-        }
+        return self.compliance_scanner.scan(message).pii_detection()
     
     async def _scan_for_medical_advice(self, message: str) -> Dict[str, Any]:
         """Scan message for medical advice content"""
-        medical_keywords = ["diagnosis", "prescription", "medication", "treatment", "symptoms"]
-        
-        detected_medical = []
-        message_lower = message.lower()
-        
-        for keyword in medical_keywords:
-            if keyword in message_lower:
-                detected_medical.append(keyword)
-        
-        return {
-            "detected": len(detected_medical) > 0,
-            "medical_keywords": detected_medical,
-            "requires_disclaimer": len(detected_medical) > 0
-        }
+        return self.compliance_scanner.scan(message).medical_detection()
     
     async def _apply_redaction(self, message: str, pii_detection: Dict[str, Any], 
                               medical_detection: Dict[str, Any]) -> str:
         """Apply redaction to message based on detected issues"""
         redacted_message = message
         
-        # Redact PII
+        # Redact PII in a single pass over the detected spans
         if pii_detection["detected"]:
-            for pii_type, matches in pii_detection["matches"].items():
-                for match in matches:
-                    redacted_message = redacted_message.replace(match, f"[{pii_type.upper()}_REDACTED]")
+            redacted_message = self.compliance_scanner.redact(message, pii_detection["spans"])
         
         # Add medical disclaimer
         if medical_detection["detected"]:
@@ -14,6 +14,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 import importlib
+import types
 from typing import TYPE_CHECKING, Any
 from collections.abc import Generator
 import yaml
@@ -37,7 +38,7 @@ from src.logger import (
 
 from src.tools import Tool
 from src.tools.executor.local_python_executor import LocalPythonExecutor, PythonExecutor, fix_final_answer_code
-from src.tools.executor.remote_executors import DockerExecutor, E2BExecutor
+from src.tools.executor.remote_executors import DockerExecutor, E2BExecutor, PooledPythonExecutor
 from src.exception import (
     AgentParsingError,
     AgentExecutionError,
@@ -66,7 +67,10 @@ class CodeAgent(MultiStepAgent):
         prompt_templates ([`~agents.PromptTemplates`], *optional*): Prompt templates.
         additional_authorized_imports (`list[str]`, *optional*): Additional authorized imports for the agent.
         planning_interval (`int`, *optional*): Interval at which the agent will run a planning step.
-        executor_type (`str`, default `"local"`): Which executor type to use between `"local"`, `"e2b"`, or `"docker"`.
+        executor_type (`str`, default `"local"`): Which executor type to use between `"local"`, `"e2b"`, `"docker"`, or `"pool"`.
+            With `"pool"`, pass a `KernelPool` as `pool` in `executor_kwargs`: the agent leases one of its warm kernels
+            for each run. The kernel is closed, or reset if the pool reuses kernels, when it is returned after the run,
+            so a run with `reset=False` does not see the variables defined by the previous run.
         executor_kwargs (`dict`, *optional*): Additional arguments to pass to initialize the executor.
         max_print_outputs_length (`int`, *optional*): Maximum length of the print outputs.
         stream_outputs (`bool`, *optional*, default `False`): Whether to stream outputs during execution.
@@ -131,13 +135,51 @@ class CodeAgent(MultiStepAgent):
         self.executor_kwargs = executor_kwargs or {}
         self.python_executor = self.create_python_executor()
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.cleanup()
+
+    def cleanup(self):
+        """Clean up resources used by the agent, such as the remote Python executor."""
+        if hasattr(self.python_executor, "cleanup"):
+            self.python_executor.cleanup()
+
+    def run(self, *args, **kwargs):
+        """
+        Run the agent, see [`MultiStepAgent.run`].
+
+        With a pooled executor, the kernel is leased for the duration of the run and returned to the pool after it,
+        including after a streamed run is exhausted or closed.
+        """
+        if not isinstance(self.python_executor, PooledPythonExecutor):
+            return super().run(*args, **kwargs)
+        try:
+            result = super().run(*args, **kwargs)
+        except BaseException:
+            self.python_executor.release()
+            raise
+        if isinstance(result, types.GeneratorType):
+            return self._release_after(result)
+        self.python_executor.release()
+        return result
+
+    def _release_after(self, steps: Generator) -> Generator:
+        try:
+            yield from steps
+        finally:
+            self.python_executor.release()
+
     def create_python_executor(self) -> PythonExecutor:
         match self.executor_type:
-            case "e2b" | "docker":
+            case "e2b" | "docker" | "pool":
                 if self.managed_agents:
                     raise Exception("Managed agents are not yet supported with remote code execution.")
                 if self.executor_type == "e2b":
                     return E2BExecutor(self.additional_authorized_imports, self.logger, **self.executor_kwargs)
+                elif self.executor_type == "pool":
+                    return PooledPythonExecutor(self.additional_authorized_imports, self.logger, **self.executor_kwargs)
                 else:
                     return DockerExecutor(self.additional_authorized_imports, self.logger, **self.executor_kwargs)
             case "local":
@@ -13,7 +13,7 @@
 """Binary Event Stream Decoding"""
 
 from binascii import crc32
-from struct import unpack
+from struct import Struct, unpack
 
 from botocore.exceptions import EventStreamError
 
@@ -226,7 +226,8 @@ class DecodeUtils:
         uint_byte_format = DecodeUtils.UINT_BYTE_FORMAT[length_byte_size]
         length = unpack(uint_byte_format, data[:length_byte_size])[0]
         bytes_end = length + length_byte_size
-        array_bytes = data[length_byte_size:bytes_end]
+        # data may be a memoryview of the stream buffer, never return a view
+        array_bytes = bytes(data[length_byte_size:bytes_end])
         return array_bytes, bytes_end
 
     @staticmethod
@@ -264,7 +265,7 @@ class DecodeUtils:
         :rtype: (bytes, int)
         :returns: A tuple containing the (uuid bytes, bytes consumed).
         """
-        return data[:16], 16
+        return bytes(data[:16]), 16
 
     @staticmethod
     def unpack_prelude(data):
@@ -384,13 +385,28 @@ class EventStreamHeaderParser:
         9: DecodeUtils.unpack_uuid,
     }
 
+    # Header types of fixed size values, unpacked in place
+    _FIXED_SIZE_HEADER_STRUCTS = {
+        # byte
+        2: Struct(DecodeUtils.INT8_BYTE_FORMAT),
+        # short
+        3: Struct(DecodeUtils.INT16_BYTE_FORMAT),
+        # integer
+        4: Struct(DecodeUtils.INT32_BYTE_FORMAT),
+        # long
+        5: Struct(DecodeUtils.INT64_BYTE_FORMAT),
+        # timestamp
+        8: Struct(DecodeUtils.INT64_BYTE_FORMAT),
+    }
+    _UINT16_STRUCT = Struct(DecodeUtils.UINT16_BYTE_FORMAT)
+
     def __init__(self):
         self._data = None
 
     def parse(self, data):
         """Parses the event stream headers from an event stream message.
 
-        :type data: bytes
+        :type data: bytes or memoryview
         :param data: The bytes that correspond to the headers section of an
         event stream message.
 
@@ -398,52 +414,62 @@ class EventStreamHeaderParser:
         :returns: A dictionary of header key, value pairs.
         """
         self._data = data
-        return self._parse_headers()
+        try:
+            return self._parse_headers()
+        finally:
+            # Don't keep a view of the stream buffer alive
+            self._data = None
 
     def _parse_headers(self):
+        # Walks the headers by offset rather than slicing the data for each
+        # field: data is usually a memoryview of the stream buffer.
+        data = self._data
+        fixed_size_structs = self._FIXED_SIZE_HEADER_STRUCTS
         headers = {}
-        while self._data:
-            name, value = self._parse_header()
+        offset = 0
+        end = len(data)
+        while offset < end:
+            name_end = offset + 1 + data[offset]
+            name = str(data[offset + 1 : name_end], 'utf-8')
+            header_type = data[name_end]
+            offset = name_end + 1
+            if header_type == 7 or header_type == 6:
+                (length,) = self._UINT16_STRUCT.unpack_from(data, offset)
+                offset += 2
+                value = data[offset : offset + length]
+                value = str(value, 'utf-8') if header_type == 7 else bytes(value)
+                offset += length
+            elif header_type in fixed_size_structs:
+                value_struct = fixed_size_structs[header_type]
+                (value,) = value_struct.unpack_from(data, offset)
+                offset += value_struct.size
+            else:
+                value_unpacker = self._HEADER_TYPE_MAP[header_type]
+                value, consumed = value_unpacker(data[offset:])
+                offset += consumed
             if name in headers:
                 raise DuplicateHeader(name)
             headers[name] = value
         return headers
 
-    def _parse_header(self):
-        name = self._parse_name()
-        value = self._parse_value()
-        return name, value
-
-    def _parse_name(self):
-        name, consumed = DecodeUtils.unpack_utf8_string(self._data, 1)
-        self._advance_data(consumed)
-        return name
-
-    def _parse_type(self):
-        type, consumed = DecodeUtils.unpack_uint8(self._data)
-        self._advance_data(consumed)
-        return type
-
-    def _parse_value(self):
-        header_type = self._parse_type()
-        value_unpacker = self._HEADER_TYPE_MAP[header_type]
-        value, consumed = value_unpacker(self._data)
-        self._advance_data(consumed)
-        return value
-
-    def _advance_data(self, consumed):
-        self._data = self._data[consumed:]
-
 
 class EventStreamBuffer:
     """Streaming based event stream buffer
 
     A buffer class that wraps bytes from an event stream providing parsed
     messages as they become available via an iterable interface.
+
+    Data is appended to a ``bytearray`` and messages are consumed by
+    advancing a read offset. Consumed bytes are only dropped once they make
+    up at least half of the buffer, so each byte is moved a constant number
+    of times on average however long the stream is. Messages are parsed and
+    checksummed through ``memoryview`` slices of the buffer: the payload is
+    the only copy made of a message.
     """
 
     def __init__(self):
-        self._data = b''
+        self._data = bytearray()
+        self._start = 0
         self._prelude = None
         self._header_parser = EventStreamHeaderParser()
 
@@ -453,7 +479,17 @@ class EventStreamBuffer:
         :type data: bytes
         :param data: The bytes to add to the buffer to be used when parsing
         """
-        self._data += data
+        try:
+            if self._start and self._start * 2 >= len(self._data):
+                del self._data[: self._start]
+                self._start = 0
+            self._data += data
+        except BufferError:
+            # A view of the buffer is still referenced (e.g. by the traceback
+            # of a parsing error), the buffer can't be resized: replace it.
+            self._data = self._data[self._start :]
+            self._start = 0
+            self._data += data
 
     def _validate_prelude(self, prelude):
         if prelude.headers_length > _MAX_HEADERS_LENGTH:
@@ -462,8 +498,8 @@ class EventStreamBuffer:
         if prelude.payload_length > _MAX_PAYLOAD_LENGTH:
             raise InvalidPayloadLength(prelude.payload_length)
 
-    def _parse_prelude(self):
-        prelude_bytes = self._data[:_PRELUDE_LENGTH]
+    def _parse_prelude(self, data):
+        prelude_bytes = data[:_PRELUDE_LENGTH]
         raw_prelude, _ = DecodeUtils.unpack_prelude(prelude_bytes)
         prelude = MessagePrelude(*raw_prelude)
         # The minus 4 removes the prelude crc from the bytes to be checked
@@ -471,45 +507,43 @@ class EventStreamBuffer:
         self._validate_prelude(prelude)
         return prelude
 
-    def _parse_headers(self):
-        header_bytes = self._data[_PRELUDE_LENGTH : self._prelude.headers_end]
+    def _parse_headers(self, data):
+        header_bytes = data[_PRELUDE_LENGTH : self._prelude.headers_end]
         return self._header_parser.parse(header_bytes)
 
-    def _parse_payload(self):
+    def _parse_payload(self, data):
         prelude = self._prelude
-        payload_bytes = self._data[prelude.headers_end : prelude.payload_end]
+        payload_bytes = bytes(data[prelude.headers_end : prelude.payload_end])
         return payload_bytes
 
-    def _parse_message_crc(self):
+    def _parse_message_crc(self, data):
         prelude = self._prelude
-        crc_bytes = self._data[prelude.payload_end : prelude.total_length]
+        crc_bytes = data[prelude.payload_end : prelude.total_length]
         message_crc, _ = DecodeUtils.unpack_uint32(crc_bytes)
         return message_crc
 
-    def _parse_message_bytes(self):
+    def _parse_message_bytes(self, data):
         # The minus 4 includes the prelude crc to the bytes to be checked
-        message_bytes = self._data[
-            _PRELUDE_LENGTH - 4 : self._prelude.payload_end
-        ]
+        message_bytes = data[_PRELUDE_LENGTH - 4 : self._prelude.payload_end]
         return message_bytes
 
-    def _validate_message_crc(self):
-        message_crc = self._parse_message_crc()
-        message_bytes = self._parse_message_bytes()
+    def _validate_message_crc(self, data):
+        message_crc = self._parse_message_crc(data)
+        message_bytes = self._parse_message_bytes(data)
         _validate_checksum(message_bytes, message_crc, crc=self._prelude.crc)
         return message_crc
 
-    def _parse_message(self):
-        crc = self._validate_message_crc()
-        headers = self._parse_headers()
-        payload = self._parse_payload()
+    def _parse_message(self, data):
+        crc = self._validate_message_crc(data)
+        headers = self._parse_headers(data)
+        payload = self._parse_payload(data)
         message = EventStreamMessage(self._prelude, headers, payload, crc)
         self._prepare_for_next_message()
         return message
 
     def _prepare_for_next_message(self):
         # Advance the data and reset the current prelude
-        self._data = self._data[self._prelude.total_length :]
+        self._start += self._prelude.total_length
         self._prelude = None
 
     def next(self):
@@ -518,16 +552,18 @@ class EventStreamBuffer:
         :rtype: EventStreamMessage
         :returns: The next event stream message
         """
-        if len(self._data) < _PRELUDE_LENGTH:
+        available = len(self._data) - self._start
+        if available < _PRELUDE_LENGTH:
             raise StopIteration()
 
-        if self._prelude is None:
-            self._prelude = self._parse_prelude()
+        with memoryview(self._data)[self._start :] as data:
+            if self._prelude is None:
+                self._prelude = self._parse_prelude(data)
 
-        if len(self._data) < self._prelude.total_length:
-            raise StopIteration()
+            if available < self._prelude.total_length:
+                raise StopIteration()
 
-        return self._parse_message()
+            return self._parse_message(data)
 
     def __next__(self):
         return self.next()
@@ -5,10 +5,12 @@ Handles project execution logic, real-time updates, and execution lifecycle mana
 """
 
 import asyncio
+import itertools
 import threading
 import time
 import traceback
-from typing import Dict, Any, Optional, TYPE_CHECKING
+import zlib
+from typing import Dict, Any, Optional, Callable, Awaitable, List, TYPE_CHECKING
 from loguru import logger
 from datetime import datetime
 
@@ -25,6 +27,10 @@ class RealtimeExecutionWrapper:
     
     This class manages periodic updates during execution to keep the 
     frontend synchronized with execution progress.
+    
+    The update callback serializes the graph and may save it, so it runs in
+    a worker thread: the scheduler loop is shared by every project on the
+    shard.
     """
     
     def __init__(self, project_id: str, execution_engine, update_callback, project_manager):
@@ -85,7 +91,7 @@ class RealtimeExecutionWrapper:
                     pass
                 # Final update only if current
                 if self._check_if_current():
-                    self.update_callback()
+                    await self._run_update_callback()
                 return result
             except Exception as e:
                 update_task.cancel()
@@ -95,7 +101,7 @@ class RealtimeExecutionWrapper:
                     pass
                 # Update on error too, but only if current
                 if self._check_if_current():
-                    self.update_callback()
+                    await self._run_update_callback()
                 raise e
         
         return await execute_with_updates()
@@ -132,7 +138,7 @@ class RealtimeExecutionWrapper:
                     pass
                 # Final update only if current
                 if self._check_if_current():
-                    self.update_callback()
+                    await self._run_update_callback()
                 return result
             except Exception as e:
                 update_task.cancel()
@@ -142,7 +148,7 @@ class RealtimeExecutionWrapper:
                     pass
                 # Update on error too, but only if current
                 if self._check_if_current():
-                    self.update_callback()
+                    await self._run_update_callback()
                 raise e
         
         return await execute_with_updates()
@@ -164,7 +170,7 @@ class RealtimeExecutionWrapper:
                 current_time = time.time()
                 # Only update display if we're the current project
                 if self._check_if_current():
-                    self.update_callback()
+                    await self._run_update_callback()
                     last_update_time = current_time
                 else:
                     # Still save state for background projects, but less frequently
@@ -172,6 +178,13 @@ class RealtimeExecutionWrapper:
                         self._save_background_state()
                         last_update_time = current_time
     
+    async def _run_update_callback(self):
+        """Run the update callback off the loop; a failed update is retried by the next one."""
+        try:
+            await asyncio.to_thread(self.update_callback)
+        except Exception as e:
+            logger.warning(f"Update callback failed for project {self.project_id}: {e}")
+    
     def _save_background_state(self):
         """Save state for background projects without updating display."""
         try:
@@ -182,63 +195,376 @@ class RealtimeExecutionWrapper:
             logger.warning(f"Failed to save background project state: {e}")
 
 
+class ScheduledExecution:
+    """
+    A project execution submitted to the ExecutionScheduler.
+    
+    State moves from 'queued' to 'running' and then to one of 'completed',
+    'failed' or 'cancelled'.
+    """
+    
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+    
+    def __init__(self, job_id: str, coro_factory: Callable[[], Awaitable[Any]], priority: int,
+                 sequence: int, concurrency_key: str, shard: int,
+                 on_done: Optional[Callable[['ScheduledExecution'], None]] = None):
+        self.job_id = job_id
+        self.coro_factory = coro_factory
+        self.priority = priority
+        self.sequence = sequence
+        self.concurrency_key = concurrency_key
+        self.shard = shard
+        self.on_done = on_done
+        self.state = self.QUEUED
+        self.error: Optional[str] = None
+        self.task: Optional[asyncio.Task] = None
+        self.queued_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+    
+    @property
+    def done(self) -> bool:
+        return self.state in (self.COMPLETED, self.FAILED, self.CANCELLED)
+    
+    @property
+    def wait_time(self) -> float:
+        """Seconds spent queued before starting"""
+        return (self.started_at or self.finished_at or time.time()) - self.queued_at
+    
+    @property
+    def run_time(self) -> float:
+        """Seconds spent running so far"""
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+
+class _SchedulerShard:
+    """
+    One long-lived event loop running on its own thread.
+    
+    Executions are taken from a priority queue (lower priority value first,
+    FIFO within a priority) and run as tasks, limited globally per shard and
+    per concurrency key.
+    """
+    
+    def __init__(self, index: int, max_concurrent: int, per_key_limit: int):
+        self.index = index
+        self.max_concurrent = max_concurrent
+        self.per_key_limit = per_key_limit
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._key_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._dispatcher: Optional[asyncio.Task] = None
+        self.started = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.total_run_time = 0.0
+        self.total_wait_time = 0.0
+    
+    def start(self):
+        """Start the loop thread (idempotent)"""
+        if self.thread is not None:
+            return
+        self.thread = threading.Thread(
+            target=self._run_loop,
+            name=f"execution-scheduler-{self.index}",
+            daemon=True
+        )
+        self.thread.start()
+        self._ready.wait()
+    
+    def _run_loop(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self._queue = asyncio.PriorityQueue()
+        self._slots = asyncio.Semaphore(self.max_concurrent)
+        self._dispatcher = self.loop.create_task(self._dispatch())
+        self._ready.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.close()
+    
+    def enqueue(self, execution: ScheduledExecution):
+        """Queue an execution from any thread"""
+        self.start()
+        self.loop.call_soon_threadsafe(
+            self._queue.put_nowait,
+            (execution.priority, execution.sequence, execution)
+        )
+    
+    def cancel(self, execution: ScheduledExecution):
+        """Cancel a queued or running execution from any thread"""
+        # Execution state is only touched on the loop thread, so the
+        # cancellation runs there too
+        self.loop.call_soon_threadsafe(self._cancel, execution)
+    
+    def _cancel(self, execution: ScheduledExecution):
+        if execution.state == ScheduledExecution.QUEUED:
+            # The dispatcher skips executions that were cancelled while queued
+            execution.state = ScheduledExecution.CANCELLED
+            execution.finished_at = time.time()
+            self.cancelled += 1
+            if execution.on_done:
+                execution.on_done(execution)
+        elif execution.state == ScheduledExecution.RUNNING and execution.task is not None:
+            execution.task.cancel()
+    
+    async def _dispatch(self):
+        while True:
+            _, _, execution = await self._queue.get()
+            if execution.state != ScheduledExecution.QUEUED:
+                continue
+            await self._slots.acquire()
+            execution.task = self.loop.create_task(self._run(execution))
+    
+    async def _run(self, execution: ScheduledExecution):
+        try:
+            semaphore = self._key_semaphores.get(execution.concurrency_key)
+            if semaphore is None:
+                semaphore = self._key_semaphores[execution.concurrency_key] = asyncio.Semaphore(self.per_key_limit)
+            
+            async with semaphore:
+                if execution.state != ScheduledExecution.QUEUED:
+                    return
+                execution.state = ScheduledExecution.RUNNING
+                execution.started_at = time.time()
+                self.started += 1
+                self.total_wait_time += execution.wait_time
+                try:
+                    await execution.coro_factory()
+                    execution.state = ScheduledExecution.COMPLETED
+                    self.completed += 1
+                except asyncio.CancelledError:
+                    execution.state = ScheduledExecution.CANCELLED
+                    self.cancelled += 1
+                except Exception as e:
+                    execution.state = ScheduledExecution.FAILED
+                    execution.error = str(e)
+                    self.failed += 1
+                    logger.error(f"Scheduled execution {execution.job_id} failed: {e}")
+                finally:
+                    execution.finished_at = time.time()
+                    self.total_run_time += execution.run_time
+                    if execution.on_done:
+                        execution.on_done(execution)
+        finally:
+            self._slots.release()
+    
+    def stop(self, timeout: float = 5.0):
+        """Cancel everything still running and stop the loop"""
+        if self.loop is None or self.thread is None:
+            return
+        
+        async def _shutdown():
+            tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self.loop.stop()
+        
+        asyncio.run_coroutine_threadsafe(_shutdown(), self.loop)
+        self.thread.join(timeout)
+        self.thread = None
+
+
+class ExecutionScheduler:
+    """
+    Runs project executions as tasks on one or more long-lived event loops.
+    
+    All projects on a shard share the same loop, so clients and connection
+    pools created on that loop can be reused across projects. Projects are
+    assigned to shards by a stable hash of their id.
+    
+    Because the loop is shared, a blocking call in one execution stalls every
+    other execution on its shard. Executions must run blocking work through
+    asyncio.to_thread, and engine callbacks must not block.
+    """
+    
+    def __init__(self, num_loops: int = 1, max_concurrent_per_loop: int = 64, per_project_limit: int = 1):
+        """
+        Initialize ExecutionScheduler.
+        
+        Args:
+            num_loops: Number of event loop shards
+            max_concurrent_per_loop: Maximum executions running at once on each loop
+            per_project_limit: Maximum executions running at once per project
+        """
+        self._shards = [
+            _SchedulerShard(index, max_concurrent_per_loop, per_project_limit)
+            for index in range(max(1, num_loops))
+        ]
+        self._executions: Dict[str, ScheduledExecution] = {}
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+    
+    def _shard_for(self, key: str) -> _SchedulerShard:
+        return self._shards[zlib.crc32(key.encode()) % len(self._shards)]
+    
+    def submit(self, job_id: str, coro_factory: Callable[[], Awaitable[Any]], priority: int = 0,
+               concurrency_key: Optional[str] = None,
+               on_done: Optional[Callable[[ScheduledExecution], None]] = None) -> ScheduledExecution:
+        """
+        Queue an execution.
+        
+        Args:
+            job_id: Unique execution identifier
+            coro_factory: Called on the scheduler loop to create the coroutine to run
+            priority: Lower values run first
+            concurrency_key: Key for the per-project concurrency limit (defaults to job_id)
+            on_done: Called on the scheduler loop when the execution finishes
+            
+        Returns:
+            The scheduled execution
+        """
+        concurrency_key = concurrency_key or job_id
+        shard = self._shard_for(concurrency_key)
+        
+        with self._lock:
+            existing = self._executions.get(job_id)
+            if existing is not None and not existing.done:
+                raise ValueError(f"Execution {job_id} is already scheduled")
+            execution = ScheduledExecution(
+                job_id, coro_factory, priority, next(self._sequence),
+                concurrency_key, shard.index, on_done
+            )
+            self._executions[job_id] = execution
+        
+        shard.enqueue(execution)
+        return execution
+    
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued or running execution"""
+        execution = self._executions.get(job_id)
+        if execution is None or execution.done:
+            return False
+        self._shards[execution.shard].cancel(execution)
+        return True
+    
+    def get(self, job_id: str) -> Optional[ScheduledExecution]:
+        return self._executions.get(job_id)
+    
+    def forget(self, job_id: str):
+        """Drop a finished execution from the registry"""
+        with self._lock:
+            execution = self._executions.get(job_id)
+            if execution is not None and execution.done:
+                del self._executions[job_id]
+    
+    def queue_depth(self, shard: Optional[int] = None) -> int:
+        """Number of executions waiting to start, on one shard or all of them"""
+        return sum(
+            1 for execution in list(self._executions.values())
+            if execution.state == ScheduledExecution.QUEUED and (shard is None or execution.shard == shard)
+        )
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue depth, concurrency and run-time statistics per shard"""
+        executions = list(self._executions.values())
+        shards: List[Dict[str, Any]] = []
+        for shard in self._shards:
+            finished = shard.completed + shard.failed
+            shards.append({
+                'shard': shard.index,
+                'queue_depth': self.queue_depth(shard.index),
+                'running': sum(
+                    1 for execution in executions
+                    if execution.shard == shard.index and execution.state == ScheduledExecution.RUNNING
+                ),
+                'max_concurrent': shard.max_concurrent,
+                'completed': shard.completed,
+                'failed': shard.failed,
+                'cancelled': shard.cancelled,
+                'avg_run_time': shard.total_run_time / finished if finished else 0.0,
+                'avg_wait_time': shard.total_wait_time / shard.started if shard.started else 0.0
+            })
+        
+        return {
+            'queue_depth': sum(shard['queue_depth'] for shard in shards),
+            'running': sum(shard['running'] for shard in shards),
+            'shards': shards
+        }
+    
+    def shutdown(self, timeout: float = 5.0):
+        """Cancel all executions and stop every loop"""
+        for shard in self._shards:
+            shard.stop(timeout)
+
+
 class ExecutionService:
     """
     Manages project execution lifecycle and coordination.
     
     This service handles:
     - Starting and stopping project executions
-    - Managing execution threads and async tasks
+    - Scheduling executions as tasks on shared event loops
     - Coordinating real-time updates
     - Handling execution errors and recovery
     """
     
-    def __init__(self, project_service, system_manager):
+    def __init__(self, project_service, system_manager, scheduler: Optional[ExecutionScheduler] = None):
         """
         Initialize ExecutionService.
         
         Args:
             project_service: ProjectService instance
             system_manager: SystemManager instance
+            scheduler: Execution scheduler shared by all projects (created if not given)
         """
         self.project_service = project_service
         self.system_manager = system_manager
+        self.scheduler = scheduler or ExecutionScheduler()
         self._running_executions: Dict[str, Dict[str, Any]] = {}
+        # Guards _running_executions, which API threads and the scheduler loops share
+        self._executions_lock = threading.Lock()
+    
+    def _on_execution_done(self, execution: ScheduledExecution):
+        """Clean up after a scheduled execution finishes."""
+        with self._executions_lock:
+            self._running_executions.pop(execution.job_id, None)
+        self.scheduler.forget(execution.job_id)
     
-    def start_project_execution(self, project_id: str, goal: str, max_steps: int) -> bool:
+    def start_project_execution(self, project_id: str, goal: str, max_steps: int, priority: int = 0) -> bool:
         """
-        Start project execution in a background thread.
+        Queue project execution on the shared execution scheduler.
         
         Args:
             project_id: Project identifier
             goal: Project goal
             max_steps: Maximum execution steps
+            priority: Scheduling priority (lower runs first)
             
         Returns:
             True if started successfully, False otherwise
         """
         try:
-            if project_id in self._running_executions:
-                logger.warning(f"Project {project_id} is already running")
-                return False
-            
-            # Create execution thread
-            thread = threading.Thread(
-                target=self._run_project_in_thread,
-                args=(project_id, goal, max_steps),
-                daemon=True
-            )
-            
             # Store execution info
-            self._running_executions[project_id] = {
-                'thread': thread,
+            info = {
                 'goal': goal,
                 'max_steps': max_steps,
                 'started_at': datetime.now()
             }
+            with self._executions_lock:
+                if project_id in self._running_executions:
+                    logger.warning(f"Project {project_id} is already running")
+                    return False
+                self._running_executions[project_id] = info
             
-            # Start the thread
-            thread.start()
+            info['execution'] = self.scheduler.submit(
+                project_id,
+                lambda: self._execute_project(project_id, goal, max_steps),
+                priority=priority,
+                on_done=self._on_execution_done
+            )
             
             logger.info(f"🚀 Started execution for project {project_id}")
             return True
@@ -246,11 +572,13 @@ class ExecutionService:
         except Exception as e:
             logger.error(f"Failed to start project execution: {e}")
             # Clean up on failure
-            if project_id in self._running_executions:
-                del self._running_executions[project_id]
+            with self._executions_lock:
+                if self._running_executions.get(project_id) is info:
+                    del self._running_executions[project_id]
             return False
     
-    def start_configured_project_execution(self, project_id: str, goal: str, max_steps: int, config: SentientConfig) -> bool:
+    def start_configured_project_execution(self, project_id: str, goal: str, max_steps: int, config: SentientConfig,
+                                           priority: int = 0) -> bool:
         """
         Start project execution with custom configuration.
         
@@ -259,36 +587,34 @@ class ExecutionService:
             goal: Project goal
             max_steps: Maximum execution steps
             config: Custom configuration
+            priority: Scheduling priority (lower runs first)
             
         Returns:
             True if started successfully, False otherwise
         """
         try:
-            if project_id in self._running_executions:
-                logger.warning(f"Project {project_id} is already running")
-                return False
-            
-            # Store the custom config in project service
-            self.project_service.project_configs[project_id] = config
-            
-            # Create execution thread
-            thread = threading.Thread(
-                target=self._run_configured_project_in_thread,
-                args=(project_id, goal, max_steps, config),
-                daemon=True
-            )
-            
             # Store execution info
-            self._running_executions[project_id] = {
-                'thread': thread,
+            info = {
                 'goal': goal,
                 'max_steps': max_steps,
                 'config': config,
                 'started_at': datetime.now()
             }
+            with self._executions_lock:
+                if project_id in self._running_executions:
+                    logger.warning(f"Project {project_id} is already running")
+                    return False
+                self._running_executions[project_id] = info
             
-            # Start the thread
-            thread.start()
+            # Store the custom config in project service
+            self.project_service.project_configs[project_id] = config
+            
+            info['execution'] = self.scheduler.submit(
+                project_id,
+                lambda: self._execute_project(project_id, goal, max_steps, config),
+                priority=priority,
+                on_done=self._on_execution_done
+            )
             
             logger.info(f"🚀 Started configured execution for project {project_id}")
             return True
@@ -296,95 +622,103 @@ class ExecutionService:
         except Exception as e:
             logger.error(f"Failed to start configured project execution: {e}")
             # Clean up on failure
-            if project_id in self._running_executions:
-                del self._running_executions[project_id]
+            with self._executions_lock:
+                if self._running_executions.get(project_id) is info:
+                    del self._running_executions[project_id]
             return False
     
-    def get_running_executions(self) -> Dict[str, Dict[str, Any]]:
+    def stop_project_execution(self, project_id: str) -> bool:
         """
-        Get information about currently running executions.
+        Cancel a queued or running project execution.
         
+        Args:
+            project_id: Project identifier
+            
         Returns:
-            Dictionary of running execution info
+            True if the execution was cancelled, False if it was not running
+        """
+        if not self.scheduler.cancel(project_id):
+            return False
+        logger.info(f"🛑 Cancelled execution for project {project_id}")
+        return True
+    
+    def get_running_executions(self) -> Dict[str, Dict[str, Any]]:
         """
-        # Clean up completed threads
-        completed = []
-        for project_id, info in self._running_executions.items():
-            if not info['thread'].is_alive():
-                completed.append(project_id)
+        Get information about currently queued and running executions.
         
-        for project_id in completed:
-            del self._running_executions[project_id]
+        Returns:
+            Dictionary of running execution info, including scheduler state,
+            queue depth and run time
+        """
+        with self._executions_lock:
+            # Clean up completed executions
+            completed = [
+                project_id for project_id, info in self._running_executions.items()
+                if 'execution' in info and info['execution'].done
+            ]
+            for project_id in completed:
+                self._running_executions.pop(project_id, None)
+            executions = list(self._running_executions.items())
         
-        # Return info about running executions (without thread objects)
-        return {
-            project_id: {
+        # Return info about running executions (without scheduler objects)
+        running = {}
+        for project_id, info in executions:
+            execution = info.get('execution')
+            if execution is None:
+                continue
+            running[project_id] = {
                 'goal': info['goal'],
                 'max_steps': info['max_steps'],
                 'started_at': info['started_at'].isoformat(),
-                'is_alive': info['thread'].is_alive()
+                'is_alive': not execution.done,
+                'state': execution.state,
+                'priority': execution.priority,
+                'shard': execution.shard,
+                'queue_depth': self.scheduler.queue_depth(execution.shard),
+                'wait_time_seconds': execution.wait_time,
+                'run_time_seconds': execution.run_time
             }
-            for project_id, info in self._running_executions.items()
-        }
+        return running
     
-    def _run_project_in_thread(self, project_id: str, goal: str, max_steps: int):
-        """
-        Thread wrapper for async execution with project management.
-        
-        Args:
-            project_id: Project identifier
-            goal: Project goal
-            max_steps: Maximum execution steps
-        """
-        logger.info(f"🧵 Thread started for project: {project_id}")
-        try:
-            # Create new event loop for this thread
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            loop.run_until_complete(
-                self._run_project_cycle_async(project_id, goal, max_steps)
-            )
-        except Exception as e:
-            logger.error(f"Thread error for project {project_id}: {e}")
-            traceback.print_exc()
-            
-            # Update project status to failed
-            self.project_service.project_manager.update_project(project_id, status='failed')
-        finally:
-            # Clean up
-            if project_id in self._running_executions:
-                del self._running_executions[project_id]
-            logger.info(f"🏁 Thread finished for project: {project_id}")
+    def get_scheduler_stats(self) -> Dict[str, Any]:
+        """Get queue depth, concurrency and run-time statistics of the scheduler."""
+        return self.scheduler.get_stats()
     
-    def _run_configured_project_in_thread(self, project_id: str, goal: str, max_steps: int, config: SentientConfig):
+    def shutdown(self):
+        """Cancel all executions and stop the scheduler loops."""
+        self.scheduler.shutdown()
+        with self._executions_lock:
+            self._running_executions.clear()
+    
+    async def _execute_project(self, project_id: str, goal: str, max_steps: int,
+                               config: Optional[SentientConfig] = None):
         """
-        Thread wrapper for async execution with custom configuration.
+        Scheduler entry point for a project execution.
         
         Args:
             project_id: Project identifier
             goal: Project goal
             max_steps: Maximum execution steps
-            config: Custom configuration
+            config: Custom configuration, if any
         """
-        logger.info(f"🧵 Configured thread started for project: {project_id}")
+        logger.info(f"🧵 Execution started for project: {project_id}")
         try:
-            # Create new event loop for this thread
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            loop.run_until_complete(
-                self._run_configured_project_cycle_async(project_id, goal, max_steps, config)
-            )
+            if config is not None:
+                await self._run_configured_project_cycle_async(project_id, goal, max_steps, config)
+            else:
+                await self._run_project_cycle_async(project_id, goal, max_steps)
+        except asyncio.CancelledError:
+            # Shielded so the status is still recorded while the task is being cancelled
+            await asyncio.shield(asyncio.to_thread(
+                self.project_service.project_manager.update_project, project_id, status='cancelled'
+            ))
+            raise
         except Exception as e:
-            logger.error(f"Configured thread error for project {project_id}: {e}")
-            traceback.print_exc()
-            
-            # Update project status to failed
-            self.project_service.project_manager.update_project(project_id, status='failed')
+            await self._record_execution_failure(project_id, e)
+            # Let the scheduler record the execution as failed
+            raise
         finally:
-            # Clean up
-            if project_id in self._running_executions:
-                del self._running_executions[project_id]
-            logger.info(f"🏁 Configured thread finished for project: {project_id}")
+            logger.info(f"🏁 Execution finished for project: {project_id}")
     
     async def _run_project_cycle_async(self, project_id: str, goal: str, max_steps: int):
         """
@@ -392,129 +726,125 @@ class ExecutionService:
         """
         logger.info(f"🎯 Initializing project: {project_id} - {goal}")
         
-        try:
-            # Get or create project-specific components
-            project_components = self.project_service.get_or_create_project_graph(project_id)
-            project_task_graph = project_components['task_graph']
-            project_execution_engine = project_components['execution_engine']
-            update_callback = project_components['update_callback']
-            
-            # Create real-time wrapper with enhanced saving
-            realtime_engine = RealtimeExecutionWrapper(
-                project_id,
-                project_execution_engine,
-                update_callback,
-                self.project_service.project_manager
-            )
+        # Get or create project-specific components
+        project_components = await asyncio.to_thread(self.project_service.get_or_create_project_graph, project_id)
+        project_task_graph = project_components['task_graph']
+        project_execution_engine = project_components['execution_engine']
+        update_callback = project_components['update_callback']
+        
+        # Create real-time wrapper with enhanced saving
+        realtime_engine = RealtimeExecutionWrapper(
+            project_id,
+            project_execution_engine,
+            update_callback,
+            self.project_service.project_manager
+        )
+        
+        # Check if this should be the current project
+        current_project = self.project_service.project_manager.get_current_project()
+        if not current_project:
+            await asyncio.to_thread(self.project_service.project_manager.set_current_project, project_id)
+            should_display = True
+        else:
+            should_display = (current_project.id == project_id)
+        
+        # Load existing state
+        project_state = await asyncio.to_thread(self.project_service.project_manager.load_project_state, project_id)
+        
+        if project_state and 'all_nodes' in project_state and len(project_state['all_nodes']) > 0:
+            logger.info(f"📊 Resuming project with {len(project_state['all_nodes'])} existing nodes")
+            await asyncio.to_thread(self._load_project_state, project_task_graph, project_state)
+            await asyncio.to_thread(self.project_service.project_manager.update_project, project_id, status='running')
             
-            # Check if this should be the current project
-            current_project = self.project_service.project_manager.get_current_project()
-            if not current_project:
-                self.project_service.project_manager.set_current_project(project_id)
-                should_display = True
-            else:
-                should_display = (current_project.id == project_id)
+            if should_display:
+                # Trigger broadcast update for current project
+                if self.project_service.broadcast_callback:
+                    await asyncio.to_thread(self.project_service.broadcast_callback)
             
-            # Load existing state
-            project_state = self.project_service.project_manager.load_project_state(project_id)
+            logger.info("⚡ Resuming execution...")
+            result = await realtime_engine.run_cycle(max_steps=max_steps)
             
-            if project_state and 'all_nodes' in project_state and len(project_state['all_nodes']) > 0:
-                logger.info(f"📊 Resuming project with {len(project_state['all_nodes'])} existing nodes")
-                self._load_project_state(project_task_graph, project_state)
-                self.project_service.project_manager.update_project(project_id, status='running')
-                
-                if should_display:
-                    # Trigger broadcast update for current project
-                    if self.project_service.broadcast_callback:
-                        self.project_service.broadcast_callback()
-                
-                logger.info("⚡ Resuming execution...")
-                result = await realtime_engine.run_cycle(max_steps=max_steps)
-                
-                # Handle execution result
-                if isinstance(result, dict) and 'error' in result:
-                    logger.error(f"❌ Execution failed: {result['error']}")
-                    self.project_service.project_manager.update_project(project_id, status='failed', error=result['error'])
-                    # Store error in the root node
-                    root_node = project_task_graph.get_node("root")
-                    if root_node:
-                        root_node.error = result['error']
-                        root_node.status = TaskStatus.FAILED
-                else:
-                    logger.info("✅ Execution completed successfully")
-            else:
-                logger.info("🧹 Starting fresh project...")
-                
-                # Clear project graph
-                project_task_graph.nodes.clear()
-                project_task_graph.graphs.clear()
-                project_task_graph.root_graph_id = None
-                project_task_graph.overall_project_goal = None
-                
-                # CRITICAL FIX: Clear the knowledge store for the project
-                knowledge_store = project_components.get('knowledge_store')
-                if knowledge_store:
-                    knowledge_store.clear()
-                    logger.info("KnowledgeStore cleared for fresh project start.")
-                
-                # Clear project-specific cache
-                cache_manager = self.system_manager.cache_manager
-                if cache_manager and self.system_manager.config.cache.enabled:
-                    cache_manager.clear_namespace(f"project_{project_id}")
-                
-                self.project_service.project_manager.update_project(project_id, status='running')
-                
-                logger.info("🚀 Starting project flow...")
-                start_time = time.time()
-                
-                result = await realtime_engine.run_project_flow(root_goal=goal, max_steps=max_steps)
-                
-                total_time = time.time() - start_time
-                logger.info(f"⏱️ Project execution took {total_time:.2f} seconds")
-                
-                # Handle execution result
-                if isinstance(result, dict) and 'error' in result:
-                    logger.error(f"❌ Execution failed: {result['error']}")
-                    self.project_service.project_manager.update_project(project_id, status='failed', error=result['error'])
-                    # Store error in the root node
-                    root_node = project_task_graph.get_node("root")
-                    if root_node:
-                        root_node.error = result['error']
-                        root_node.status = TaskStatus.FAILED
-                else:
-                    logger.info("✅ Execution completed successfully")
+            await self._handle_execution_result(project_id, project_task_graph, result)
+        else:
+            logger.info("🧹 Starting fresh project...")
+            
+            # Clear project graph
+            project_task_graph.nodes.clear()
+            project_task_graph.graphs.clear()
+            project_task_graph.root_graph_id = None
+            project_task_graph.overall_project_goal = None
             
-            # CRITICAL: Update project status BEFORE saving (only if not already marked as failed)
-            current_project = self.project_service.project_manager.get_project(project_id)
-            if current_project and current_project.status != 'failed':
-                self.project_service.project_manager.update_project(project_id, status='completed')
+            # CRITICAL FIX: Clear the knowledge store for the project
+            knowledge_store = project_components.get('knowledge_store')
+            if knowledge_store:
+                await asyncio.to_thread(knowledge_store.clear)
+                logger.info("KnowledgeStore cleared for fresh project start.")
             
-            # CRITICAL: Save state IMMEDIATELY after execution completes
-            logger.info(f"🚨 CRITICAL SAVE - Saving final state for project {project_id}")
-            self._save_final_project_state_enhanced(project_task_graph, project_id)
+            # Clear project-specific cache
+            cache_manager = self.system_manager.cache_manager
+            if cache_manager and self.system_manager.config.cache.enabled:
+                await asyncio.to_thread(cache_manager.clear_namespace, f"project_{project_id}")
             
-            # Final sync only if current project
+            await asyncio.to_thread(self.project_service.project_manager.update_project, project_id, status='running')
+            
+            logger.info("🚀 Starting project flow...")
+            start_time = time.time()
+            
+            result = await realtime_engine.run_project_flow(root_goal=goal, max_steps=max_steps)
+            
+            total_time = time.time() - start_time
+            logger.info(f"⏱️ Project execution took {total_time:.2f} seconds")
+            
+            await self._handle_execution_result(project_id, project_task_graph, result)
+        
+        # CRITICAL: Update project status BEFORE saving (only if not already marked as failed)
+        current_project = self.project_service.project_manager.get_project(project_id)
+        if current_project and current_project.status != 'failed':
+            await asyncio.to_thread(self.project_service.project_manager.update_project, project_id, status='completed')
+        
+        # CRITICAL: Save state IMMEDIATELY after execution completes
+        logger.info(f"🚨 CRITICAL SAVE - Saving final state for project {project_id}")
+        await asyncio.to_thread(self._save_final_project_state_enhanced, project_task_graph, project_id)
+        
+        # Final sync only if current project
+        if (self.project_service.project_manager.get_current_project() and 
+            self.project_service.project_manager.get_current_project().id == project_id):
+            # Trigger broadcast update for current project
+            if self.project_service.broadcast_callback:
+                await asyncio.to_thread(self.project_service.broadcast_callback)
+        
+        logger.info(f"✅ Project {project_id} completed and saved")
+    
+    async def _handle_execution_result(self, project_id: str, project_task_graph, result: Any):
+        """Mark the project as failed when the execution engine returned an error."""
+        if isinstance(result, dict) and 'error' in result:
+            logger.error(f"❌ Execution failed: {result['error']}")
+            await asyncio.to_thread(
+                self.project_service.project_manager.update_project,
+                project_id, status='failed', error=result['error']
+            )
+            # Store error in the root node
+            root_node = project_task_graph.get_node("root")
+            if root_node:
+                root_node.error = result['error']
+                root_node.status = TaskStatus.FAILED
+        else:
+            logger.info("✅ Execution completed successfully")
+    
+    async def _record_execution_failure(self, project_id: str, error: Exception):
+        """Mark a project whose execution raised as failed and show the error state if it is displayed."""
+        logger.error(f"Execution error for project {project_id}: {error}")
+        traceback.print_exc()
+        await asyncio.to_thread(self.project_service.project_manager.update_project, project_id, status='failed')
+        
+        try:
             if (self.project_service.project_manager.get_current_project() and 
                 self.project_service.project_manager.get_current_project().id == project_id):
                 # Trigger broadcast update for current project
                 if self.project_service.broadcast_callback:
-                    self.project_service.broadcast_callback()
-            
-            logger.info(f"✅ Project {project_id} completed and saved")
-            
-        except Exception as e:
-            self.project_service.project_manager.update_project(project_id, status='failed')
-            logger.error(f"Project execution error: {e}")
-            traceback.print_exc()
-            
-            try:
-                if (self.project_service.project_manager.get_current_project() and 
-                    self.project_service.project_manager.get_current_project().id == project_id):
-                    # Trigger broadcast update for current project
-                    if self.project_service.broadcast_callback:
-                        self.project_service.broadcast_callback()
-            except:
-                logger.error("Failed to broadcast error state")
+                    await asyncio.to_thread(self.project_service.broadcast_callback)
+        except Exception:
+            logger.error("Failed to broadcast error state")
     
     async def _run_configured_project_cycle_async(self, project_id: str, goal: str, max_steps: int, config: SentientConfig):
         """
@@ -607,7 +937,7 @@ class ExecutionService:
             
             # MULTIPLE SAVE ATTEMPTS
             save_attempts = [
-                ("project_manager", lambda: self.project_service.project_manager.save_project_state(project_id, data)),
+                ("project_manager", lambda: self.project_service.save_project_state(project_id, data)),
                 ("comprehensive_results", lambda: self._save_comprehensive_results(project_id, data)),
                 ("emergency_backup", lambda: self._save_emergency_backup(project_id, data))
             ]
@@ -25,9 +25,11 @@ TODO: move them to `huggingface_hub` to avoid code duplication.
 import inspect
 import json
 import re
+import threading
 import types
+import weakref
 from collections.abc import Callable
-from copy import copy
+from copy import copy, deepcopy
 from typing import (
     Any,
     Literal,
@@ -94,6 +96,57 @@ class DocstringParsingException(Exception):
     """Exception raised for errors in parsing docstrings to generate JSON schemas"""
 
 
+def _read_only(*args, **kwargs):
+    raise TypeError("Cached JSON schemas are read-only: copy the schema before modifying it")
+
+
+class _ReadOnlyDict(dict):
+    """A dict that cannot be modified in place. Copies of it are plain dicts."""
+
+    __slots__ = ()
+    __setitem__ = __delitem__ = __ior__ = clear = pop = popitem = setdefault = update = _read_only
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return deepcopy(dict(self), memo)
+
+    def __reduce__(self):
+        return dict, (dict(self),)
+
+
+class _ReadOnlyList(list):
+    """A list that cannot be modified in place. Copies of it are plain lists."""
+
+    __slots__ = ()
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = clear = extend = insert = pop = remove = reverse = sort = _read_only
+
+    def __copy__(self):
+        return list(self)
+
+    def __deepcopy__(self, memo):
+        return deepcopy(list(self), memo)
+
+    def __reduce__(self):
+        return list, (list(self),)
+
+
+def _read_only_schema(value: Any) -> Any:
+    if isinstance(value, dict):
+        return _ReadOnlyDict((key, _read_only_schema(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return _ReadOnlyList(_read_only_schema(item) for item in value)
+    return value
+
+
+# Schemas of functions (and of the functions of bound methods), with the docstring and annotations they were built from
+_json_schema_cache: "weakref.WeakKeyDictionary[Callable, tuple[str | None, dict, dict]]" = weakref.WeakKeyDictionary()
+_bound_json_schema_cache: "weakref.WeakKeyDictionary[Callable, tuple[str | None, dict, dict]]" = weakref.WeakKeyDictionary()
+_json_schema_cache_lock = threading.Lock()
+
+
 def get_json_schema(func: Callable) -> dict:
     """
     This function generates a JSON schema for a given function, based on its docstring and type hints. This is
@@ -200,7 +253,32 @@ def get_json_schema(func: Callable) -> dict:
             'required': ['beverage']
         }
     }
+
+    Schemas are cached per function, and rebuilt if its docstring or annotations change. The returned schema is the
+    cached one and is read-only: modifying it raises a `TypeError`, while `copy.deepcopy` returns a plain, mutable copy.
     """
+    if isinstance(func, types.MethodType):
+        # Bound methods are created on each attribute access: key on the underlying function
+        cache, key = _bound_json_schema_cache, func.__func__
+    else:
+        cache, key = _json_schema_cache, func
+    doc = getattr(func, "__doc__", None)
+    annotations = getattr(func, "__annotations__", None) or {}
+
+    try:
+        entry = cache.get(key)
+    except TypeError:  # Not hashable or not weak-referenceable
+        return _build_json_schema(func)
+    if entry is not None and entry[0] == doc and entry[1] == annotations:
+        return entry[2]
+
+    schema = _read_only_schema(_build_json_schema(func))
+    with _json_schema_cache_lock:
+        cache[key] = (doc, dict(annotations), schema)
+    return schema
+
+
+def _build_json_schema(func: Callable) -> dict:
     doc = inspect.getdoc(func)
     if not doc:
         raise DocstringParsingException(
@@ -51,6 +51,8 @@ class InferenceClientModel(ApiModel):
         base_url (`str`, `optional`):
             Base URL to run inference. This is a duplicated argument from `model` to make [`InferenceClientModel`]
             follow the same pattern as `openai.OpenAI` client. Cannot be used if `model` is set. Defaults to None.
+        max_image_size (`int`, *optional*):
+            Downscale images in messages so that neither side exceeds this many pixels. Defaults to no limit.
         **kwargs:
             Additional keyword arguments to pass to the Hugging Face InferenceClient.
 
@@ -85,6 +87,7 @@ class InferenceClientModel(ApiModel):
         bill_to: str | None = None,
         base_url: str | None = None,
         http_client=None,
+        max_image_size: int | None = None,
         **kwargs,
     ):
         if token is not None and api_key is not None:
@@ -95,7 +98,7 @@ class InferenceClientModel(ApiModel):
             )
 
         self.http_client = http_client
-        self.message_manager = MessageManager(model_id=model_id)
+        self.message_manager = MessageManager(model_id=model_id, max_image_size=max_image_size)
 
         token = token if token is not None else api_key
         if token is None:
@@ -161,8 +164,7 @@ class InferenceClientModel(ApiModel):
         # Handle tools parameter
         if tools_to_call_from:
             tools_config = {
-                "tools": [self.message_manager.get_tool_json_schema(tool, model_id=self.model_id) for tool in
-                          tools_to_call_from],
+                "tools": list(self.message_manager.get_tools_payload(tools_to_call_from, model_id=self.model_id).tools),
             }
             if tool_choice is not None:
                 tools_config["tool_choice"] = tool_choice
@@ -0,0 +1,435 @@
+import asyncio
+import hashlib
+import io
+import json
+import os
+import re
+import threading
+import time
+import weakref
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+from markitdown._base_converter import DocumentConverterResult
+
+from src.logger import logger
+
+_MAX_AGE_PATTERN = re.compile(r"max-age=(\d+)")
+
+
+@dataclass
+class FetchResponse:
+    """Body and validators of a fetched URL."""
+    url: str
+    status_code: int
+    body: bytes
+    headers: Dict[str, str] = field(default_factory=dict)
+    fetched_at: float = 0.0
+    max_age: Optional[float] = None
+    truncated: bool = False
+    from_cache: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status_code < 300
+
+    @property
+    def content_type(self) -> str:
+        return self.headers.get("content-type", "")
+
+    @property
+    def digest(self) -> str:
+        return hashlib.sha256(self.body).hexdigest()
+
+
+class FetchCache:
+    """
+    Disk cache of fetched URLs.
+
+    Each URL is stored under the hash of the URL as three files: the raw body, a JSON file with the
+    response metadata (validators, fetch time, body digest), and the converted markdown, which is
+    tagged with the digest of the body it was converted from so that a changed body invalidates it.
+
+    Once the files take more than `max_bytes`, the least recently used URLs are deleted until the
+    cache is back under 90% of it. Reads refresh the modification time of the metadata file, which
+    is what "recently used" is measured by.
+    """
+
+    def __init__(self, root: Optional[str | Path] = None, max_bytes: int = 1024 * 1024 * 1024):
+        self.root = Path(root) if root is not None else self._default_root()
+        self.max_bytes = max_bytes
+        # Bytes on disk, scanned on the first write and kept up to date by writes and evictions
+        self._size: Optional[int] = None
+        self._size_lock = threading.Lock()
+        self._evict_lock = threading.Lock()
+
+    @staticmethod
+    def _default_root() -> Path:
+        """Per-user cache directory, readable by its owner only."""
+        cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+        root = Path(cache_home) / "web_fetch_cache"
+        root.mkdir(mode=0o700, parents=True, exist_ok=True)
+        # mkdir leaves the mode of an existing directory alone
+        os.chmod(root, 0o700)
+        return root
+
+    def _path(self, url: str, suffix: str) -> Path:
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return self.root / key[:2] / f"{key}{suffix}"
+
+    def _write(self, path: Path, data: bytes):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f"{path.suffix}.{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        try:
+            old_size = path.stat().st_size
+        except OSError:
+            old_size = 0
+        os.replace(tmp_path, path)
+        self._add_size(len(data) - old_size)
+
+    def _add_size(self, delta: int):
+        with self._size_lock:
+            if self._size is None:
+                # The scan already sees the file just written
+                self._size = sum(size for size, _, _ in self._entries().values())
+            else:
+                self._size += delta
+
+    def _entries(self) -> Dict[str, Tuple[int, float, List[Path]]]:
+        """Total size, last use and files of each cached URL, by URL hash."""
+        entries: Dict[str, Tuple[int, float, List[Path]]] = {}
+        for path in self.root.glob("*/*"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            key = path.name.split(".", 1)[0]
+            size, last_used, paths = entries.get(key, (0, 0.0, []))
+            paths.append(path)
+            entries[key] = (size + stat.st_size, max(last_used, stat.st_mtime), paths)
+        return entries
+
+    def _evict_if_full(self):
+        if self._size is None or self._size <= self.max_bytes:
+            return
+        # One eviction at a time; concurrent writers leave it to the running one
+        if not self._evict_lock.acquire(blocking=False):
+            return
+        try:
+            entries = self._entries()
+            total = sum(size for size, _, _ in entries.values())
+            target = self.max_bytes * 0.9
+            for size, _, paths in sorted(entries.values(), key=lambda entry: entry[1]):
+                if total <= target:
+                    break
+                for path in paths:
+                    path.unlink(missing_ok=True)
+                total -= size
+            with self._size_lock:
+                self._size = total
+        finally:
+            self._evict_lock.release()
+
+    def get(self, url: str) -> Optional[FetchResponse]:
+        meta_path = self._path(url, ".json")
+        try:
+            meta = json.loads(meta_path.read_bytes())
+            body = self._path(url, ".body").read_bytes()
+        except (OSError, ValueError):
+            return None
+        if hashlib.sha256(body).hexdigest() != meta.get("digest"):
+            return None
+        try:
+            os.utime(meta_path)
+        except OSError:
+            pass
+        return FetchResponse(
+            url=url,
+            status_code=meta["status_code"],
+            body=body,
+            headers=meta["headers"],
+            fetched_at=meta["fetched_at"],
+            max_age=meta.get("max_age"),
+            truncated=meta.get("truncated", False),
+            from_cache=True,
+        )
+
+    def put(self, response: FetchResponse):
+        # Body first: a metadata file always describes a complete body
+        self._write(self._path(response.url, ".body"), response.body)
+        self.touch(response)
+        self._evict_if_full()
+
+    def touch(self, response: FetchResponse):
+        meta = {
+            "status_code": response.status_code,
+            "headers": response.headers,
+            "fetched_at": response.fetched_at,
+            "max_age": response.max_age,
+            "truncated": response.truncated,
+            "digest": response.digest,
+        }
+        self._write(self._path(response.url, ".json"), json.dumps(meta).encode("utf-8"))
+
+    def get_markdown(self, url: str, digest: str) -> Optional[DocumentConverterResult]:
+        try:
+            cached = json.loads(self._path(url, ".md.json").read_bytes())
+        except (OSError, ValueError):
+            return None
+        if cached.get("digest") != digest:
+            return None
+        return DocumentConverterResult(markdown=cached["markdown"], title=cached.get("title"))
+
+    def put_markdown(self, url: str, digest: str, result: DocumentConverterResult):
+        data = {"digest": digest, "markdown": result.markdown, "title": result.title}
+        self._write(self._path(url, ".md.json"), json.dumps(data).encode("utf-8"))
+        self._evict_if_full()
+
+    def delete(self, url: str):
+        for suffix in (".json", ".body", ".md.json"):
+            path = self._path(url, suffix)
+            try:
+                size = path.stat().st_size
+                path.unlink()
+            except OSError:
+                continue
+            self._add_size(-size)
+
+
+@dataclass
+class _LoopState:
+    """Client, per-host semaphores and in-flight requests of one event loop."""
+    client: httpx.AsyncClient
+    host_semaphores: Dict[str, asyncio.Semaphore] = field(default_factory=dict)
+    in_flight: Dict[Tuple[str, str], asyncio.Task] = field(default_factory=dict)
+
+
+def convert_to_markdown(body: bytes, content_type: str, url: str) -> Optional[DocumentConverterResult]:
+    """Convert a fetched body to markdown with MarkItDown."""
+    from markitdown import MarkItDown, StreamInfo
+
+    mimetype, _, params = content_type.partition(";")
+    charset = None
+    for param in params.split(";"):
+        name, _, value = param.strip().partition("=")
+        if name.lower() == "charset" and value:
+            charset = value.strip('"')
+    stream_info = StreamInfo(mimetype=mimetype.strip() or None, charset=charset, url=url)
+    return MarkItDown().convert_stream(io.BytesIO(body), stream_info=stream_info)
+
+
+class HttpFetcher:
+    """
+    Fetch layer shared by the web tools.
+
+    Requests go through a pooled `httpx.AsyncClient` with keep-alive connections (one per event
+    loop, as connections cannot be shared between loops), at most
+    `per_host_limit` at a time per host. Concurrent fetches of the same URL share one request.
+    Responses are cached on disk: fresh entries (younger than the response's `max-age`, or `ttl`)
+    are served without a request, stale ones are revalidated with `If-None-Match` /
+    `If-Modified-Since`. Bodies are streamed and cut at `max_body_bytes`.
+
+    Args:
+        cache_dir (`str`, *optional*): Cache directory. Defaults to `web_fetch_cache` in the user's cache directory.
+        cache_max_bytes (`int`, default `1 GiB`): Size of the cache past which least recently used URLs are evicted.
+        ttl (`float`, default `3600`): Seconds a response is fresh when it has no `max-age`.
+        per_host_limit (`int`, default `4`): Concurrent requests per host.
+        max_connections (`int`, default `64`): Size of the connection pool.
+        max_body_bytes (`int`, default `10 MiB`): Bodies are truncated past this size.
+        timeout (`float`, default `30`): Request timeout in seconds.
+        converter (`Callable`, *optional*): `(body, content_type, url) -> DocumentConverterResult`.
+        transport (`httpx.AsyncBaseTransport`, *optional*): Transport of the clients, e.g. `httpx.MockTransport` in tests.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str | Path] = None,
+        cache_max_bytes: int = 1024 * 1024 * 1024,
+        ttl: float = 3600,
+        per_host_limit: int = 4,
+        max_connections: int = 64,
+        max_body_bytes: int = 10 * 1024 * 1024,
+        timeout: float = 30,
+        converter: Callable[[bytes, str, str], Optional[DocumentConverterResult]] = convert_to_markdown,
+        headers: Optional[Dict[str, str]] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.cache = FetchCache(cache_dir, max_bytes=cache_max_bytes)
+        self.ttl = ttl
+        self.per_host_limit = per_host_limit
+        self.max_connections = max_connections
+        self.max_body_bytes = max_body_bytes
+        self.timeout = timeout
+        self.converter = converter
+        self.headers = headers or {"User-Agent": "Mozilla/5.0 (compatible; WebFetcherTool)"}
+        self.transport = transport
+
+        # Client, semaphores and in-flight requests belong to the event loop that created them,
+        # so each loop gets its own
+        self._loop_states: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopState]" = weakref.WeakKeyDictionary()
+        self._loop_states_lock = threading.Lock()
+
+    def _state_for_loop(self) -> "_LoopState":
+        loop = asyncio.get_running_loop()
+        with self._loop_states_lock:
+            state = self._loop_states.get(loop)
+            if state is None:
+                # Connections of closed loops can no longer be used or closed; drop their clients
+                for closed in [other for other in self._loop_states if other.is_closed()]:
+                    del self._loop_states[closed]
+                state = _LoopState(httpx.AsyncClient(
+                    follow_redirects=True,
+                    timeout=self.timeout,
+                    transport=self.transport,
+                    headers=self.headers,
+                    limits=httpx.Limits(
+                        max_connections=self.max_connections,
+                        max_keepalive_connections=self.max_connections,
+                    ),
+                ))
+                self._loop_states[loop] = state
+        return state
+
+    def _is_fresh(self, response: FetchResponse) -> bool:
+        max_age = response.max_age if response.max_age is not None else self.ttl
+        return time.time() - response.fetched_at < max_age
+
+    async def fetch(self, url: str) -> FetchResponse:
+        """Fetch a URL, from the cache when fresh."""
+        cached = await asyncio.to_thread(self.cache.get, url)
+        if cached is not None and self._is_fresh(cached):
+            return cached
+
+        state = self._state_for_loop()
+        return await self._shared(state, ("fetch", url), lambda: self._fetch_and_store(state, url, cached))
+
+    async def _shared(self, state: "_LoopState", key: Tuple[str, str], make_coroutine: Callable):
+        """
+        Run the coroutine once for concurrent callers with the same key.
+
+        The coroutine runs in its own task, which callers await through a shield: a cancelled caller
+        stops waiting without cancelling the work the other callers wait for.
+        """
+        task = state.in_flight.get(key)
+        if task is None:
+            task = asyncio.create_task(make_coroutine())
+            state.in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget(state, key, done))
+        return await asyncio.shield(task)
+
+    def _forget(self, state: "_LoopState", key: Tuple[str, str], task: asyncio.Task):
+        if state.in_flight.get(key) is task:
+            del state.in_flight[key]
+        # Mark the exception as retrieved when every caller was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    async def _fetch_and_store(self, state: "_LoopState", url: str, cached: Optional[FetchResponse]) -> FetchResponse:
+        headers = {}
+        if cached is not None:
+            if etag := cached.headers.get("etag"):
+                headers["If-None-Match"] = etag
+            if last_modified := cached.headers.get("last-modified"):
+                headers["If-Modified-Since"] = last_modified
+
+        host = urlsplit(url).netloc
+        semaphore = state.host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = state.host_semaphores[host] = asyncio.Semaphore(self.per_host_limit)
+        async with semaphore:
+            response, cache_control = await self._stream(state.client, url, headers)
+
+        if response.status_code == 304 and cached is not None:
+            cached.fetched_at = response.fetched_at
+            if response.max_age is not None:
+                cached.max_age = response.max_age
+            await asyncio.to_thread(self.cache.touch, cached)
+            return cached
+
+        # A truncated body is not the page: serving it from the cache would hide the rest for good
+        if response.ok and not response.truncated and "no-store" not in cache_control:
+            await asyncio.to_thread(self.cache.put, response)
+        return response
+
+    async def _stream(self, client: httpx.AsyncClient, url: str, headers: Dict[str, str]) -> Tuple[FetchResponse, str]:
+        async with client.stream("GET", url, headers=headers) as resp:
+            body = bytearray()
+            truncated = False
+            async for chunk in resp.aiter_bytes():
+                remaining = self.max_body_bytes - len(body)
+                if len(chunk) >= remaining:
+                    body += chunk[:remaining]
+                    truncated = len(chunk) > remaining
+                    if truncated:
+                        logger.warning(f"Truncated {url} at {self.max_body_bytes} bytes")
+                        break
+                    continue
+                body += chunk
+
+            cache_control = resp.headers.get("cache-control", "").lower()
+            max_age = None
+            if "no-cache" in cache_control:
+                max_age = 0
+            elif match := _MAX_AGE_PATTERN.search(cache_control):
+                max_age = float(match.group(1))
+
+            keep = ("content-type", "etag", "last-modified")
+            response = FetchResponse(
+                url=url,
+                status_code=resp.status_code,
+                body=bytes(body),
+                headers={name: resp.headers[name] for name in keep if name in resp.headers},
+                fetched_at=time.time(),
+                max_age=max_age,
+                truncated=truncated,
+            )
+        return response, cache_control
+
+    async def fetch_markdown(self, url: str, min_length: int = 0) -> Optional[DocumentConverterResult]:
+        """
+        Fetch a URL and convert it to markdown, reusing the cached conversion while the body is unchanged.
+
+        Returns None if the request failed, or if the markdown is shorter than `min_length`
+        (e.g. a page rendered by JavaScript).
+        """
+        response = await self.fetch(url)
+        if not response.ok or not response.body:
+            return None
+
+        result = await self._shared(self._state_for_loop(), ("markdown", url), lambda: self._convert_and_store(response))
+        if result is None or len(result.markdown.strip()) < min_length:
+            return None
+        return result
+
+    async def _convert_and_store(self, response: FetchResponse) -> Optional[DocumentConverterResult]:
+        digest = response.digest
+        result = await asyncio.to_thread(self.cache.get_markdown, response.url, digest)
+        if result is None:
+            result = await asyncio.to_thread(self.converter, response.body, response.content_type, response.url)
+            if result is not None:
+                await asyncio.to_thread(self.cache.put_markdown, response.url, digest, result)
+        return result
+
+    async def aclose(self):
+        """Close the clients of all event loops; those of other running loops are closed on their loop."""
+        with self._loop_states_lock:
+            states = list(self._loop_states.items())
+            self._loop_states.clear()
+        current = asyncio.get_running_loop()
+        for loop, state in states:
+            if loop is current:
+                await state.client.aclose()
+            elif loop.is_running():
+                future = asyncio.run_coroutine_threadsafe(state.client.aclose(), loop)
+                await asyncio.wrap_future(future)
+
+
+http_fetcher = HttpFetcher()
+
+
+__all__ = ["FetchResponse", "FetchCache", "HttpFetcher", "convert_to_markdown", "http_fetcher"]
@@ -0,0 +1,181 @@
+import base64
+import hashlib
+import mmap
+import os
+import shutil
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Optional
+
+if TYPE_CHECKING:
+    import PIL.Image
+
+
+@dataclass(frozen=True)
+class ImageHandle:
+    """
+    Reference to an image in an `ImageStore`, identified by the hash of its content.
+    """
+    digest: str
+    width: int
+    height: int
+    mode: str
+    store: "ImageStore" = field(compare=False, repr=False)
+
+    @property
+    def size(self) -> tuple[int, int]:
+        return self.width, self.height
+
+    def load(self) -> "PIL.Image.Image":
+        return self.store.load(self)
+
+    def base64(self, max_size: Optional[int] = None) -> str:
+        return self.store.base64(self, max_size=max_size)
+
+
+class ImageStore:
+    """
+    Content-addressed store for agent images.
+
+    Images are written once as PNG files named after the hash of their content, so agent memory only needs to
+    keep `ImageHandle`s. Downscaled variants are encoded once per maximum size. Encoded files are read through
+    memory maps, and decoded images and base64 encodings are kept in small LRU caches.
+
+    Args:
+        root (`str` or `Path`, *optional*): Directory holding the image files. Defaults to a temporary directory
+            that is removed when the store is garbage collected or the process exits.
+        max_decoded (`int`, default `16`): Number of decoded images to keep in memory.
+        max_encoded (`int`, default `32`): Number of base64 encodings to keep in memory.
+        max_mapped (`int`, default `64`): Number of memory-mapped files to keep open.
+    """
+    def __init__(
+        self,
+        root: str | Path | None = None,
+        max_decoded: int = 16,
+        max_encoded: int = 32,
+        max_mapped: int = 64,
+    ):
+        self._root = Path(root) if root is not None else None
+        self.max_decoded = max_decoded
+        self.max_encoded = max_encoded
+        self.max_mapped = max_mapped
+        self._decoded: OrderedDict[str, "PIL.Image.Image"] = OrderedDict()
+        self._encoded: OrderedDict[tuple[str, Optional[int]], str] = OrderedDict()
+        self._mapped: OrderedDict[Path, mmap.mmap] = OrderedDict()
+        self._lock = threading.RLock()
+
+    @property
+    def root(self) -> Path:
+        with self._lock:
+            if self._root is None:
+                self._root = Path(tempfile.mkdtemp(prefix="agent_images_"))
+                weakref.finalize(self, shutil.rmtree, str(self._root), True)
+            else:
+                self._root.mkdir(parents=True, exist_ok=True)
+            return self._root
+
+    def _path(self, digest: str, max_size: Optional[int] = None) -> Path:
+        name = digest if max_size is None else f"{digest}_{max_size}"
+        return self.root / f"{name}.png"
+
+    @staticmethod
+    def _write(path: Path, save: Callable[[Any], None]):
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "wb") as f:
+            save(f)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _touch(cache: OrderedDict, key: Any, value: Any, max_size: int):
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > max_size:
+            cache.popitem(last=False)
+
+    def put(self, image: "PIL.Image.Image | ImageHandle") -> ImageHandle:
+        """
+        Store an image, returning its handle. Images already in the store are not written again.
+        """
+        if isinstance(image, ImageHandle):
+            return image
+
+        hasher = hashlib.blake2b(digest_size=16)
+        hasher.update(f"{image.mode}:{image.width}x{image.height}:".encode())
+        hasher.update(image.tobytes())
+        handle = ImageHandle(hasher.hexdigest(), image.width, image.height, image.mode, self)
+
+        path = self._path(handle.digest)
+        if not path.exists():
+            self._write(path, lambda f: image.save(f, format="PNG"))
+        return handle
+
+    def put_all(self, images: "list[PIL.Image.Image | ImageHandle] | None") -> list[ImageHandle] | None:
+        if images is None:
+            return None
+        return [self.put(image) for image in images]
+
+    def encoded(self, handle: ImageHandle, max_size: Optional[int] = None) -> mmap.mmap:
+        """
+        Get the PNG encoding of an image, downscaled so that neither side exceeds `max_size`.
+
+        The returned buffer is a read-only memory map of the encoded file.
+        """
+        if max_size is not None and max(handle.size) <= max_size:
+            max_size = None
+
+        path = self._path(handle.digest, max_size)
+        with self._lock:
+            mapped = self._mapped.get(path)
+            if mapped is None:
+                if not path.exists():
+                    image = self.load(handle).copy()
+                    image.thumbnail((max_size, max_size))
+                    self._write(path, lambda f: image.save(f, format="PNG"))
+                with open(path, "rb") as f:
+                    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            # Evicted maps are closed once no caller references them anymore
+            self._touch(self._mapped, path, mapped, self.max_mapped)
+            return mapped
+
+    def base64(self, handle: ImageHandle, max_size: Optional[int] = None) -> str:
+        """
+        Get the base64 PNG encoding of an image, downscaled so that neither side exceeds `max_size`.
+        """
+        key = (handle.digest, max_size)
+        with self._lock:
+            encoded = self._encoded.get(key)
+            if encoded is None:
+                encoded = base64.b64encode(self.encoded(handle, max_size)).decode("utf-8")
+            self._touch(self._encoded, key, encoded, self.max_encoded)
+            return encoded
+
+    def load(self, handle: ImageHandle) -> "PIL.Image.Image":
+        """
+        Decode an image. The result is cached and shared, copy it before modifying it.
+        """
+        from PIL import Image
+
+        with self._lock:
+            image = self._decoded.get(handle.digest)
+            if image is None:
+                with Image.open(self._path(handle.digest)) as f:
+                    f.load()
+                    image = f
+            self._touch(self._decoded, handle.digest, image, self.max_decoded)
+            return image
+
+    def clear_caches(self):
+        with self._lock:
+            self._decoded.clear()
+            self._encoded.clear()
+            self._mapped.clear()
+
+
+image_store = ImageStore()
+
+
+__all__ = ["ImageHandle", "ImageStore", "image_store"]
@@ -28,6 +28,8 @@ class LiteLLMModel(ApiModel):
             Useful for specific models that do not support specific message roles like "system".
         flatten_messages_as_text (`bool`, *optional*): Whether to flatten messages as text.
             Defaults to `True` for models that start with "ollama", "groq", "cerebras".
+        max_image_size (`int`, *optional*):
+            Downscale images in messages so that neither side exceeds this many pixels. Defaults to no limit.
         **kwargs:
             Additional keyword arguments to pass to the OpenAI API.
     """
@@ -41,6 +43,7 @@ class LiteLLMModel(ApiModel):
         custom_role_conversions: dict[str, str] | None = None,
         flatten_messages_as_text: bool | None = None,
         http_client=None,
+        max_image_size: int | None = None,
         **kwargs,
     ):
         if not model_id:
@@ -62,7 +65,7 @@ class LiteLLMModel(ApiModel):
         )
         self.http_client = http_client
 
-        self.message_manager = MessageManager(model_id=model_id)
+        self.message_manager = MessageManager(model_id=model_id, max_image_size=max_image_size)
 
         super().__init__(
             model_id=model_id,
@@ -125,7 +128,7 @@ class LiteLLMModel(ApiModel):
         # Handle tools parameter
         if tools_to_call_from:
             tools_config = {
-                "tools": [self.message_manager.get_tool_json_schema(tool, model_id=self.model_id) for tool in tools_to_call_from],
+                "tools": list(self.message_manager.get_tools_payload(tools_to_call_from, model_id=self.model_id).tools),
             }
             if tool_choice is not None:
                 tools_config["tool_choice"] = tool_choice
@@ -17,10 +17,14 @@
 import ast
 import builtins
 import difflib
+import hashlib
 import inspect
 import logging
 import math
+import operator
 import re
+import threading
+from collections import OrderedDict
 from collections.abc import Callable, Mapping
 from functools import wraps
 from importlib import import_module
@@ -49,6 +53,7 @@ ERRORS = {
 DEFAULT_MAX_LEN_OUTPUT = 50000
 MAX_OPERATIONS = 10000000
 MAX_WHILE_ITERATIONS = 1000000
+PROGRAM_CACHE_SIZE = 256
 
 
 def custom_print(*args):
@@ -172,6 +177,10 @@ def check_safer_result(result: Any, static_tools: dict[str, Callable] = None, au
                 raise InterpreterError(f"Forbidden access to function: {function_name}")
 
 
+# Only results of these types can fail check_safer_result
+CHECKED_RESULT_TYPES = (ModuleType, dict, FunctionType, BuiltinFunctionType)
+
+
 def safer_eval(func: Callable):
     """
     Decorator to enhance the security of an evaluation function by checking its return value.
@@ -192,7 +201,8 @@ def safer_eval(func: Callable):
         authorized_imports=BASE_BUILTIN_MODULES,
     ):
         result = func(expression, state, static_tools, custom_tools, authorized_imports=authorized_imports)
-        check_safer_result(result, static_tools, authorized_imports)
+        if isinstance(result, CHECKED_RESULT_TYPES):
+            check_safer_result(result, static_tools, authorized_imports)
         return result
 
     return _check_return
@@ -805,6 +815,17 @@ def evaluate_call(
         for keyword in call.keywords
     }
 
+    return call_function(func, func_name, args, kwargs, state, static_tools)
+
+
+def call_function(
+    func: Callable,
+    func_name: str | None,
+    args: list[Any],
+    kwargs: dict[str, Any],
+    state: dict[str, Any],
+    static_tools: dict[str, Callable],
+) -> Any:
     if func_name == "super":
         if not args:
             if "__class__" in state and "self" in state:
@@ -825,7 +846,7 @@ def evaluate_call(
         state["_print_outputs"] += " ".join(map(str, args)) + "\n"
         return None
     else:  # Assume it's a callable object
-        if (inspect.getmodule(func) == builtins) and inspect.isbuiltin(func) and (func not in static_tools.values()):
+        if inspect.isbuiltin(func) and (inspect.getmodule(func) == builtins) and (func not in static_tools.values()):
             raise InterpreterError(
                 f"Invoking a builtin function that has not been explicitly added as a tool is not allowed ({func_name})."
             )
@@ -841,6 +862,10 @@ def evaluate_subscript(
 ) -> Any:
     index = evaluate_ast(subscript.slice, state, static_tools, custom_tools, authorized_imports)
     value = evaluate_ast(subscript.value, state, static_tools, custom_tools, authorized_imports)
+    return get_item(value, index)
+
+
+def get_item(value: Any, index: Any) -> Any:
     try:
         return value[index]
     except (KeyError, IndexError, TypeError) as e:
@@ -1307,7 +1332,576 @@ def evaluate_delete(
             raise InterpreterError(f"Deletion of {type(target).__name__} targets is not supported")
 
 
-@safer_eval
+def evaluate_constant(
+    constant: ast.Constant,
+    state: dict[str, Any],
+    static_tools: dict[str, Callable],
+    custom_tools: dict[str, Callable],
+    authorized_imports: list[str],
+) -> Any:
+    return constant.value
+
+
+def evaluate_tuple(
+    tuple_node: ast.Tuple,
+    state: dict[str, Any],
+    static_tools: dict[str, Callable],
+    custom_tools: dict[str, Callable],
+    authorized_imports: list[str],
+) -> tuple[Any, ...]:
+    return tuple(evaluate_ast(elt, state, static_tools, custom_tools, authorized_imports) for elt in tuple_node.elts)
+
+
+def evaluate_list(
+    list_node: ast.List,
+    state: dict[str, Any],
+    static_tools: dict[str, Callable],
+    custom_tools: dict[str, Callable],
+    authorized_imports: list[str],
+) -> list[Any]:
+    return [evaluate_ast(elt, state, static_tools, custom_tools, authorized_imports) for elt in list_node.elts]
+
+
+def evaluate_set(
+    set_node: ast.Set,
+    state: dict[str, Any],
+    static_tools: dict[str, Callable],
+    custom_tools: dict[str, Callable],
+    authorized_imports: list[str],
+) -> set[Any]:
+    return set(evaluate_ast(elt, state, static_tools, custom_tools, authorized_imports) for elt in set_node.elts)
+
+
+def evaluate_dict(
+    dict_node: ast.Dict,
+    state: dict[str, Any],
+    static_tools: dict[str, Callable],
+    custom_tools: dict[str, Callable],
+    authorized_imports: list[str],
+) -> dict[Any, Any]:
+    keys = (evaluate_ast(k, state, static_tools, custom_tools, authorized_imports) for k in dict_node.keys)
+    values = (evaluate_ast(v, state, static_tools, custom_tools, authorized_imports) for v in dict_node.values)
+    return dict(zip(keys, values))
+
+
+def evaluate_value(
+    expression: ast.Expr | ast.Starred,
+    state: dict[str, Any],
+    static_tools: dict[str, Callable],
+    custom_tools: dict[str, Callable],
+    authorized_imports: list[str],
+) -> Any:
+    return evaluate_ast(expression.value, state, static_tools, custom_tools, authorized_imports)
+
+
+def evaluate_formatted_value(
+    formatted_value: ast.FormattedValue,
+    state: dict[str, Any],
+    static_tools: dict[str, Callable],
+    custom_tools: dict[str, Callable],
+    authorized_imports: list[str],
+) -> Any:
+    value = evaluate_ast(formatted_value.value, state, static_tools, custom_tools, authorized_imports)
+    # Early return if no format spec
+    if not formatted_value.format_spec:
+        return value
+    # Apply format specification
+    format_spec = evaluate_ast(formatted_value.format_spec, state, static_tools, custom_tools, authorized_imports)
+    return format(value, format_spec)
+
+
+def evaluate_joined_str(
+    joined_str: ast.JoinedStr,
+    state: dict[str, Any],
+    static_tools: dict[str, Callable],
+    custom_tools: dict[str, Callable],
+    authorized_imports: list[str],
+) -> str:
+    return "".join([str(evaluate_ast(v, state, static_tools, custom_tools, authorized_imports)) for v in joined_str.values])
+
+
+def evaluate_ifexp(
+    ifexp: ast.IfExp,
+    state: dict[str, Any],
+    static_tools: dict[str, Callable],
+    custom_tools: dict[str, Callable],
+    authorized_imports: list[str],
+) -> Any:
+    if evaluate_ast(ifexp.test, state, static_tools, custom_tools, authorized_imports):
+        return evaluate_ast(ifexp.body, state, static_tools, custom_tools, authorized_imports)
+    else:
+        return evaluate_ast(ifexp.orelse, state, static_tools, custom_tools, authorized_imports)
+
+
+def evaluate_slice(
+    slice_node: ast.Slice,
+    state: dict[str, Any],
+    static_tools: dict[str, Callable],
+    custom_tools: dict[str, Callable],
+    authorized_imports: list[str],
+) -> slice:
+    return slice(
+        evaluate_ast(slice_node.lower, state, static_tools, custom_tools, authorized_imports)
+        if slice_node.lower is not None
+        else None,
+        evaluate_ast(slice_node.upper, state, static_tools, custom_tools, authorized_imports)
+        if slice_node.upper is not None
+        else None,
+        evaluate_ast(slice_node.step, state, static_tools, custom_tools, authorized_imports)
+        if slice_node.step is not None
+        else None,
+    )
+
+
+def evaluate_break(expression: ast.Break, *params) -> None:
+    raise BreakException()
+
+
+def evaluate_continue(expression: ast.Continue, *params) -> None:
+    raise ContinueException()
+
+
+def evaluate_return(
+    return_node: ast.Return,
+    state: dict[str, Any],
+    static_tools: dict[str, Callable],
+    custom_tools: dict[str, Callable],
+    authorized_imports: list[str],
+) -> None:
+    raise ReturnException(
+        evaluate_ast(return_node.value, state, static_tools, custom_tools, authorized_imports)
+        if return_node.value
+        else None
+    )
+
+
+def evaluate_pass(expression: ast.Pass, *params) -> None:
+    return None
+
+
+# Evaluation function of each supported node type, called as
+# evaluator(expression, state, static_tools, custom_tools, authorized_imports)
+EVALUATORS: dict[type[ast.AST], Callable] = {
+    ast.Assign: evaluate_assign,
+    ast.AnnAssign: evaluate_annassign,
+    ast.AugAssign: evaluate_augassign,
+    ast.Call: evaluate_call,
+    ast.Constant: evaluate_constant,
+    ast.Tuple: evaluate_tuple,
+    ast.ListComp: evaluate_listcomp,
+    ast.GeneratorExp: evaluate_listcomp,
+    ast.DictComp: evaluate_dictcomp,
+    ast.SetComp: evaluate_setcomp,
+    ast.UnaryOp: evaluate_unaryop,
+    ast.Starred: evaluate_value,
+    ast.BoolOp: evaluate_boolop,
+    ast.Break: evaluate_break,
+    ast.Continue: evaluate_continue,
+    ast.BinOp: evaluate_binop,
+    ast.Compare: evaluate_condition,
+    ast.Lambda: evaluate_lambda,
+    ast.FunctionDef: evaluate_function_def,
+    ast.Dict: evaluate_dict,
+    ast.Expr: evaluate_value,
+    ast.For: evaluate_for,
+    ast.FormattedValue: evaluate_formatted_value,
+    ast.If: evaluate_if,
+    ast.JoinedStr: evaluate_joined_str,
+    ast.List: evaluate_list,
+    ast.Name: evaluate_name,
+    ast.Subscript: evaluate_subscript,
+    ast.IfExp: evaluate_ifexp,
+    ast.Attribute: evaluate_attribute,
+    ast.Slice: evaluate_slice,
+    ast.While: evaluate_while,
+    ast.Import: lambda expression, state, static_tools, custom_tools, authorized_imports: evaluate_import(
+        expression, state, authorized_imports
+    ),
+    ast.ImportFrom: lambda expression, state, static_tools, custom_tools, authorized_imports: evaluate_import(
+        expression, state, authorized_imports
+    ),
+    ast.ClassDef: evaluate_class_def,
+    ast.Try: evaluate_try,
+    ast.Raise: evaluate_raise,
+    ast.Assert: evaluate_assert,
+    ast.With: evaluate_with,
+    ast.Set: evaluate_set,
+    ast.Return: evaluate_return,
+    ast.Pass: evaluate_pass,
+    ast.Delete: evaluate_delete,
+}
+if hasattr(ast, "Index"):
+    EVALUATORS[ast.Index] = evaluate_value
+
+
+def count_operation(state: dict[str, Any]) -> None:
+    operations_count = state.get("_operations_count")
+    if operations_count is None:
+        operations_count = state["_operations_count"] = {"counter": 0}
+    counter = operations_count["counter"]
+    if counter >= MAX_OPERATIONS:
+        raise InterpreterError(
+            f"Reached the max number of operations of {MAX_OPERATIONS}. Maybe there is an infinite loop somewhere in the code, or you're just asking too many calculations."
+        )
+    operations_count["counter"] = counter + 1
+
+
+BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+    ast.FloorDiv: operator.floordiv,
+    ast.BitAnd: operator.and_,
+    ast.BitOr: operator.or_,
+    ast.BitXor: operator.xor,
+    ast.LShift: operator.lshift,
+    ast.RShift: operator.rshift,
+}
+
+UNARY_OPERATORS = {
+    ast.USub: operator.neg,
+    ast.UAdd: lambda operand: operand,
+    ast.Not: operator.not_,
+    ast.Invert: operator.invert,
+}
+
+COMPARISON_OPERATORS = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.Is: operator.is_,
+    ast.IsNot: operator.is_not,
+    ast.In: lambda left, right: left in right,
+    ast.NotIn: lambda left, right: left not in right,
+}
+
+
+def compile_evaluator(expression: ast.AST, evaluator: Callable) -> Callable:
+    """Wrap an evaluation function into a compiled node, counting the operation and checking its result."""
+
+    def evaluate(state, static_tools, custom_tools, authorized_imports):
+        count_operation(state)
+        result = evaluator(expression, state, static_tools, custom_tools, authorized_imports)
+        if isinstance(result, CHECKED_RESULT_TYPES):
+            check_safer_result(result, static_tools, authorized_imports)
+        return result
+
+    return evaluate
+
+
+def compile_unsupported(expression: Any) -> Callable:
+    def evaluate(state, static_tools, custom_tools, authorized_imports):
+        count_operation(state)
+        # For now we refuse anything else. Let's add things as we need them.
+        raise InterpreterError(f"{expression.__class__.__name__} is not supported.")
+
+    return evaluate
+
+
+def compile_constant(constant: ast.Constant) -> Callable:
+    value = constant.value
+
+    def evaluate(state, static_tools, custom_tools, authorized_imports):
+        count_operation(state)
+        return value
+
+    return evaluate
+
+
+def compile_name(name: ast.Name) -> Callable:
+    name_id = name.id
+
+    def evaluate(state, static_tools, custom_tools, authorized_imports):
+        count_operation(state)
+        if name_id in state:
+            result = state[name_id]
+        else:
+            result = evaluate_name(name, state, static_tools, custom_tools, authorized_imports)
+        if isinstance(result, CHECKED_RESULT_TYPES):
+            check_safer_result(result, static_tools, authorized_imports)
+        return result
+
+    return evaluate
+
+
+def compile_attribute(attribute: ast.Attribute) -> Callable | None:
+    if attribute.attr.startswith("__") and attribute.attr.endswith("__"):
+        return None
+    value = compile_ast(attribute.value)
+    attr = attribute.attr
+
+    def evaluate(state, static_tools, custom_tools, authorized_imports):
+        count_operation(state)
+        result = getattr(value(state, static_tools, custom_tools, authorized_imports), attr)
+        if isinstance(result, CHECKED_RESULT_TYPES):
+            check_safer_result(result, static_tools, authorized_imports)
+        return result
+
+    return evaluate
+
+
+def compile_binop(binop: ast.BinOp) -> Callable | None:
+    op = BINARY_OPERATORS.get(type(binop.op))
+    if op is None:
+        return None
+    left, right = compile_ast(binop.left), compile_ast(binop.right)
+
+    def evaluate(state, static_tools, custom_tools, authorized_imports):
+        count_operation(state)
+        result = op(
+            left(state, static_tools, custom_tools, authorized_imports),
+            right(state, static_tools, custom_tools, authorized_imports),
+        )
+        if isinstance(result, CHECKED_RESULT_TYPES):
+            check_safer_result(result, static_tools, authorized_imports)
+        return result
+
+    return evaluate
+
+
+def compile_unaryop(unaryop: ast.UnaryOp) -> Callable | None:
+    op = UNARY_OPERATORS.get(type(unaryop.op))
+    if op is None:
+        return None
+    operand = compile_ast(unaryop.operand)
+
+    def evaluate(state, static_tools, custom_tools, authorized_imports):
+        count_operation(state)
+        result = op(operand(state, static_tools, custom_tools, authorized_imports))
+        if isinstance(result, CHECKED_RESULT_TYPES):
+            check_safer_result(result, static_tools, authorized_imports)
+        return result
+
+    return evaluate
+
+
+def compile_boolop(boolop: ast.BoolOp) -> Callable:
+    values = [compile_ast(value) for value in boolop.values]
+    is_and = isinstance(boolop.op, ast.And)
+
+    def evaluate(state, static_tools, custom_tools, authorized_imports):
+        count_operation(state)
+        for value in values:
+            result = value(state, static_tools, custom_tools, authorized_imports)
+            # 'and' returns the first falsy value, 'or' the first truthy one, or else the last value
+            if (not result) if is_and else bool(result):
+                break
+        if isinstance(result, CHECKED_RESULT_TYPES):
+            check_safer_result(result, static_tools, authorized_imports)
+        return result
+
+    return evaluate
+
+
+def compile_compare(compare: ast.Compare) -> Callable | None:
+    ops = [COMPARISON_OPERATORS.get(type(op)) for op in compare.ops]
+    if None in ops:
+        return None
+    left_operand = compile_ast(compare.left)
+    comparisons = list(zip(ops, [compile_ast(comparator) for comparator in compare.comparators]))
+
+    def evaluate(state, static_tools, custom_tools, authorized_imports):
+        count_operation(state)
+        result = True
+        left = left_operand(state, static_tools, custom_tools, authorized_imports)
+        for i, (op, comparator) in enumerate(comparisons):
+            right = comparator(state, static_tools, custom_tools, authorized_imports)
+            current_result = op(left, right)
+            if current_result is False:
+                return False
+            result = current_result if i == 0 else (result and current_result)
+            left = right
+        if isinstance(result, CHECKED_RESULT_TYPES):
+            check_safer_result(result, static_tools, authorized_imports)
+        return result
+
+    return evaluate
+
+
+def compile_subscript(subscript: ast.Subscript) -> Callable:
+    index, value = compile_ast(subscript.slice), compile_ast(subscript.value)
+
+    def evaluate(state, static_tools, custom_tools, authorized_imports):
+        count_operation(state)
+        key = index(state, static_tools, custom_tools, authorized_imports)
+        result = get_item(value(state, static_tools, custom_tools, authorized_imports), key)
+        if isinstance(result, CHECKED_RESULT_TYPES):
+            check_safer_result(result, static_tools, authorized_imports)
+        return result
+
+    return evaluate
+
+
+def compile_sequence(sequence: ast.Tuple | ast.List | ast.Set) -> Callable:
+    elts = [compile_ast(elt) for elt in sequence.elts]
+    build = {ast.Tuple: tuple, ast.List: list, ast.Set: set}[type(sequence)]
+
+    def evaluate(state, static_tools, custom_tools, authorized_imports):
+        count_operation(state)
+        return build([elt(state, static_tools, custom_tools, authorized_imports) for elt in elts])
+
+    return evaluate
+
+
+def compile_dict(dict_node: ast.Dict) -> Callable | None:
+    if None in dict_node.keys:
+        return None
+    items = [(compile_ast(key), compile_ast(value)) for key, value in zip(dict_node.keys, dict_node.values)]
+
+    def evaluate(state, static_tools, custom_tools, authorized_imports):
+        count_operation(state)
+        result = {
+            key(state, static_tools, custom_tools, authorized_imports): value(
+                state, static_tools, custom_tools, authorized_imports
+            )
+            for key, value in items
+        }
+        if isinstance(result, CHECKED_RESULT_TYPES):
+            check_safer_result(result, static_tools, authorized_imports)
+        return result
+
+    return evaluate
+
+
+def compile_value(expression: ast.Expr | ast.Starred) -> Callable:
+    value = compile_ast(expression.value)
+
+    def evaluate(state, static_tools, custom_tools, authorized_imports):
+        count_operation(state)
+        result = value(state, static_tools, custom_tools, authorized_imports)
+        if isinstance(result, CHECKED_RESULT_TYPES):
+            check_safer_result(result, static_tools, authorized_imports)
+        return result
+
+    return evaluate
+
+
+def compile_ifexp(ifexp: ast.IfExp) -> Callable:
+    test, body, orelse = compile_ast(ifexp.test), compile_ast(ifexp.body), compile_ast(ifexp.orelse)
+
+    def evaluate(state, static_tools, custom_tools, authorized_imports):
+        count_operation(state)
+        if test(state, static_tools, custom_tools, authorized_imports):
+            result = body(state, static_tools, custom_tools, authorized_imports)
+        else:
+            result = orelse(state, static_tools, custom_tools, authorized_imports)
+        if isinstance(result, CHECKED_RESULT_TYPES):
+            check_safer_result(result, static_tools, authorized_imports)
+        return result
+
+    return evaluate
+
+
+def compile_call(call: ast.Call) -> Callable | None:
+    if isinstance(call.func, ast.Name):
+        func_name = call.func.id
+        func_value = None
+    elif isinstance(call.func, ast.Attribute):
+        func_name = call.func.attr
+        func_value = compile_ast(call.func.value)
+    else:
+        return None
+    args = [
+        (isinstance(arg, ast.Starred), compile_ast(arg.value if isinstance(arg, ast.Starred) else arg))
+        for arg in call.args
+    ]
+    keywords = [(keyword.arg, compile_ast(keyword.value)) for keyword in call.keywords]
+
+    def evaluate(state, static_tools, custom_tools, authorized_imports):
+        count_operation(state)
+        if func_value is not None:
+            obj = func_value(state, static_tools, custom_tools, authorized_imports)
+            if not hasattr(obj, func_name):
+                raise InterpreterError(f"Object {obj} has no attribute {func_name}")
+            func = getattr(obj, func_name)
+        elif func_name in state:
+            func = state[func_name]
+        elif func_name in static_tools:
+            func = static_tools[func_name]
+        elif func_name in custom_tools:
+            func = custom_tools[func_name]
+        elif func_name in ERRORS:
+            func = ERRORS[func_name]
+        else:
+            raise InterpreterError(
+                f"Forbidden function evaluation: '{func_name}' is not among the explicitly allowed tools or defined/imported in the preceding code"
+            )
+
+        arg_values = []
+        for is_starred, arg in args:
+            if is_starred:
+                arg_values.extend(arg(state, static_tools, custom_tools, authorized_imports))
+            else:
+                arg_values.append(arg(state, static_tools, custom_tools, authorized_imports))
+        kwargs = {name: value(state, static_tools, custom_tools, authorized_imports) for name, value in keywords}
+
+        result = call_function(func, func_name, arg_values, kwargs, state, static_tools)
+        if isinstance(result, CHECKED_RESULT_TYPES):
+            check_safer_result(result, static_tools, authorized_imports)
+        return result
+
+    return evaluate
+
+
+# Node types compiled into specialized closures that call their compiled children directly.
+# A compiler returns None to fall back to the node's evaluation function.
+COMPILERS: dict[type[ast.AST], Callable[[Any], Callable | None]] = {
+    ast.Constant: compile_constant,
+    ast.Name: compile_name,
+    ast.Attribute: compile_attribute,
+    ast.BinOp: compile_binop,
+    ast.UnaryOp: compile_unaryop,
+    ast.BoolOp: compile_boolop,
+    ast.Compare: compile_compare,
+    ast.Subscript: compile_subscript,
+    ast.Tuple: compile_sequence,
+    ast.List: compile_sequence,
+    ast.Set: compile_sequence,
+    ast.Dict: compile_dict,
+    ast.Expr: compile_value,
+    ast.Starred: compile_value,
+    ast.IfExp: compile_ifexp,
+    ast.Call: compile_call,
+}
+
+
+def compile_ast(expression: ast.AST) -> Callable:
+    """
+    Compile a node into a closure `evaluate(state, static_tools, custom_tools, authorized_imports)`.
+
+    The closure is cached on the node, so a tree is compiled at most once. Each compiled node counts one operation
+    and checks its result with `check_safer_result`, like `evaluate_ast` always did.
+    """
+    evaluate = getattr(expression, "_evaluate", None)
+    if evaluate is not None:
+        return evaluate
+
+    node_type = type(expression)
+    compiler = COMPILERS.get(node_type)
+    if compiler is not None:
+        evaluate = compiler(expression)
+    if evaluate is None:
+        evaluator = EVALUATORS.get(node_type)
+        if evaluator is None:
+            evaluator = next(
+                (evaluator for ast_type, evaluator in EVALUATORS.items() if isinstance(expression, ast_type)), None
+            )
+        if evaluator is not None:
+            evaluate = compile_evaluator(expression, evaluator)
+        else:
+            evaluate = compile_unsupported(expression)
+
+    if isinstance(expression, ast.AST):
+        expression._evaluate = evaluate
+    return evaluate
+
+
 def evaluate_ast(
     expression: ast.AST,
     state: dict[str, Any],
@@ -1319,7 +1913,8 @@ def evaluate_ast(
     Evaluate an abstract syntax tree using the content of the variables stored in a state and only evaluating a given
     set of functions.
 
-    This function will recurse through the nodes of the tree provided.
+    The tree is compiled into closures on first evaluation (see `compile_ast`), and later evaluations of the same
+    nodes reuse them.
 
     Args:
         expression (`ast.AST`):
@@ -1335,130 +1930,35 @@ def evaluate_ast(
             The list of modules that can be imported by the code. By default, only a few safe modules are allowed.
             If it contains "*", it will authorize any import. Use this at your own risk!
     """
-    if state.setdefault("_operations_count", {"counter": 0})["counter"] >= MAX_OPERATIONS:
-        raise InterpreterError(
-            f"Reached the max number of operations of {MAX_OPERATIONS}. Maybe there is an infinite loop somewhere in the code, or you're just asking too many calculations."
-        )
-    state["_operations_count"]["counter"] += 1
-    common_params = (state, static_tools, custom_tools, authorized_imports)
-    if isinstance(expression, ast.Assign):
-        # Assignment -> we evaluate the assignment which should update the state
-        # We return the variable assigned as it may be used to determine the final result.
-        return evaluate_assign(expression, *common_params)
-    elif isinstance(expression, ast.AnnAssign):
-        return evaluate_annassign(expression, *common_params)
-    elif isinstance(expression, ast.AugAssign):
-        return evaluate_augassign(expression, *common_params)
-    elif isinstance(expression, ast.Call):
-        # Function call -> we return the value of the function call
-        return evaluate_call(expression, *common_params)
-    elif isinstance(expression, ast.Constant):
-        # Constant -> just return the value
-        return expression.value
-    elif isinstance(expression, ast.Tuple):
-        return tuple((evaluate_ast(elt, *common_params) for elt in expression.elts))
-    elif isinstance(expression, (ast.ListComp, ast.GeneratorExp)):
-        return evaluate_listcomp(expression, *common_params)
-    elif isinstance(expression, ast.DictComp):
-        return evaluate_dictcomp(expression, *common_params)
-    elif isinstance(expression, ast.SetComp):
-        return evaluate_setcomp(expression, *common_params)
-    elif isinstance(expression, ast.UnaryOp):
-        return evaluate_unaryop(expression, *common_params)
-    elif isinstance(expression, ast.Starred):
-        return evaluate_ast(expression.value, *common_params)
-    elif isinstance(expression, ast.BoolOp):
-        # Boolean operation -> evaluate the operation
-        return evaluate_boolop(expression, *common_params)
-    elif isinstance(expression, ast.Break):
-        raise BreakException()
-    elif isinstance(expression, ast.Continue):
-        raise ContinueException()
-    elif isinstance(expression, ast.BinOp):
-        # Binary operation -> execute operation
-        return evaluate_binop(expression, *common_params)
-    elif isinstance(expression, ast.Compare):
-        # Comparison -> evaluate the comparison
-        return evaluate_condition(expression, *common_params)
-    elif isinstance(expression, ast.Lambda):
-        return evaluate_lambda(expression, *common_params)
-    elif isinstance(expression, ast.FunctionDef):
-        return evaluate_function_def(expression, *common_params)
-    elif isinstance(expression, ast.Dict):
-        # Dict -> evaluate all keys and values
-        keys = (evaluate_ast(k, *common_params) for k in expression.keys)
-        values = (evaluate_ast(v, *common_params) for v in expression.values)
-        return dict(zip(keys, values))
-    elif isinstance(expression, ast.Expr):
-        # Expression -> evaluate the content
-        return evaluate_ast(expression.value, *common_params)
-    elif isinstance(expression, ast.For):
-        # For loop -> execute the loop
-        return evaluate_for(expression, *common_params)
-    elif isinstance(expression, ast.FormattedValue):
-        # Formatted value (part of f-string) -> evaluate the content and format it
-        value = evaluate_ast(expression.value, *common_params)
-        # Early return if no format spec
-        if not expression.format_spec:
-            return value
-        # Apply format specification
-        format_spec = evaluate_ast(expression.format_spec, *common_params)
-        return format(value, format_spec)
-    elif isinstance(expression, ast.If):
-        # If -> execute the right branch
-        return evaluate_if(expression, *common_params)
-    elif hasattr(ast, "Index") and isinstance(expression, ast.Index):
-        return evaluate_ast(expression.value, *common_params)
-    elif isinstance(expression, ast.JoinedStr):
-        return "".join([str(evaluate_ast(v, *common_params)) for v in expression.values])
-    elif isinstance(expression, ast.List):
-        # List -> evaluate all elements
-        return [evaluate_ast(elt, *common_params) for elt in expression.elts]
-    elif isinstance(expression, ast.Name):
-        # Name -> pick up the value in the state
-        return evaluate_name(expression, *common_params)
-    elif isinstance(expression, ast.Subscript):
-        # Subscript -> return the value of the indexing
-        return evaluate_subscript(expression, *common_params)
-    elif isinstance(expression, ast.IfExp):
-        test_val = evaluate_ast(expression.test, *common_params)
-        if test_val:
-            return evaluate_ast(expression.body, *common_params)
-        else:
-            return evaluate_ast(expression.orelse, *common_params)
-    elif isinstance(expression, ast.Attribute):
-        return evaluate_attribute(expression, *common_params)
-    elif isinstance(expression, ast.Slice):
-        return slice(
-            evaluate_ast(expression.lower, *common_params) if expression.lower is not None else None,
-            evaluate_ast(expression.upper, *common_params) if expression.upper is not None else None,
-            evaluate_ast(expression.step, *common_params) if expression.step is not None else None,
-        )
-    elif isinstance(expression, ast.While):
-        return evaluate_while(expression, *common_params)
-    elif isinstance(expression, (ast.Import, ast.ImportFrom)):
-        return evaluate_import(expression, state, authorized_imports)
-    elif isinstance(expression, ast.ClassDef):
-        return evaluate_class_def(expression, *common_params)
-    elif isinstance(expression, ast.Try):
-        return evaluate_try(expression, *common_params)
-    elif isinstance(expression, ast.Raise):
-        return evaluate_raise(expression, *common_params)
-    elif isinstance(expression, ast.Assert):
-        return evaluate_assert(expression, *common_params)
-    elif isinstance(expression, ast.With):
-        return evaluate_with(expression, *common_params)
-    elif isinstance(expression, ast.Set):
-        return set((evaluate_ast(elt, *common_params) for elt in expression.elts))
-    elif isinstance(expression, ast.Return):
-        raise ReturnException(evaluate_ast(expression.value, *common_params) if expression.value else None)
-    elif isinstance(expression, ast.Pass):
-        return None
-    elif isinstance(expression, ast.Delete):
-        return evaluate_delete(expression, *common_params)
-    else:
-        # For now we refuse anything else. Let's add things as we need them.
-        raise InterpreterError(f"{expression.__class__.__name__} is not supported.")
+    try:
+        evaluate = expression._evaluate
+    except AttributeError:
+        evaluate = compile_ast(expression)
+    return evaluate(state, static_tools, custom_tools, authorized_imports)
+
+
+_program_cache: OrderedDict[str, ast.Module] = OrderedDict()
+_program_cache_lock = threading.Lock()
+
+
+def parse_code(code: str) -> ast.Module:
+    """
+    Parse code into a module, reusing the already parsed (and compiled) module of identical code.
+    """
+    key = hashlib.sha256(code.encode("utf-8", "surrogatepass")).hexdigest()
+    with _program_cache_lock:
+        module = _program_cache.get(key)
+        if module is not None:
+            _program_cache.move_to_end(key)
+            return module
+
+    module = ast.parse(code)
+    with _program_cache_lock:
+        module = _program_cache.setdefault(key, module)
+        _program_cache.move_to_end(key)
+        while len(_program_cache) > PROGRAM_CACHE_SIZE:
+            _program_cache.popitem(last=False)
+    return module
 
 
 class FinalAnswerException(Exception):
@@ -1495,7 +1995,7 @@ def evaluate_python_code(
             The print outputs will be stored in the state under the key "_print_outputs".
     """
     try:
-        expression = ast.parse(code)
+        expression = parse_code(code)
     except SyntaxError as e:
         raise InterpreterError(
             f"Code parsing failed on line {e.lineno} due to: {type(e).__name__}\n"
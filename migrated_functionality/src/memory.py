@@ -1,8 +1,9 @@
-from dataclasses import asdict, dataclass
+from dataclasses import asdict, dataclass, fields
 from typing import TYPE_CHECKING, Any, Dict, List, TypedDict, Union, Optional
 
 from src.models import ChatMessage, MessageRole
 from src.exception import AgentError
+from src.image_store import ImageHandle
 from src.utils import make_json_serializable
 from src.logger import LogLevel, AgentLogger, Timing, TokenUsage
 
@@ -37,6 +38,22 @@ class MemoryStep:
     def to_messages(self, summary_mode: bool = False) -> list[ChatMessage]:
         raise NotImplementedError
 
+    def messages_key(self) -> tuple:
+        """Values that to_messages depends on. The cached messages are rebuilt when they change."""
+        return tuple(getattr(self, field.name) for field in fields(self))
+
+    def to_cached_messages(self, summary_mode: bool = False) -> list[ChatMessage]:
+        """
+        Same as to_messages, but returns the same ChatMessage objects while the step is unchanged,
+        so that prompts built from them can be rendered incrementally.
+        """
+        cache = self.__dict__.setdefault("_messages_cache", {})
+        key = self.messages_key()
+        cached = cache.get(summary_mode)
+        if cached is None or cached[0] != key:
+            cached = cache[summary_mode] = (key, self.to_messages(summary_mode=summary_mode))
+        return list(cached[1])
+
 
 @dataclass
 class ActionStep(MemoryStep):
@@ -48,7 +65,7 @@ class ActionStep(MemoryStep):
     model_output_message: ChatMessage | None = None
     model_output: str | None = None
     observations: str | None = None
-    observations_images: list["PIL.Image.Image"] | None = None
+    observations_images: list["PIL.Image.Image | ImageHandle"] | None = None
     action_output: Any = None
     token_usage: TokenUsage | None = None
     is_final_answer: bool = False
@@ -64,7 +81,10 @@ class ActionStep(MemoryStep):
             "model_output_message": self.model_output_message.dict() if self.model_output_message else None,
             "model_output": self.model_output,
             "observations": self.observations,
-            "observations_images": [image.tobytes() for image in self.observations_images]
+            "observations_images": [
+                image.digest if isinstance(image, ImageHandle) else image.tobytes()
+                for image in self.observations_images
+            ]
             if self.observations_images
             else None,
             "action_output": make_json_serializable(self.action_output),
@@ -72,6 +92,16 @@ class ActionStep(MemoryStep):
             "is_final_answer": self.is_final_answer,
         }
 
+    def messages_key(self) -> tuple:
+        # Images are compared by identity, the cached messages keep them alive
+        return (
+            self.model_output,
+            tuple(self.tool_calls) if self.tool_calls is not None else None,
+            tuple(id(image) for image in self.observations_images) if self.observations_images else None,
+            self.observations,
+            self.error,
+        )
+
     def to_messages(self, summary_mode: bool = False) -> list[ChatMessage]:
         messages = []
         if self.model_output is not None and not summary_mode:
@@ -140,6 +170,9 @@ class PlanningStep(MemoryStep):
     timing: Timing
     token_usage: TokenUsage | None = None
 
+    def messages_key(self) -> tuple:
+        return (self.plan,)
+
     def to_messages(self, summary_mode: bool = False) -> list[ChatMessage]:
         if summary_mode:
             return []
@@ -154,7 +187,10 @@ class PlanningStep(MemoryStep):
 @dataclass
 class TaskStep(MemoryStep):
     task: str
-    task_images: list["PIL.Image.Image"] | None = None
+    task_images: list["PIL.Image.Image | ImageHandle"] | None = None
+
+    def messages_key(self) -> tuple:
+        return (self.task, tuple(id(image) for image in self.task_images) if self.task_images else None)
 
     def to_messages(self, summary_mode: bool = False) -> list[ChatMessage]:
         content = [{"type": "text", "text": f"New task:\n{self.task}"}]
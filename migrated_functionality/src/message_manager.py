@@ -1,8 +1,12 @@
 from typing import Dict, List, Optional, Any
+from collections import OrderedDict
 from copy import deepcopy
+import threading
+import weakref
 
 from src.models.base import MessageRole, ChatMessage
 from src.utils import encode_image_base64, make_image_url
+from src.image_store import ImageHandle
 
 DEFAULT_ANTHROPIC_MODELS = [
     'claude37-sonnet',
@@ -18,10 +22,225 @@ UNSUPPORTED_TOOL_CHOICE_MODELS = [
     'claude37-sonnet',
 ]
 
+class ImageEncodingCache():
+    """
+    Base64 encodings of images, keyed by image identity.
+
+    Images are encoded once and the encoding is reused for as long as the image
+    object is alive; entries are dropped when the image is garbage collected.
+    Handles to the image store are encoded (and downscaled) by the store itself.
+    """
+    def __init__(self):
+        self._encodings: dict[int, tuple[weakref.ref, str]] = {}
+
+    def encode(self, image: Any, max_size: Optional[int] = None) -> str:
+        """
+        Args:
+            image (`PIL.Image.Image` or `ImageHandle`): Image to encode.
+            max_size (`int`, *optional*): Downscale stored images so that neither side exceeds this size.
+        """
+        if isinstance(image, ImageHandle):
+            return image.base64(max_size=max_size)
+
+        key = id(image)
+        entry = self._encodings.get(key)
+        if entry is not None and entry[0]() is image:
+            return entry[1]
+
+        encoded = encode_image_base64(image)
+        try:
+            ref = weakref.ref(image, lambda _, key=key: self._encodings.pop(key, None))
+        except TypeError:
+            return encoded
+        self._encodings[key] = (ref, encoded)
+        return encoded
+
+    def clear(self):
+        self._encodings.clear()
+
+
+image_encoding_cache = ImageEncodingCache()
+
+
+class ToolSchemaCache():
+    """
+    JSON schemas of tools, per provider format.
+
+    Tools whose name, description and parameters are the attributes of their class share one
+    entry per `Tool` class; other tools get an entry per instance, dropped when the tool is
+    garbage collected. Entries are checked against the tool's current attributes, so assigning
+    new ones rebuilds the schema (modifying `parameters` in place does not).
+    """
+    def __init__(self):
+        self._schemas: dict[tuple[int, bool], tuple[weakref.ref, str, str, Any, dict]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _owner(tool: Any) -> Any:
+        tool_class = type(tool)
+        if (
+            getattr(tool_class, "parameters", None) is tool.parameters
+            and getattr(tool_class, "name", None) == tool.name
+            and getattr(tool_class, "description", None) == tool.description
+        ):
+            return tool_class
+        return tool
+
+    def get(self, tool: Any, anthropic: bool) -> dict:
+        owner = self._owner(tool)
+        key = (id(owner), anthropic)
+        entry = self._schemas.get(key)
+        if (
+            entry is not None
+            and entry[0]() is owner
+            and entry[1] == tool.name
+            and entry[2] == tool.description
+            and entry[3] is tool.parameters
+        ):
+            return entry[4]
+
+        schema = self._build(tool, anthropic)
+        try:
+            ref = weakref.ref(owner, lambda _, key=key: self._schemas.pop(key, None))
+        except TypeError:
+            return schema
+        with self._lock:
+            self._schemas[key] = (ref, tool.name, tool.description, tool.parameters, schema)
+        return schema
+
+    @staticmethod
+    def _build(tool: Any, anthropic: bool) -> dict:
+        properties = deepcopy(tool.parameters['properties'])
+
+        required = []
+        for key, value in properties.items():
+            if value["type"] == "any":
+                value["type"] = "string"
+            if not ("nullable" in value and value["nullable"]):
+                required.append(key)
+
+        if anthropic:
+            return {
+                "name": tool.name,
+                "description": tool.description,
+                "input_schema": {
+                    "type": "object",
+                    "properties": properties,
+                    "required": required,
+                },
+            }
+        else:
+            return {
+                "type": "function",
+                "function": {
+                    "name": tool.name,
+                    "description": tool.description,
+                    "parameters": {
+                        "type": "object",
+                        "properties": properties,
+                        "required": required,
+                    },
+                },
+            }
+
+    def clear(self):
+        with self._lock:
+            self._schemas.clear()
+
+
+tool_schema_cache = ToolSchemaCache()
+
+
+class ToolsPayload():
+    """
+    Tool schemas of one tool set in a provider's format, built once per tool set.
+
+    The schemas are shared with the schema cache and must be treated as read-only.
+    """
+    def __init__(self, tools: tuple[Any, ...], schemas: list[dict]):
+        self.tool_objects = tools
+        self.tools = schemas
+
+
+def _copy_message(message: dict[str, Any]) -> dict[str, Any]:
+    """Copy a rendered message so that merging into it does not affect other references."""
+    return {key: list(value) if isinstance(value, list) else value for key, value in message.items()}
+
+
+class RenderedPrompt():
+    """
+    Append-only rendering of one conversation.
+
+    Keeps the input messages already rendered and, after each of them, a
+    checkpoint of the output (its length and a copy of its last message, which
+    later messages with the same role may be merged into). A new message list
+    that shares a prefix with the rendered one only renders the messages after
+    that prefix.
+    """
+    def __init__(self):
+        self.inputs: list[tuple[ChatMessage, Any, Any, int | None]] = []
+        self.checkpoints: list[tuple[int, dict[str, Any]]] = []
+        self.output: list[dict[str, Any]] = []
+
+    @staticmethod
+    def _fingerprint(message: ChatMessage) -> tuple[ChatMessage, Any, Any, int | None]:
+        content = message.content
+        return (message, message.role, content, len(content) if isinstance(content, list) else None)
+
+    def _is_rendered(self, index: int, message: ChatMessage) -> bool:
+        rendered, role, content, length = self.inputs[index]
+        return (
+            rendered is message
+            and role == message.role
+            and content is message.content
+            and length == (len(content) if isinstance(content, list) else None)
+        )
+
+    def rewind(self, message_list: list[ChatMessage]) -> int:
+        """
+        Drop everything rendered after the prefix shared with `message_list`.
+
+        Returns:
+            `int`: Number of messages of `message_list` that are already rendered.
+        """
+        limit = min(len(self.inputs), len(message_list))
+        shared = 0
+        while shared < limit and self._is_rendered(shared, message_list[shared]):
+            shared += 1
+
+        if shared < len(self.inputs):
+            del self.inputs[shared:]
+            del self.checkpoints[shared:]
+            if shared == 0:
+                self.output = []
+            else:
+                length, last_message = self.checkpoints[-1]
+                del self.output[length:]
+                self.output[-1] = _copy_message(last_message)
+        elif self.output:
+            # The last message may be returned to a caller already, merge into a copy
+            self.output[-1] = _copy_message(self.output[-1])
+        return shared
+
+    def record(self, message: ChatMessage):
+        self.inputs.append(self._fingerprint(message))
+        self.checkpoints.append((len(self.output), _copy_message(self.output[-1])))
+
+
 class MessageManager():
-    def __init__(self, model_id: str, api_type: str = "chat/completions"):
+    def __init__(self,
+            model_id: str,
+            api_type: str = "chat/completions",
+            prompt_cache_size: int = 8,
+            max_image_size: Optional[int] = None,
+    ):
         self.model_id = model_id
         self.api_type = api_type
+        self.max_image_size = max_image_size
+        self.prompt_cache_size = prompt_cache_size
+        self._prompt_cache: OrderedDict[tuple, RenderedPrompt] = OrderedDict()
+        self._prompt_cache_lock = threading.Lock()
+        self._tools_payloads: OrderedDict[tuple, ToolsPayload] = OrderedDict()
 
     def get_clean_message_list(self,
             message_list: list[ChatMessage],
@@ -34,6 +253,10 @@ class MessageManager():
         Creates a list of messages to give as input to the LLM. These messages are dictionaries and chat template compatible with transformers LLM chat template.
         Subsequent messages with the same role will be concatenated to a single message.
 
+        Rendering is incremental: when `message_list` starts with the same message objects as a previous call,
+        only the new messages are rendered. Messages must not be modified in place once rendered, and the
+        returned dictionaries must be treated as read-only.
+
         Args:
             message_list (`list[dict[str, str]]`): List of chat messages.
             role_conversions (`dict[MessageRole, MessageRole]`, *optional* ): Mapping to convert roles.
@@ -42,210 +265,250 @@ class MessageManager():
         """
         api_type = api_type or self.api_type
         if api_type == "responses":
-            return self._get_responses_message_list(
-                message_list, role_conversions, convert_images_to_image_urls, flatten_messages_as_text
-            )
+            render, merge = self._render_responses_message, self._merge_responses_message
         else:
-            return self._get_chat_completions_message_list(
-                message_list, role_conversions, convert_images_to_image_urls, flatten_messages_as_text
-            )
+            render, merge = self._render_chat_completions_message, self._merge_chat_completions_message
 
-    def _get_chat_completions_message_list(self,
-            message_list: list[ChatMessage],
+        if not message_list:
+            return []
+
+        options = (api_type, tuple(role_conversions.items()), convert_images_to_image_urls, flatten_messages_as_text)
+        key = (id(message_list[0]), options)
+        with self._prompt_cache_lock:
+            prompt = self._prompt_cache.get(key)
+            if prompt is None or not prompt.inputs or prompt.inputs[0][0] is not message_list[0]:
+                prompt = RenderedPrompt()
+                self._prompt_cache[key] = prompt
+                while len(self._prompt_cache) > self.prompt_cache_size:
+                    self._prompt_cache.popitem(last=False)
+            else:
+                self._prompt_cache.move_to_end(key)
+
+            try:
+                for message in message_list[prompt.rewind(message_list):]:
+                    rendered = render(message, role_conversions, convert_images_to_image_urls, flatten_messages_as_text)
+                    merge(prompt.output, rendered, flatten_messages_as_text)
+                    prompt.record(message)
+            except Exception:
+                self._prompt_cache.pop(key, None)
+                raise
+            return list(prompt.output)
+
+    def clear_prompt_cache(self):
+        with self._prompt_cache_lock:
+            self._prompt_cache.clear()
+
+    def _convert_role(self,
+            message: ChatMessage,
+            role_conversions: dict[MessageRole, MessageRole] | dict[str, str],
+    ) -> MessageRole | str:
+        role = message.role
+        if role not in MessageRole.roles():
+            raise ValueError(f"Incorrect role {role}, only {MessageRole.roles()} are supported for now.")
+        return role_conversions.get(role, role)
+
+    def _render_chat_completions_message(self,
+            message: ChatMessage,
             role_conversions: dict[MessageRole, MessageRole] | dict[str, str] = {},
             convert_images_to_image_urls: bool = False,
             flatten_messages_as_text: bool = False,
-    ) -> list[dict[str, Any]]:
+    ) -> dict[str, Any]:
         """
-        Creates a list of messages in chat completions format.
+        Renders a single message in chat completions format, encoding its images.
         """
-        output_message_list: list[dict[str, Any]] = []
-        message_list = deepcopy(message_list)  # Avoid modifying the original list
-        for message in message_list:
-            role = message.role
-            if role not in MessageRole.roles():
-                raise ValueError(f"Incorrect role {role}, only {MessageRole.roles()} are supported for now.")
-
-            if role in role_conversions:
-                message.role = role_conversions[role]  # type: ignore
-            # encode images if needed
-            if isinstance(message.content, list):
-                for element in message.content:
-                    assert isinstance(element, dict), "Error: this element should be a dict:" + str(element)
-                    if element["type"] == "image":
-                        assert not flatten_messages_as_text, f"Cannot use images with {flatten_messages_as_text=}"
-                        if convert_images_to_image_urls:
-                            element.update(
-                                {
-                                    "type": "image_url",
-                                    "image_url": {"url": make_image_url(encode_image_base64(element.pop("image")))},
-                                }
-                            )
-                        else:
-                            element["image"] = encode_image_base64(element["image"])
-
-            if len(output_message_list) > 0 and message.role == output_message_list[-1]["role"]:
-                assert isinstance(message.content, list), "Error: wrong content:" + str(message.content)
-                if flatten_messages_as_text:
-                    output_message_list[-1]["content"] += "\n" + message.content[0]["text"]
-                else:
-                    for el in message.content:
-                        if el["type"] == "text" and output_message_list[-1]["content"][-1]["type"] == "text":
-                            # Merge consecutive text messages rather than creating new ones
-                            output_message_list[-1]["content"][-1]["text"] += "\n" + el["text"]
-                        else:
-                            output_message_list[-1]["content"].append(el)
+        role = self._convert_role(message, role_conversions)
+        content = message.content
+        # encode images if needed
+        if isinstance(content, list):
+            rendered_content = []
+            for element in content:
+                assert isinstance(element, dict), "Error: this element should be a dict:" + str(element)
+                if element["type"] == "image":
+                    assert not flatten_messages_as_text, f"Cannot use images with {flatten_messages_as_text=}"
+                    encoded = image_encoding_cache.encode(element["image"], max_size=self.max_image_size)
+                    if convert_images_to_image_urls:
+                        element = {key: value for key, value in element.items() if key != "image"}
+                        element.update(
+                            {
+                                "type": "image_url",
+                                "image_url": {"url": make_image_url(encoded)},
+                            }
+                        )
+                    else:
+                        element = {**element, "image": encoded}
+                rendered_content.append(element)
+            content = rendered_content
+        return {"role": role, "content": content}
+
+    def _merge_chat_completions_message(self,
+            output_message_list: list[dict[str, Any]],
+            message: dict[str, Any],
+            flatten_messages_as_text: bool = False,
+    ):
+        """
+        Appends a rendered chat completions message, merging it into the previous one if they share a role.
+        """
+        content = message["content"]
+        if len(output_message_list) > 0 and message["role"] == output_message_list[-1]["role"]:
+            assert isinstance(content, list), "Error: wrong content:" + str(content)
+            if flatten_messages_as_text:
+                output_message_list[-1]["content"] += "\n" + content[0]["text"]
             else:
-                if flatten_messages_as_text:
-                    content = message.content[0]["text"]
-                else:
-                    content = message.content
-                output_message_list.append(
-                    {
-                        "role": message.role,
-                        "content": content,
-                    }
-                )
-        return output_message_list
+                last_content = output_message_list[-1]["content"]
+                for el in content:
+                    if el["type"] == "text" and last_content[-1]["type"] == "text":
+                        # Merge consecutive text messages rather than creating new ones
+                        last_content[-1] = {**last_content[-1], "text": last_content[-1]["text"] + "\n" + el["text"]}
+                    else:
+                        last_content.append(el)
+        else:
+            if flatten_messages_as_text:
+                content = content[0]["text"]
+            output_message_list.append(
+                {
+                    "role": message["role"],
+                    "content": content,
+                }
+            )
 
-    def _get_responses_message_list(self,
-            message_list: list[ChatMessage],
+    def _render_responses_message(self,
+            message: ChatMessage,
             role_conversions: dict[MessageRole, MessageRole] | dict[str, str] = {},
             convert_images_to_image_urls: bool = False,
             flatten_messages_as_text: bool = False,
-    ) -> list[dict[str, Any]]:
+    ) -> dict[str, Any]:
         """
-        Creates a list of messages in responses format (OpenAI responses API).
+        Renders a single message in responses format (OpenAI responses API), encoding its images.
         """
-        output_message_list: list[dict[str, Any]] = []
-        message_list = deepcopy(message_list)  # Avoid modifying the original list
-        
-        for message in message_list:
-            role = message.role
-            if role not in MessageRole.roles():
-                raise ValueError(f"Incorrect role {role}, only {MessageRole.roles()} are supported for now.")
-
-            if role in role_conversions:
-                message.role = role_conversions[role]  # type: ignore
-            
-            # Handle content processing
-            if isinstance(message.content, list):
-                # Process each content element
-                processed_content = []
-                for element in message.content:
-                    assert isinstance(element, dict), "Error: this element should be a dict:" + str(element)
-                    
-                    if element["type"] == "image":
-                        assert not flatten_messages_as_text, f"Cannot use images with {flatten_messages_as_text=}"
-                        if convert_images_to_image_urls:
-                            processed_content.append({
-                                "type": "image_url",
-                                "image_url": {"url": make_image_url(encode_image_base64(element.pop("image")))},
-                            })
-                        else:
-                            processed_content.append({
-                                "type": "image",
-                                "image": encode_image_base64(element["image"])
-                            })
-                    elif element["type"] == "text":
-                        processed_content.append(element)
+        role = self._convert_role(message, role_conversions)
+
+        # Handle content processing
+        if isinstance(message.content, list):
+            # Process each content element
+            processed_content = []
+            for element in message.content:
+                assert isinstance(element, dict), "Error: this element should be a dict:" + str(element)
+
+                if element["type"] == "image":
+                    assert not flatten_messages_as_text, f"Cannot use images with {flatten_messages_as_text=}"
+                    encoded = image_encoding_cache.encode(element["image"], max_size=self.max_image_size)
+                    if convert_images_to_image_urls:
+                        processed_content.append({
+                            "type": "image_url",
+                            "image_url": {"url": make_image_url(encoded)},
+                        })
                     else:
-                        processed_content.append(element)
-                
-                content = processed_content
-            else:
-                # Handle string content
-                if flatten_messages_as_text:
-                    content = message.content
+                        processed_content.append({
+                            "type": "image",
+                            "image": encoded
+                        })
                 else:
-                    content = [{"type": "text", "text": message.content}] if message.content else []
-
-            # Handle tool calls for responses format
-            tool_calls = None
-            if message.tool_calls:
-                tool_calls = []
-                for tool_call in message.tool_calls:
-                    tool_calls.append({
-                        "id": tool_call.id,
-                        "type": tool_call.type,
-                        "function": {
-                            "name": tool_call.function.name,
-                            "arguments": tool_call.function.arguments,
-                            "description": tool_call.function.description
-                        }
-                    })
-
-            # Create message in responses format
-            message_dict = {
-                "role": message.role,
-                "content": content,
-            }
-            
-            if tool_calls:
-                message_dict["tool_calls"] = tool_calls
-
-            # Merge consecutive messages with same role
-            if len(output_message_list) > 0 and message.role == output_message_list[-1]["role"]:
-                if flatten_messages_as_text:
-                    if isinstance(content, list) and content and content[0]["type"] == "text":
-                        output_message_list[-1]["content"] += "\n" + content[0]["text"]
-                    else:
-                        output_message_list[-1]["content"] += "\n" + str(content)
+                    processed_content.append(element)
+
+            content = processed_content
+        else:
+            # Handle string content
+            if flatten_messages_as_text:
+                content = message.content
+            else:
+                content = [{"type": "text", "text": message.content}] if message.content else []
+
+        # Create message in responses format
+        message_dict = {
+            "role": role,
+            "content": content,
+        }
+
+        # Handle tool calls for responses format
+        if message.tool_calls:
+            message_dict["tool_calls"] = [
+                {
+                    "id": tool_call.id,
+                    "type": tool_call.type,
+                    "function": {
+                        "name": tool_call.function.name,
+                        "arguments": tool_call.function.arguments,
+                        "description": tool_call.function.description
+                    }
+                }
+                for tool_call in message.tool_calls
+            ]
+        return message_dict
+
+    def _merge_responses_message(self,
+            output_message_list: list[dict[str, Any]],
+            message: dict[str, Any],
+            flatten_messages_as_text: bool = False,
+    ):
+        """
+        Appends a rendered responses message, merging it into the previous one if they share a role.
+        """
+        # Merge consecutive messages with same role
+        if len(output_message_list) > 0 and message["role"] == output_message_list[-1]["role"]:
+            content = message["content"]
+            tool_calls = message.get("tool_calls")
+            if flatten_messages_as_text:
+                if isinstance(content, list) and content and content[0]["type"] == "text":
+                    output_message_list[-1]["content"] += "\n" + content[0]["text"]
                 else:
-                    # Merge content lists
-                    if isinstance(output_message_list[-1]["content"], list) and isinstance(content, list):
-                        output_message_list[-1]["content"].extend(content)
-                    else:
-                        output_message_list[-1]["content"] = content
-                
-                # Merge tool calls
-                if tool_calls and "tool_calls" in output_message_list[-1]:
-                    output_message_list[-1]["tool_calls"].extend(tool_calls)
-                elif tool_calls:
-                    output_message_list[-1]["tool_calls"] = tool_calls
+                    output_message_list[-1]["content"] += "\n" + str(content)
             else:
-                output_message_list.append(message_dict)
+                # Merge content lists
+                if isinstance(output_message_list[-1]["content"], list) and isinstance(content, list):
+                    output_message_list[-1]["content"].extend(content)
+                else:
+                    output_message_list[-1]["content"] = content
+
+            # Merge tool calls
+            if tool_calls and "tool_calls" in output_message_list[-1]:
+                output_message_list[-1]["tool_calls"].extend(tool_calls)
+            elif tool_calls:
+                output_message_list[-1]["tool_calls"] = tool_calls
+        else:
+            output_message_list.append(message)
 
-        return output_message_list
+    def _is_anthropic(self, model_id: Optional[str] = None) -> bool:
+        return (model_id or self.model_id).split("/")[-1] in DEFAULT_ANTHROPIC_MODELS
 
     def get_tool_json_schema(self,
                              tool: Any,
                              model_id: Optional[str] = None
                              ) -> Dict:
-        properties = deepcopy(tool.parameters['properties'])
+        """
+        Get the JSON schema of a tool in the format of the model's provider.
 
-        required = []
-        for key, value in properties.items():
-            if value["type"] == "any":
-                value["type"] = "string"
-            if not ("nullable" in value and value["nullable"]):
-                required.append(key)
+        Schemas are cached (see `ToolSchemaCache`) and shared: the returned dictionary must be treated as read-only.
+        """
+        return tool_schema_cache.get(tool, self._is_anthropic(model_id))
 
-        model_id = model_id.split("/")[-1]
+    def get_tools_payload(self,
+                          tools: list[Any],
+                          model_id: Optional[str] = None,
+                          ) -> ToolsPayload:
+        """
+        Get the schemas of a tool set in the format of the model's provider.
 
-        if model_id in DEFAULT_ANTHROPIC_MODELS:
-            return {
-                "name": tool.name,
-                "description": tool.description,
-                "input_schema": {
-                    "type": "object",
-                    "properties": properties,
-                    "required": required,
-                },
-            }
-        else:
-            return {
-                "type": "function",
-                "function": {
-                    "name": tool.name,
-                    "description": tool.description,
-                    "parameters": {
-                        "type": "object",
-                        "properties": properties,
-                        "required": required,
-                    },
-                },
-            }
+        The payload of the last few tool sets is kept, so an agent calling the model with the same tools at
+        every step reuses the same payload until one of its tools changes.
+        """
+        anthropic = self._is_anthropic(model_id)
+        schemas = [tool_schema_cache.get(tool, anthropic) for tool in tools]
+        key = (anthropic, tuple(id(tool) for tool in tools))
+        with self._prompt_cache_lock:
+            payload = self._tools_payloads.get(key)
+            if (
+                payload is not None
+                and len(payload.tools) == len(schemas)
+                and all(cached is schema for cached, schema in zip(payload.tools, schemas))
+            ):
+                self._tools_payloads.move_to_end(key)
+                return payload
+
+            payload = ToolsPayload(tuple(tools), schemas)
+            self._tools_payloads[key] = payload
+            while len(self._tools_payloads) > max(self.prompt_cache_size, 1):
+                self._tools_payloads.popitem(last=False)
+        return payload
 
     def get_clean_completion_kwargs(self, completion_kwargs: Dict[str, Any]):
 
@@ -68,6 +68,7 @@ from src.logger import (
 )
 
 from src.tools import Tool
+from src.image_store import image_store
 from src.exception import (
     AgentError,
     AgentGenerationError,
@@ -414,6 +415,8 @@ You have been provided with these additional arguments, that you can access usin
             level=LogLevel.INFO,
             title=self.name if hasattr(self, "name") else None,
         )
+        # Keep only handles to the images in memory, the image store holds their content
+        images = image_store.put_all(images)
         self.memory.steps.append(TaskStep(task=self.task, task_images=images))
 
         if getattr(self, "python_executor", None):
@@ -543,6 +546,8 @@ You have been provided with these additional arguments, that you can access usin
             callback(memory_step) if len(inspect.signature(callback).parameters) == 1 else callback(
                 memory_step, agent=self
             )
+        # Callbacks may attach new observation images (e.g. screenshots)
+        memory_step.observations_images = image_store.put_all(memory_step.observations_images)
 
     def _handle_max_steps_reached(self, task: str, images: list["PIL.Image.Image"]) -> Any:
         action_step_start_time = time.time()
@@ -699,9 +704,9 @@ You have been provided with these additional arguments, that you can access usin
         that can be used as input to the LLM. Adds a number of keywords (such as PLAN, error, etc) to help
         the LLM.
         """
-        messages = self.memory.system_prompt.to_messages(summary_mode=summary_mode)
+        messages = self.memory.system_prompt.to_cached_messages(summary_mode=summary_mode)
         for memory_step in self.memory.steps:
-            messages.extend(memory_step.to_messages(summary_mode=summary_mode))
+            messages.extend(memory_step.to_cached_messages(summary_mode=summary_mode))
         return messages
 
     def _step_stream(self, memory_step: ActionStep) -> Generator[ChatMessageStreamDelta | ActionOutput | ToolOutput]:
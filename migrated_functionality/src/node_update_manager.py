@@ -6,13 +6,12 @@ This service provides different update strategies based on the agent type:
 - LightweightSentientAgent: Deferred updates for minimal overhead
 """
 
-import threading
 import asyncio
+import time
+from bisect import bisect_left
 from typing import Dict, Any, List, Tuple, Optional, TYPE_CHECKING
 from datetime import datetime
-from collections import defaultdict
 from loguru import logger
-import json
 
 if TYPE_CHECKING:
     from sentientresearchagent.hierarchical_agent_framework.node.task_node import TaskNode
@@ -29,6 +28,49 @@ class UpdateEntry:
         self.timestamp = timestamp
 
 
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (milliseconds)."""
+    
+    BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+    
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+    
+    def observe(self, value_ms: float) -> None:
+        self.counts[bisect_left(self.BUCKETS_MS, value_ms)] += 1
+        self.count += 1
+        self.total_ms += value_ms
+        self.max_ms = max(self.max_ms, value_ms)
+    
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.BUCKETS_MS, self.counts):
+            seen += count
+            if seen >= rank:
+                return float(bound)
+        return self.max_ms
+    
+    def snapshot(self) -> Dict[str, Any]:
+        buckets = {f"le_{bound}ms": count for bound, count in zip(self.BUCKETS_MS, self.counts)}
+        buckets["inf"] = self.counts[-1]
+        return {
+            "buckets": buckets,
+            "count": self.count,
+            "mean_ms": self.total_ms / self.count if self.count else 0.0,
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "p99_ms": self.quantile(0.99),
+            "max_ms": self.max_ms
+        }
+
+
 class NodeUpdateManager:
     """
     Manages node updates with different strategies based on agent type.
@@ -37,6 +79,14 @@ class NodeUpdateManager:
     - REALTIME: Immediate updates with optimization (ProfiledSentientAgent)
     - DEFERRED: Queue updates until after LLM calls (LightweightSentientAgent)
     - STANDARD: Current behavior without optimization
+    
+    The manager lives on a single event loop. Coalesced and deferred updates
+    are keyed by (node id, update type), so repeated updates of a node within
+    a window merge into one entry, and each flush sends all pending entries
+    as one "node_update_batch" broadcast. Broadcasts are sent by one flush task
+    at a time: while a slow consumer is being sent to, new updates keep
+    coalescing, and once `max_pending_updates` entries are pending, producers
+    wait for the next flush.
     """
     
     def __init__(
@@ -46,7 +96,8 @@ class NodeUpdateManager:
         enable_coalescing: bool = True,
         coalescing_window_ms: int = 50,
         knowledge_store: Optional["KnowledgeStore"] = None,
-        websocket_handler: Optional[Any] = None
+        websocket_handler: Optional[Any] = None,
+        max_pending_updates: int = 5000
     ):
         """
         Initialize NodeUpdateManager.
@@ -58,6 +109,8 @@ class NodeUpdateManager:
             coalescing_window_ms: Window for coalescing updates
             knowledge_store: Knowledge store instance
             websocket_handler: WebSocket handler for broadcasts
+            max_pending_updates: Coalesced entries after which producers wait
+                for a flush
         """
         self.execution_strategy = execution_strategy
         self.broadcast_mode = broadcast_mode
@@ -65,31 +118,33 @@ class NodeUpdateManager:
         self.coalescing_window_ms = coalescing_window_ms
         self.knowledge_store = knowledge_store
         self.websocket_handler = websocket_handler
+        self.max_pending_updates = max_pending_updates
         
-        # Thread-local storage for deferred updates
-        self._thread_local = threading.local()
+        # Deferred updates, coalesced by (node id, update type)
+        self._deferred: Dict[Tuple[str, str], UpdateEntry] = {}
         
         # Coalescing state
-        self._coalesce_buffer: Dict[str, List[UpdateEntry]] = defaultdict(list)
-        self._coalesce_lock = threading.Lock()
-        self._coalesce_task: Optional[asyncio.Task] = None
+        self._pending: Dict[Tuple[str, str], UpdateEntry] = {}
+        self._pending_since: Optional[float] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._space_available = asyncio.Event()
+        self._space_available.set()
         
         # Statistics
         self._stats = {
             "updates_processed": 0,
             "updates_coalesced": 0,
             "updates_deferred": 0,
-            "batches_flushed": 0
+            "batches_flushed": 0,
+            "broadcasts_sent": 0,
+            "backpressure_waits": 0,
+            "send_errors": 0
         }
+        self._flush_latency = LatencyHistogram()
+        self._send_latency = LatencyHistogram()
         
         logger.info(f"NodeUpdateManager initialized: strategy={execution_strategy}, broadcast={broadcast_mode}")
     
-    def _get_deferred_queue(self) -> List[UpdateEntry]:
-        """Get thread-local deferred queue."""
-        if not hasattr(self._thread_local, 'deferred_queue'):
-            self._thread_local.deferred_queue = []
-        return self._thread_local.deferred_queue
-    
     async def update_node_state(
         self, 
         node: "TaskNode", 
@@ -126,8 +181,7 @@ class NodeUpdateManager:
     
     async def _defer_update(self, entry: UpdateEntry) -> None:
         """Defer update for later processing (LightweightAgent)."""
-        queue = self._get_deferred_queue()
-        queue.append(entry)
+        self._coalesce_into(self._deferred, entry)
         self._stats["updates_deferred"] += 1
         logger.debug(f"Deferred {entry.update_type} update for node {entry.node_id}")
     
@@ -141,15 +195,19 @@ class NodeUpdateManager:
         - Compressed payloads
         """
         if self.enable_coalescing and entry.update_type in ["status", "progress"]:
+            # Backpressure: wait for a flush to drain the buffer. Other producers woken by the
+            # same flush may fill it up again first.
+            while len(self._pending) >= self.max_pending_updates:
+                self._stats["backpressure_waits"] += 1
+                self._ensure_flush_task()
+                self._space_available.clear()
+                await self._space_available.wait()
+            
             # Add to coalesce buffer
-            with self._coalesce_lock:
-                self._coalesce_buffer[entry.node_id].append(entry)
-                
-                # Start coalesce timer if not running
-                if not self._coalesce_task or self._coalesce_task.done():
-                    self._coalesce_task = asyncio.create_task(
-                        self._coalesce_timer()
-                    )
+            if not self._pending:
+                self._pending_since = time.perf_counter()
+            self._coalesce_into(self._pending, entry)
+            self._ensure_flush_task()
             
             self._stats["updates_coalesced"] += 1
         else:
@@ -170,92 +228,110 @@ class NodeUpdateManager:
         if self.broadcast_mode == "full" and self.websocket_handler:
             await self._broadcast_update(node, entry)
     
-    async def _coalesce_timer(self) -> None:
-        """Timer for coalescing updates."""
-        await asyncio.sleep(self.coalescing_window_ms / 1000.0)
+    def _coalesce_into(self, buffer: Dict[Tuple[str, str], UpdateEntry], entry: UpdateEntry) -> None:
+        """Merge an entry into the pending entry of the same node and update type."""
+        key = (entry.node_id, entry.update_type)
+        pending = buffer.get(key)
+        if pending is None:
+            buffer[key] = UpdateEntry(entry.node_id, entry.update_type, dict(entry.data), entry.timestamp)
+            return
         
-        # Process coalesced updates
-        with self._coalesce_lock:
-            if self._coalesce_buffer:
+        old_status = pending.data.get("old_status")
+        pending.data.update(entry.data)
+        if entry.update_type == "status" and old_status is not None:
+            # Coalesced status changes go from the first old status to the last new one
+            pending.data["old_status"] = old_status
+        pending.timestamp = entry.timestamp
+    
+    def _ensure_flush_task(self) -> None:
+        """Start the flush task if it is not running."""
+        if not self._flush_task or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
+    
+    async def _flush_loop(self) -> None:
+        """Flush coalesced updates once per window while updates keep arriving."""
+        while self._pending:
+            await asyncio.sleep(self.coalescing_window_ms / 1000.0)
+            try:
                 await self._flush_coalesced_updates()
+            except Exception as e:
+                # The batch is lost, but later updates must still be flushed
+                self._stats["send_errors"] += 1
+                logger.error(f"Failed to broadcast coalesced node updates: {e}")
     
     async def _flush_coalesced_updates(self) -> None:
-        """Flush coalesced updates."""
-        for node_id, entries in self._coalesce_buffer.items():
-            if entries:
-                # Combine updates
-                combined_entry = self._combine_entries(entries)
-                
-                # Apply combined update
-                # Note: We need the actual node object here
-                # This is a limitation we'll address in integration
-                if self.websocket_handler and self.broadcast_mode != "none":
-                    await self._broadcast_combined_update(node_id, combined_entry)
-        
-        self._coalesce_buffer.clear()
-    
-    def _combine_entries(self, entries: List[UpdateEntry]) -> UpdateEntry:
-        """Combine multiple update entries into one."""
+        """Flush coalesced updates as one batch."""
+        entries = list(self._pending.values())
+        pending_since = self._pending_since
+        self._pending = {}
+        self._pending_since = None
+        self._space_available.set()
         if not entries:
-            return None
-            
-        # Take the latest entry as base
-        combined = entries[-1]
+            return
         
-        # Merge data from all entries
-        merged_data = {}
-        for entry in entries:
-            merged_data.update(entry.data)
+        # Note: We need the actual node objects to update the knowledge store
+        # This is a limitation we'll address in integration
+        if self.websocket_handler and self.broadcast_mode != "none":
+            await self._broadcast_batch(entries)
         
-        combined.data = merged_data
-        return combined
+        self._stats["batches_flushed"] += 1
+        if pending_since is not None:
+            self._flush_latency.observe((time.perf_counter() - pending_since) * 1000)
+    
+    async def flush(self) -> None:
+        """Flush pending coalesced updates now."""
+        await self._flush_coalesced_updates()
+    
+    def _entry_payload(self, entry: UpdateEntry) -> Dict[str, Any]:
+        data = entry.data
+        # Differential update - only send what changed
+        if entry.update_type == "status":
+            data = {
+                "status": data.get("new_status"),
+                "old_status": data.get("old_status")
+            }
+        return {
+            "node_id": entry.node_id,
+            "update_type": entry.update_type,
+            "data": data,
+            "timestamp": entry.timestamp.isoformat()
+        }
     
     async def _broadcast_update(self, node: "TaskNode", entry: UpdateEntry) -> None:
         """Broadcast a single update."""
         if self.broadcast_mode == "none":
             return
             
-        payload = {
-            "type": f"node_{entry.update_type}",
-            "node_id": entry.node_id,
-            "data": entry.data,
-            "timestamp": entry.timestamp.isoformat()
-        }
-        
-        # Differential update - only send what changed
-        if entry.update_type == "status":
-            payload["data"] = {
-                "status": entry.data.get("new_status"),
-                "old_status": entry.data.get("old_status")
-            }
-        
-        # Send via websocket
-        if self.websocket_handler:
-            # Check if this is OptimizedBroadcastService
-            if hasattr(self.websocket_handler, 'broadcast_to_room'):
-                # Use optimized broadcast
-                await self.websocket_handler.broadcast_to_room("default", payload)
-            else:
-                # Fallback to direct emit
-                await self.websocket_handler.emit("node_update", payload)
+        payload = self._entry_payload(entry)
+        payload["type"] = f"node_{entry.update_type}"
+        del payload["update_type"]
+        await self._send(payload)
     
-    async def _broadcast_combined_update(self, node_id: str, entry: UpdateEntry) -> None:
-        """Broadcast a combined update."""
+    async def _broadcast_batch(self, entries: List[UpdateEntry]) -> None:
+        """Broadcast coalesced updates of many nodes in one message."""
         payload = {
             "type": "node_update_batch",
-            "node_id": node_id,
-            "updates": entry.data,
-            "timestamp": entry.timestamp.isoformat()
+            "updates": [self._entry_payload(entry) for entry in entries],
+            "count": len(entries),
+            "timestamp": datetime.now().isoformat()
         }
+        await self._send(payload)
+    
+    async def _send(self, payload: Dict[str, Any]) -> None:
+        """Send a payload via the websocket handler."""
+        if not self.websocket_handler:
+            return
         
-        if self.websocket_handler:
-            # Check if this is OptimizedBroadcastService
-            if hasattr(self.websocket_handler, 'broadcast_to_room'):
-                # Use optimized broadcast
-                await self.websocket_handler.broadcast_to_room("default", payload)
-            else:
-                # Fallback to direct emit
-                await self.websocket_handler.emit("node_update", payload)
+        start = time.perf_counter()
+        # Check if this is OptimizedBroadcastService
+        if hasattr(self.websocket_handler, 'broadcast_to_room'):
+            # Use optimized broadcast
+            await self.websocket_handler.broadcast_to_room("default", payload)
+        else:
+            # Fallback to direct emit
+            await self.websocket_handler.emit("node_update", payload)
+        self._send_latency.observe((time.perf_counter() - start) * 1000)
+        self._stats["broadcasts_sent"] += 1
     
     async def flush_deferred_updates(self) -> None:
         """
@@ -263,30 +339,32 @@ class NodeUpdateManager:
         
         This is called after LLM operations complete.
         """
-        queue = self._get_deferred_queue()
-        if not queue:
+        if not self._deferred:
             return
-            
-        logger.info(f"Flushing {len(queue)} deferred updates")
         
-        # Group by node for efficient knowledge store updates
-        updates_by_node: Dict[str, List[UpdateEntry]] = defaultdict(list)
-        for entry in queue:
-            updates_by_node[entry.node_id].append(entry)
+        entries = list(self._deferred.values())
+        self._deferred = {}
+        logger.info(f"Flushing {len(entries)} deferred updates")
         
         # Batch update knowledge store
         if self.knowledge_store:
             # Note: We need node objects here
             # This will be resolved in integration
-            logger.debug(f"Would batch update {len(updates_by_node)} nodes in knowledge store")
+            logger.debug(f"Would batch update {len({entry.node_id for entry in entries})} nodes in knowledge store")
+        
+        if self.websocket_handler and self.broadcast_mode != "none":
+            await self._broadcast_batch(entries)
         
-        # Clear the queue
-        queue.clear()
         self._stats["batches_flushed"] += 1
     
-    def get_stats(self) -> Dict[str, int]:
-        """Get update manager statistics."""
-        return self._stats.copy()
+    def get_stats(self) -> Dict[str, Any]:
+        """Get update manager statistics, including flush and send latency histograms."""
+        stats: Dict[str, Any] = self._stats.copy()
+        stats["pending_updates"] = len(self._pending)
+        stats["deferred_updates"] = len(self._deferred)
+        stats["flush_latency_ms"] = self._flush_latency.snapshot()
+        stats["send_latency_ms"] = self._send_latency.snapshot()
+        return stats
     
     @classmethod
     def from_config(cls, config: "ExecutionConfig", **kwargs) -> "NodeUpdateManager":
@@ -31,6 +31,8 @@ class OpenAIServerModel(ApiModel):
             Useful for specific models that do not support specific message roles like "system".
         flatten_messages_as_text (`bool`, default `False`):
             Whether to flatten messages as text.
+        max_image_size (`int`, *optional*):
+            Downscale images in messages so that neither side exceeds this many pixels. Defaults to no limit.
         **kwargs:
             Additional keyword arguments to pass to the OpenAI API.
     """
@@ -46,6 +48,7 @@ class OpenAIServerModel(ApiModel):
         custom_role_conversions: dict[str, str] | None = None,
         flatten_messages_as_text: bool = False,
         http_client: Any = None,
+        max_image_size: int | None = None,
         **kwargs,
         ):
         self.model_id = model_id
@@ -67,7 +70,7 @@ class OpenAIServerModel(ApiModel):
             "project": project,
         }
 
-        self.message_manager = MessageManager(model_id=model_id)
+        self.message_manager = MessageManager(model_id=model_id, max_image_size=max_image_size)
 
         super().__init__(
             model_id=model_id,
@@ -134,8 +137,7 @@ class OpenAIServerModel(ApiModel):
         # Handle tools parameter
         if tools_to_call_from:
             tools_config = {
-                "tools": [self.message_manager.get_tool_json_schema(tool, model_id=self.model_id) for tool in
-                          tools_to_call_from],
+                "tools": list(self.message_manager.get_tools_payload(tools_to_call_from, model_id=self.model_id).tools),
             }
             if tool_choice is not None:
                 tools_config["tool_choice"] = tool_choice
@@ -6,21 +6,185 @@ This service improves WebSocket performance through:
 - Async message queuing
 - Differential updates to minimize data transfer
 - Client-side throttling support
+- Single serialization per payload, shared by hashing, compression and fan-out
+
+State updates (node_update, graph_update, state_update) are versioned per
+room. A full update carries "keyframe": True; otherwise "is_diff": True and
+its data is a diff against the state with "base_version" and "base_hash".
+Every update carries the resulting "version" and "state_hash".
+
+The diff format depends on the diff_protocol option:
+- DIFF_PROTOCOL_LEGACY (default): {"_type": "diff", "+key": ..., "~key": ...,
+  "-key": None} with added, changed and removed top-level keys. State updates
+  sent with force_immediate carry the bare data, as before versioning.
+- DIFF_PROTOCOL_PATCH: {"_type": "patch", "ops": [...]}, a JSON Patch
+  (RFC 6902). Messages carry "protocol": 2, and state updates sent with
+  force_immediate carry the full versioned message ({"event", "data",
+  "version", ...}) so clients can follow the sequence.
+
+Clients whose version does not match the base of a diff emit a
+"request_resync" event ({"room": ...}), which sends them the latest state of
+every update type of the room as a "state_resync" event.
 """
 
 import asyncio
+import base64
+import gzip
 import json
 import time
-from typing import Dict, List, Any, Optional, Set, TYPE_CHECKING
+from typing import Dict, Iterable, List, Any, Optional, Set, Tuple, TYPE_CHECKING
 from datetime import datetime
-from collections import defaultdict, deque
+from collections import OrderedDict, defaultdict, deque
 from loguru import logger
 import hashlib
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+STATE_EVENTS = ("node_update", "graph_update", "state_update")
+RESYNC_EVENT = "request_resync"
+
+DIFF_PROTOCOL_LEGACY = 1
+DIFF_PROTOCOL_PATCH = 2
+
 if TYPE_CHECKING:
     from socketio import AsyncServer
 
 
+def encode_json(data: Any, sort_keys: bool = False) -> bytes:
+    """Serialize data to compact UTF-8 JSON, using orjson when available."""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        return orjson.dumps(data, default=str, option=option)
+    return json.dumps(
+        data, sort_keys=sort_keys, separators=(",", ":"), ensure_ascii=False, default=str
+    ).encode("utf-8")
+
+
+def decode_json(data: bytes) -> Any:
+    """Deserialize JSON bytes, using orjson when available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _escape_pointer(token: Any) -> str:
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+
+def _unescape_pointer(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def compute_patch(old: Any, new: Any, path: str = "", ops: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+    """
+    Compute the JSON Patch (RFC 6902) operations turning `old` into `new`.
+
+    Objects and lists are compared recursively, so a nested change produces
+    one operation on its path instead of resending the enclosing subtree.
+    Both values must be JSON-compatible (dicts with string keys, lists,
+    scalars).
+    """
+    if ops is None:
+        ops = []
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key, value in new.items():
+            child = f"{path}/{_escape_pointer(key)}"
+            if key not in old:
+                ops.append({"op": "add", "path": child, "value": value})
+            elif old[key] != value:
+                compute_patch(old[key], value, child, ops)
+        for key in old:
+            if key not in new:
+                ops.append({"op": "remove", "path": f"{path}/{_escape_pointer(key)}"})
+    elif isinstance(old, list) and isinstance(new, list):
+        common = min(len(old), len(new))
+        for i in range(common):
+            if old[i] != new[i]:
+                compute_patch(old[i], new[i], f"{path}/{i}", ops)
+        for i in range(common, len(new)):
+            ops.append({"op": "add", "path": f"{path}/{i}", "value": new[i]})
+        for i in range(len(old) - 1, common - 1, -1):
+            ops.append({"op": "remove", "path": f"{path}/{i}"})
+    else:
+        ops.append({"op": "replace", "path": path, "value": new})
+    return ops
+
+
+def apply_patch(document: Any, ops: List[Dict[str, Any]]) -> Any:
+    """
+    Apply JSON Patch operations produced by `compute_patch` to a document.
+
+    The document is modified in place; the patched document is returned
+    (it is a new object when the patch replaces the root).
+    """
+    for op in ops:
+        path = op["path"]
+        if not path:
+            document = op["value"]
+            continue
+        *parents, last = [_unescape_pointer(token) for token in path[1:].split("/")]
+        target = document
+        for token in parents:
+            target = target[int(token)] if isinstance(target, list) else target[token]
+        if isinstance(target, list):
+            index = len(target) if last == "-" else int(last)
+            if op["op"] == "add":
+                target.insert(index, op["value"])
+            elif op["op"] == "remove":
+                del target[index]
+            else:
+                target[index] = op["value"]
+        elif op["op"] == "remove":
+            del target[last]
+        else:
+            target[last] = op["value"]
+    return document
+
+
+class TrackedState:
+    """Last state sent for one update type of a room."""
+
+    __slots__ = ("data", "hash", "version", "size", "since_keyframe")
+
+    def __init__(self, data: Any, state_hash: str, version: int, size: int):
+        self.data = data
+        self.hash = state_hash
+        self.version = version
+        self.size = size
+        self.since_keyframe = 0
+
+
+class EncodedPayload:
+    """
+    A payload serialized once.
+
+    The compressed form and the frames built from it are derived from the
+    serialized bytes on first use and kept, so sending the same payload to
+    several rooms does not encode or compress it again.
+    """
+
+    __slots__ = ("data", "raw", "_compressed", "_frames")
+
+    def __init__(self, data: Any, raw: Optional[bytes] = None):
+        self.data = data
+        self.raw = raw if raw is not None else encode_json(data)
+        self._compressed: Optional[bytes] = None
+        self._frames: Dict[Tuple[bool, bool], Tuple[Any, int]] = {}
+
+    @property
+    def size(self) -> int:
+        return len(self.raw)
+
+    def compressed(self, compresslevel: int = 6) -> bytes:
+        """Gzip the serialized bytes (once)."""
+        if self._compressed is None:
+            self._compressed = gzip.compress(self.raw, compresslevel=compresslevel)
+        return self._compressed
+
+
 class MessageBatch:
     """Container for batched messages."""
     
@@ -62,7 +226,12 @@ class OptimizedBroadcastService:
         batch_timeout_ms: int = 100,
         enable_compression: bool = True,
         enable_diff_updates: bool = True,
-        max_queue_size: int = 1000
+        max_queue_size: int = 1000,
+        binary_frames: bool = False,
+        keyframe_interval: int = 50,
+        max_tracked_states: int = 1024,
+        max_state_bytes: int = 64 * 1024 * 1024,
+        diff_protocol: int = DIFF_PROTOCOL_LEGACY
     ):
         """
         Initialize the optimized broadcast service.
@@ -74,22 +243,44 @@ class OptimizedBroadcastService:
             enable_compression: Enable message compression
             enable_diff_updates: Enable differential updates
             max_queue_size: Maximum queue size per client
+            binary_frames: Send payloads as binary frames holding the JSON
+                bytes, gzipped when compression is beneficial (clients detect
+                the gzip magic bytes), instead of JSON objects with base64
+                compressed data
+            keyframe_interval: Send a full state after this many patches
+            max_tracked_states: Maximum number of room states kept for diffing
+            max_state_bytes: Maximum serialized size of the room states kept
+                for diffing; least recently updated states are evicted first
+            diff_protocol: Wire format of differential updates,
+                DIFF_PROTOCOL_LEGACY (top-level "+"/"~"/"-" keys) or
+                DIFF_PROTOCOL_PATCH (JSON Patch); see the module docstring
         """
+        if diff_protocol not in (DIFF_PROTOCOL_LEGACY, DIFF_PROTOCOL_PATCH):
+            raise ValueError(f"Unknown diff protocol: {diff_protocol}")
+        
         self.socketio = socketio
         self.batch_size = batch_size
         self.batch_timeout_ms = batch_timeout_ms
         self.enable_compression = enable_compression
         self.enable_diff_updates = enable_diff_updates
         self.max_queue_size = max_queue_size
+        self.binary_frames = binary_frames
+        self.keyframe_interval = keyframe_interval
+        self.max_tracked_states = max_tracked_states
+        self.max_state_bytes = max_state_bytes
+        self.diff_protocol = diff_protocol
         
         # Message queues per room
         self._message_queues: Dict[str, deque] = defaultdict(lambda: deque(maxlen=max_queue_size))
         self._active_batches: Dict[str, MessageBatch] = {}
         self._batch_tasks: Dict[str, asyncio.Task] = {}
         
-        # State tracking for differential updates
-        self._last_states: Dict[str, Dict[str, Any]] = {}
-        self._state_hashes: Dict[str, str] = {}
+        # State tracking for differential updates, least recently updated first
+        self._states: "OrderedDict[str, TrackedState]" = OrderedDict()
+        self._state_bytes = 0
+        # Last version per state key, dropped with the state when it is
+        # evicted (the next update of an evicted state is a keyframe)
+        self._state_versions: Dict[str, int] = {}
         
         # Statistics
         self._stats = {
@@ -98,14 +289,22 @@ class OptimizedBroadcastService:
             "bytes_sent": 0,
             "diff_updates": 0,
             "full_updates": 0,
+            "skipped_updates": 0,
+            "keyframes": 0,
+            "evicted_states": 0,
+            "resyncs": 0,
             "compression_ratio": 0.0
         }
         
         # Locks
         self._queue_locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
         
+        if socketio is not None and enable_diff_updates:
+            socketio.on(RESYNC_EVENT, self._handle_resync_request)
+        
         logger.info(f"OptimizedBroadcastService initialized with batch_size={batch_size}, "
-                   f"timeout={batch_timeout_ms}ms, compression={enable_compression}")
+                   f"timeout={batch_timeout_ms}ms, compression={enable_compression}, "
+                   f"binary_frames={binary_frames}")
     
     async def emit(
         self,
@@ -136,8 +335,24 @@ class OptimizedBroadcastService:
         }
         
         if force_immediate:
-            # Send immediately
-            await self._send_immediate(event, data, room)
+            if self.enable_diff_updates and event in STATE_EVENTS:
+                # State updates stay on the versioned sequence of the room;
+                # pending updates go out first so versions arrive in order
+                queue_key = room or "_global"
+                async with self._queue_locks[queue_key]:
+                    await self._flush_batch(queue_key)
+                    if self.diff_protocol == DIFF_PROTOCOL_PATCH:
+                        if not await self._track_state_message(queue_key, message):
+                            return
+                        await self._send_immediate(event, EncodedPayload(message), room)
+                    else:
+                        # Legacy clients get the bare data, which becomes the
+                        # base of the next diff
+                        await self._track_state_message(queue_key, message, keyframe=True)
+                        await self._send_immediate(event, EncodedPayload(data), room)
+            else:
+                # Send immediately
+                await self._send_immediate(event, EncodedPayload(data), room)
             self._stats["messages_sent"] += 1
         else:
             # Add to queue for batching
@@ -145,6 +360,24 @@ class OptimizedBroadcastService:
             async with self._queue_locks[queue_key]:
                 await self._queue_message(queue_key, message)
     
+    async def emit_to_rooms(self, event: str, data: Any, rooms: Iterable[str]) -> None:
+        """
+        Send the same message to several rooms immediately, encoding it once.
+
+        Args:
+            event: Event name
+            data: Event data
+            rooms: Rooms to broadcast to
+        """
+        if not self.socketio:
+            return
+        
+        payload = EncodedPayload(data)
+        compress = self.enable_compression and await self._compress_payload(payload)
+        for room in rooms:
+            await self._send_immediate(event, payload, room, compress=compress)
+            self._stats["messages_sent"] += 1
+    
     async def _queue_message(self, queue_key: str, message: Dict[str, Any]) -> None:
         """Queue a message for batching."""
         # Add to current batch or create new one
@@ -180,26 +413,27 @@ class OptimizedBroadcastService:
         if not batch.messages:
             return
         
-        # Cancel scheduled task if exists
+        # Cancel scheduled task if exists, unless this flush is that task
         if queue_key in self._batch_tasks:
             task = self._batch_tasks.pop(queue_key)
-            if not task.done():
+            if not task.done() and task is not asyncio.current_task():
                 task.cancel()
         
         # Process differential updates if enabled
         if self.enable_diff_updates:
             await self._process_diff_updates(queue_key, batch)
+            if not batch.messages:
+                return
         
-        # Send batch
-        payload = batch.to_payload()
+        # Serialize the batch once
+        payload = EncodedPayload(batch.to_payload())
         
         # Compress if enabled
-        if self.enable_compression:
-            payload = await self._compress_payload(payload)
+        compress = self.enable_compression and await self._compress_payload(payload)
         
         # Send to appropriate destination
         room = queue_key if queue_key != "_global" else None
-        await self._send_immediate("batch_update", payload, room)
+        await self._send_immediate("batch_update", payload, room, compress=compress)
         
         self._stats["batches_sent"] += 1
         self._stats["messages_sent"] += len(batch.messages)
@@ -207,67 +441,93 @@ class OptimizedBroadcastService:
         logger.debug(f"Flushed batch for {queue_key}: {len(batch.messages)} messages")
     
     async def _process_diff_updates(self, queue_key: str, batch: MessageBatch) -> None:
-        """Process messages for differential updates."""
-        # Group messages by type for efficient diffing
-        messages_by_type = defaultdict(list)
+        """Process messages for differential updates, dropping unchanged states."""
+        messages = []
         for msg in batch.messages:
-            msg_type = msg.get("event", "unknown")
-            messages_by_type[msg_type].append(msg)
-        
-        # Apply differential updates for state-based messages
-        for msg_type, messages in messages_by_type.items():
-            if msg_type in ["node_update", "graph_update", "state_update"]:
-                # Process as differential updates
-                for i, msg in enumerate(messages):
-                    diff_msg = await self._create_diff_update(queue_key, msg_type, msg)
-                    if diff_msg:
-                        messages[i] = diff_msg
-                        self._stats["diff_updates"] += 1
-                    else:
-                        self._stats["full_updates"] += 1
+            if msg.get("event", "unknown") in STATE_EVENTS:
+                if not await self._track_state_message(queue_key, msg):
+                    continue
+            messages.append(msg)
+        batch.messages = messages
+    
+    async def _track_state_message(self, queue_key: str, message: Dict[str, Any], keyframe: bool = False) -> bool:
+        """Version a state message in place, returning False if it can be dropped."""
+        if await self._create_diff_update(queue_key, message["event"], message, keyframe) is None:
+            self._stats["skipped_updates"] += 1
+            return False
+        if message.get("is_diff"):
+            self._stats["diff_updates"] += 1
+        else:
+            self._stats["full_updates"] += 1
+        return True
     
     async def _create_diff_update(
         self, 
         queue_key: str, 
         msg_type: str, 
-        message: Dict[str, Any]
+        message: Dict[str, Any],
+        keyframe: bool = False
     ) -> Optional[Dict[str, Any]]:
-        """Create a differential update if possible."""
+        """
+        Turn a state message into a versioned diff or keyframe.
+        
+        Args:
+            queue_key: Room of the message, "_global" for global broadcasts
+            msg_type: State event name
+            message: Message to update in place
+            keyframe: Always send the full state
+        
+        Returns:
+            The message, or None if the state did not change
+        """
         state_key = f"{queue_key}:{msg_type}"
         current_data = message.get("data", {})
         
-        # Calculate hash of current state
-        current_hash = self._calculate_hash(current_data)
-        
-        # Check if state has changed
-        if state_key in self._state_hashes:
-            if self._state_hashes[state_key] == current_hash:
-                # No change - skip update
-                return None
-            
-            # Calculate diff
-            last_state = self._last_states.get(state_key, {})
-            diff = self._calculate_diff(last_state, current_data)
-            
-            if diff and len(json.dumps(diff)) < len(json.dumps(current_data)) * 0.7:
+        # Serialize the current state once, for the hash, the size check and
+        # the stored copy (which is what clients see, not the caller's object)
+        current_bytes = encode_json(current_data, sort_keys=True)
+        current_hash = hashlib.md5(current_bytes).hexdigest()
+        
+        last = self._states.get(state_key)
+        if last is not None and last.hash == current_hash:
+            # No change - skip update
+            self._states.move_to_end(state_key)
+            return None
+        
+        current_state = decode_json(current_bytes)
+        version = self._state_versions.get(state_key, 0) + 1
+        self._state_versions[state_key] = version
+        tracked = TrackedState(current_state, current_hash, version, len(current_bytes))
+        
+        is_diff = False
+        if not keyframe and last is not None and last.since_keyframe + 1 < self.keyframe_interval:
+            if self.diff_protocol == DIFF_PROTOCOL_PATCH:
+                diff = {"_type": "patch", "ops": compute_patch(last.data, current_state)}
+            else:
+                diff = self._calculate_diff(last.data, current_state)
+            if diff is not None and len(encode_json(diff)) < len(current_bytes) * 0.7:
                 # Diff is beneficial (at least 30% smaller)
                 message["data"] = diff
                 message["is_diff"] = True
-                message["base_hash"] = self._state_hashes[state_key]
-        
-        # Update state tracking
-        self._last_states[state_key] = current_data
-        self._state_hashes[state_key] = current_hash
-        
+                message["base_hash"] = last.hash
+                message["base_version"] = last.version
+                tracked.since_keyframe = last.since_keyframe + 1
+                is_diff = True
+        if not is_diff:
+            message["keyframe"] = True
+            self._stats["keyframes"] += 1
+        message["version"] = version
+        message["state_hash"] = current_hash
+        if self.diff_protocol == DIFF_PROTOCOL_PATCH:
+            message["protocol"] = DIFF_PROTOCOL_PATCH
+        
+        self._store_state(state_key, tracked)
         return message
     
-    def _calculate_hash(self, data: Any) -> str:
-        """Calculate hash of data for comparison."""
-        data_str = json.dumps(data, sort_keys=True)
-        return hashlib.md5(data_str.encode()).hexdigest()
-    
-    def _calculate_diff(self, old_data: Dict[str, Any], new_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Calculate difference between two states."""
+    def _calculate_diff(self, old_data: Any, new_data: Any) -> Optional[Dict[str, Any]]:
+        """Calculate the legacy top-level difference between two states."""
+        if not isinstance(old_data, dict) or not isinstance(new_data, dict):
+            return None
         diff = {"_type": "diff"}
         
         # Find added/modified fields
@@ -284,41 +544,120 @@ class OptimizedBroadcastService:
         
         return diff if len(diff) > 1 else None
     
-    async def _compress_payload(self, payload: Dict[str, Any]) -> Dict[str, Any]:
-        """Compress payload if beneficial."""
-        import gzip
-        import base64
-        
-        original = json.dumps(payload)
-        compressed = await asyncio.to_thread(
-            gzip.compress,
-            original.encode('utf-8'),
-            compresslevel=6
-        )
-        
-        if len(compressed) < len(original) * 0.8:  # At least 20% compression
-            self._stats["compression_ratio"] = len(compressed) / len(original)
-            return {
-                "_compressed": True,
-                "data": base64.b64encode(compressed).decode('utf-8'),
-                "original_size": len(original)
-            }
-        
-        return payload
+    def _store_state(self, state_key: str, tracked: TrackedState) -> None:
+        """Store a room state, evicting least recently updated states over the limits."""
+        previous = self._states.pop(state_key, None)
+        if previous is not None:
+            self._state_bytes -= previous.size
+        self._states[state_key] = tracked
+        self._state_bytes += tracked.size
+        
+        while len(self._states) > 1 and (
+            len(self._states) > self.max_tracked_states or self._state_bytes > self.max_state_bytes
+        ):
+            evicted_key, evicted = self._states.popitem(last=False)
+            self._state_versions.pop(evicted_key, None)
+            self._state_bytes -= evicted.size
+            self._stats["evicted_states"] += 1
+    
+    async def resync(self, room: Optional[str] = None, sid: Optional[str] = None) -> None:
+        """
+        Send the latest state of every update type of a room to a client that
+        fell behind (or to the whole room if no sid is given).
+        
+        Pending messages of the room are flushed first, so patches sent after
+        the resync apply on top of it. Update types whose state was evicted are
+        left out; their next update is a keyframe.
+        
+        Args:
+            room: Room whose states to send, None for global broadcasts
+            sid: Client session id to send the resync to
+        """
+        if not self.socketio:
+            return
+        
+        queue_key = room or "_global"
+        async with self._queue_locks[queue_key]:
+            await self._flush_batch(queue_key)
+            
+            states = {}
+            for msg_type in STATE_EVENTS:
+                tracked = self._states.get(f"{queue_key}:{msg_type}")
+                if tracked is not None:
+                    states[msg_type] = {
+                        "data": tracked.data,
+                        "version": tracked.version,
+                        "state_hash": tracked.hash
+                    }
+            
+            payload = {"type": "state_resync", "states": states, "timestamp": datetime.now().isoformat()}
+            await self._send_immediate("state_resync", payload, sid or room)
+            self._stats["resyncs"] += 1
+    
+    async def _handle_resync_request(self, sid: str, data: Any = None) -> None:
+        """Resync a client that asked for it; clients may only resync rooms they are in."""
+        room = data.get("room") if isinstance(data, dict) else None
+        if room is not None and room not in self.socketio.rooms(sid):
+            logger.warning(f"Client {sid} requested a resync of room {room} it is not in")
+            return
+        await self.resync(room=room, sid=sid)
     
-    async def _send_immediate(self, event: str, data: Any, room: Optional[str] = None) -> None:
+    def _calculate_hash(self, data: Any) -> str:
+        """Calculate hash of data for comparison."""
+        return hashlib.md5(encode_json(data, sort_keys=True)).hexdigest()
+    
+    async def _compress_payload(self, payload: EncodedPayload) -> bool:
+        """Compress payload, returning True if compression is beneficial."""
+        compressed = await asyncio.to_thread(payload.compressed, 6)
+        
+        if len(compressed) < payload.size * 0.8:  # At least 20% compression
+            self._stats["compression_ratio"] = len(compressed) / payload.size
+            return True
+        
+        return False
+    
+    def _build_frame(self, payload: EncodedPayload, compress: bool) -> Tuple[Any, int]:
+        """Build the frame sent for a payload, and its approximate size in bytes."""
+        key = (compress, self.binary_frames)
+        frame = payload._frames.get(key)
+        if frame is None:
+            if self.binary_frames:
+                body = payload.compressed() if compress else payload.raw
+                frame = (body, len(body))
+            elif compress:
+                encoded = base64.b64encode(payload.compressed()).decode('ascii')
+                frame = ({
+                    "_compressed": True,
+                    "data": encoded,
+                    "original_size": payload.size
+                }, len(encoded))
+            else:
+                frame = (payload.data, payload.size)
+            payload._frames[key] = frame
+        return frame
+    
+    async def _send_immediate(
+        self,
+        event: str,
+        data: Any,
+        room: Optional[str] = None,
+        compress: bool = False
+    ) -> None:
         """Send a message immediately without batching."""
         if not self.socketio:
             return
         
+        payload = data if isinstance(data, EncodedPayload) else EncodedPayload(data)
+        frame, size = self._build_frame(payload, compress)
+        
         try:
             if room:
-                await self.socketio.emit(event, data, room=room)
+                await self.socketio.emit(event, frame, room=room)
             else:
-                await self.socketio.emit(event, data)
+                await self.socketio.emit(event, frame)
                 
             # Track bytes sent (approximate)
-            self._stats["bytes_sent"] += len(json.dumps(data))
+            self._stats["bytes_sent"] += size
         except Exception as e:
             logger.error(f"Error sending WebSocket message: {e}")
     
@@ -11,13 +11,19 @@
 # ANY KIND, either express or implied. See the License for the specific
 # language governing permissions and limitations under the License.
 
+import asyncio
 import base64
+import contextvars
+import inspect
 import json
 import logging
-from functools import partial
+import queue
+import threading
+from functools import lru_cache, partial
 from itertools import tee
 
 import jmespath
+from jmespath.visitor import TreeInterpreter
 
 from botocore.context import with_current_context
 from botocore.exceptions import PaginationError
@@ -26,6 +32,14 @@ from botocore.utils import merge_dicts, set_value_from_jmespath
 
 log = logging.getLogger(__name__)
 
+# Root nodes of expressions evaluated element by element by search()
+_STREAMED_PROJECTIONS = ('projection', 'filter_projection')
+
+# Kinds of the items passed from a read-ahead worker to the consumer
+_PAGE = 'page'
+_ERROR = 'error'
+_DONE = 'done'
+
 
 class TokenEncoder:
     """Encodes dictionaries into opaque strings.
@@ -187,10 +201,153 @@ class PaginatorModel:
         return single_paginator_config
 
 
+@lru_cache(maxsize=256)
+def _compile_expression(expression):
+    """Compile a JMESPath expression, caching the most recently used ones."""
+    return jmespath.compile(expression)
+
+
+def _is_false(value):
+    # JMESPath falsiness, which differs from Python's (0 is true)
+    return (
+        value == ''
+        or value == []
+        or value == {}
+        or value is None
+        or value is False
+    )
+
+
+def _iter_search_results(compiled, page):
+    """Yields the results of a compiled expression applied to a page.
+
+    A list result is yielded item by item, anything else as is. When the
+    expression is a projection (``Items[*].Key``, ``Items[?Size > `0`]``),
+    the projection is applied to one element of the page at a time and its
+    results are yielded as they are found instead of being collected into a
+    list for the whole page first.
+    """
+    parsed = compiled.parsed
+    if parsed['type'] not in _STREAMED_PROJECTIONS:
+        results = compiled.search(page)
+        if isinstance(results, list):
+            yield from results
+        else:
+            # Yield result directly if it is not a list.
+            yield results
+        return
+
+    interpreter = TreeInterpreter()
+    children = parsed['children']
+    base = interpreter.visit(children[0], page)
+    if not isinstance(base, list):
+        # The projection of anything else than a list is null
+        yield None
+        return
+    projection = children[1]
+    condition = children[2] if parsed['type'] == 'filter_projection' else None
+    for element in base:
+        if condition is not None and _is_false(
+            interpreter.visit(condition, element)
+        ):
+            continue
+        result = interpreter.visit(projection, element)
+        if result is not None:
+            yield result
+
+
+def _read_ahead(pages, read_ahead):
+    """Iterate over ``pages`` with a worker thread fetching ahead.
+
+    The worker keeps up to ``read_ahead`` pages fetched that the consumer
+    has not taken yet, so the next request is in flight while the current
+    page is processed. Pages and errors reach the consumer in order.
+    """
+    results = queue.Queue()
+    slots = threading.Semaphore(read_ahead)
+    stopped = threading.Event()
+
+    def fetch():
+        try:
+            while True:
+                slots.acquire()
+                if stopped.is_set():
+                    return
+                try:
+                    page = next(pages)
+                except StopIteration:
+                    results.put((_DONE, None))
+                    return
+                results.put((_PAGE, page))
+        except Exception as e:
+            results.put((_ERROR, e))
+        finally:
+            pages.close()
+
+    # Requests run in the context of the caller (e.g. for feature ids)
+    context = contextvars.copy_context()
+    threading.Thread(target=context.run, args=(fetch,), daemon=True).start()
+    try:
+        while True:
+            kind, value = results.get()
+            slots.release()
+            if kind is _PAGE:
+                yield value
+            elif kind is _ERROR:
+                raise value
+            else:
+                return
+    finally:
+        # Wake the worker up if it is waiting for a slot
+        stopped.set()
+        slots.release()
+
+
+async def _async_read_ahead(pages, read_ahead):
+    """Async version of `_read_ahead`, fetching ahead in a task."""
+    results = asyncio.Queue()
+    slots = asyncio.Semaphore(read_ahead)
+
+    async def fetch():
+        try:
+            while True:
+                await slots.acquire()
+                try:
+                    page = await pages.__anext__()
+                except StopAsyncIteration:
+                    results.put_nowait((_DONE, None))
+                    return
+                results.put_nowait((_PAGE, page))
+        except Exception as e:
+            results.put_nowait((_ERROR, e))
+        finally:
+            await pages.aclose()
+
+    task = asyncio.ensure_future(fetch())
+    try:
+        while True:
+            kind, value = await results.get()
+            slots.release()
+            if kind is _PAGE:
+                yield value
+            elif kind is _ERROR:
+                raise value
+            else:
+                return
+    finally:
+        task.cancel()
+        # Wait for the task to close ``pages``; its cancellation is expected
+        await asyncio.gather(task, return_exceptions=True)
+
+
 class PageIterator:
     """An iterable object to paginate API results.
     Please note it is NOT a python iterator.
     Use ``iter`` to wrap this as a generator.
+
+    With ``read_ahead``, up to that many pages are fetched by a worker
+    thread ahead of the consumer, so that requests overlap with the
+    processing of the pages.
     """
 
     def __init__(
@@ -206,6 +363,7 @@ class PageIterator:
         starting_token,
         page_size,
         op_kwargs,
+        read_ahead=0,
     ):
         self._method = method
         self._input_token = input_token
@@ -222,6 +380,7 @@ class PageIterator:
         self._non_aggregate_part = {}
         self._token_encoder = TokenEncoder()
         self._token_decoder = TokenDecoder()
+        self._read_ahead = read_ahead
 
     @property
     def result_keys(self):
@@ -253,6 +412,28 @@ class PageIterator:
         return self._non_aggregate_part
 
     def __iter__(self):
+        if self._read_ahead:
+            return _read_ahead(self._iter_pages(), self._read_ahead)
+        return self._iter_pages()
+
+    def _iter_pages(self):
+        pagination = self._paginate()
+        current_kwargs = next(pagination)
+        while True:
+            response = self._make_request(current_kwargs)
+            yield pagination.send(response)
+            try:
+                current_kwargs = next(pagination)
+            except StopIteration:
+                return
+
+    def _paginate(self):
+        """Pagination logic, independent of how requests are made.
+
+        This generator alternates between yielding the kwargs of the next
+        request, to be answered with ``send(response)``, and yielding the
+        page made from that response. It stops when there are no more pages.
+        """
         current_kwargs = self._op_kwargs
         previous_next_token = None
         next_token = {key: None for key in self._input_token}
@@ -269,7 +450,7 @@ class PageIterator:
         starting_truncation = 0
         self._inject_starting_params(current_kwargs)
         while True:
-            response = self._make_request(current_kwargs)
+            response = yield current_kwargs
             parsed = self._extract_parsed_response(response)
             if first_request:
                 # The first request is handled differently.  We could
@@ -342,18 +523,17 @@ class PageIterator:
         :type expression: str
         :param expression: JMESPath expression to apply to each page.
 
+        Results are yielded as each page arrives, so memory use is bounded
+        by the size of a page (times ``ReadAhead``) rather than by the size
+        of the whole result, unlike ``build_full_result``.
+
         :return: Returns an iterator that yields the individual
             elements of applying a JMESPath expression to each page of
             results.
         """
-        compiled = jmespath.compile(expression)
+        compiled = _compile_expression(expression)
         for page in self:
-            results = compiled.search(page)
-            if isinstance(results, list):
-                yield from results
-            else:
-                # Yield result directly if it is not a list.
-                yield results
+            yield from _iter_search_results(compiled, page)
 
     @with_current_context(partial(register_feature_id, 'PAGINATOR'))
     def _make_request(self, current_kwargs):
@@ -485,47 +665,53 @@ class PageIterator:
     def build_full_result(self):
         complete_result = {}
         for response in self:
-            page = response
-            # We want to try to catch operation object pagination
-            # and format correctly for those. They come in the form
-            # of a tuple of two elements: (http_response, parsed_responsed).
-            # We want the parsed_response as that is what the page iterator
-            # uses. We can remove it though once operation objects are removed.
-            if isinstance(response, tuple) and len(response) == 2:
-                page = response[1]
-            # We're incrementally building the full response page
-            # by page.  For each page in the response we need to
-            # inject the necessary components from the page
-            # into the complete_result.
-            for result_expression in self.result_keys:
-                # In order to incrementally update a result key
-                # we need to search the existing value from complete_result,
-                # then we need to search the _current_ page for the
-                # current result key value.  Then we append the current
-                # value onto the existing value, and re-set that value
-                # as the new value.
-                result_value = result_expression.search(page)
-                if result_value is None:
-                    continue
-                existing_value = result_expression.search(complete_result)
-                if existing_value is None:
-                    # Set the initial result
-                    set_value_from_jmespath(
-                        complete_result,
-                        result_expression.expression,
-                        result_value,
-                    )
-                    continue
-                # Now both result_value and existing_value contain something
-                if isinstance(result_value, list):
-                    existing_value.extend(result_value)
-                elif isinstance(result_value, (int, float, str)):
-                    # Modify the existing result with the sum or concatenation
-                    set_value_from_jmespath(
-                        complete_result,
-                        result_expression.expression,
-                        existing_value + result_value,
-                    )
+            self._add_to_full_result(complete_result, response)
+        return self._finish_full_result(complete_result)
+
+    def _add_to_full_result(self, complete_result, response):
+        page = response
+        # We want to try to catch operation object pagination
+        # and format correctly for those. They come in the form
+        # of a tuple of two elements: (http_response, parsed_responsed).
+        # We want the parsed_response as that is what the page iterator
+        # uses. We can remove it though once operation objects are removed.
+        if isinstance(response, tuple) and len(response) == 2:
+            page = response[1]
+        # We're incrementally building the full response page
+        # by page.  For each page in the response we need to
+        # inject the necessary components from the page
+        # into the complete_result.
+        for result_expression in self.result_keys:
+            # In order to incrementally update a result key
+            # we need to search the existing value from complete_result,
+            # then we need to search the _current_ page for the
+            # current result key value.  Then we append the current
+            # value onto the existing value, and re-set that value
+            # as the new value.
+            result_value = result_expression.search(page)
+            if result_value is None:
+                continue
+            existing_value = result_expression.search(complete_result)
+            if existing_value is None:
+                # Set the initial result
+                set_value_from_jmespath(
+                    complete_result,
+                    result_expression.expression,
+                    result_value,
+                )
+                continue
+            # Now both result_value and existing_value contain something
+            if isinstance(result_value, list):
+                existing_value.extend(result_value)
+            elif isinstance(result_value, (int, float, str)):
+                # Modify the existing result with the sum or concatenation
+                set_value_from_jmespath(
+                    complete_result,
+                    result_expression.expression,
+                    existing_value + result_value,
+                )
+
+    def _finish_full_result(self, complete_result):
         merge_dicts(complete_result, self.non_aggregate_part)
         if self.resume_token is not None:
             complete_result['NextToken'] = self.resume_token
@@ -596,8 +782,56 @@ class PageIterator:
         return dict(zip(self._input_token, deprecated_token))
 
 
+class AsyncPageIterator(PageIterator):
+    """An asynchronous iterable object to paginate API results.
+
+    Use ``async for`` to iterate over the pages. Requests are awaited if the
+    paginated method is a coroutine function, and run in a thread otherwise.
+    With ``read_ahead``, up to that many pages are fetched by a task ahead
+    of the consumer.
+    """
+
+    def __aiter__(self):
+        if self._read_ahead:
+            return _async_read_ahead(self._aiter_pages(), self._read_ahead)
+        return self._aiter_pages()
+
+    async def _aiter_pages(self):
+        pagination = self._paginate()
+        current_kwargs = next(pagination)
+        while True:
+            response = await self._make_async_request(current_kwargs)
+            yield pagination.send(response)
+            try:
+                current_kwargs = next(pagination)
+            except StopIteration:
+                return
+
+    async def _make_async_request(self, current_kwargs):
+        if inspect.iscoroutinefunction(self._method):
+            return await self._make_request(current_kwargs)
+        return await asyncio.to_thread(self._make_request, current_kwargs)
+
+    async def search(self, expression):
+        """Applies a JMESPath expression to a paginator
+
+        Async version of `PageIterator.search`, to use with ``async for``.
+        """
+        compiled = _compile_expression(expression)
+        async for page in self:
+            for result in _iter_search_results(compiled, page):
+                yield result
+
+    async def build_full_result(self):
+        complete_result = {}
+        async for response in self:
+            self._add_to_full_result(complete_result, response)
+        return self._finish_full_result(complete_result)
+
+
 class Paginator:
     PAGE_ITERATOR_CLS = PageIterator
+    ASYNC_PAGE_ITERATOR_CLS = AsyncPageIterator
 
     def __init__(self, method, pagination_config, model):
         self._model = model
@@ -619,7 +853,7 @@ class Paginator:
     def _get_non_aggregate_keys(self, config):
         keys = []
         for key in config.get('non_aggregate_keys', []):
-            keys.append(jmespath.compile(key))
+            keys.append(_compile_expression(key))
         return keys
 
     def _get_output_tokens(self, config):
@@ -628,7 +862,7 @@ class Paginator:
         if not isinstance(output_token, list):
             output_token = [output_token]
         for config in output_token:
-            output.append(jmespath.compile(config))
+            output.append(_compile_expression(config))
         return output
 
     def _get_input_tokens(self, config):
@@ -640,14 +874,14 @@ class Paginator:
     def _get_more_results_token(self, config):
         more_results = config.get('more_results')
         if more_results is not None:
-            return jmespath.compile(more_results)
+            return _compile_expression(more_results)
 
     def _get_result_keys(self, config):
         result_key = config.get('result_key')
         if result_key is not None:
             if not isinstance(result_key, list):
                 result_key = [result_key]
-            result_key = [jmespath.compile(rk) for rk in result_key]
+            result_key = [_compile_expression(rk) for rk in result_key]
             return result_key
 
     def _get_limit_key(self, config):
@@ -661,8 +895,23 @@ class Paginator:
         at a time.
 
         """
+        return self._create_page_iterator(self.PAGE_ITERATOR_CLS, kwargs)
+
+    def paginate_async(self, **kwargs):
+        """Create an asynchronous paginator object for an operation.
+
+        This returns an object to use with ``async for``, yielding a
+        single page of a response at a time.
+
+        """
+        return self._create_page_iterator(self.ASYNC_PAGE_ITERATOR_CLS, kwargs)
+
+    def _create_page_iterator(self, page_iterator_cls, kwargs):
         page_params = self._extract_paging_params(kwargs)
-        return self.PAGE_ITERATOR_CLS(
+        extra_params = {}
+        if page_params['ReadAhead']:
+            extra_params['read_ahead'] = page_params['ReadAhead']
+        return page_iterator_cls(
             self._method,
             self._input_token,
             self._output_token,
@@ -674,6 +923,7 @@ class Paginator:
             page_params['StartingToken'],
             page_params['PageSize'],
             kwargs,
+            **extra_params,
         )
 
     def _extract_paging_params(self, kwargs):
@@ -695,10 +945,16 @@ class Paginator:
                     page_size = str(page_size)
             else:
                 page_size = int(page_size)
+        read_ahead = int(pagination_config.get('ReadAhead', 0))
+        if read_ahead < 0:
+            raise PaginationError(
+                message=f"ReadAhead cannot be negative: {read_ahead}"
+            )
         return {
             'MaxItems': max_items,
             'StartingToken': pagination_config.get('StartingToken', None),
             'PageSize': page_size,
+            'ReadAhead': read_ahead,
         }
 
 
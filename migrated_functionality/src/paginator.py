@@ -179,6 +179,16 @@ def document_paginate_method(
         ),
     )
 
+    pagination_config_members['ReadAhead'] = DocumentedShape(
+        name='ReadAhead',
+        type_name='integer',
+        documentation=(
+            '<p>The number of pages to fetch in the background ahead '
+            'of the page being processed. Defaults to 0, which fetches '
+            'each page when the previous one has been processed.</p>'
+        ),
+    )
+
     botocore_pagination_params = [
         DocumentedShape(
             name='PaginationConfig',
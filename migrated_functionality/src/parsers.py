@@ -120,6 +120,7 @@ Each call to ``parse()`` returns a dict has this form::
 """
 
 import base64
+import functools
 import http.client
 import io
 import json
@@ -143,6 +144,30 @@ LOG = logging.getLogger(__name__)
 
 DEFAULT_TIMESTAMP_PARSER = parse_timestamp
 
+# Type names of the shapes a parser can have a _handle_<type> method for.
+_SHAPE_TYPE_NAMES = (
+    'structure',
+    'list',
+    'map',
+    'string',
+    'character',
+    'boolean',
+    'byte',
+    'short',
+    'integer',
+    'long',
+    'float',
+    'double',
+    'bigInteger',
+    'bigDecimal',
+    'blob',
+    'timestamp',
+)
+
+# Parser class -> whether it can parse with compiled shapes, see
+# ResponseParser._supports_compiled_shapes.
+_COMPILED_SHAPES_SUPPORT = {}
+
 
 class ResponseParserFactory:
     def __init__(self):
@@ -152,23 +177,46 @@ class ResponseParserFactory:
         """Set default arguments when a parser instance is created.
 
         You can specify any kwargs that are allowed by a ResponseParser
-        class.  There are currently two arguments:
+        class.  There are currently three arguments:
 
             * timestamp_parser - A callable that can parse a timestamp string
             * blob_parser - A callable that can parse a blob type
+            * incremental_parse_threshold - The body size from which XML
+              responses are parsed incrementally, see
+              ``BaseXMLResponseParser``.  Ignored by the other protocols.
 
         """
         self._defaults.update(kwargs)
 
     def create_parser(self, protocol_name):
         parser_cls = PROTOCOL_PARSERS[protocol_name]
-        return parser_cls(**self._defaults)
+        defaults = self._defaults
+        if not issubclass(parser_cls, BaseXMLResponseParser):
+            defaults = {
+                name: value
+                for name, value in defaults.items()
+                if name != 'incremental_parse_threshold'
+            }
+        return parser_cls(**defaults)
 
 
 def create_parser(protocol):
     return ResponseParserFactory().create_parser(protocol)
 
 
+def _get_text(node_or_string):
+    if hasattr(node_or_string, 'text'):
+        text = node_or_string.text
+        if text is None:
+            # If an XML node is empty <foo></foo>,
+            # we want to parse that as an empty string,
+            # not as a null/None value.
+            text = ''
+    else:
+        text = node_or_string
+    return text
+
+
 def _text_content(func):
     # This decorator hides the difference between
     # an XML node with text or a plain string.  It's used
@@ -176,20 +224,18 @@ def _text_content(func):
     # strings, which allows the same scalar handlers to be used
     # for XML nodes from the body and HTTP headers.
     def _get_text_content(self, shape, node_or_string):
-        if hasattr(node_or_string, 'text'):
-            text = node_or_string.text
-            if text is None:
-                # If an XML node is empty <foo></foo>,
-                # we want to parse that as an empty string,
-                # not as a null/None value.
-                text = ''
-        else:
-            text = node_or_string
-        return func(self, shape, text)
+        return func(self, shape, _get_text(node_or_string))
 
     return _get_text_content
 
 
+def _method_owner(cls, name):
+    for klass in cls.__mro__:
+        if name in vars(klass):
+            return klass
+    return None
+
+
 class ResponseParserError(Exception):
     pass
 
@@ -346,6 +392,76 @@ class ResponseParser:
         )
         return handler(shape, node)
 
+    def _parse_root(self, shape, node):
+        """Parses a response body, as ``_parse_shape`` does.
+
+        The body is parsed by the compiled parser of the shape when the
+        parser supports it, instead of dispatching on the type of every
+        node of the shape.
+        """
+        parse = self._get_compiled_shape(shape)
+        if parse is None:
+            return self._parse_shape(shape, node)
+        return parse(node)
+
+    @classmethod
+    def _supports_compiled_shapes(cls):
+        """Whether ``_compile`` parses shapes as ``_parse_shape`` does.
+
+        Parsers implementing ``_compile`` turn a shape into a function
+        parsing nodes of that shape, with a ``_compile_<type>`` method for
+        every ``_handle_<type>`` method.  A subclass overriding how a type
+        is parsed but not how it is compiled keeps walking the shapes.
+        """
+        supported = _COMPILED_SHAPES_SUPPORT.get(cls)
+        if supported is None:
+            method_pairs = [
+                ('_parse_shape', '_compile'),
+                ('_default_handle', '_compile'),
+            ]
+            for type_name in _SHAPE_TYPE_NAMES:
+                handle_name = f'_handle_{type_name}'
+                if hasattr(cls, handle_name):
+                    method_pairs.append((handle_name, f'_compile_{type_name}'))
+            supported = all(
+                _method_owner(cls, compile_name) is not None
+                and _method_owner(cls, compile_name)
+                is _method_owner(cls, handle_name)
+                for handle_name, compile_name in method_pairs
+            )
+            _COMPILED_SHAPES_SUPPORT[cls] = supported
+        return supported
+
+    def _get_compiled_shape(self, shape):
+        """Returns the compiled parser of a shape, or None.
+
+        Compiled parsers are cached per shape (i.e. per operation) on the
+        parser (i.e. per client).
+        """
+        if not self._supports_compiled_shapes():
+            return None
+        try:
+            compiled_shapes = self._compiled_shapes
+        except AttributeError:
+            compiled_shapes = self._compiled_shapes = {}
+        cached = compiled_shapes.get(id(shape))
+        if cached is not None and cached[0] is shape:
+            return cached[1]
+        compiled = self._compile(shape)
+        if compiled is None:
+            compiled = functools.partial(self._default_handle, shape)
+        # Keep the shape alive so that its id is not reused
+        compiled_shapes[id(shape)] = (shape, compiled)
+        return compiled
+
+    def _compile(self, shape):
+        # Returns a function(node) parsing a node of the shape, or None
+        # when nodes of the shape are returned unchanged (_default_handle).
+        method = getattr(self, f'_compile_{shape.type_name}', None)
+        if method is None:
+            return None
+        return method(shape)
+
     def _handle_list(self, shape, node):
         # Enough implementations share list serialization that it's moved
         # up here in the base class.
@@ -355,6 +471,16 @@ class ResponseParser:
             parsed.append(self._parse_shape(member_shape, item))
         return parsed
 
+    def _compile_list(self, shape):
+        parse_member = self._compile(shape.member)
+        if parse_member is None:
+            return list
+
+        def parse_list(node):
+            return [parse_member(item) for item in node]
+
+        return parse_list
+
     def _default_handle(self, shape, value):
         return value
 
@@ -412,9 +538,134 @@ class ResponseParser:
         return code
 
 
+class _ParsedElement(ETree.Element):
+    """An XML list item, already parsed."""
+
+    __slots__ = ('parsed',)
+
+
+# Parent "shape" of the root element of a response with a result wrapper
+_RESULT_WRAPPER = object()
+
+
+class _IncrementalTreeBuilder(ETree.TreeBuilder):
+    """Builds the tree of an XML response, parsing list items as they are read.
+
+    Elements are matched to the output shape as they are opened.  When an
+    item of one of its lists is closed, it is parsed with the compiled
+    parser of the list member and replaced in the tree by an empty
+    ``_ParsedElement`` holding the parsed item, so that the elements of a
+    large list never exist all at once.
+    """
+
+    def __init__(self, parser, shape, result_wrapper=None):
+        super().__init__()
+        self._parser = parser
+        self._shape = shape
+        self._result_wrapper = result_wrapper
+        # (element, shape, parse_item) of each open element.  The shape is
+        # None when the children of the element are not matched to the
+        # output shape, parse_item is None unless the element is a list item.
+        self._open = []
+        self._children = {}
+
+    def start(self, tag, attrs):
+        element = super().start(tag, attrs)
+        open_elements = self._open
+        if not open_elements:
+            parse_item = None
+            if self._result_wrapper is not None:
+                shape = _RESULT_WRAPPER
+            else:
+                shape = self._shape
+        elif open_elements[-1][1] is None:
+            shape = parse_item = None
+        else:
+            shape, parse_item = self._child(open_elements[-1][1], tag)
+        open_elements.append((element, shape, parse_item))
+        return element
+
+    def end(self, tag):
+        element = super().end(tag)
+        parse_item = self._open.pop()[2]
+        if parse_item is not None:
+            parsed_element = _ParsedElement(element.tag)
+            parsed_element.parsed = parse_item(element)
+            # The item is the last child of its parent so far
+            self._open[-1][0][-1] = parsed_element
+        return element
+
+    def _child(self, parent_shape, tag):
+        # Parent shapes are kept alive by the output shape
+        key = (id(parent_shape), tag)
+        child = self._children.get(key)
+        if child is None:
+            name = self._parser._namespace_re.sub('', tag)
+            child = self._children[key] = self._find_child(parent_shape, name)
+        return child
+
+    def _find_child(self, parent_shape, name):
+        if parent_shape is _RESULT_WRAPPER:
+            if name == self._result_wrapper:
+                return self._shape, None
+            return None, None
+        if parent_shape.type_name == 'list':
+            return self._list_item(parent_shape.member)
+        if parent_shape.type_name != 'structure' or parent_shape.metadata.get(
+            'exception', False
+        ):
+            return None, None
+        parser = self._parser
+        matching_shapes = [
+            member_shape
+            for member_name, member_shape in parent_shape.members.items()
+            if member_shape.serialization.get('location')
+            not in parser.KNOWN_LOCATIONS
+            and not member_shape.serialization.get('eventheader')
+            and parser._member_key_name(member_shape, member_name) == name
+        ]
+        if len(matching_shapes) != 1:
+            # Elements parsed as several members are kept as they are
+            return None, None
+        member_shape = matching_shapes[0]
+        if member_shape.type_name == 'list' and (
+            member_shape.serialization.get('flattened')
+        ):
+            return self._list_item(member_shape.member)
+        if member_shape.type_name in ('list', 'structure'):
+            return member_shape, None
+        return None, None
+
+    def _list_item(self, member_shape):
+        if not hasattr(self._parser, f'_compile_{member_shape.type_name}'):
+            # Items returned unchanged are kept as elements
+            return None, None
+        return None, self._parser._get_compiled_shape(member_shape)
+
+
 class BaseXMLResponseParser(ResponseParser):
-    def __init__(self, timestamp_parser=None, blob_parser=None):
+    # Default of the ``incremental_parse_threshold`` argument.
+    INCREMENTAL_PARSE_THRESHOLD = None
+
+    def __init__(
+        self,
+        timestamp_parser=None,
+        blob_parser=None,
+        incremental_parse_threshold=None,
+    ):
+        """Creates the parser.
+
+        :param incremental_parse_threshold: Bodies of at least this many
+            bytes are parsed incrementally: the items of the lists of the
+            output shape are parsed as soon as they are read, and their
+            elements freed, instead of first building the tree of the whole
+            body.  Defaults to ``INCREMENTAL_PARSE_THRESHOLD``; None always
+            builds the whole tree.
+        """
         super().__init__(timestamp_parser, blob_parser)
+        if incremental_parse_threshold is None:
+            incremental_parse_threshold = self.INCREMENTAL_PARSE_THRESHOLD
+        self._incremental_parse_threshold = incremental_parse_threshold
         self._namespace_re = re.compile('{.*}')
 
     def _handle_map(self, shape, node):
@@ -438,6 +689,36 @@ class BaseXMLResponseParser(ResponseParser):
             parsed[key_name] = val_name
         return parsed
 
+    def _compile_map(self, shape):
+        key_location_name = shape.key.serialization.get('name') or 'key'
+        value_location_name = shape.value.serialization.get('name') or 'value'
+        flattened = shape.serialization.get('flattened')
+        parse_key = self._compile(shape.key)
+        parse_value = self._compile(shape.value)
+
+        def parse_map(node):
+            parsed = {}
+            if flattened and not isinstance(node, list):
+                node = [node]
+            for keyval_node in node:
+                for single_pair in keyval_node:
+                    # Within each <entry> there's a <key> and a <value>
+                    tag_name = self._node_tag(single_pair)
+                    if tag_name == key_location_name:
+                        key_name = single_pair
+                        if parse_key is not None:
+                            key_name = parse_key(single_pair)
+                    elif tag_name == value_location_name:
+                        val_name = single_pair
+                        if parse_value is not None:
+                            val_name = parse_value(single_pair)
+                    else:
+                        raise ResponseParserError(f"Unknown tag: {tag_name}")
+                parsed[key_name] = val_name
+            return parsed
+
+        return parse_map
+
     def _node_tag(self, node):
         return self._namespace_re.sub('', node.tag)
 
@@ -451,6 +732,25 @@ class BaseXMLResponseParser(ResponseParser):
             node = [node]
         return super()._handle_list(shape, node)
 
+    def _compile_list(self, shape):
+        flattened = shape.serialization.get('flattened')
+        parse_member = self._compile(shape.member)
+
+        def parse_list(node):
+            if flattened and not isinstance(node, list):
+                node = [node]
+            if parse_member is None:
+                return list(node)
+            # Items read by an _IncrementalTreeBuilder are already parsed
+            return [
+                item.parsed
+                if type(item) is _ParsedElement
+                else parse_member(item)
+                for item in node
+            ]
+
+        return parse_list
+
     def _handle_structure(self, shape, node):
         parsed = {}
         members = shape.members
@@ -488,6 +788,76 @@ class BaseXMLResponseParser(ResponseParser):
                     parsed[member_name] = attribs[location_name]
         return parsed
 
+    def _compile_structure(self, shape):
+        is_exception = shape.metadata.get('exception', False)
+        is_tagged_union = shape.is_tagged_union
+        # Members are compiled when the structure is first parsed, which
+        # keeps recursive shapes finite.
+        compiled_members = None
+
+        def compile_members():
+            compiled = []
+            members = shape.members
+            for member_name in members:
+                member_shape = members[member_name]
+                serialization = member_shape.serialization
+                if (
+                    serialization.get('location') in self.KNOWN_LOCATIONS
+                    or serialization.get('eventheader')
+                ):
+                    # All members with known locations have already been
+                    # handled, so we don't need to parse these members.
+                    continue
+                compiled.append(
+                    (
+                        member_name,
+                        self._member_key_name(member_shape, member_name),
+                        self._compile(member_shape),
+                        serialization.get('xmlAttribute'),
+                        serialization,
+                    )
+                )
+            return compiled
+
+        def parse_structure(node):
+            nonlocal compiled_members
+            if compiled_members is None:
+                compiled_members = compile_members()
+            parsed = {}
+            if is_exception:
+                node = self._get_error_root(node)
+            xml_dict = self._build_name_to_xml_node(node)
+            if is_tagged_union and self._has_unknown_tagged_union_member(
+                shape, xml_dict
+            ):
+                tag = self._get_first_key(xml_dict)
+                return self._handle_unknown_tagged_union_member(tag)
+            for (
+                member_name,
+                xml_name,
+                parse_member,
+                is_attribute,
+                serialization,
+            ) in compiled_members:
+                member_node = xml_dict.get(xml_name)
+                if member_node is not None:
+                    if parse_member is not None:
+                        member_node = parse_member(member_node)
+                    parsed[member_name] = member_node
+                elif is_attribute:
+                    attribs = {}
+                    location_name = serialization['name']
+                    for key, value in node.attrib.items():
+                        new_key = self._namespace_re.sub(
+                            location_name.split(':')[0] + ':', key
+                        )
+                        attribs[new_key] = value
+                    if location_name in attribs:
+                        parsed[member_name] = attribs[location_name]
+            return parsed
+
+        return parse_structure
+
     def _get_error_root(self, original_root):
         if self._node_tag(original_root) == 'ErrorResponse':
             for child in original_root:
@@ -548,6 +918,36 @@ class BaseXMLResponseParser(ResponseParser):
             )
         return root
 
+    def _should_parse_incrementally(self, xml_string, shape):
+        threshold = self._incremental_parse_threshold
+        return (
+            threshold is not None
+            and shape is not None
+            and xml_string
+            and len(xml_string) >= threshold
+            and self._supports_compiled_shapes()
+        )
+
+    def _parse_xml_string_incrementally(
+        self, xml_string, shape, result_wrapper=None
+    ):
+        # Like _parse_xml_string_to_dom, but the items of the lists of
+        # ``shape`` are parsed while the document is read, and left in the
+        # tree as _ParsedElement nodes for the compiled parser of the shape.
+        try:
+            parser = ETree.XMLParser(
+                target=_IncrementalTreeBuilder(self, shape, result_wrapper),
+                encoding=self.DEFAULT_ENCODING,
+            )
+            parser.feed(xml_string)
+            root = parser.close()
+        except XMLParseError as e:
+            raise ResponseParserError(
+                f"Unable to parse response ({e}), "
+                f"invalid XML received. Further retries may succeed:\n{xml_string}"
+            )
+        return root
+
     def _replace_nodes(self, parsed):
         for key, value in parsed.items():
             if list(value):
@@ -588,6 +988,43 @@ class BaseXMLResponseParser(ResponseParser):
     _handle_double = _handle_float
     _handle_long = _handle_integer
 
+    def _compile_boolean(self, shape):
+        def parse_boolean(node):
+            return _get_text(node) == 'true'
+
+        return parse_boolean
+
+    def _compile_float(self, shape):
+        def parse_float(node):
+            return float(_get_text(node))
+
+        return parse_float
+
+    def _compile_timestamp(self, shape):
+        def parse_timestamp(node):
+            return self._timestamp_parser(_get_text(node))
+
+        return parse_timestamp
+
+    def _compile_integer(self, shape):
+        def parse_integer(node):
+            return int(_get_text(node))
+
+        return parse_integer
+
+    def _compile_string(self, shape):
+        return _get_text
+
+    def _compile_blob(self, shape):
+        def parse_blob(node):
+            return self._blob_parser(_get_text(node))
+
+        return parse_blob
+
+    _compile_character = _compile_string
+    _compile_double = _compile_float
+    _compile_long = _compile_integer
+
 
 class QueryParser(BaseXMLResponseParser):
     def _do_error_parse(self, response, shape):
@@ -614,7 +1051,12 @@ class QueryParser(BaseXMLResponseParser):
 
     def _parse_body_as_xml(self, response, shape, inject_metadata=True):
         xml_contents = response['body']
-        root = self._parse_xml_string_to_dom(xml_contents)
+        if self._should_parse_incrementally(xml_contents, shape):
+            root = self._parse_xml_string_incrementally(
+                xml_contents, shape, shape.serialization.get('resultWrapper')
+            )
+        else:
+            root = self._parse_xml_string_to_dom(xml_contents)
         parsed = {}
         if shape is not None:
             start = root
@@ -622,7 +1064,7 @@ class QueryParser(BaseXMLResponseParser):
                 start = self._find_result_wrapped_shape(
                     shape.serialization['resultWrapper'], root
                 )
-            parsed = self._parse_shape(shape, start)
+            parsed = self._parse_root(shape, start)
         if inject_metadata:
             self._inject_response_metadata(root, parsed)
         return parsed
@@ -719,6 +1161,87 @@ class BaseJSONParser(ResponseParser):
     def _handle_timestamp(self, shape, value):
         return self._timestamp_parser(value)
 
+    def _compile_structure(self, shape):
+        if shape.is_document_type:
+            return None
+        is_tagged_union = shape.is_tagged_union
+        # Members are compiled when the structure is first parsed, which
+        # keeps recursive shapes finite.
+        compiled_members = None
+
+        def compile_members():
+            members = shape.members
+            return [
+                (
+                    member_name,
+                    members[member_name].serialization.get('name', member_name),
+                    self._compile(members[member_name]),
+                )
+                for member_name in members
+            ]
+
+        def parse_structure(value):
+            nonlocal compiled_members
+            if value is None:
+                # If the comes across the wire as "null" (None in python),
+                # we should be returning this unchanged, instead of as an
+                # empty dict.
+                return None
+            if compiled_members is None:
+                compiled_members = compile_members()
+            if is_tagged_union and self._has_unknown_tagged_union_member(
+                shape, value
+            ):
+                tag = self._get_first_key(value)
+                return self._handle_unknown_tagged_union_member(tag)
+            final_parsed = {}
+            for member_name, json_name, parse_member in compiled_members:
+                raw_value = value.get(json_name)
+                if raw_value is not None:
+                    if parse_member is not None:
+                        raw_value = parse_member(raw_value)
+                    final_parsed[member_name] = raw_value
+            return final_parsed
+
+        return parse_structure
+
+    def _compile_map(self, shape):
+        parse_key = self._compile(shape.key)
+        parse_value = self._compile(shape.value)
+        if parse_key is None and parse_value is None:
+            return dict
+        if parse_key is None:
+
+            def parse_map(value):
+                return {key: parse_value(val) for key, val in value.items()}
+
+        elif parse_value is None:
+
+            def parse_map(value):
+                return {parse_key(key): val for key, val in value.items()}
+
+        else:
+
+            def parse_map(value):
+                return {
+                    parse_key(key): parse_value(val)
+                    for key, val in value.items()
+                }
+
+        return parse_map
+
+    def _compile_blob(self, shape):
+        def parse_blob(value):
+            return self._blob_parser(value)
+
+        return parse_blob
+
+    def _compile_timestamp(self, shape):
+        def parse_timestamp(value):
+            return self._timestamp_parser(value)
+
+        return parse_timestamp
+
     def _do_error_parse(self, response, shape):
         body = self._parse_body_as_json(response['body'])
         error = {"Error": {"Message": '', "Code": ''}, "ResponseMetadata": {}}
@@ -1107,7 +1630,7 @@ class JSONParser(BaseJSONParser):
         # but we need to traverse the parsed JSON data to convert
         # to richer types (blobs, timestamps, etc.
         parsed_json = self._parse_body_as_json(raw_body)
-        return self._parse_shape(shape, parsed_json)
+        return self._parse_root(shape, parsed_json)
 
 
 class BaseRestParser(ResponseParser):
@@ -1162,15 +1685,17 @@ class BaseRestParser(ResponseParser):
                     body = body.decode(self.DEFAULT_ENCODING)
                 final_parsed[payload_member_name] = body
             else:
-                original_parsed = self._initial_body_parse(response['body'])
-                final_parsed[payload_member_name] = self._parse_shape(
-                    body_shape, original_parsed
+                final_parsed[payload_member_name] = self._parse_body(
+                    response['body'], body_shape
                 )
         else:
-            original_parsed = self._initial_body_parse(response['body'])
-            body_parsed = self._parse_shape(shape, original_parsed)
+            body_parsed = self._parse_body(response['body'], shape)
             final_parsed.update(body_parsed)
 
+    def _parse_body(self, body_contents, shape):
+        original_parsed = self._initial_body_parse(body_contents)
+        return self._parse_root(shape, original_parsed)
+
     def _parse_non_payload_attrs(
         self, response, shape, member_shapes, final_parsed
     ):
@@ -1222,6 +1747,16 @@ class BaseRestParser(ResponseParser):
             parsed = json.loads(decoded)
         return parsed
 
+    def _compile_string(self, shape):
+        if not is_json_value_header(shape):
+            return None
+
+        def parse_json_value(value):
+            decoded = base64.b64decode(value).decode(self.DEFAULT_ENCODING)
+            return json.loads(decoded)
+
+        return parse_json_value
+
     def _handle_list(self, shape, node):
         location = shape.serialization.get('location')
         if location == 'header' and not isinstance(node, list):
@@ -1229,6 +1764,19 @@ class BaseRestParser(ResponseParser):
             node = [e.strip() for e in node.split(',')]
         return super()._handle_list(shape, node)
 
+    def _compile_list(self, shape):
+        parse_list = super()._compile_list(shape)
+        if shape.serialization.get('location') != 'header':
+            return parse_list
+
+        def parse_header_list(node):
+            if not isinstance(node, list):
+                # List in headers may be a comma separated string as per RFC7230
+                node = [e.strip() for e in node.split(',')]
+            return parse_list(node)
+
+        return parse_header_list
+
 
 class BaseRpcV2Parser(ResponseParser):
     def _do_parse(self, response, shape):
@@ -1339,6 +1887,18 @@ class RestJSONParser(BaseRestParser, BaseJSONParser):
     _handle_long = _handle_integer
     _handle_double = _handle_float
 
+    def _compile_boolean(self, shape):
+        return ensure_boolean
+
+    def _compile_integer(self, shape):
+        return int
+
+    def _compile_float(self, shape):
+        return float
+
+    _compile_long = _compile_integer
+    _compile_double = _compile_float
+
 
 class RpcV2CBORParser(BaseRpcV2Parser, BaseCBORParser):
     EVENT_STREAM_PARSER_CLS = EventStreamCBORParser
@@ -1468,11 +2028,27 @@ class RestXMLParser(BaseRestParser, BaseXMLResponseParser):
         merge_dicts(default, parsed)
         return default
 
+    def _parse_body(self, body_contents, shape):
+        if self._should_parse_incrementally(body_contents, shape):
+            root = self._parse_xml_string_incrementally(body_contents, shape)
+            return self._parse_root(shape, root)
+        return super()._parse_body(body_contents, shape)
+
     @_text_content
     def _handle_string(self, shape, text):
         text = super()._handle_string(shape, text)
         return text
 
+    def _compile_string(self, shape):
+        parse_string = super()._compile_string(shape)
+        if parse_string is None:
+            return _get_text
+
+        def parse_text(node):
+            return parse_string(_get_text(node))
+
+        return parse_text
+
 
 PROTOCOL_PARSERS = {
     'ec2': EC2QueryParser,
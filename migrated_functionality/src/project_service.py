@@ -5,7 +5,10 @@ Handles project management logic including project graphs, state management,
 and synchronization with the display.
 """
 
-from typing import Dict, Any, Optional, Callable, List, TYPE_CHECKING
+from typing import Dict, Any, Optional, Callable, List, Set, TYPE_CHECKING
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
 import traceback
 from loguru import logger
 from datetime import datetime
@@ -22,10 +25,151 @@ from ...hierarchical_agent_framework.node.node_processor import NodeProcessor
 from ...hierarchical_agent_framework.node.hitl_coordinator import HITLCoordinator
 from ...hierarchical_agent_framework.node.task_node import TaskNode
 from ...hierarchical_agent_framework.types import TaskStatus, TaskType, NodeType
+from .project_snapshot import ORPHAN_BLOCK, ProjectSnapshotCodec, ProjectSnapshotReader, write_project_snapshot
 
 if TYPE_CHECKING:
     from ...core.system_manager import SystemManager
 
+class ProjectPersistenceWorker:
+    """
+    Coalescing, debounced writer for project state snapshots.
+    
+    Only the latest pending snapshot per project is kept. A snapshot is
+    written once no newer one has arrived for `debounce_seconds` (but at most
+    `max_delay_seconds` after the first pending one), on a bounded thread
+    pool, with at most one write in flight per project.
+    """
+    
+    def __init__(self, save_fn: Callable[[str, Dict[str, Any]], None],
+                 debounce_seconds: float = 0.5, max_delay_seconds: float = 2.0,
+                 max_workers: int = 2):
+        """
+        Initialize ProjectPersistenceWorker.
+        
+        Args:
+            save_fn: Called with (project_id, data) to write a snapshot
+            debounce_seconds: Quiet period before a pending snapshot is written
+            max_delay_seconds: Maximum time a snapshot may stay pending
+            max_workers: Size of the write thread pool
+        """
+        self.save_fn = save_fn
+        self.debounce_seconds = debounce_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._due: Dict[str, float] = {}
+        self._first_pending: Dict[str, float] = {}
+        self._in_flight: Set[str] = set()
+        self._condition = threading.Condition()
+        self._stopped = False
+        # Updated under self._condition
+        self.stats = {'submitted': 0, 'coalesced': 0, 'written': 0, 'failed': 0}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="project-persistence")
+        self._thread = threading.Thread(target=self._run, name="project-persistence-scheduler", daemon=True)
+        self._thread.start()
+    
+    def submit(self, project_id: str, data: Dict[str, Any]):
+        """Queue a snapshot, replacing any pending snapshot of the same project."""
+        with self._condition:
+            self.stats['submitted'] += 1
+            if not self._stopped:
+                now = time.monotonic()
+                if project_id in self._pending:
+                    self.stats['coalesced'] += 1
+                else:
+                    self._first_pending[project_id] = now
+                self._pending[project_id] = data
+                self._due[project_id] = min(now + self.debounce_seconds,
+                                            self._first_pending[project_id] + self.max_delay_seconds)
+                self._condition.notify()
+                return
+            # After shutdown nothing picks snapshots up anymore, so write it right away
+            self._in_flight.add(project_id)
+        self._write(project_id, data)
+    
+    def _run(self):
+        while True:
+            with self._condition:
+                while True:
+                    now = time.monotonic()
+                    waiting = {pid: due for pid, due in self._due.items() if pid not in self._in_flight}
+                    ready = [pid for pid, due in waiting.items() if due <= now]
+                    if ready or (self._stopped and not self._pending):
+                        break
+                    timeout = min(waiting.values()) - now if waiting else None
+                    self._condition.wait(timeout)
+                
+                if not ready:
+                    return
+                
+                for project_id in ready:
+                    data = self._pending.pop(project_id)
+                    del self._due[project_id]
+                    del self._first_pending[project_id]
+                    self._in_flight.add(project_id)
+                    self._executor.submit(self._write, project_id, data)
+    
+    def _write(self, project_id: str, data: Dict[str, Any]):
+        stat = 'written'
+        try:
+            self.save_fn(project_id, data)
+        except Exception as e:
+            stat = 'failed'
+            logger.warning(f"Async save failed for project {project_id}: {e}")
+        finally:
+            with self._condition:
+                self.stats[stat] += 1
+                self._in_flight.discard(project_id)
+                self._condition.notify_all()
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Write all pending snapshots now and wait for them to finish.
+        
+        Returns:
+            True if everything was written before the timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            for project_id in self._due:
+                self._due[project_id] = 0
+            self._condition.notify_all()
+            while self._pending or self._in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+    
+    def shutdown(self, timeout: Optional[float] = None):
+        """
+        Write pending snapshots and stop the worker.
+        
+        Pending snapshots are written on the calling thread. Safe to call
+        more than once.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            self._stopped = True
+            pending = self._pending
+            self._pending = {}
+            self._due.clear()
+            self._first_pending.clear()
+            self._condition.notify_all()
+            # Let in-flight writes finish first, so an older snapshot never
+            # overwrites a newer pending one
+            while self._in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            self._in_flight.update(pending)
+        
+        for project_id, data in pending.items():
+            self._write(project_id, data)
+        self._thread.join(timeout)
+        self._executor.shutdown(wait=True)
+
+
 class ProjectService:
     """
     Manages project lifecycle, state, and synchronization.
@@ -35,6 +179,9 @@ class ProjectService:
     - State synchronization between projects and display
     - Project configuration management
     - Real-time updates and callbacks
+    
+    Call `shutdown()` when the server stops: snapshots still pending in the
+    persistence worker are not written otherwise.
     """
     
     def __init__(self, system_manager: "SystemManager", broadcast_callback: Optional[Callable] = None):
@@ -63,6 +210,23 @@ class ProjectService:
         self.results_dir = paths.experiment_results_dir
         self.results_dir.mkdir(exist_ok=True, parents=True)
         
+        # Coalesced background persistence with incremental results snapshots
+        self.persistence_worker = ProjectPersistenceWorker(self._persist_project_snapshot)
+        self.results_compact_every = 50
+        self._results_baselines: Dict[str, Dict[str, int]] = {}
+        self._results_delta_counts: Dict[str, int] = {}
+        # Last sequence number of each project's results package and delta log
+        self._results_seqs: Dict[str, int] = {}
+        self._results_locks: Dict[str, threading.Lock] = {}
+        self._results_locks_guard = threading.Lock()
+        # Fingerprint of the last saved state per project, to skip unchanged saves
+        self._state_fingerprints: Dict[str, int] = {}
+        
+        # Binary graph snapshots used for fast project loading
+        self.snapshot_codec = ProjectSnapshotCodec([TaskStatus, TaskType, NodeType])
+        # Subgraphs left out of a lazily loaded project graph, per project
+        self._unloaded_subgraphs: Dict[str, Set[str]] = {}
+        
         logger.info("✅ ProjectService initialized")
         
     def get_all_projects(self) -> Dict[str, Any]:
@@ -180,7 +344,7 @@ class ProjectService:
             # Ensure project is loaded in memory
             if project_id not in self.project_graphs:
                 logger.debug(f"Loading project {project_id} into memory for display")
-                if not self.load_project_into_graph(project_id):
+                if not self.load_project_into_graph(project_id, lazy=True):
                     logger.warning(f"Failed to load project {project_id}")
                     # Try to get data from comprehensive results as fallback
                     return self._try_comprehensive_results_fallback(project_id)
@@ -232,6 +396,11 @@ class ProjectService:
                 logger.warning(f"Serialization returned non-dict ({type(data)}) for project {project_id}")
                 return self._try_comprehensive_results_fallback(project_id)
             
+            # A lazily loaded graph lists the subgraphs that expand_project_subgraph can load
+            unloaded = self._unloaded_subgraphs.get(project_id)
+            if unloaded:
+                data['unloaded_subgraphs'] = sorted(unloaded)
+            
             # Verify we have the expected structure
             node_count_serialized = len(data.get('all_nodes', {}))
             logger.debug(f"✅ Retrieved display data for project {project_id}: {node_count_serialized} nodes")
@@ -405,12 +574,16 @@ class ProjectService:
             project_id: Project identifier to load
         """
         try:
-            # Ensure project is loaded in memory
-            if project_id not in self.project_graphs:
-                self.load_project_into_graph(project_id)
+            # Only the root subgraph is loaded from the binary snapshot; the
+            # display expands the other subgraphs on demand
+            if project_id in self.project_graphs:
+                loaded = True
+            else:
+                loaded = self.load_project_into_graph(project_id, lazy=True)
             
-            # Load saved results if available (for persistence)
-            self._auto_load_project_results(project_id)
+            # Saved results are only needed when the graph could not be loaded
+            if not loaded:
+                self._auto_load_project_results(project_id)
             
             logger.debug(f"Project {project_id} prepared for display")
             
@@ -425,13 +598,15 @@ class ProjectService:
             if not self.current_display_project_id:
                 return
             
+            # A lazily loaded graph is only completed before it changes, so a
+            # partial graph is still what is saved
+            if self.current_display_project_id in self._unloaded_subgraphs:
+                return
+            
             # Get current project data
             project_data = self.get_project_display_data(self.current_display_project_id)
             
-            # Save to project state
-            self.project_manager.save_project_state(self.current_display_project_id, project_data)
-            
-            # Also save detailed results for persistence
+            # The persistence worker saves the state, its binary snapshot and the results
             self.save_project_state_async(self.current_display_project_id, project_data)
             
             logger.debug(f"Saved display state for project: {self.current_display_project_id}")
@@ -443,39 +618,351 @@ class ProjectService:
         """
         Asynchronously save project state to prevent blocking operations.
         
+        Saves are coalesced per project and debounced by the persistence
+        worker, so only the latest snapshot is written.
+        
         Args:
             project_id: Project identifier
             data: Project data to save
         """
         try:
-            import threading
+            self.persistence_worker.submit(project_id, data)
+        except Exception as e:
+            logger.warning(f"Failed to queue async save for project {project_id}: {e}")
+    
+    def flush_pending_saves(self, timeout: Optional[float] = None) -> bool:
+        """
+        Write all pending project snapshots and wait for them.
+        
+        Args:
+            timeout: Maximum seconds to wait
             
-            def save_task():
-                try:
-                    # Save basic state
-                    self.project_manager.save_project_state(project_id, data)
-                    
-                    # Save detailed results for persistence
-                    results_package = {
-                        'basic_state': data,
-                        'saved_at': datetime.now().isoformat(),
-                        'metadata': {
-                            'node_count': len(data.get('all_nodes', {})),
-                            'project_goal': data.get('overall_project_goal'),
-                            'completion_status': self._get_completion_status(data.get('all_nodes', {}))
-                        }
-                    }
-                    self.save_project_results(project_id, results_package)
-                    
-                except Exception as e:
-                    logger.warning(f"Async save failed for project {project_id}: {e}")
+        Returns:
+            True if all pending saves completed
+        """
+        return self.persistence_worker.flush(timeout)
+    
+    def shutdown(self, timeout: Optional[float] = None):
+        """
+        Write all pending project snapshots and stop the persistence worker,
+        then save the displayed project with its binary snapshot.
+        
+        Args:
+            timeout: Maximum seconds to wait for in-flight writes
+        """
+        self.persistence_worker.shutdown(timeout)
+        if self.current_display_project_id in self.project_graphs:
+            self._save_current_display_state()
+    
+    def _persist_project_snapshot(self, project_id: str, data: Dict[str, Any]):
+        """Write one coalesced snapshot: basic state, binary graph snapshot and results package."""
+        fingerprints = self._node_fingerprints(data.get('all_nodes', {}))
+        
+        # Save basic state
+        self.save_project_state(project_id, data, fingerprints)
+        
+        # Refresh the binary snapshot, unless a newer state was saved meanwhile
+        state_fingerprint = self._state_fingerprint(data, fingerprints)
+        with self._results_lock(project_id):
+            if (self._state_fingerprints.get(project_id) == state_fingerprint
+                    and not self._snapshot_file(project_id).exists()):
+                self.save_project_snapshot(project_id, data)
+        
+        # Save detailed results for persistence
+        self._save_results_snapshot(project_id, data, fingerprints)
+    
+    def _state_fingerprint(self, data: Dict[str, Any], fingerprints: Dict[str, int]) -> int:
+        rest = {key: value for key, value in data.items() if key != 'all_nodes'}
+        return hash((json.dumps(rest, sort_keys=True, default=str), tuple(sorted(fingerprints.items()))))
+    
+    def save_project_state(self, project_id: str, data: Dict[str, Any],
+                           fingerprints: Optional[Dict[str, int]] = None):
+        """
+        Save project state.
+        
+        Saves of a state identical to the last one saved are skipped. A
+        changed state makes the binary graph snapshot stale, so it is
+        removed; the persistence worker writes a new one.
+        
+        Args:
+            project_id: Project identifier
+            data: Serialized project graph data
+            fingerprints: Node fingerprints of data, if already computed
+        """
+        if fingerprints is None:
+            fingerprints = self._node_fingerprints(data.get('all_nodes', {}))
+        state_fingerprint = self._state_fingerprint(data, fingerprints)
+        with self._results_lock(project_id):
+            if self._state_fingerprints.get(project_id) == state_fingerprint:
+                return
+        
+        self.project_manager.save_project_state(project_id, data)
+        with self._results_lock(project_id):
+            self._snapshot_file(project_id).unlink(missing_ok=True)
+            self._state_fingerprints[project_id] = state_fingerprint
+    
+    def _snapshot_file(self, project_id: str) -> Path:
+        return self.results_dir / f"{project_id}_graph.snap"
+    
+    def save_project_snapshot(self, project_id: str, data: Dict[str, Any]) -> bool:
+        """
+        Write the binary graph snapshot for a project.
+        
+        Node timestamps and enums are converted once here, so loading the
+        snapshot can construct TaskNodes directly.
+        
+        Args:
+            project_id: Project identifier
+            data: Serialized project graph data
             
-            # Run save in background thread
-            thread = threading.Thread(target=save_task, daemon=True)
-            thread.start()
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            all_nodes = {}
+            for node_id, node_data in data.get('all_nodes', {}).items():
+                node = dict(node_data)
+                self._deserialize_node_timestamps(node)
+                self._deserialize_node_enums(node)
+                all_nodes[node_id] = self._prepare_node_data_for_deserialization(node)
+            
+            write_project_snapshot(
+                self._snapshot_file(project_id),
+                self.snapshot_codec,
+                all_nodes,
+                data.get('graphs', {}),
+                {
+                    'overall_project_goal': data.get('overall_project_goal'),
+                    'root_graph_id': data.get('root_graph_id')
+                }
+            )
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to write graph snapshot for project {project_id}: {e}")
+            self._snapshot_file(project_id).unlink(missing_ok=True)
+            return False
+    
+    def _load_project_from_snapshot(self, project_id: str, project_task_graph: TaskGraph,
+                                    graph_ids: Optional[List[str]] = None, lazy: bool = False) -> bool:
+        """
+        Load a project's task graph from its binary snapshot.
+        
+        Args:
+            project_id: Project identifier
+            project_task_graph: Task graph to load into
+            graph_ids: Only load the nodes of these subgraphs (all when None)
+            lazy: Only load the root subgraph and orphan nodes; the other
+                subgraphs are tracked and loaded on demand
+            
+        Returns:
+            True if the snapshot was loaded, False if there is no usable snapshot
+        """
+        snapshot_file = self._snapshot_file(project_id)
+        if not snapshot_file.exists():
+            return False
+        
+        try:
+            with ProjectSnapshotReader(snapshot_file, self.snapshot_codec) as reader:
+                if lazy and graph_ids is None:
+                    graph_ids = [reader.state.get('root_graph_id'), ORPHAN_BLOCK]
+                
+                project_task_graph.nodes.clear()
+                project_task_graph.graphs.clear()
+                
+                failed_nodes = 0
+                for _, nodes in reader.iter_blocks(graph_ids):
+                    for node_id, node_data in nodes.items():
+                        try:
+                            project_task_graph.nodes[node_id] = TaskNode(**node_data)
+                        except Exception as e:
+                            logger.warning(f"Failed to load node {node_id} from snapshot: {e}")
+                            failed_nodes += 1
+                
+                unloaded = set(reader.block_ids()).difference(graph_ids or reader.block_ids())
+                # Deferred subgraphs are reconstructed when their nodes are loaded
+                self._reconstruct_graphs(project_task_graph, {
+                    graph_id: graph_data for graph_id, graph_data in reader.graphs.items()
+                    if graph_id not in unloaded
+                })
+                project_task_graph.overall_project_goal = reader.state.get('overall_project_goal')
+                project_task_graph.root_graph_id = reader.state.get('root_graph_id')
+                
+                if unloaded:
+                    self._unloaded_subgraphs[project_id] = unloaded
+                else:
+                    self._unloaded_subgraphs.pop(project_id, None)
+                
+                logger.debug(f"📦 Loaded project {project_id} from snapshot: "
+                             f"{len(project_task_graph.nodes)} nodes, {failed_nodes} failed, "
+                             f"{len(unloaded)} subgraphs deferred")
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to load graph snapshot for project {project_id}, falling back to state: {e}")
+            return False
+    
+    def expand_project_subgraph(self, project_id: str, graph_id: str) -> bool:
+        """
+        Load one deferred subgraph of a lazily loaded project into its task graph.
+        
+        Args:
+            project_id: Project identifier
+            graph_id: Subgraph identifier
             
+        Returns:
+            True if the subgraph is loaded (now or before), False otherwise
+        """
+        unloaded = self._unloaded_subgraphs.get(project_id)
+        if not unloaded or graph_id not in unloaded:
+            return project_id in self.project_graphs
+        
+        try:
+            with ProjectSnapshotReader(self._snapshot_file(project_id), self.snapshot_codec) as reader:
+                nodes = {
+                    node_id: TaskNode(**node_data)
+                    for node_id, node_data in reader.load_block(graph_id).items()
+                }
+                graph_data = reader.graphs.get(graph_id)
         except Exception as e:
-            logger.warning(f"Failed to start async save for project {project_id}: {e}")
+            # Snapshot gone or unreadable: load the whole project instead
+            logger.warning(f"Failed to expand subgraph {graph_id} of project {project_id}: {e}")
+            return self._load_remaining_subgraphs(project_id)
+        
+        project_task_graph = self.project_graphs[project_id]['task_graph']
+        project_task_graph.nodes.update(nodes)
+        if graph_data is not None:
+            self._reconstruct_graphs(project_task_graph, {graph_id: graph_data}, replace=False)
+        unloaded.discard(graph_id)
+        if not unloaded:
+            self._unloaded_subgraphs.pop(project_id, None)
+        return True
+    
+    def _load_remaining_subgraphs(self, project_id: str) -> bool:
+        """Complete a lazily loaded project graph, from its snapshot or else its saved state."""
+        if self._unloaded_subgraphs.pop(project_id, None) is None or project_id not in self.project_graphs:
+            return project_id in self.project_graphs
+        
+        project_task_graph = self.project_graphs[project_id]['task_graph']
+        if self._load_project_from_snapshot(project_id, project_task_graph):
+            return True
+        return self.load_project_into_graph(project_id)
+    
+    def _results_lock(self, project_id: str) -> threading.Lock:
+        with self._results_locks_guard:
+            lock = self._results_locks.get(project_id)
+            if lock is None:
+                lock = self._results_locks[project_id] = threading.Lock()
+            return lock
+    
+    def _results_delta_file(self, project_id: str) -> Path:
+        return self.results_dir / f"{project_id}_results.delta.jsonl"
+    
+    @staticmethod
+    def _node_fingerprints(all_nodes: Dict[str, Any]) -> Dict[str, int]:
+        return {
+            node_id: hash(json.dumps(node, sort_keys=True, default=str))
+            for node_id, node in all_nodes.items()
+        }
+    
+    def _save_results_snapshot(self, project_id: str, data: Dict[str, Any],
+                               fingerprints: Optional[Dict[str, int]] = None):
+        """
+        Save the results package for a state snapshot.
+        
+        After a full write, later snapshots only append the nodes that
+        changed (and the ids of removed nodes) to a delta log; the full
+        package is rewritten every `results_compact_every` deltas.
+        """
+        all_nodes = data.get('all_nodes', {})
+        metadata = {
+            'node_count': len(all_nodes),
+            'project_goal': data.get('overall_project_goal'),
+            'completion_status': self._get_completion_status(all_nodes)
+        }
+        if fingerprints is None:
+            fingerprints = self._node_fingerprints(all_nodes)
+        
+        with self._results_lock(project_id):
+            baseline = self._results_baselines.get(project_id)
+            delta_count = self._results_delta_counts.get(project_id, 0)
+            
+            if baseline is not None and delta_count < self.results_compact_every:
+                delta = {
+                    'seq': self._next_results_seq(project_id),
+                    'saved_at': datetime.now().isoformat(),
+                    'changed': {
+                        node_id: all_nodes[node_id]
+                        for node_id, fingerprint in fingerprints.items()
+                        if baseline.get(node_id) != fingerprint
+                    },
+                    'removed': [node_id for node_id in baseline if node_id not in fingerprints],
+                    'state': {key: value for key, value in data.items() if key != 'all_nodes'},
+                    'metadata': metadata
+                }
+                with open(self._results_delta_file(project_id), 'a') as f:
+                    f.write(json.dumps(delta, default=str) + "\n")
+                self._results_baselines[project_id] = fingerprints
+                self._results_delta_counts[project_id] = delta_count + 1
+                return
+        
+        results_package = {
+            'basic_state': data,
+            'saved_at': datetime.now().isoformat(),
+            'metadata': metadata
+        }
+        if self.save_project_results(project_id, results_package):
+            with self._results_lock(project_id):
+                self._results_baselines[project_id] = fingerprints
+                self._results_delta_counts[project_id] = 0
+    
+    def _next_results_seq(self, project_id: str) -> int:
+        """
+        Next sequence number for the results of a project; call with its results lock held.
+        
+        The counter resumes after the last entry of a delta log left by an
+        earlier run, so a full package saved now counts as newer than it.
+        """
+        seq = self._results_seqs.get(project_id)
+        if seq is None:
+            seq = 0
+            try:
+                with open(self._results_delta_file(project_id), 'r') as f:
+                    for line in f:
+                        try:
+                            seq = max(seq, json.loads(line).get('seq', 0))
+                        except json.JSONDecodeError:
+                            break
+            except OSError:
+                pass
+        self._results_seqs[project_id] = seq + 1
+        return seq + 1
+    
+    def _apply_results_deltas(self, project_id: str, results_package: Dict[str, Any]) -> Dict[str, Any]:
+        """Apply delta log entries newer than the full results package."""
+        delta_file = self._results_delta_file(project_id)
+        if not delta_file.exists() or 'basic_state' not in results_package:
+            return results_package
+        
+        base_seq = results_package.get('save_metadata', {}).get('delta_seq', 0)
+        basic_state = results_package['basic_state']
+        all_nodes = basic_state.setdefault('all_nodes', {})
+        
+        with open(delta_file, 'r') as f:
+            for line in f:
+                try:
+                    delta = json.loads(line)
+                except json.JSONDecodeError:
+                    # Partially written last entry
+                    break
+                if delta.get('seq', 0) <= base_seq:
+                    continue
+                for node_id in delta.get('removed', []):
+                    all_nodes.pop(node_id, None)
+                all_nodes.update(delta.get('changed', {}))
+                basic_state.update(delta.get('state', {}))
+                results_package['metadata'] = delta.get('metadata', results_package.get('metadata'))
+                results_package['saved_at'] = delta.get('saved_at', results_package.get('saved_at'))
+        
+        return results_package
     
     def delete_project(self, project_id: str) -> bool:
         """
@@ -493,6 +980,14 @@ class ProjectService:
             if results_file.exists():
                 results_file.unlink()
                 logger.info(f"🗑️ Deleted saved results for project {project_id}")
+            self._results_delta_file(project_id).unlink(missing_ok=True)
+            with self._results_lock(project_id):
+                self._results_baselines.pop(project_id, None)
+                self._results_delta_counts.pop(project_id, None)
+                self._results_seqs.pop(project_id, None)
+                self._state_fingerprints.pop(project_id, None)
+            self._snapshot_file(project_id).unlink(missing_ok=True)
+            self._unloaded_subgraphs.pop(project_id, None)
             
             # Remove custom config
             if project_id in self.project_configs:
@@ -555,6 +1050,9 @@ class ProjectService:
             config_type = "custom" if project_id in self.project_configs else "default"
             logger.info(f"✅ Created execution environment for project {project_id} "
                        f"({config_type} config, HITL: {'enabled' if custom_config.execution.enable_hitl else 'disabled'})")
+        elif project_id in self._unloaded_subgraphs:
+            # Callers other than the display need the complete graph
+            self._load_remaining_subgraphs(project_id)
         
         return self.project_graphs[project_id]
     
@@ -595,12 +1093,13 @@ class ProjectService:
             logger.error(f"Failed to sync project {project_id} to display: {e}")
             return False
     
-    def load_project_into_graph(self, project_id: str) -> bool:
+    def load_project_into_graph(self, project_id: str, lazy: bool = False) -> bool:
         """
         Load a project's state into its task graph for display with comprehensive debugging.
         
         Args:
             project_id: Project identifier to load
+            lazy: When loading from a snapshot, defer all but the root subgraph
             
         Returns:
             True if successful, False otherwise
@@ -608,6 +1107,9 @@ class ProjectService:
         try:
             logger.debug(f"🚨 LOAD DEBUG - Starting load for project: {project_id}")
             
+            # A full load replaces whatever a lazy load left out
+            self._unloaded_subgraphs.pop(project_id, None)
+            
             # Get or create project-specific execution context
             project_components = self.get_or_create_project_graph(project_id)
             
@@ -617,6 +1119,16 @@ class ProjectService:
             
             logger.debug(f"🚨 LOAD DEBUG - Project graph created/retrieved: {project_components is not None}")
             
+            # Fast path: binary snapshot with native enums and timestamps
+            project_task_graph = project_components.get('task_graph')
+            if project_task_graph is not None and self._load_project_from_snapshot(project_id, project_task_graph,
+                                                                                     lazy=lazy):
+                if not project_task_graph.overall_project_goal:
+                    project = self.project_manager.get_project(project_id)
+                    if project:
+                        project_task_graph.overall_project_goal = project.goal
+                return True
+            
             # Load saved state into the project's task graph
             project_state = self.project_manager.load_project_state(project_id)
             project = self.project_manager.get_project(project_id)
@@ -711,7 +1223,7 @@ class ProjectService:
                     serializer = GraphSerializer(display_graph)
                     data = serializer.to_visualization_dict()
                 
-                self.project_manager.save_project_state(current_project.id, data)
+                self.save_project_state(current_project.id, data)
                 
                 # Also update the project-specific graph if it exists
                 if current_project.id in self.project_graphs:
@@ -722,6 +1234,7 @@ class ProjectService:
                     project_task_graph.graphs.update(display_graph.graphs)
                     project_task_graph.overall_project_goal = display_graph.overall_project_goal
                     project_task_graph.root_graph_id = display_graph.root_graph_id
+                    self._unloaded_subgraphs.pop(current_project.id, None)
                 
                 logger.debug(f"💾 Saved state for project {current_project.id}")
             except Exception as e:
@@ -771,7 +1284,7 @@ class ProjectService:
                 # Trigger broadcast for current project
                 if self.broadcast_callback:
                     self.broadcast_callback()
-            # If not current project, just save the state without syncing to display
+            # If not current project, queue a save on the persistence worker without syncing to display
             else:
                 try:
                     project_components = self.project_graphs.get(project_id)
@@ -783,7 +1296,7 @@ class ProjectService:
                             from ...hierarchical_agent_framework.graph.graph_serializer import GraphSerializer
                             serializer = GraphSerializer(project_task_graph)
                             data = serializer.to_visualization_dict()
-                        self.project_manager.save_project_state(project_id, data)
+                        self.save_project_state_async(project_id, data)
                 except Exception as e:
                     logger.warning(f"Failed to save state for background project {project_id}: {e}")
         
@@ -860,11 +1373,13 @@ class ProjectService:
             logger.warning(f"Failed to prepare node data for deserialization: {e}")
             return node_data
     
-    def _reconstruct_graphs(self, project_task_graph: TaskGraph, graphs_data: Dict[str, Any]):
-        """Reconstruct NetworkX graphs from serialized data."""
+    def _reconstruct_graphs(self, project_task_graph: TaskGraph, graphs_data: Dict[str, Any],
+                            replace: bool = True):
+        """Reconstruct NetworkX graphs from serialized data, replacing the existing ones unless replace is False."""
         import networkx as nx
         
-        project_task_graph.graphs.clear()
+        if replace:
+            project_task_graph.graphs.clear()
         
         for graph_id, graph_data in graphs_data.items():
             try:
@@ -996,16 +1511,25 @@ class ProjectService:
         try:
             results_file = self.results_dir / f"{project_id}_results.json"
             
-            # Add save metadata
-            results_package['save_metadata'] = {
-                'saved_at': datetime.now().isoformat(),
-                'version': '1.0',
-                'project_id': project_id
-            }
-            
-            # Write to file
-            with open(results_file, 'w') as f:
-                json.dump(results_package, f, indent=2, default=str)
+            with self._results_lock(project_id):
+                # Add save metadata; delta log entries up to delta_seq are already included
+                results_package['save_metadata'] = {
+                    'saved_at': datetime.now().isoformat(),
+                    'version': '1.0',
+                    'project_id': project_id,
+                    'delta_seq': self._next_results_seq(project_id)
+                }
+                
+                # Write to a temporary file and atomically replace the results file
+                tmp_file = results_file.with_suffix(f".{threading.get_ident()}.tmp")
+                with open(tmp_file, 'w') as f:
+                    json.dump(results_package, f, indent=2, default=str)
+                os.replace(tmp_file, results_file)
+                
+                # The delta log is relative to the previous full package
+                self._results_delta_file(project_id).unlink(missing_ok=True)
+                self._results_baselines.pop(project_id, None)
+                self._results_delta_counts.pop(project_id, None)
             
             logger.debug(f"💾 Saved results for project {project_id}")
             return True
@@ -1030,8 +1554,10 @@ class ProjectService:
             if not results_file.exists():
                 return None
             
-            with open(results_file, 'r') as f:
-                results_package = json.load(f)
+            with self._results_lock(project_id):
+                with open(results_file, 'r') as f:
+                    results_package = json.load(f)
+                results_package = self._apply_results_deltas(project_id, results_package)
             
             logger.debug(f"📂 Loaded saved results for project {project_id}")
             return results_package
@@ -1079,7 +1605,8 @@ class ProjectService:
     
     def _auto_load_project_results(self, project_id: str):
         """
-        Automatically load project results when switching projects.
+        Automatically load project results when switching to a project
+        whose graph could not be loaded.
         """
         try:
             results_package = self.load_project_results(project_id)
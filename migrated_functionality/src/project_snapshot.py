@@ -0,0 +1,212 @@
+"""
+Project Snapshot
+
+Versioned binary snapshot format for project task graphs.
+
+A snapshot file is laid out as:
+
+    MAGIC | version (u16) | index length (u32) | index | node blocks...
+
+The index is a msgpack map holding the graph-level state (goal, root graph
+id, graph nodes and edges) and the offset and length of one node block per
+subgraph. Each node block is a msgpack map of node id to node data. Enums
+and datetimes are encoded natively as msgpack extension types, so nodes can
+be passed straight to TaskNode without fixing up fields in Python, and
+subgraphs can be read independently without decoding the rest of the file.
+"""
+
+import mmap
+import os
+import struct
+from datetime import datetime, timedelta, timezone
+from enum import Enum
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Type
+
+import msgpack
+
+SNAPSHOT_MAGIC = b"PGSNAP"
+SNAPSHOT_VERSION = 1
+
+_HEADER = struct.Struct(">6sHI")
+_EXT_NAIVE_DATETIME = 1
+_EXT_AWARE_DATETIME = 2
+_EXT_ENUM = 3
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_UTC = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# Nodes that do not belong to any subgraph
+ORPHAN_BLOCK = "__orphans__"
+
+
+class SnapshotFormatError(ValueError):
+    """Raised when a snapshot file is not a supported project snapshot."""
+
+
+class ProjectSnapshotCodec:
+    """
+    msgpack encoder/decoder with native datetime and enum support.
+
+    Enum classes must be registered by name so they can be restored.
+    """
+
+    def __init__(self, enum_types: Optional[List[Type[Enum]]] = None):
+        self.enum_types: Dict[str, Type[Enum]] = {
+            enum_type.__name__: enum_type for enum_type in (enum_types or [])
+        }
+
+    def _default(self, obj: Any) -> Any:
+        if isinstance(obj, datetime):
+            if obj.tzinfo is None:
+                return msgpack.ExtType(_EXT_NAIVE_DATETIME, struct.pack(">q", (obj - _EPOCH) // timedelta(microseconds=1)))
+            return msgpack.ExtType(_EXT_AWARE_DATETIME, struct.pack(">q", (obj - _EPOCH_UTC) // timedelta(microseconds=1)))
+        if isinstance(obj, Enum) and type(obj).__name__ in self.enum_types:
+            return msgpack.ExtType(_EXT_ENUM, msgpack.packb([type(obj).__name__, obj.value]))
+        if isinstance(obj, (set, tuple)):
+            return list(obj)
+        raise TypeError(f"Cannot encode {type(obj).__name__} in a project snapshot")
+
+    def _ext_hook(self, code: int, data: bytes) -> Any:
+        if code == _EXT_NAIVE_DATETIME:
+            return _EPOCH + timedelta(microseconds=struct.unpack(">q", data)[0])
+        if code == _EXT_AWARE_DATETIME:
+            return _EPOCH_UTC + timedelta(microseconds=struct.unpack(">q", data)[0])
+        if code == _EXT_ENUM:
+            name, value = msgpack.unpackb(data, raw=False)
+            return self.enum_types[name](value)
+        return msgpack.ExtType(code, data)
+
+    def encode(self, obj: Any) -> bytes:
+        return msgpack.packb(obj, default=self._default, use_bin_type=True)
+
+    def decode(self, data) -> Any:
+        return msgpack.unpackb(data, ext_hook=self._ext_hook, raw=False, strict_map_key=False)
+
+
+def write_project_snapshot(path: Path, codec: ProjectSnapshotCodec, all_nodes: Dict[str, Dict[str, Any]],
+                           graphs: Dict[str, Dict[str, Any]], state: Dict[str, Any]):
+    """
+    Atomically write a project snapshot.
+
+    Args:
+        path: Snapshot file path
+        codec: Codec used to encode node data
+        all_nodes: Node id to node data (with native enums and datetimes)
+        graphs: Graph id to {'nodes': [...], 'edges': [...]}
+        state: Other graph-level fields (overall_project_goal, root_graph_id, ...)
+    """
+    # Group nodes by the first subgraph that contains them
+    block_nodes: Dict[str, Dict[str, Any]] = {}
+    assigned = set()
+    for graph_id, graph_data in graphs.items():
+        block = {}
+        for node_id in graph_data.get('nodes', []):
+            if node_id in all_nodes and node_id not in assigned:
+                block[node_id] = all_nodes[node_id]
+                assigned.add(node_id)
+        block_nodes[graph_id] = block
+    block_nodes[ORPHAN_BLOCK] = {
+        node_id: node for node_id, node in all_nodes.items() if node_id not in assigned
+    }
+
+    blocks: List[bytes] = []
+    block_index: Dict[str, Tuple[int, int, int]] = {}
+    offset = 0
+    for block_id, nodes in block_nodes.items():
+        encoded = codec.encode(nodes)
+        block_index[block_id] = (offset, len(encoded), len(nodes))
+        blocks.append(encoded)
+        offset += len(encoded)
+
+    index = codec.encode({
+        'state': state,
+        'graphs': {
+            graph_id: {
+                'nodes': list(graph_data.get('nodes', [])),
+                'edges': [
+                    [edge['source'], edge['target']] if isinstance(edge, dict) else list(edge)
+                    for edge in graph_data.get('edges', [])
+                ]
+            }
+            for graph_id, graph_data in graphs.items()
+        },
+        'blocks': block_index
+    })
+
+    tmp_path = path.with_suffix(f"{path.suffix}.{os.getpid()}.tmp")
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(index)))
+        f.write(index)
+        for block in blocks:
+            f.write(block)
+    os.replace(tmp_path, path)
+
+
+class ProjectSnapshotReader:
+    """
+    Lazy reader for a project snapshot.
+
+    Opening a snapshot only decodes its index; node blocks are decoded per
+    subgraph on demand from a memory-mapped file.
+    """
+
+    def __init__(self, path: Path, codec: ProjectSnapshotCodec):
+        self.path = path
+        self.codec = codec
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise SnapshotFormatError(f"Empty snapshot file: {path}")
+
+        magic, version, index_length = _HEADER.unpack_from(self._map, 0)
+        if magic != SNAPSHOT_MAGIC:
+            self.close()
+            raise SnapshotFormatError(f"Not a project snapshot: {path}")
+        if version > SNAPSHOT_VERSION:
+            self.close()
+            raise SnapshotFormatError(f"Unsupported snapshot version {version}: {path}")
+
+        self.version = version
+        index_start = _HEADER.size
+        self._blocks_start = index_start + index_length
+        index = codec.decode(self._map[index_start:self._blocks_start])
+        self.state: Dict[str, Any] = index['state']
+        self.graphs: Dict[str, Dict[str, Any]] = index['graphs']
+        self._blocks: Dict[str, Tuple[int, int, int]] = index['blocks']
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if getattr(self, '_map', None) is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    @property
+    def node_count(self) -> int:
+        return sum(count for _, _, count in self._blocks.values())
+
+    def block_ids(self) -> List[str]:
+        """Subgraph ids with a node block, plus ORPHAN_BLOCK."""
+        return list(self._blocks)
+
+    def load_block(self, block_id: str) -> Dict[str, Dict[str, Any]]:
+        """Decode the nodes of one subgraph (or ORPHAN_BLOCK)."""
+        block = self._blocks.get(block_id)
+        if block is None:
+            return {}
+        offset, length, _ = block
+        start = self._blocks_start + offset
+        with memoryview(self._map) as view:
+            return self.codec.decode(view[start:start + length])
+
+    def iter_blocks(self, block_ids: Optional[List[str]] = None) -> Iterator[Tuple[str, Dict[str, Dict[str, Any]]]]:
+        """Yield (block id, nodes) one subgraph at a time."""
+        for block_id in (block_ids if block_ids is not None else self.block_ids()):
+            yield block_id, self.load_block(block_id)
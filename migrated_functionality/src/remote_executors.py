@@ -18,7 +18,14 @@ import base64
 import json
 import pickle
 import re
+import subprocess
+import sys
+import threading
 import time
+import uuid
+import weakref
+from collections import deque
+from contextlib import contextmanager
 from io import BytesIO
 from pathlib import Path
 from textwrap import dedent
@@ -40,6 +47,25 @@ except ModuleNotFoundError:
     pass
 
 
+RESULT_PICKLE_PREFIX = "RESULT_PICKLE:"
+
+
+def wrap_final_answer_code(code_action: str, final_answer_pattern: re.Pattern) -> str:
+    """
+    Replace the final_answer call of a code action with code printing the pickled final answer.
+    """
+    match = final_answer_pattern.search(code_action)
+    if not match:
+        return code_action
+    pre_final_answer_code = final_answer_pattern.sub("", code_action)
+    result_expr = match.group(1)
+    return pre_final_answer_code + dedent(f"""
+        import pickle, base64
+        _result = {result_expr}
+        print("{RESULT_PICKLE_PREFIX}" + base64.b64encode(pickle.dumps(_result)).decode())
+        """)
+
+
 class RemotePythonExecutor(PythonExecutor):
     def __init__(self, additional_imports: list[str], logger):
         self.additional_imports = additional_imports
@@ -156,138 +182,133 @@ class E2BExecutor(RemotePythonExecutor):
             return None, execution_logs
 
 
-class DockerExecutor(RemotePythonExecutor):
+def get_docker_client():
     """
-    Executes Python code using Jupyter Kernel Gateway in a Docker container.
+    Connect to the Docker daemon, checking that the 'docker' extra is installed.
     """
+    try:
+        import docker
+        import websocket  # noqa: F401
+    except ModuleNotFoundError:
+        raise ModuleNotFoundError(
+            "Please install 'docker' extra to use DockerExecutor: `pip install 'smolagents[docker]'`"
+        )
 
-    def __init__(
-        self,
-        additional_imports: list[str],
-        logger,
-        host: str = "127.0.0.1",
-        port: int = 8888,
-        image_name: str = "jupyter-kernel",
-        build_new_image: bool = True,
-        container_run_kwargs: dict[str, Any] | None = None,
-    ):
-        """
-        Initialize the Docker-based Jupyter Kernel Gateway executor.
+    # Initialize Docker
+    try:
+        return docker.from_env()
+    except docker.errors.DockerException as e:
+        raise RuntimeError("Could not connect to Docker daemon: make sure Docker is running.") from e
+
+
+def start_kernel_gateway_container(
+    client,
+    logger,
+    host: str = "127.0.0.1",
+    port: int = 8888,
+    image_name: str = "jupyter-kernel",
+    build_new_image: bool = True,
+    container_run_kwargs: dict[str, Any] | None = None,
+):
+    """
+    Start a Docker container running Jupyter Kernel Gateway, building its image if needed.
+    """
+    import docker
 
-        Args:
-            additional_imports: Additional imports to install.
-            logger: Logger to use.
-            host: Host to bind to.
-            port: Port to bind to.
-            image_name: Name of the Docker image to use. If the image doesn't exist, it will be built.
-            build_new_image: If True, the image will be rebuilt even if it already exists.
-            container_run_kwargs: Additional keyword arguments to pass to the Docker container run command.
-        """
-        super().__init__(additional_imports, logger)
+    # Check if image exists, unless forced to rebuild
+    if not build_new_image:
         try:
-            import docker
-            from websocket import create_connection
-        except ModuleNotFoundError:
-            raise ModuleNotFoundError(
-                "Please install 'docker' extra to use DockerExecutor: `pip install 'smolagents[docker]'`"
-            )
-        self.host = host
-        self.port = port
-        self.image_name = image_name
+            client.images.get(image_name)
+            logger.log(f"Using existing Docker image: {image_name}", level=LogLevel.INFO)
+        except docker.errors.ImageNotFound:
+            logger.log(f"Image {image_name} not found, building...", level=LogLevel.INFO)
+            build_new_image = True
+
+    if build_new_image:
+        logger.log(f"Building Docker image {image_name}...", level=LogLevel.INFO)
+        dockerfile_path = Path(__file__).parent / "Dockerfile"
+        if not dockerfile_path.exists():
+            with open(dockerfile_path, "w") as f:
+                f.write(
+                    dedent(
+                        """\
+                        FROM python:3.12-slim
+
+                        RUN pip install jupyter_kernel_gateway jupyter_client
+
+                        EXPOSE 8888
+                        CMD ["jupyter", "kernelgateway", "--KernelGatewayApp.ip='0.0.0.0'", "--KernelGatewayApp.port=8888", "--KernelGatewayApp.allow_origin='*'"]
+                        """
+                    )
+                )
+        _, build_logs = client.images.build(
+            path=str(dockerfile_path.parent), dockerfile=str(dockerfile_path), tag=image_name
+        )
+        for log_chunk in build_logs:
+            # Only log non-empty messages
+            if log_message := log_chunk.get("stream", "").rstrip():
+                logger.log(log_message, level=LogLevel.DEBUG)
 
-        # Initialize Docker
-        try:
-            self.client = docker.from_env()
-        except docker.errors.DockerException as e:
-            raise RuntimeError("Could not connect to Docker daemon: make sure Docker is running.") from e
+    logger.log(f"Starting container on {host}:{port}...", level=LogLevel.INFO)
+    # Create base container parameters
+    container_kwargs = {}
+    if container_run_kwargs:
+        container_kwargs.update(container_run_kwargs)
 
-        # Build and start container
-        try:
-            # Check if image exists, unless forced to rebuild
-            if not build_new_image:
-                try:
-                    self.client.images.get(self.image_name)
-                    self.logger.log(f"Using existing Docker image: {self.image_name}", level=LogLevel.INFO)
-                except docker.errors.ImageNotFound:
-                    self.logger.log(f"Image {self.image_name} not found, building...", level=LogLevel.INFO)
-                    build_new_image = True
-
-            if build_new_image:
-                self.logger.log(f"Building Docker image {self.image_name}...", level=LogLevel.INFO)
-                dockerfile_path = Path(__file__).parent / "Dockerfile"
-                if not dockerfile_path.exists():
-                    with open(dockerfile_path, "w") as f:
-                        f.write(
-                            dedent(
-                                """\
-                                FROM python:3.12-slim
-
-                                RUN pip install jupyter_kernel_gateway jupyter_client
-
-                                EXPOSE 8888
-                                CMD ["jupyter", "kernelgateway", "--KernelGatewayApp.ip='0.0.0.0'", "--KernelGatewayApp.port=8888", "--KernelGatewayApp.allow_origin='*'"]
-                                """
-                            )
-                        )
-                _, build_logs = self.client.images.build(
-                    path=str(dockerfile_path.parent), dockerfile=str(dockerfile_path), tag=self.image_name
-                )
-                for log_chunk in build_logs:
-                    # Only log non-empty messages
-                    if log_message := log_chunk.get("stream", "").rstrip():
-                        self.logger.log(log_message, level=LogLevel.DEBUG)
-
-            self.logger.log(f"Starting container on {host}:{port}...", level=LogLevel.INFO)
-            # Create base container parameters
-            container_kwargs = {}
-            if container_run_kwargs:
-                container_kwargs.update(container_run_kwargs)
-
-            # Ensure required port mapping and background running
-            if not isinstance(container_kwargs.get("ports"), dict):
-                container_kwargs["ports"] = {}
-            container_kwargs["ports"]["8888/tcp"] = (host, port)
-            container_kwargs["detach"] = True
-
-            self.container = self.client.containers.run(self.image_name, **container_kwargs)
-
-            retries = 0
-            while self.container.status != "running" and retries < 5:
-                self.logger.log(f"Container status: {self.container.status}, waiting...", level=LogLevel.INFO)
-                time.sleep(1)
-                self.container.reload()
-                retries += 1
+    # Ensure required port mapping and background running
+    if not isinstance(container_kwargs.get("ports"), dict):
+        container_kwargs["ports"] = {}
+    container_kwargs["ports"]["8888/tcp"] = (host, port)
+    container_kwargs["detach"] = True
 
-            self.base_url = f"http://{host}:{port}"
+    container = client.containers.run(image_name, **container_kwargs)
 
-            # Create new kernel via HTTP
-            r = requests.post(f"{self.base_url}/api/kernels")
-            if r.status_code != 201:
-                error_details = {
-                    "status_code": r.status_code,
-                    "headers": dict(r.headers),
-                    "url": r.url,
-                    "body": r.text,
-                    "request_method": r.request.method,
-                    "request_headers": dict(r.request.headers),
-                    "request_body": r.request.body,
-                }
-                self.logger.log_error(f"Failed to create kernel. Details: {json.dumps(error_details, indent=2)}")
-                raise RuntimeError(f"Failed to create kernel: Status {r.status_code}\nResponse: {r.text}") from None
-
-            self.kernel_id = r.json()["id"]
-
-            ws_url = f"ws://{host}:{port}/api/kernels/{self.kernel_id}/channels"
-            self.ws = create_connection(ws_url)
+    retries = 0
+    while container.status != "running" and retries < 5:
+        logger.log(f"Container status: {container.status}, waiting...", level=LogLevel.INFO)
+        time.sleep(1)
+        container.reload()
+        retries += 1
 
-            self.installed_packages = self.install_packages(additional_imports)
-            self.logger.log(
-                f"Container {self.container.short_id} is running with kernel {self.kernel_id}", level=LogLevel.INFO
-            )
+    return container
 
-        except Exception as e:
-            self.cleanup()
-            raise RuntimeError(f"Failed to initialize Jupyter kernel: {e}") from e
+
+class JupyterKernel:
+    """
+    A kernel created through the HTTP and WebSocket API of a Jupyter Kernel Gateway.
+
+    Args:
+        host: Host of the Kernel Gateway.
+        port: Port of the Kernel Gateway.
+        logger: Logger to use.
+    """
+
+    def __init__(self, host: str, port: int, logger):
+        from websocket import create_connection
+
+        self.logger = logger
+        self.final_answer_pattern = re.compile(r"^final_answer\((.*)\)$", re.M)
+        self.base_url = f"http://{host}:{port}"
+
+        # Create new kernel via HTTP
+        r = requests.post(f"{self.base_url}/api/kernels")
+        if r.status_code != 201:
+            error_details = {
+                "status_code": r.status_code,
+                "headers": dict(r.headers),
+                "url": r.url,
+                "body": r.text,
+                "request_method": r.request.method,
+                "request_headers": dict(r.request.headers),
+                "request_body": r.request.body,
+            }
+            self.logger.log_error(f"Failed to create kernel. Details: {json.dumps(error_details, indent=2)}")
+            raise RuntimeError(f"Failed to create kernel: Status {r.status_code}\nResponse: {r.text}") from None
+
+        self.kernel_id = r.json()["id"]
+
+        ws_url = f"ws://{host}:{port}/api/kernels/{self.kernel_id}/channels"
+        self.ws = create_connection(ws_url)
 
     def run_code_raise_errors(self, code_action: str, return_final_answer: bool = False) -> tuple[Any, str]:
         """
@@ -295,15 +316,7 @@ class DockerExecutor(RemotePythonExecutor):
         """
         try:
             if return_final_answer:
-                match = self.final_answer_pattern.search(code_action)
-                if match:
-                    pre_final_answer_code = self.final_answer_pattern.sub("", code_action)
-                    result_expr = match.group(1)
-                    wrapped_code = pre_final_answer_code + dedent(f"""
-                        import pickle, base64
-                        _result = {result_expr}
-                        print("RESULT_PICKLE:" + base64.b64encode(pickle.dumps(_result)).decode())
-                        """)
+                wrapped_code = wrap_final_answer_code(code_action, self.final_answer_pattern)
             else:
                 wrapped_code = code_action
 
@@ -326,8 +339,8 @@ class DockerExecutor(RemotePythonExecutor):
 
                 if msg_type == "stream":
                     text = msg["content"]["text"]
-                    if return_final_answer and text.startswith("RESULT_PICKLE:"):
-                        pickle_data = text[len("RESULT_PICKLE:") :].strip()
+                    if return_final_answer and text.startswith(RESULT_PICKLE_PREFIX):
+                        pickle_data = text[len(RESULT_PICKLE_PREFIX) :].strip()
                         result = pickle.loads(base64.b64decode(pickle_data))
                         waiting_for_idle = True
                     else:
@@ -347,8 +360,6 @@ class DockerExecutor(RemotePythonExecutor):
 
     def _send_execute_request(self, code: str) -> str:
         """Send code execution request to kernel."""
-        import uuid
-
         # Generate a unique message ID
         msg_id = str(uuid.uuid4())
 
@@ -375,6 +386,77 @@ class DockerExecutor(RemotePythonExecutor):
         self.ws.send(json.dumps(execute_request))
         return msg_id
 
+    def reset(self):
+        """Clear the user namespace and the input and output history of the kernel, like `%reset -f`."""
+        self.run_code_raise_errors("get_ipython().reset(new_session=False)")
+
+    def close(self):
+        """Close the connection and shut the kernel down."""
+        try:
+            self.ws.close()
+        finally:
+            requests.delete(f"{self.base_url}/api/kernels/{self.kernel_id}")
+
+
+class DockerExecutor(RemotePythonExecutor):
+    """
+    Executes Python code using Jupyter Kernel Gateway in a Docker container.
+    """
+
+    def __init__(
+        self,
+        additional_imports: list[str],
+        logger,
+        host: str = "127.0.0.1",
+        port: int = 8888,
+        image_name: str = "jupyter-kernel",
+        build_new_image: bool = True,
+        container_run_kwargs: dict[str, Any] | None = None,
+    ):
+        """
+        Initialize the Docker-based Jupyter Kernel Gateway executor.
+
+        Args:
+            additional_imports: Additional imports to install.
+            logger: Logger to use.
+            host: Host to bind to.
+            port: Port to bind to.
+            image_name: Name of the Docker image to use. If the image doesn't exist, it will be built.
+            build_new_image: If True, the image will be rebuilt even if it already exists.
+            container_run_kwargs: Additional keyword arguments to pass to the Docker container run command.
+        """
+        super().__init__(additional_imports, logger)
+        self.host = host
+        self.port = port
+        self.image_name = image_name
+        self.client = get_docker_client()
+
+        # Build and start container
+        try:
+            self.container = start_kernel_gateway_container(
+                self.client, self.logger, host, port, image_name, build_new_image, container_run_kwargs
+            )
+            self.base_url = f"http://{host}:{port}"
+
+            self.kernel = JupyterKernel(host, port, self.logger)
+            self.kernel_id = self.kernel.kernel_id
+            self.ws = self.kernel.ws
+
+            self.installed_packages = self.install_packages(additional_imports)
+            self.logger.log(
+                f"Container {self.container.short_id} is running with kernel {self.kernel_id}", level=LogLevel.INFO
+            )
+
+        except Exception as e:
+            self.cleanup()
+            raise RuntimeError(f"Failed to initialize Jupyter kernel: {e}") from e
+
+    def run_code_raise_errors(self, code_action: str, return_final_answer: bool = False) -> tuple[Any, str]:
+        """
+        Execute code and return result based on whether it's a final answer.
+        """
+        return self.kernel.run_code_raise_errors(code_action, return_final_answer=return_final_answer)
+
     def cleanup(self):
         """Clean up resources."""
         try:
@@ -391,4 +473,434 @@ class DockerExecutor(RemotePythonExecutor):
         self.cleanup()
 
 
-__all__ = ["E2BExecutor", "DockerExecutor"]
+SUBPROCESS_KERNEL_SOURCE = dedent(
+    """\
+    import contextlib, io, json, subprocess, sys, traceback
+
+    protocol = sys.stdout
+    namespace = {"__name__": "__main__"}
+    for line in sys.stdin:
+        request = json.loads(line)
+        if request.get("reset"):
+            namespace = {"__name__": "__main__"}
+            protocol.write(json.dumps({"output": "", "error": None}) + "\\n")
+            protocol.flush()
+            continue
+        code = request["code"]
+        output = io.StringIO()
+        error = None
+        try:
+            with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+                if code.startswith("!"):
+                    command = code[1:]
+                    if command.startswith("pip "):
+                        command = f"{sys.executable} -m {command}"
+                    completed = subprocess.run(command, shell=True, capture_output=True, text=True)
+                    output.write(completed.stdout + completed.stderr)
+                    if completed.returncode:
+                        error = f"Command exited with status {completed.returncode}"
+                else:
+                    exec(compile(code, "<kernel>", "exec"), namespace)
+        except BaseException:
+            error = traceback.format_exc()
+        protocol.write(json.dumps({"output": output.getvalue(), "error": error}) + "\\n")
+        protocol.flush()
+    """
+)
+
+
+class SubprocessKernel:
+    """
+    A kernel running in a local Python subprocess, exchanging JSON lines over stdin/stdout.
+
+    Like a Jupyter kernel, it keeps its namespace between executions and runs `!command` lines in a shell.
+    It does not isolate code from the host, and is meant for tests and local development of `KernelPool`.
+
+    Args:
+        logger: Logger to use.
+        python_executable: Python interpreter used to run the kernel.
+    """
+
+    def __init__(self, logger, python_executable: str = sys.executable):
+        self.logger = logger
+        self.final_answer_pattern = re.compile(r"^final_answer\((.*)\)$", re.M)
+        self.process = subprocess.Popen(
+            [python_executable, "-u", "-c", SUBPROCESS_KERNEL_SOURCE],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+
+    def run_code_raise_errors(self, code_action: str, return_final_answer: bool = False) -> tuple[Any, str]:
+        """
+        Execute code and return result based on whether it's a final answer.
+        """
+        if return_final_answer:
+            code_action = wrap_final_answer_code(code_action, self.final_answer_pattern)
+        response = self._request({"code": code_action})
+        if response["error"]:
+            raise AgentError(response["output"] + response["error"], self.logger)
+
+        result = None
+        outputs = []
+        for output_line in response["output"].splitlines(keepends=True):
+            if return_final_answer and output_line.startswith(RESULT_PICKLE_PREFIX):
+                result = pickle.loads(base64.b64decode(output_line[len(RESULT_PICKLE_PREFIX) :].strip()))
+            else:
+                outputs.append(output_line)
+        return result, "".join(outputs)
+
+    def _request(self, request: dict) -> dict:
+        self.process.stdin.write(json.dumps(request) + "\n")
+        self.process.stdin.flush()
+        line = self.process.stdout.readline()
+        if not line:
+            raise RuntimeError(f"Kernel process exited with status {self.process.poll()}")
+        return json.loads(line)
+
+    def reset(self):
+        """Replace the namespace of the kernel with an empty one."""
+        self._request({"reset": True})
+
+    def close(self):
+        """Stop the kernel process."""
+        if self.process.poll() is None:
+            self.process.stdin.close()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        self.process.stdout.close()
+
+
+class SubprocessKernelBackend:
+    """
+    `KernelPool` backend starting `SubprocessKernel`s.
+
+    Args:
+        logger: Logger to use.
+        python_executable: Python interpreter used to run the kernels.
+    """
+
+    def __init__(self, logger, python_executable: str = sys.executable):
+        self.logger = logger
+        self.python_executable = python_executable
+
+    def start_kernel(self) -> SubprocessKernel:
+        return SubprocessKernel(self.logger, self.python_executable)
+
+    def close(self):
+        pass
+
+
+class DockerKernelBackend:
+    """
+    `KernelPool` backend starting Jupyter kernels in a single Kernel Gateway container.
+
+    The container is started on creation and shared by all kernels of the pool, so installed packages are
+    shared too. Takes the same container arguments as `DockerExecutor`.
+    """
+
+    def __init__(
+        self,
+        logger,
+        host: str = "127.0.0.1",
+        port: int = 8888,
+        image_name: str = "jupyter-kernel",
+        build_new_image: bool = True,
+        container_run_kwargs: dict[str, Any] | None = None,
+    ):
+        self.logger = logger
+        self.host = host
+        self.port = port
+        self.client = get_docker_client()
+        self.container = start_kernel_gateway_container(
+            self.client, logger, host, port, image_name, build_new_image, container_run_kwargs
+        )
+
+    def start_kernel(self) -> JupyterKernel:
+        return JupyterKernel(self.host, self.port, self.logger)
+
+    def close(self):
+        try:
+            self.logger.log(f"Stopping and removing container {self.container.short_id}...", level=LogLevel.INFO)
+            self.container.stop()
+            self.container.remove()
+        except Exception as e:
+            self.logger.log_error(f"Error during cleanup: {e}")
+
+
+class PooledKernel:
+    """
+    A kernel owned by a `KernelPool`, with the state the pool keeps track of.
+    """
+
+    def __init__(self, kernel):
+        self.kernel = kernel
+        self.installed_packages: set[str] = set()
+        self.warm_tools_code = ""
+        self.tools_code = ""
+        self.uses = 0
+        self.broken = False
+
+    def run_code_raise_errors(self, code: str, return_final_answer: bool = False) -> tuple[Any, str]:
+        try:
+            return self.kernel.run_code_raise_errors(code, return_final_answer=return_final_answer)
+        except AgentError:
+            raise
+        except Exception:
+            # The connection to the kernel failed, so its state is unknown
+            self.broken = True
+            raise
+
+    def reset(self):
+        try:
+            self.kernel.reset()
+        except AgentError:
+            raise
+        except Exception:
+            self.broken = True
+            raise
+
+
+class KernelPool:
+    """
+    Pool of pre-warmed kernels leased to `PooledPythonExecutor`s.
+
+    Kernels are started ahead of time with the authorized imports installed and the tool definitions loaded.
+    By default a kernel serves a single lease: when it is released, it is closed and a new warm kernel is
+    started in the background, so runs never share a kernel and only the start-up time is saved.
+
+    With `max_uses` above 1, released kernels are reused: their namespace is cleared and the tool definitions
+    are loaded again before the next lease. This is not an isolation boundary, as state outside the namespace,
+    such as `os.environ`, attributes of imported modules or files, carries over to the next lease. Only reuse
+    kernels for runs that may see each other's data. Kernels that failed are always closed and replaced.
+
+    Args:
+        backend: Starts the kernels, e.g. `DockerKernelBackend` or `SubprocessKernelBackend`.
+        logger: Logger to use.
+        size (`int`, default `2`): Number of kernels to keep.
+        additional_imports (`list[str]`, *optional*): Packages to install in every kernel.
+        tools (`dict[str, Tool]`, *optional*): Tools whose definitions are loaded in every kernel.
+        max_uses (`int`, default `1`): Number of leases after which a kernel is recreated.
+    """
+
+    def __init__(
+        self,
+        backend,
+        logger,
+        size: int = 2,
+        additional_imports: list[str] | None = None,
+        tools: dict[str, Any] | None = None,
+        max_uses: int = 1,
+    ):
+        self.backend = backend
+        self.logger = logger
+        self.size = size
+        self.additional_imports = list(additional_imports or [])
+        self.tools_code = get_tools_definition_code(tools) if tools else ""
+        self.max_uses = max_uses
+        self._idle: deque[PooledKernel] = deque()
+        self._kernels: set[PooledKernel] = set()
+        self._starting = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        for _ in range(size):
+            self._start_kernel_in_background()
+
+    def _start_kernel_in_background(self):
+        with self._condition:
+            self._starting += 1
+        threading.Thread(target=self._start_kernel, daemon=True).start()
+
+    def _start_kernel(self):
+        pooled = None
+        try:
+            pooled = PooledKernel(self.backend.start_kernel())
+            self._warm(pooled)
+        except Exception as e:
+            self.logger.log_error(f"Failed to start pooled kernel: {e}")
+            if pooled is not None:
+                self._close_kernel(pooled)
+            pooled = None
+        with self._condition:
+            self._starting -= 1
+            if pooled is not None:
+                if self._closed:
+                    self._close_kernel(pooled)
+                else:
+                    self._kernels.add(pooled)
+                    self._idle.append(pooled)
+            self._condition.notify_all()
+
+    def _warm(self, pooled: PooledKernel):
+        if self.additional_imports:
+            _, execution_logs = pooled.run_code_raise_errors(f"!pip install {' '.join(self.additional_imports)}")
+            self.logger.log(execution_logs, level=LogLevel.DEBUG)
+            pooled.installed_packages.update(self.additional_imports)
+        if self.tools_code:
+            pooled.run_code_raise_errors(self.tools_code)
+        pooled.warm_tools_code = pooled.tools_code = self.tools_code
+
+    def _close_kernel(self, pooled: PooledKernel):
+        try:
+            pooled.kernel.close()
+        except Exception as e:
+            self.logger.log_error(f"Error while closing pooled kernel: {e}")
+
+    def acquire(self, timeout: float | None = None) -> PooledKernel:
+        """
+        Lease a warm kernel, waiting up to `timeout` seconds for one to be available.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while not self._idle:
+                if self._closed:
+                    raise RuntimeError("Kernel pool is closed")
+                if not self._starting and len(self._kernels) < self.size:
+                    # Kernels failed to start: retry instead of waiting forever
+                    self._start_kernel_in_background()
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError(f"No pooled kernel available after {timeout} seconds")
+                self._condition.wait(remaining)
+            pooled = self._idle.popleft()
+        pooled.uses += 1
+        return pooled
+
+    def release(self, pooled: PooledKernel):
+        """
+        Reset a leased kernel and return it to the pool, or replace it if it can't be reused.
+        """
+        if not pooled.broken and pooled.uses < self.max_uses and not self._closed:
+            try:
+                pooled.reset()
+                # Tools are defined again rather than restored, so that nothing of the lease survives in them
+                if pooled.warm_tools_code:
+                    pooled.run_code_raise_errors(pooled.warm_tools_code)
+                pooled.tools_code = pooled.warm_tools_code
+                with self._condition:
+                    if not self._closed:
+                        self._idle.append(pooled)
+                        self._condition.notify()
+                        return
+            except Exception as e:
+                self.logger.log_error(f"Failed to reset pooled kernel: {e}")
+
+        with self._condition:
+            self._kernels.discard(pooled)
+            replace = not self._closed
+        self._close_kernel(pooled)
+        if replace:
+            self._start_kernel_in_background()
+
+    @contextmanager
+    def lease(self, timeout: float | None = None):
+        """
+        Context manager leasing a kernel for the duration of the block.
+        """
+        pooled = self.acquire(timeout)
+        try:
+            yield pooled
+        finally:
+            self.release(pooled)
+
+    def close(self):
+        """
+        Close idle kernels and the backend. Kernels still leased are closed when released.
+        """
+        with self._condition:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._kernels.difference_update(idle)
+            self._condition.notify_all()
+        for pooled in idle:
+            self._close_kernel(pooled)
+        self.backend.close()
+
+
+class PooledPythonExecutor(RemotePythonExecutor):
+    """
+    Executes Python code in a kernel leased from a `KernelPool`.
+
+    A kernel is leased on first use and returned to the pool by `release()`, which `CodeAgent` calls at the end of
+    each run, by `cleanup()`, or when the executor is garbage collected. Variables defined by the code of one run are
+    therefore not kept for the next one. Packages and tool definitions already loaded in the kernel are not sent again.
+
+    Args:
+        additional_imports (`list[str]`): Additional imports to install.
+        logger (`Logger`): Logger to use.
+        pool (`KernelPool`): Pool to lease the kernel from.
+        lease_timeout (`float`, *optional*, default `60`): Seconds to wait for an available kernel, `None` to wait
+            indefinitely.
+    """
+
+    def __init__(self, additional_imports: list[str], logger, pool: KernelPool, lease_timeout: float | None = 60):
+        super().__init__(additional_imports, logger)
+        self.pool = pool
+        self.lease_timeout = lease_timeout
+        self.kernel: PooledKernel | None = None
+        self._release: weakref.finalize | None = None
+
+    def _leased_kernel(self) -> PooledKernel:
+        """Get the leased kernel, leasing one if the executor has none."""
+        if self.kernel is None:
+            self.kernel = self.pool.acquire(self.lease_timeout)
+            self._release = weakref.finalize(self, self.pool.release, self.kernel)
+            self.installed_packages = self.install_packages(self.additional_imports)
+        return self.kernel
+
+    def run_code_raise_errors(self, code: str, return_final_answer: bool = False) -> tuple[Any, str]:
+        return self._leased_kernel().run_code_raise_errors(code, return_final_answer=return_final_answer)
+
+    def install_packages(self, additional_imports: list[str]):
+        kernel = self._leased_kernel()
+        packages_to_install = [pkg for pkg in additional_imports if pkg not in kernel.installed_packages]
+        super().install_packages(packages_to_install)
+        kernel.installed_packages.update(packages_to_install)
+        return list(additional_imports)
+
+    def send_tools(self, tools: dict[str, Any]):
+        kernel = self._leased_kernel()
+        # Install tool packages
+        packages_to_install = {
+            pkg
+            for tool in tools.values()
+            for pkg in tool.to_dict()["requirements"]
+            if pkg not in self.installed_packages + ["smolagents"]
+        }
+        if packages_to_install:
+            self.installed_packages += self.install_packages(list(packages_to_install))
+        # Skip tool definitions the kernel already has
+        code = get_tools_definition_code(tools)
+        if code and code != kernel.tools_code:
+            execution = self.run_code_raise_errors(code)
+            self.logger.log(execution[1])
+            kernel.tools_code = code
+
+    def release(self):
+        """Reset the leased kernel and return it to the pool. The next execution leases a kernel again."""
+        if self._release is not None:
+            self._release()
+            self._release = None
+            self.kernel = None
+
+    def cleanup(self):
+        """Return the leased kernel, if any, to the pool."""
+        self.release()
+
+    def delete(self):
+        """Ensure cleanup on deletion."""
+        self.cleanup()
+
+
+__all__ = [
+    "E2BExecutor",
+    "DockerExecutor",
+    "KernelPool",
+    "PooledPythonExecutor",
+    "DockerKernelBackend",
+    "SubprocessKernelBackend",
+]
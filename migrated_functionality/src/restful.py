@@ -306,6 +306,8 @@ class RestfulModel(ApiModel):
             Useful for specific models that do not support specific message roles like "system".
         flatten_messages_as_text (`bool`, default `False`):
             Whether to flatten messages as text.
+        max_image_size (`int`, *optional*):
+            Downscale images in messages so that neither side exceeds this many pixels. Defaults to no limit.
         **kwargs:
             Additional keyword arguments to pass to the OpenAI API.
     """
@@ -319,6 +321,7 @@ class RestfulModel(ApiModel):
         custom_role_conversions: dict[str, str] | None = None,
         flatten_messages_as_text: bool = False,
         http_client=None,
+        max_image_size: Optional[int] = None,
         **kwargs,
     ):
         self.model_id = model_id
@@ -333,7 +336,7 @@ class RestfulModel(ApiModel):
 
         self.http_client = http_client
 
-        self.message_manager = MessageManager(model_id=model_id)
+        self.message_manager = MessageManager(model_id=model_id, max_image_size=max_image_size)
 
         super().__init__(
             model_id=model_id,
@@ -391,8 +394,7 @@ class RestfulModel(ApiModel):
         # Handle tools parameter
         if tools_to_call_from:
             tools_config = {
-                "tools": [self.message_manager.get_tool_json_schema(tool, model_id=self.model_id) for tool in
-                          tools_to_call_from],
+                "tools": list(self.message_manager.get_tools_payload(tools_to_call_from, model_id=self.model_id).tools),
             }
             if tool_choice is not None:
                 tools_config["tool_choice"] = tool_choice
@@ -806,6 +808,8 @@ class RestfulResponseModel(ApiModel):
             Useful for specific models that do not support specific message roles like "system".
         flatten_messages_as_text (`bool`, default `False`):
             Whether to flatten messages as text.
+        max_image_size (`int`, *optional*):
+            Downscale images in messages so that neither side exceeds this many pixels. Defaults to no limit.
         **kwargs:
             Additional keyword arguments to pass to the OpenAI API.
     """
@@ -819,6 +823,7 @@ class RestfulResponseModel(ApiModel):
         custom_role_conversions: dict[str, str] | None = None,
         flatten_messages_as_text: bool = False,
         http_client=None,
+        max_image_size: Optional[int] = None,
         **kwargs,
     ):
         self.model_id = model_id
@@ -833,7 +838,7 @@ class RestfulResponseModel(ApiModel):
 
         self.http_client = http_client
 
-        self.message_manager = MessageManager(model_id=model_id)
+        self.message_manager = MessageManager(model_id=model_id, max_image_size=max_image_size)
 
         super().__init__(
             model_id=model_id,
@@ -899,8 +904,7 @@ class RestfulResponseModel(ApiModel):
         # Handle tools parameter
         if tools_to_call_from:
             tools_config = {
-                "tools": [self.message_manager.get_tool_json_schema(tool, model_id=self.model_id) for tool in
-                          tools_to_call_from],
+                "tools": list(self.message_manager.get_tools_payload(tools_to_call_from, model_id=self.model_id).tools),
             }
             if tool_choice is not None:
                 tools_config["tool_choice"] = tool_choice
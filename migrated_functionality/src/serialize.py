@@ -65,6 +65,9 @@ ISO8601 = '%Y-%m-%dT%H:%M:%SZ'
 # Same as ISO8601, but with microsecond precision.
 ISO8601_MICRO = '%Y-%m-%dT%H:%M:%S.%fZ'
 HOST_PREFIX_RE = re.compile(r"^[A-Za-z0-9\.\-]+$")
+# Whether the compiled serializers of a class can be used, see
+# ``Serializer._supports_compiled_shapes``
+_COMPILED_SHAPES_SUPPORT = {}
 
 
 def create_serializer(protocol_name, include_validation=True):
@@ -76,6 +79,32 @@ def create_serializer(protocol_name, include_validation=True):
     return serializer
 
 
+def _method_owner(cls, name):
+    for klass in cls.__mro__:
+        if name in vars(klass):
+            return klass
+    return None
+
+
+class _CompiledMembers(dict):
+    """Compiled members of a structure shape, compiled on first use.
+
+    Maps a member name to whatever ``compile_member(name, member_shape)``
+    returns. Compiling members lazily keeps recursive shapes finite: they
+    are compiled as deep as the input goes, once.
+    """
+
+    def __init__(self, shape, compile_member):
+        super().__init__()
+        self._members = shape.members
+        self._compile_member = compile_member
+
+    def __missing__(self, key):
+        # Unknown members raise a KeyError, as when walking the shape
+        compiled = self[key] = self._compile_member(key, self._members[key])
+        return compiled
+
+
 class Serializer:
     DEFAULT_METHOD = 'POST'
     # Clients can change this to a different MutableMapping
@@ -123,6 +152,59 @@ class Serializer:
         """
         raise NotImplementedError("serialize_to_request")
 
+    @classmethod
+    def _supports_compiled_shapes(cls):
+        """Whether ``_compile`` serializes shapes as ``_serialize`` does.
+
+        Serializers implementing ``_compile`` turn a shape into a function
+        serializing values of that shape, with a ``_compile_type_<type>``
+        method for every ``_serialize_type_<type>`` method. A subclass
+        overriding how a type is serialized but not how it is compiled
+        keeps walking the shapes.
+        """
+        supported = _COMPILED_SHAPES_SUPPORT.get(cls)
+        if supported is None:
+            method_pairs = [
+                ('_serialize', '_compile'),
+                ('_default_serialize', '_compile'),
+            ]
+            for name in dir(cls):
+                if name.startswith('_serialize_type_'):
+                    type_name = name[len('_serialize_type_') :]
+                    method_pairs.append((name, f'_compile_type_{type_name}'))
+            supported = all(
+                _method_owner(cls, compile_name) is not None
+                and _method_owner(cls, compile_name)
+                is _method_owner(cls, serialize_name)
+                for serialize_name, compile_name in method_pairs
+            )
+            _COMPILED_SHAPES_SUPPORT[cls] = supported
+        return supported
+
+    def _get_compiled_shape(self, shape):
+        """Returns the compiled serializer of a shape, or None.
+
+        Compiled serializers are cached per shape (i.e. per operation) on
+        the serializer (i.e. per protocol).
+        """
+        if not self._supports_compiled_shapes():
+            return None
+        try:
+            compiled_shapes = self._compiled_shapes
+        except AttributeError:
+            compiled_shapes = self._compiled_shapes = {}
+        key = (id(shape), self.MAP_TYPE)
+        cached = compiled_shapes.get(key)
+        if cached is not None and cached[0] is shape:
+            return cached[1]
+        compiled = self._compile_root(shape)
+        # Keep the shape alive so that its id is not reused
+        compiled_shapes[key] = (shape, compiled)
+        return compiled
+
+    def _compile_root(self, shape):
+        return self._compile(shape)
+
     def _create_default_request(self):
         # Creates a boilerplate default request dict that subclasses
         # can use as a starting point.
@@ -244,7 +326,11 @@ class QuerySerializer(Serializer):
         body_params['Action'] = operation_model.name
         body_params['Version'] = operation_model.metadata['apiVersion']
         if shape is not None:
-            self._serialize(body_params, parameters, shape)
+            serialize = self._get_compiled_shape(shape)
+            if serialize is not None:
+                serialize(body_params, parameters)
+            else:
+                self._serialize(body_params, parameters, shape)
         serialized['body'] = body_params
 
         host_prefix = self._expand_host_prefix(parameters, operation_model)
@@ -336,6 +422,127 @@ class QuerySerializer(Serializer):
     def _serialize_type_double(self, serialized, value, shape, prefix=''):
         self._serialize_type_float(serialized, value, shape, prefix)
 
+    # Compiled serializers: each _compile_type_* method returns a
+    # function(serialized, value, prefix='') doing what the matching
+    # _serialize_type_* method does for that shape.
+
+    def _compile(self, shape):
+        method = getattr(
+            self,
+            f'_compile_type_{shape.type_name}',
+            self._compile_default,
+        )
+        return method(shape)
+
+    def _compile_type_structure(self, shape):
+        def compile_member(key, member_shape):
+            name = self._get_serialized_name(member_shape, key)
+            return name, self._compile(member_shape)
+
+        members = _CompiledMembers(shape, compile_member)
+
+        def serialize_structure(serialized, value, prefix=''):
+            for key, member_value in value.items():
+                name, serialize_member = members[key]
+                if prefix:
+                    name = f'{prefix}.{name}'
+                serialize_member(serialized, member_value, name)
+
+        return serialize_structure
+
+    def _compile_type_list(self, shape):
+        serialize_element = self._compile(shape.member)
+        flattened = self._is_shape_flattened(shape)
+        if flattened:
+            member_name = None
+            if shape.member.serialization.get('name'):
+                member_name = self._get_serialized_name(
+                    shape.member, default_name=''
+                )
+        else:
+            list_name = shape.member.serialization.get('name', 'member')
+
+        def serialize_list(serialized, value, prefix=''):
+            if not value:
+                # The query protocol serializes empty lists.
+                serialized[prefix] = ''
+                return
+            if not flattened:
+                list_prefix = f'{prefix}.{list_name}'
+            elif member_name is not None:
+                # Replace '.Original' with '.{name}'.
+                list_prefix = '.'.join(prefix.split('.')[:-1] + [member_name])
+            else:
+                list_prefix = prefix
+            for i, element in enumerate(value, 1):
+                serialize_element(serialized, element, f'{list_prefix}.{i}')
+
+        return serialize_list
+
+    def _compile_type_map(self, shape):
+        flattened = self._is_shape_flattened(shape)
+        key_shape = shape.key
+        value_shape = shape.value
+        serialize_key = self._compile(key_shape)
+        serialize_value = self._compile(value_shape)
+        key_suffix = self._get_serialized_name(key_shape, default_name='key')
+        value_suffix = self._get_serialized_name(value_shape, 'value')
+
+        def serialize_map(serialized, value, prefix=''):
+            if flattened:
+                full_prefix = prefix
+            else:
+                full_prefix = f'{prefix}.entry'
+            template = full_prefix + '.{i}.{suffix}'
+            for i, key in enumerate(value, 1):
+                key_prefix = template.format(i=i, suffix=key_suffix)
+                value_prefix = template.format(i=i, suffix=value_suffix)
+                serialize_key(serialized, key, key_prefix)
+                serialize_value(serialized, value[key], value_prefix)
+
+        return serialize_map
+
+    def _compile_type_blob(self, shape):
+        get_base64 = self._get_base64
+
+        def serialize_blob(serialized, value, prefix=''):
+            serialized[prefix] = get_base64(value)
+
+        return serialize_blob
+
+    def _compile_type_timestamp(self, shape):
+        timestamp_format = shape.serialization.get('timestampFormat')
+
+        def serialize_timestamp(serialized, value, prefix=''):
+            serialized[prefix] = self._convert_timestamp_to_str(
+                value, timestamp_format
+            )
+
+        return serialize_timestamp
+
+    def _compile_type_boolean(self, shape):
+        def serialize_boolean(serialized, value, prefix=''):
+            serialized[prefix] = 'true' if value else 'false'
+
+        return serialize_boolean
+
+    def _compile_default(self, shape):
+        def serialize_default(serialized, value, prefix=''):
+            serialized[prefix] = value
+
+        return serialize_default
+
+    def _compile_type_float(self, shape):
+        handle_float = self._handle_float
+
+        def serialize_float(serialized, value, prefix=''):
+            serialized[prefix] = handle_float(value)
+
+        return serialize_float
+
+    def _compile_type_double(self, shape):
+        return self._compile_type_float(shape)
+
 
 class EC2Serializer(QuerySerializer):
     """EC2 specific customizations to the query protocol serializers.
@@ -366,6 +573,15 @@ class EC2Serializer(QuerySerializer):
             element_shape = shape.member
             self._serialize(serialized, element, element_shape, element_prefix)
 
+    def _compile_type_list(self, shape):
+        serialize_element = self._compile(shape.member)
+
+        def serialize_list(serialized, value, prefix=''):
+            for i, element in enumerate(value, 1):
+                serialize_element(serialized, element, f'{prefix}.{i}')
+
+        return serialize_list
+
 
 class JSONSerializer(Serializer):
     TIMESTAMP_FORMAT = 'unixtimestamp'
@@ -389,7 +605,7 @@ class JSONSerializer(Serializer):
         body = self.MAP_TYPE()
         input_shape = operation_model.input_shape
         if input_shape is not None:
-            self._serialize(body, parameters, input_shape)
+            self._serialize_root(body, parameters, input_shape)
         serialized['body'] = json.dumps(body).encode(self.DEFAULT_ENCODING)
 
         host_prefix = self._expand_host_prefix(parameters, operation_model)
@@ -398,6 +614,13 @@ class JSONSerializer(Serializer):
 
         return serialized
 
+    def _serialize_root(self, serialized, value, shape):
+        serialize = self._get_compiled_shape(shape)
+        if serialize is not None:
+            serialize(serialized, value)
+        else:
+            self._serialize(serialized, value, shape)
+
     def _serialize(self, serialized, value, shape, key=None):
         method = getattr(
             self,
@@ -465,6 +688,103 @@ class JSONSerializer(Serializer):
     def _serialize_type_double(self, serialized, value, shape, prefix=''):
         self._serialize_type_float(serialized, value, shape, prefix)
 
+    # Compiled serializers: each _compile_type_* method returns a
+    # function(value) returning the serialized value, or None when values
+    # of the shape are serialized as is.
+
+    def _compile_root(self, shape):
+        # Returns a function(serialized, value) serializing the members of a
+        # structure into ``serialized``, as _serialize does without a key.
+        if shape.type_name != 'structure' or shape.is_document_type:
+            return None
+        return self._compile_members(shape)
+
+    def _compile(self, shape):
+        method = getattr(self, f'_compile_type_{shape.type_name}', None)
+        if method is None:
+            return None
+        return method(shape)
+
+    def _compile_members(self, shape):
+        def compile_member(key, member_shape):
+            if 'name' in member_shape.serialization:
+                key = member_shape.serialization['name']
+            return key, self._compile(member_shape)
+
+        members = _CompiledMembers(shape, compile_member)
+
+        def serialize_members(serialized, value):
+            for key, member_value in value.items():
+                name, serialize_member = members[key]
+                if serialize_member is None:
+                    serialized[name] = member_value
+                else:
+                    serialized[name] = serialize_member(member_value)
+
+        return serialize_members
+
+    def _compile_type_structure(self, shape):
+        if shape.is_document_type:
+            return None
+        serialize_members = self._compile_members(shape)
+        map_type = self.MAP_TYPE
+
+        def serialize_structure(value):
+            serialized = map_type()
+            serialize_members(serialized, value)
+            return serialized
+
+        return serialize_structure
+
+    def _compile_type_map(self, shape):
+        serialize_value = self._compile(shape.value)
+        map_type = self.MAP_TYPE
+
+        def serialize_map(value):
+            map_obj = map_type()
+            if serialize_value is None:
+                map_obj.update(value)
+            else:
+                for sub_key, sub_value in value.items():
+                    map_obj[sub_key] = serialize_value(sub_value)
+            return map_obj
+
+        return serialize_map
+
+    def _compile_type_list(self, shape):
+        serialize_item = self._compile(shape.member)
+
+        def serialize_list(value):
+            if serialize_item is None:
+                return list(value)
+            return [serialize_item(list_item) for list_item in value]
+
+        return serialize_list
+
+    def _compile_type_timestamp(self, shape):
+        timestamp_format = shape.serialization.get('timestampFormat')
+
+        def serialize_timestamp(value):
+            return self._convert_timestamp_to_str(value, timestamp_format)
+
+        return serialize_timestamp
+
+    def _compile_type_blob(self, shape):
+        return self._get_base64
+
+    def _compile_type_float(self, shape):
+        handle_float = self._handle_float
+
+        def serialize_float(value):
+            if isinstance(value, decimal.Decimal):
+                value = float(value)
+            return handle_float(value)
+
+        return serialize_float
+
+    def _compile_type_double(self, shape):
+        return self._compile_type_float(shape)
+
 
 class CBORSerializer(Serializer):
     UNSIGNED_INT_MAJOR_TYPE = 0
@@ -1051,7 +1371,7 @@ class RestJSONSerializer(BaseRestSerializer, JSONSerializer):
 
     def _serialize_body_params(self, params, shape):
         serialized_body = self.MAP_TYPE()
-        self._serialize(serialized_body, params, shape)
+        self._serialize_root(serialized_body, params, shape)
         return json.dumps(serialized_body).encode(self.DEFAULT_ENCODING)
 
 
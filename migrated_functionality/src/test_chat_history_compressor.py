@@ -0,0 +1,295 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+from src.chat_history_compressor import ChatHistoryCompressor, MessageTokenIndex
+
+
+class _Message:
+
+    def __init__(self, role, content):
+        self.role = role
+        self.content = content
+
+    def to_dict(self):
+        return {"role": self.role, "content": self.content}
+
+
+def _config(**kwargs):
+    fields = dict(
+        enable_compression=True,
+        agent_name="agent",
+        agent_id="a1",
+        token_threshold=1000,
+        message_threshold=10,
+        preserve_recent_turns=2,
+        target_compression_ratio=0.6,
+        compression_cooldown=0,
+        preserve_recent_tokens=0,
+        background_compression=True,
+        background_compression_ratio=0.5,
+    )
+    fields.update(kwargs)
+    return SimpleNamespace(**fields)
+
+
+def _history(count):
+    messages = [_Message("system", "system prompt"), _Message("user", "the task")]
+    for index in range(2, count):
+        messages.append(_Message("user" if index % 2 == 0 else "assistant", f"turn {index}"))
+    return messages
+
+
+class _StubCompressor(ChatHistoryCompressor):
+    """Counts one token per word and answers compression requests once released."""
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.release = asyncio.Event()
+        self.dumped = []
+
+    def _count_message_tokens(self, message):
+        return len(message.content.split())
+
+    def _dump_messages(self, all_messages):
+        self.dumped.append(len(all_messages))
+
+    async def _call_llm_for_compression(self, system_prompt, user_prompt):
+        await self.release.wait()
+        return "summary"
+
+
+def _words(message):
+    return len(message.content.split())
+
+
+class TestMessageTokenIndex(unittest.TestCase):
+
+    def _index(self):
+        counted = []
+
+        def count_tokens(message):
+            counted.append(message)
+            return _words(message)
+
+        return MessageTokenIndex(count_tokens), counted
+
+    def test_prefix_sums(self):
+        index, _ = self._index()
+        index.reset([_Message("user", "a b"), _Message("user", "c"), _Message("user", "d e f")])
+        self.assertEqual(len(index), 3)
+        self.assertEqual(index.prefix, [0, 2, 3, 6])
+        self.assertEqual(index.total_tokens, 6)
+        self.assertEqual(index.tokens_between(1, 3), 4)
+
+    def test_sync_only_counts_appended_messages(self):
+        index, counted = self._index()
+        messages = _history(6)
+        index.sync(messages)
+        self.assertEqual(len(counted), 6)
+        index.sync(messages)
+        self.assertEqual(len(counted), 6)
+        new_message = _Message("user", "one more")
+        index.sync(messages + [new_message])
+        self.assertEqual(counted[6:], [new_message])
+        self.assertEqual(index.total_tokens, sum(_words(message) for message in messages) + 2)
+
+    def test_sync_rebuilds_after_history_is_replaced(self):
+        index, counted = self._index()
+        messages = _history(6)
+        index.sync(messages)
+        compressed = messages[:2] + [_Message("assistant", "summary")] + messages[-1:]
+        index.sync(compressed)
+        self.assertEqual(len(counted), 10)
+        self.assertEqual(len(index), 4)
+        self.assertEqual(index.total_tokens, sum(_words(message) for message in compressed))
+
+        # Same length but a different last message is not a prefix either
+        rewritten = messages[:2] + [_Message("assistant", "summary")] + [_Message("user", "other message here")]
+        index.sync(rewritten)
+        self.assertEqual(index.total_tokens, sum(_words(message) for message in rewritten))
+
+    def test_suffix_start_within(self):
+        index, _ = self._index()
+        # Token counts 2, 1, 3, 4
+        index.reset([_Message("user", text) for text in ("a b", "c", "d e f", "g h i j")])
+        self.assertEqual(index.suffix_start_within(7), 2)
+        self.assertEqual(index.suffix_start_within(8), 1)
+        self.assertEqual(index.suffix_start_within(10), 0)
+        self.assertEqual(index.suffix_start_within(10, lo=2), 2)
+        self.assertEqual(index.suffix_start_within(3), 4)
+
+
+class TestShouldCompress(unittest.TestCase):
+
+    def test_message_and_token_thresholds(self):
+        compressor = _StubCompressor(_config(message_threshold=10, token_threshold=20))
+        self.assertFalse(compressor.should_compress(10, 20))
+        self.assertTrue(compressor.should_compress(11, 0))
+        self.assertTrue(compressor.should_compress(1, 21))
+
+    def test_token_count_defaults_to_the_index(self):
+        compressor = _StubCompressor(_config(message_threshold=100, token_threshold=10))
+        messages = _history(4)
+        self.assertFalse(compressor.should_compress_messages(messages))
+        self.assertTrue(compressor.should_compress_messages(messages + [_Message("user", "w " * 10)]))
+        self.assertTrue(compressor.should_compress(1))
+
+    def test_cooldown(self):
+        compressor = _StubCompressor(_config(message_threshold=10, compression_cooldown=5))
+        compressor.last_compression_message_count = 8
+        self.assertFalse(compressor.should_compress(12, 0))
+        self.assertTrue(compressor.should_compress(13, 0))
+
+    def test_disabled_compression_only_runs_when_forced(self):
+        compressor = _StubCompressor(_config(enable_compression=False))
+        self.assertFalse(compressor.should_compress(100, 10000))
+        self.assertTrue(compressor.should_compress(1, 0, force=True))
+
+
+class TestPreserveRecentTokens(unittest.TestCase):
+
+    def _split(self, messages, **kwargs):
+        compressor = _StubCompressor(_config(**kwargs))
+        return compressor._filter_messages_to_compress(messages, dump_messages=False)
+
+    def test_recent_messages_within_the_token_budget_are_kept(self):
+        # Every message after the first two costs two tokens
+        messages = _history(8)
+        to_preserved, to_compress, recent = self._split(messages, preserve_recent_turns=2, preserve_recent_tokens=6)
+        self.assertEqual(to_preserved, messages[:2])
+        self.assertEqual(to_compress, messages[2:5])
+        self.assertEqual(recent, messages[5:])
+
+        _, to_compress, recent = self._split(messages, preserve_recent_turns=2, preserve_recent_tokens=7)
+        self.assertEqual(recent, messages[5:])
+
+    def test_preserve_recent_turns_is_the_minimum(self):
+        messages = _history(8)
+        _, to_compress, recent = self._split(messages, preserve_recent_turns=2, preserve_recent_tokens=1)
+        self.assertEqual(recent, messages[6:])
+        _, to_compress, recent = self._split(messages, preserve_recent_turns=2, preserve_recent_tokens=0)
+        self.assertEqual(recent, messages[6:])
+        self.assertEqual(to_compress, messages[2:6])
+
+    def test_budget_covering_everything_compresses_nothing(self):
+        messages = _history(8)
+        _, to_compress, recent = self._split(messages, preserve_recent_turns=2, preserve_recent_tokens=1000)
+        self.assertEqual(to_compress, [])
+        self.assertEqual(recent, messages[2:])
+
+
+class TestBackgroundCompression(unittest.TestCase):
+
+    def test_starts_at_soft_threshold_without_dumping_on_the_loop(self):
+        async def run():
+            compressor = _StubCompressor(_config())
+            self.assertFalse(compressor.maybe_start_background_compression(_history(5)))
+            self.assertTrue(compressor.maybe_start_background_compression(_history(6)))
+            # The dump runs inside the background task, not in the start call
+            self.assertEqual(compressor.dumped, [])
+            compressor.release.set()
+            await compressor.background.task
+            return compressor
+
+        compressor = asyncio.run(run())
+        self.assertEqual(compressor.dumped, [6])
+        self.assertEqual(compressor.background_stats["started"], 1)
+
+    def test_only_one_background_compression_at_a_time(self):
+        async def run():
+            compressor = _StubCompressor(_config())
+            messages = _history(6)
+            self.assertTrue(compressor.maybe_start_background_compression(messages))
+            self.assertFalse(compressor.maybe_start_background_compression(messages + [_Message("user", "more")]))
+            compressor.cancel_background_compression()
+
+        asyncio.run(run())
+
+    def test_pending_compression_keeps_the_uncompressed_history(self):
+        async def run():
+            compressor = _StubCompressor(_config())
+            messages = _history(6)
+            compressor.maybe_start_background_compression(messages)
+            result = compressor.poll_background_compression(messages)
+            compressor.cancel_background_compression()
+            return compressor, result
+
+        compressor, result = asyncio.run(run())
+        self.assertIsNone(result)
+        self.assertEqual(compressor.background_stats["turns_served_while_pending"], 1)
+
+    def test_divergent_history_cancels_compression(self):
+        async def run():
+            compressor = _StubCompressor(_config())
+            messages = _history(6)
+            compressor.maybe_start_background_compression(messages)
+            task = compressor.background.task
+            rewritten = messages[:3] + [_Message("user", "rewritten")] + messages[4:]
+            result = compressor.poll_background_compression(rewritten)
+            await asyncio.sleep(0)
+            return compressor, task, result, rewritten
+
+        compressor, task, result, rewritten = asyncio.run(run())
+        self.assertIsNone(result)
+        self.assertTrue(task.cancelled())
+        # The rewrite keeps the length and the last message, so the index is rebuilt explicitly
+        self.assertEqual(compressor.token_index.total_tokens, sum(_words(message) for message in rewritten))
+        self.assertIsNone(compressor.background)
+        self.assertEqual(compressor.background_stats["cancelled"], 1)
+
+    def test_completed_compression_is_swapped_in_with_new_messages(self):
+        async def run():
+            compressor = _StubCompressor(_config())
+            messages = _history(6)
+            compressor.maybe_start_background_compression(messages)
+            compressor.release.set()
+            await compressor.background.task
+            await asyncio.sleep(0.05)
+            new_message = _Message("user", "asked while compressing")
+            return compressor, messages, new_message, compressor.poll_background_compression(messages + [new_message])
+
+        compressor, messages, new_message, result = asyncio.run(run())
+        self.assertEqual(result[:2], messages[:2])
+        self.assertEqual(result[2].content, "summary")
+        self.assertEqual(result[3:], messages[-2:] + [new_message])
+        self.assertIsNone(compressor.background)
+        self.assertEqual(compressor.background_stats["applied"], 1)
+        self.assertEqual(compressor.last_compression_message_count, len(result))
+
+    def test_latency_is_measured_to_task_completion(self):
+        async def run():
+            compressor = _StubCompressor(_config())
+            messages = _history(6)
+            compressor.maybe_start_background_compression(messages)
+            await asyncio.sleep(0.05)
+            compressor.release.set()
+            await compressor.background.task
+            # Polling long after completion must not inflate the measured latency
+            await asyncio.sleep(0.2)
+            compressor.poll_background_compression(messages)
+            return compressor.background_stats
+
+        stats = asyncio.run(run())
+        self.assertGreaterEqual(stats["last_compression_seconds"], 0.05)
+        self.assertLess(stats["last_compression_seconds"], 0.2)
+        self.assertEqual(stats["hidden_latency_seconds"], stats["last_compression_seconds"])
+
+    def test_failed_compression_is_counted(self):
+        class _FailingCompressor(_StubCompressor):
+            async def _call_llm_for_compression(self, system_prompt, user_prompt):
+                return None
+
+        async def run():
+            compressor = _FailingCompressor(_config())
+            messages = _history(6)
+            compressor.maybe_start_background_compression(messages)
+            await compressor.background.task
+            return compressor, compressor.poll_background_compression(messages)
+
+        compressor, result = asyncio.run(run())
+        self.assertIsNone(result)
+        self.assertEqual(compressor.background_stats["failed"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
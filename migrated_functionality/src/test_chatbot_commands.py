@@ -0,0 +1,70 @@
+import unittest
+from src.chatbot_commands import AhoCorasick, ComplianceScanner
+
+
+class TestAhoCorasick(unittest.TestCase):
+
+    def _matches(self, keywords, text):
+        automaton = AhoCorasick(keywords)
+        return sorted(
+            (end - len(keywords[index]), end, keywords[index])
+            for end, index in automaton.iter_matches(text)
+        )
+
+    def test_finds_every_occurrence(self):
+        self.assertEqual(
+            self._matches(["he", "she", "his", "hers"], "ushers"),
+            [(1, 4, "she"), (2, 4, "he"), (2, 6, "hers")],
+        )
+
+    def test_overlapping_and_repeated_keywords(self):
+        self.assertEqual(
+            self._matches(["aa", "a"], "aaa"),
+            [(0, 1, "a"), (0, 2, "aa"), (1, 2, "a"), (1, 3, "aa"), (2, 3, "a")],
+        )
+
+    def test_no_match(self):
+        self.assertEqual(self._matches(["diagnosis"], "nothing to see here"), [])
+
+
+class TestComplianceScannerBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.scanner = ComplianceScanner()
+
+    def test_batch_matches_single_scans(self):
+        messages = [
+            "Mail me at jane.doe@example.com or call 555-123-4567",
+            "",
+            "What medication and treatment do you suggest?",
+            "SSN 123-45-6789, card 1234 5678 9012 3456",
+            "no findings",
+        ]
+        batch = self.scanner.scan_batch(messages)
+        for message, result in zip(messages, batch):
+            self.assertEqual(result, self.scanner.scan(message))
+
+    def test_spans_are_relative_to_each_message(self):
+        messages = ["first message", "reach me at 555-123-4567"]
+        result = self.scanner.scan_batch(messages)[1]
+        self.assertEqual(result.pii_matches, {"phone": ["555-123-4567"]})
+        start, end, pii_type = result.pii_spans[0]
+        self.assertEqual(messages[1][start:end], "555-123-4567")
+        self.assertEqual(pii_type, "phone")
+
+    def test_keywords_do_not_match_across_messages(self):
+        result = self.scanner.scan_batch(["diag", "nosis"])
+        self.assertEqual([r.medical_keywords for r in result], [[], []])
+
+    def test_length_changing_lowercase_keeps_keywords_in_their_message(self):
+        # 'İ'.lower() is two characters long, which shifts later offsets
+        messages = ["İİİİİİİİ", "symptoms", "x"]
+        result = self.scanner.scan_batch(messages)
+        self.assertEqual(
+            [r.medical_keywords for r in result],
+            [[], ["symptoms"], []],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
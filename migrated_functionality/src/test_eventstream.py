@@ -0,0 +1,119 @@
+import struct
+import unittest
+from binascii import crc32
+from botocore.eventstream import EventStreamBuffer as ReferenceBuffer
+from src.eventstream import ChecksumMismatch, EventStreamBuffer, InvalidPayloadLength
+
+
+def _message(payload, headers=None):
+    """Encodes an event stream message with string headers."""
+    header_bytes = b''
+    for name, value in (headers or {}).items():
+        name, value = name.encode('utf-8'), value.encode('utf-8')
+        header_bytes += struct.pack('!B', len(name)) + name + struct.pack('!BH', 7, len(value)) + value
+    total_length = 12 + len(header_bytes) + len(payload) + 4
+    prelude = struct.pack('!II', total_length, len(header_bytes))
+    prelude += struct.pack('!I', crc32(prelude) & 0xFFFFFFFF)
+    message = prelude + header_bytes + payload
+    return message + struct.pack('!I', crc32(message) & 0xFFFFFFFF)
+
+
+def _event(index, size=None):
+    payload = (b'{"index": %d}' % index) if size is None else bytes([index % 256]) * size
+    return _message(payload, {':message-type': 'event', ':event-type': f'Event{index % 3}'})
+
+
+def _messages(buffer, chunks):
+    parsed = []
+    for chunk in chunks:
+        buffer.add_data(chunk)
+        parsed.extend((message.headers, message.payload, message.crc) for message in buffer)
+    return parsed
+
+
+def _chunks(data, size):
+    return [data[offset : offset + size] for offset in range(0, len(data), size)]
+
+
+class TestEventStreamBuffer(unittest.TestCase):
+
+    def test_chunked_input_parses_as_the_reference_buffer(self):
+        stream = b''.join(_event(index, size=index * 7 if index % 2 else None) for index in range(20))
+        expected = _messages(ReferenceBuffer(), [stream])
+        self.assertEqual(len(expected), 20)
+        for size in (1, 5, 12, 13, 64, 1000, len(stream)):
+            with self.subTest(chunk_size=size):
+                self.assertEqual(_messages(EventStreamBuffer(), _chunks(stream, size)), expected)
+
+    def test_incomplete_message_waits_for_more_data(self):
+        message = _event(1)
+        buffer = EventStreamBuffer()
+        buffer.add_data(message[:11])
+        self.assertEqual(list(buffer), [])
+        buffer.add_data(message[11:-1])
+        self.assertEqual(list(buffer), [])
+        buffer.add_data(message[-1:])
+        [parsed] = list(buffer)
+        self.assertEqual(parsed.payload, b'{"index": 1}')
+        self.assertIsInstance(parsed.payload, bytes)
+
+    def test_consumed_bytes_are_compacted(self):
+        buffer = EventStreamBuffer()
+        message = _event(0, size=100)
+        longest = 0
+        for _ in range(100):
+            buffer.add_data(message)
+            self.assertEqual(len(list(buffer)), 1)
+            longest = max(longest, len(buffer._data))
+        # Consumed messages are dropped once they make up half of the buffer
+        self.assertLessEqual(longest, 2 * len(message))
+        self.assertLessEqual(buffer._start, len(buffer._data))
+
+        # A partial message survives the compaction
+        buffer.add_data(message + message[:20])
+        buffer.add_data(b'')
+        self.assertEqual(len(list(buffer)), 1)
+        buffer.add_data(message[20:])
+        self.assertEqual(len(list(buffer)), 1)
+        self.assertEqual(buffer._start, len(buffer._data))
+
+    def test_data_is_added_while_a_view_of_the_buffer_is_held(self):
+        buffer = EventStreamBuffer()
+        first, second = _event(1), _event(2)
+        buffer.add_data(first + second[:10])
+        self.assertEqual(len(list(buffer)), 1)
+        view = memoryview(buffer._data)
+        # The buffer can't be resized in place, so it is replaced
+        buffer.add_data(second[10:])
+        self.assertEqual(bytes(view[: len(first)]), first)
+        [message] = list(buffer)
+        self.assertEqual(message.payload, b'{"index": 2}')
+        self.assertEqual(buffer._start, len(second))
+        view.release()
+
+    def test_buffer_stays_usable_after_a_checksum_error(self):
+        corrupted = bytearray(_event(1))
+        corrupted[-5] ^= 0xFF
+        buffer = EventStreamBuffer()
+        buffer.add_data(bytes(corrupted))
+        try:
+            next(buffer)
+        except ChecksumMismatch as e:
+            # The frames of the traceback hold views of the buffer
+            error = e
+        data = buffer._data
+        buffer.add_data(_event(2))
+        self.assertIsNot(buffer._data, data)
+        self.assertEqual(bytes(buffer._data), bytes(corrupted) + _event(2))
+        del error
+
+    def test_payload_length_is_validated_before_the_payload_arrives(self):
+        prelude = struct.pack('!II', 25 * 1024 * 1024, 0)
+        buffer = EventStreamBuffer()
+        buffer.add_data(prelude + struct.pack('!I', crc32(prelude) & 0xFFFFFFFF))
+        with self.assertRaises(InvalidPayloadLength):
+            next(buffer)
+
+
+if __name__ == "__main__":
+    unittest.main()
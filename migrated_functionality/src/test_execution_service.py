@@ -0,0 +1,263 @@
+import asyncio
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from src.execution_service import ExecutionScheduler, ExecutionService, RealtimeExecutionWrapper, ScheduledExecution
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met in time")
+        time.sleep(0.01)
+
+
+class TestExecutionScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.scheduler = None
+
+    def tearDown(self):
+        if self.scheduler is not None:
+            self.scheduler.shutdown()
+
+    def test_lower_priority_values_run_first(self):
+        self.scheduler = ExecutionScheduler(max_concurrent_per_loop=1)
+        order = []
+        executions = []
+
+        def job(priority):
+            async def run():
+                order.append(priority)
+            return run
+
+        async def blocker():
+            # Submitted from the loop, so all three are queued before the dispatcher wakes up
+            for priority in (5, 1, 3):
+                executions.append(self.scheduler.submit(f"job-{priority}", job(priority), priority=priority))
+            await asyncio.sleep(0.05)
+
+        self.scheduler.submit("blocker", blocker)
+        _wait_for(lambda: len(executions) == 3 and all(execution.done for execution in executions))
+        self.assertEqual(order, [1, 3, 5])
+
+    def _max_parallel_per_project(self, per_project_limit):
+        self.scheduler = ExecutionScheduler(per_project_limit=per_project_limit)
+        running = {"now": 0, "max": 0}
+
+        async def job():
+            running["now"] += 1
+            running["max"] = max(running["max"], running["now"])
+            await asyncio.sleep(0.02)
+            running["now"] -= 1
+
+        executions = [
+            self.scheduler.submit(f"run-{index}", job, concurrency_key="project-1")
+            for index in range(4)
+        ]
+        _wait_for(lambda: all(execution.done for execution in executions))
+        return running["max"]
+
+    def test_per_project_limit(self):
+        self.assertEqual(self._max_parallel_per_project(1), 1)
+        self.scheduler.shutdown()
+        self.assertEqual(self._max_parallel_per_project(2), 2)
+
+    def test_duplicate_job_is_rejected_while_scheduled(self):
+        self.scheduler = ExecutionScheduler()
+        release = threading.Event()
+
+        async def job():
+            while not release.is_set():
+                await asyncio.sleep(0.01)
+
+        execution = self.scheduler.submit("job", job)
+        with self.assertRaises(ValueError):
+            self.scheduler.submit("job", job)
+        release.set()
+        _wait_for(lambda: execution.done)
+        self.scheduler.submit("job", job)
+
+    def test_cancel_queued_execution(self):
+        self.scheduler = ExecutionScheduler(max_concurrent_per_loop=1)
+        release = threading.Event()
+
+        async def blocker():
+            while not release.is_set():
+                await asyncio.sleep(0.01)
+
+        async def never_started():
+            raise AssertionError("cancelled execution was run")
+
+        first = self.scheduler.submit("blocker", blocker)
+        _wait_for(lambda: first.state == ScheduledExecution.RUNNING)
+        queued = self.scheduler.submit("queued", never_started)
+        self.assertTrue(self.scheduler.cancel("queued"))
+        _wait_for(lambda: queued.done)
+        release.set()
+        _wait_for(lambda: first.done)
+        self.assertEqual(queued.state, ScheduledExecution.CANCELLED)
+        self.assertFalse(self.scheduler.cancel("queued"))
+
+    def test_stats(self):
+        self.scheduler = ExecutionScheduler(num_loops=2)
+
+        async def succeed():
+            await asyncio.sleep(0.01)
+
+        async def fail():
+            raise RuntimeError("boom")
+
+        executions = [self.scheduler.submit(f"ok-{index}", succeed) for index in range(3)]
+        executions.append(self.scheduler.submit("bad", fail))
+        _wait_for(lambda: all(execution.done for execution in executions))
+
+        stats = self.scheduler.get_stats()
+        self.assertEqual(len(stats["shards"]), 2)
+        self.assertEqual(stats["queue_depth"], 0)
+        self.assertEqual(stats["running"], 0)
+        self.assertEqual(sum(shard["completed"] for shard in stats["shards"]), 3)
+        self.assertEqual(sum(shard["failed"] for shard in stats["shards"]), 1)
+        self.assertEqual(executions[-1].error, "boom")
+        self.assertTrue(all(shard["avg_wait_time"] >= 0 for shard in stats["shards"]))
+
+
+class _ProjectManager:
+
+    def __init__(self, current_project_id=None):
+        self.updates = []
+        self.current_project_id = current_project_id
+
+    def update_project(self, project_id, **fields):
+        self.updates.append((project_id, fields))
+
+    def get_current_project(self):
+        if self.current_project_id is None:
+            return None
+        return SimpleNamespace(id=self.current_project_id)
+
+
+class _Engine:
+
+    def __init__(self, error=None):
+        self.error = error
+
+    async def run_cycle(self, max_steps):
+        if self.error:
+            raise self.error
+        return {"steps": max_steps}
+
+
+class _BlockingExecutionService(ExecutionService):
+    """Runs a project cycle that only ends when cancelled."""
+
+    def __init__(self, scheduler):
+        project_service = SimpleNamespace(project_manager=_ProjectManager(), project_configs={})
+        super().__init__(project_service, system_manager=None, scheduler=scheduler)
+        self.started = threading.Event()
+
+    async def _run_project_cycle_async(self, project_id, goal, max_steps):
+        self.started.set()
+        await asyncio.Event().wait()
+
+
+class TestExecutionService(unittest.TestCase):
+
+    def setUp(self):
+        self.service = _BlockingExecutionService(ExecutionScheduler())
+
+    def tearDown(self):
+        self.service.shutdown()
+
+    def test_stop_project_execution_cancels_the_run(self):
+        self.assertTrue(self.service.start_project_execution("p1", "goal", 10))
+        self.assertFalse(self.service.start_project_execution("p1", "goal", 10))
+        self.assertTrue(self.service.started.wait(5))
+        self.assertEqual(self.service.get_running_executions()["p1"]["state"], ScheduledExecution.RUNNING)
+
+        self.assertTrue(self.service.stop_project_execution("p1"))
+        _wait_for(lambda: not self.service.get_running_executions())
+        _wait_for(lambda: self.service.project_service.project_manager.updates)
+        self.assertEqual(
+            self.service.project_service.project_manager.updates,
+            [("p1", {"status": "cancelled"})],
+        )
+        self.assertEqual(self.service.get_scheduler_stats()["shards"][0]["cancelled"], 1)
+        self.assertFalse(self.service.stop_project_execution("p1"))
+
+
+class _FailingExecutionService(ExecutionService):
+    """Runs a project cycle that raises."""
+
+    def __init__(self, scheduler, current_project_id=None):
+        self.broadcasts = []
+        project_service = SimpleNamespace(
+            project_manager=_ProjectManager(current_project_id),
+            project_configs={},
+            broadcast_callback=lambda: self.broadcasts.append(threading.get_ident()),
+        )
+        super().__init__(project_service, system_manager=None, scheduler=scheduler)
+
+    async def _run_project_cycle_async(self, project_id, goal, max_steps):
+        raise RuntimeError("boom")
+
+
+class TestExecutionFailure(unittest.TestCase):
+
+    def _run_failing(self, current_project_id):
+        service = _FailingExecutionService(ExecutionScheduler(), current_project_id)
+        try:
+            self.assertTrue(service.start_project_execution("p1", "goal", 10))
+            _wait_for(lambda: not service.get_running_executions())
+            self.assertEqual(service.get_scheduler_stats()["shards"][0]["failed"], 1)
+        finally:
+            service.shutdown()
+        return service
+
+    def test_failure_is_recorded_once(self):
+        service = self._run_failing(current_project_id="other")
+        self.assertEqual(service.project_service.project_manager.updates, [("p1", {"status": "failed"})])
+        self.assertEqual(service.broadcasts, [])
+
+    def test_failure_of_the_displayed_project_is_broadcast(self):
+        service = self._run_failing(current_project_id="p1")
+        self.assertEqual(service.project_service.project_manager.updates, [("p1", {"status": "failed"})])
+        self.assertEqual(len(service.broadcasts), 1)
+
+
+class TestRealtimeExecutionWrapper(unittest.TestCase):
+
+    def _run_cycle(self, engine, update_callback):
+        wrapper = RealtimeExecutionWrapper("p1", engine, update_callback, _ProjectManager("p1"))
+
+        async def run():
+            loop_thread = threading.get_ident()
+            try:
+                return loop_thread, await wrapper.run_cycle(max_steps=3)
+            except Exception as e:
+                return loop_thread, e
+
+        return asyncio.run(run())
+
+    def test_update_callback_runs_off_the_loop(self):
+        threads = []
+        loop_thread, result = self._run_cycle(_Engine(), lambda: threads.append(threading.get_ident()))
+        self.assertEqual(result, {"steps": 3})
+        self.assertEqual(len(threads), 1)
+        self.assertNotEqual(threads[0], loop_thread)
+
+    def test_failed_update_does_not_fail_the_run(self):
+        def update_callback():
+            raise OSError("disk full")
+
+        _, result = self._run_cycle(_Engine(), update_callback)
+        self.assertEqual(result, {"steps": 3})
+
+        _, error = self._run_cycle(_Engine(error=ValueError("engine")), update_callback)
+        self.assertIsInstance(error, ValueError)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import copy
+import json
+import pickle
+import unittest
+from src.function_utils import _build_json_schema, get_json_schema
+
+
+def multiply(x: float, y: list[int]) -> float:
+    """
+    A function that multiplies numbers
+
+    Args:
+        x: The first number to multiply
+        y: The other numbers to multiply
+    """
+    return x
+
+
+class _Calculator:
+
+    def add(self, x: int) -> int:
+        """
+        Add a number
+
+        Args:
+            x: The number to add
+        """
+        return x
+
+
+class TestGetJsonSchema(unittest.TestCase):
+
+    def test_schema_is_built_once_and_shared(self):
+        schema = get_json_schema(multiply)
+        self.assertIs(get_json_schema(multiply), schema)
+        self.assertEqual(schema, _build_json_schema(multiply))
+        self.assertEqual(json.dumps(schema), json.dumps(_build_json_schema(multiply)))
+
+    def test_cached_schema_is_read_only(self):
+        schema = get_json_schema(multiply)
+        parameters = schema["function"]["parameters"]
+        with self.assertRaises(TypeError):
+            parameters["properties"]["x"]["type"] = "string"
+        with self.assertRaises(TypeError):
+            parameters["required"].append("z")
+        with self.assertRaises(TypeError):
+            del schema["function"]
+        with self.assertRaises(TypeError):
+            schema.update(type="other")
+        self.assertEqual(get_json_schema(multiply), _build_json_schema(multiply))
+
+    def test_copies_are_plain_and_mutable(self):
+        schema = get_json_schema(multiply)
+        for duplicate in (copy.deepcopy(schema), pickle.loads(pickle.dumps(schema))):
+            self.assertEqual(duplicate, schema)
+            self.assertIs(type(duplicate), dict)
+            self.assertIs(type(duplicate["function"]["parameters"]["required"]), list)
+            duplicate["function"]["parameters"]["required"].append("z")
+        self.assertIs(type(copy.copy(schema)), dict)
+        self.assertNotIn("z", schema["function"]["parameters"]["required"])
+
+    def test_changed_docstring_rebuilds_the_schema(self):
+        def greet(name: str) -> str:
+            """
+            Greet someone
+
+            Args:
+                name: Who to greet
+            """
+            return name
+
+        schema = get_json_schema(greet)
+        greet.__doc__ = greet.__doc__.replace("Greet someone", "Say hello")
+        rebuilt = get_json_schema(greet)
+        self.assertIsNot(rebuilt, schema)
+        self.assertEqual(rebuilt["function"]["description"], "Say hello")
+
+    def test_bound_methods_share_the_function_schema(self):
+        first, second = _Calculator(), _Calculator()
+        schema = get_json_schema(first.add)
+        self.assertIs(get_json_schema(second.add), schema)
+        self.assertEqual(list(schema["function"]["parameters"]["properties"]), ["x"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,305 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import unittest
+import unittest.mock
+from pathlib import Path
+import httpx
+from src.http_fetcher import FetchCache, FetchResponse, HttpFetcher
+
+
+class _Server:
+    """Answers requests through `httpx.MockTransport` and records the request headers."""
+
+    def __init__(self, body=b"<p>hello</p>", headers=None, not_modified=False):
+        self.body = body
+        self.headers = {"content-type": "text/html", **(headers or {})}
+        self.not_modified = not_modified
+        self.requests = []
+        self.release = None
+
+    async def __call__(self, request):
+        self.requests.append(request.headers)
+        if self.release is not None:
+            await self.release.wait()
+        if self.not_modified and ("if-none-match" in request.headers or "if-modified-since" in request.headers):
+            return httpx.Response(304, headers={"cache-control": self.headers.get("cache-control", "")})
+        return httpx.Response(200, content=self.body, headers=self.headers)
+
+
+class _Markdown:
+
+    def __init__(self, markdown):
+        self.markdown = markdown
+        self.title = None
+
+
+class TestHttpFetcher(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _fetcher(self, server, **kwargs):
+        return HttpFetcher(cache_dir=self._tmp.name, transport=httpx.MockTransport(server), **kwargs)
+
+    def _fetch_twice(self, fetcher, url="https://example.com/page"):
+        async def run():
+            first = await fetcher.fetch(url)
+            second = await fetcher.fetch(url)
+            await fetcher.aclose()
+            return first, second
+
+        return asyncio.run(run())
+
+    def test_fresh_response_is_served_from_the_cache(self):
+        server = _Server(headers={"cache-control": "max-age=60"})
+        first, second = self._fetch_twice(self._fetcher(server))
+        self.assertEqual(len(server.requests), 1)
+        self.assertFalse(first.from_cache)
+        self.assertTrue(second.from_cache)
+        self.assertEqual(second.body, b"<p>hello</p>")
+        self.assertEqual(second.max_age, 60)
+
+    def test_ttl_applies_without_max_age(self):
+        server = _Server()
+        self._fetch_twice(self._fetcher(server, ttl=60))
+        self.assertEqual(len(server.requests), 1)
+
+        server = _Server()
+        self._fetch_twice(self._fetcher(server, ttl=0))
+        self.assertEqual(len(server.requests), 2)
+
+    def test_stale_response_is_revalidated_with_etag(self):
+        server = _Server(headers={"cache-control": "no-cache", "etag": '"v1"'}, not_modified=True)
+        first, second = self._fetch_twice(self._fetcher(server))
+        self.assertEqual(len(server.requests), 2)
+        self.assertNotIn("if-none-match", server.requests[0])
+        self.assertEqual(server.requests[1]["if-none-match"], '"v1"')
+        self.assertTrue(second.from_cache)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.body, first.body)
+        self.assertGreaterEqual(second.fetched_at, first.fetched_at)
+
+    def test_stale_response_is_revalidated_with_last_modified(self):
+        last_modified = "Wed, 21 Oct 2015 07:28:00 GMT"
+        server = _Server(headers={"cache-control": "max-age=0", "last-modified": last_modified}, not_modified=True)
+        _, second = self._fetch_twice(self._fetcher(server))
+        self.assertEqual(server.requests[1]["if-modified-since"], last_modified)
+        self.assertTrue(second.from_cache)
+
+    def test_no_store_responses_are_not_cached(self):
+        server = _Server(headers={"cache-control": "no-store", "etag": '"v1"'})
+        fetcher = self._fetcher(server)
+        _, second = self._fetch_twice(fetcher)
+        self.assertEqual(len(server.requests), 2)
+        self.assertNotIn("if-none-match", server.requests[1])
+        self.assertFalse(second.from_cache)
+        self.assertIsNone(fetcher.cache.get("https://example.com/page"))
+
+    def test_failed_responses_are_not_cached(self):
+        async def server(request):
+            return httpx.Response(500, content=b"error")
+
+        fetcher = self._fetcher(server)
+        first, _ = self._fetch_twice(fetcher)
+        self.assertFalse(first.ok)
+        self.assertIsNone(fetcher.cache.get("https://example.com/page"))
+
+    def test_body_is_truncated_at_max_body_bytes(self):
+        fetcher = self._fetcher(_Server(body=b"x" * 100), max_body_bytes=10)
+        response, _ = self._fetch_twice(fetcher)
+        self.assertEqual(response.body, b"x" * 10)
+        self.assertTrue(response.truncated)
+        self.assertIsNone(fetcher.cache.get("https://example.com/page"))
+
+        fetcher = self._fetcher(_Server(body=b"x" * 10), max_body_bytes=10)
+        response, _ = self._fetch_twice(fetcher, "https://example.com/exact")
+        self.assertEqual(response.body, b"x" * 10)
+        self.assertFalse(response.truncated)
+        self.assertIsNotNone(fetcher.cache.get("https://example.com/exact"))
+
+    def test_concurrent_fetches_of_one_url_share_a_request(self):
+        server = _Server()
+        fetcher = self._fetcher(server)
+
+        async def run():
+            server.release = asyncio.Event()
+            fetches = [asyncio.create_task(fetcher.fetch("https://example.com/page")) for _ in range(3)]
+            other = asyncio.create_task(fetcher.fetch("https://example.com/other"))
+            await asyncio.sleep(0.05)
+            server.release.set()
+            responses = await asyncio.gather(*fetches, other)
+            await fetcher.aclose()
+            return responses
+
+        responses = asyncio.run(run())
+        self.assertEqual(len(server.requests), 2)
+        self.assertIs(responses[0], responses[1])
+        self.assertIs(responses[0], responses[2])
+
+    def test_cancelled_caller_does_not_cancel_the_shared_request(self):
+        server = _Server()
+        fetcher = self._fetcher(server)
+
+        async def run():
+            server.release = asyncio.Event()
+            cancelled = asyncio.create_task(fetcher.fetch("https://example.com/page"))
+            waiting = asyncio.create_task(fetcher.fetch("https://example.com/page"))
+            await asyncio.sleep(0.05)
+            cancelled.cancel()
+            server.release.set()
+            response = await waiting
+            await fetcher.aclose()
+            return response
+
+        self.assertEqual(asyncio.run(run()).body, b"<p>hello</p>")
+        self.assertEqual(len(server.requests), 1)
+
+    def test_fetch_markdown_reuses_the_cached_conversion(self):
+        conversions = []
+
+        def converter(body, content_type, url):
+            conversions.append(url)
+            return _Markdown(body.decode())
+
+        server = _Server(headers={"cache-control": "no-cache", "etag": '"v1"'}, not_modified=True)
+        fetcher = self._fetcher(server, converter=converter)
+
+        async def run():
+            first = await fetcher.fetch_markdown("https://example.com/page")
+            second = await fetcher.fetch_markdown("https://example.com/page")
+            too_short = await fetcher.fetch_markdown("https://example.com/page", min_length=100)
+            await fetcher.aclose()
+            return first, second, too_short
+
+        first, second, too_short = asyncio.run(run())
+        self.assertEqual(first.markdown, "<p>hello</p>")
+        self.assertEqual(second.markdown, first.markdown)
+        self.assertIsNone(too_short)
+        self.assertEqual(conversions, ["https://example.com/page"])
+
+
+class TestHttpFetcherEventLoops(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.server = _Server()
+        self.fetcher = HttpFetcher(cache_dir=self._tmp.name, ttl=0, transport=httpx.MockTransport(self.server))
+        self.other_loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.other_loop.run_forever, daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        self.other_loop.call_soon_threadsafe(self.other_loop.stop)
+        self.thread.join(5)
+        self.other_loop.close()
+        self._tmp.cleanup()
+
+    def _on_other_loop(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.other_loop).result(5)
+
+    def _client(self, loop):
+        return self.fetcher._loop_states[loop].client
+
+    def test_each_loop_keeps_its_own_client(self):
+        self._on_other_loop(self.fetcher.fetch("https://example.com/a"))
+        other_client = self._client(self.other_loop)
+
+        async def run():
+            await self.fetcher.fetch("https://example.com/b")
+            own_client = self._client(asyncio.get_running_loop())
+            self.assertIsNot(own_client, other_client)
+            # Fetching on this loop leaves the other loop's client open and in use
+            self.assertFalse(other_client.is_closed)
+            await self.fetcher.aclose()
+            return own_client
+
+        own_client = asyncio.run(run())
+        self.assertTrue(own_client.is_closed)
+        self.assertTrue(other_client.is_closed)
+        self.assertEqual(len(self.fetcher._loop_states), 0)
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_clients_of_closed_loops_are_dropped(self):
+        loops = []
+
+        async def first():
+            loops.append(asyncio.get_running_loop())
+            await self.fetcher.fetch("https://example.com/a")
+
+        asyncio.run(first())
+        self.assertTrue(loops[0].is_closed())
+        self.assertIn(loops[0], self.fetcher._loop_states)
+
+        async def second():
+            await self.fetcher.fetch("https://example.com/b")
+            states = list(self.fetcher._loop_states)
+            await self.fetcher.aclose()
+            return states
+
+        self.assertEqual(len(asyncio.run(second())), 1)
+        self.assertNotIn(loops[0], self.fetcher._loop_states)
+
+
+class TestFetchCache(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.cache = FetchCache(self._tmp.name)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _response(self, name):
+        return FetchResponse(url=f"https://example.com/{name}", status_code=200, body=b"x" * 100, fetched_at=time.time())
+
+    def _age(self, name, seconds_ago):
+        meta_path = self.cache._path(f"https://example.com/{name}", ".json")
+        used = time.time() - seconds_ago
+        os.utime(meta_path, (used, used))
+
+    def test_default_root_is_private_to_the_user(self):
+        with tempfile.TemporaryDirectory() as cache_home:
+            os.makedirs(os.path.join(cache_home, "web_fetch_cache"), mode=0o755)
+            with unittest.mock.patch.dict(os.environ, {"XDG_CACHE_HOME": cache_home}):
+                cache = FetchCache()
+            self.assertEqual(cache.root, Path(cache_home) / "web_fetch_cache")
+            self.assertEqual(cache.root.stat().st_mode & 0o777, 0o700)
+
+    def test_least_recently_used_url_is_evicted(self):
+        self.cache.put(self._response("a"))
+        entry_size = self.cache._size
+        self.cache.put(self._response("b"))
+        self._age("a", 20)
+        self._age("b", 10)
+        # Reading refreshes "a", which leaves "b" as the least recently used
+        self.assertIsNotNone(self.cache.get("https://example.com/a"))
+
+        self.cache.max_bytes = int(entry_size * 2.5)
+        self.cache.put(self._response("c"))
+        self.assertIsNotNone(self.cache.get("https://example.com/a"))
+        self.assertIsNone(self.cache.get("https://example.com/b"))
+        self.assertIsNotNone(self.cache.get("https://example.com/c"))
+        self.assertEqual(self.cache._size, 2 * entry_size)
+
+    def test_delete_updates_the_size(self):
+        self.cache.put(self._response("a"))
+        self.cache.delete("https://example.com/a")
+        self.assertIsNone(self.cache.get("https://example.com/a"))
+        self.assertEqual(self.cache._size, 0)
+
+    def test_changed_body_invalidates_the_markdown(self):
+        response = self._response("a")
+        self.cache.put(response)
+        self.cache.put_markdown(response.url, response.digest, _Markdown("# a"))
+        self.assertEqual(self.cache.get_markdown(response.url, response.digest).markdown, "# a")
+        self.assertIsNone(self.cache.get_markdown(response.url, "other digest"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import base64
+import io
+import tempfile
+import unittest
+from PIL import Image
+from src.image_store import ImageHandle, ImageStore
+
+
+def _image(color, size=(40, 20), mode="RGB"):
+    return Image.new(mode, size, color)
+
+
+def _decode(encoded):
+    return Image.open(io.BytesIO(base64.b64decode(encoded)))
+
+
+class TestImageStore(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.store = ImageStore(self._tmp.name)
+
+    def tearDown(self):
+        self.store.clear_caches()
+        self._tmp.cleanup()
+
+    def _files(self):
+        return sorted(path.name for path in self.store.root.iterdir())
+
+    def test_put_deduplicates_by_content(self):
+        handle = self.store.put(_image("red"))
+        self.assertEqual(self.store.put(_image("red")), handle)
+        self.assertEqual(handle.size, (40, 20))
+        self.assertEqual(handle.mode, "RGB")
+        self.assertEqual(self._files(), [f"{handle.digest}.png"])
+
+        # Same pixels in another size or mode are other images
+        self.assertNotEqual(self.store.put(_image("red", size=(20, 40))), handle)
+        self.assertNotEqual(self.store.put(_image("red", mode="RGBA")), handle)
+        self.assertNotEqual(self.store.put(_image("blue")), handle)
+        self.assertEqual(len(self._files()), 4)
+
+    def test_put_does_not_rewrite_stored_images(self):
+        writes = []
+        write = self.store._write
+        self.store._write = lambda path, save: (writes.append(path), write(path, save))
+        self.store.put(_image("red"))
+        self.store.put(_image("red"))
+        self.assertEqual(len(writes), 1)
+
+    def test_put_all(self):
+        handle = self.store.put(_image("red"))
+        handles = self.store.put_all([_image("red"), handle, _image("blue")])
+        self.assertEqual(handles[0], handle)
+        self.assertIs(handles[1], handle)
+        self.assertIsInstance(handles[2], ImageHandle)
+        self.assertIsNone(self.store.put_all(None))
+        self.assertEqual(len(self._files()), 2)
+
+    def test_load_round_trips_and_is_cached(self):
+        image = _image("red")
+        handle = self.store.put(image)
+        loaded = handle.load()
+        self.assertEqual(loaded.tobytes(), image.tobytes())
+        self.assertIs(handle.load(), loaded)
+
+        self.store.max_decoded = 1
+        self.store.put(_image("blue")).load()
+        self.assertIsNot(handle.load(), loaded)
+
+    def test_encodings_are_cached(self):
+        handle = self.store.put(_image("red"))
+        encoded = handle.base64()
+        self.assertIs(handle.base64(), encoded)
+        self.assertIs(self.store.encoded(handle), self.store.encoded(handle))
+        self.assertEqual(base64.b64decode(encoded), bytes(self.store.encoded(handle)))
+        self.assertEqual(_decode(encoded).tobytes(), _image("red").tobytes())
+
+        self.store.clear_caches()
+        self.assertIsNot(handle.base64(), encoded)
+        self.assertEqual(handle.base64(), encoded)
+
+    def test_encoding_cache_is_bounded(self):
+        self.store.max_encoded = 2
+        handles = [self.store.put(_image(color)) for color in ("red", "green", "blue")]
+        for handle in handles:
+            handle.base64()
+        self.assertEqual(len(self.store._encoded), 2)
+        self.assertNotIn((handles[0].digest, None), self.store._encoded)
+
+    def test_max_size_downscales_once(self):
+        handle = self.store.put(_image("red", size=(400, 200)))
+        encoded = handle.base64(max_size=100)
+        self.assertEqual(_decode(encoded).size, (100, 50))
+        self.assertIs(handle.base64(max_size=100), encoded)
+        self.assertIn(f"{handle.digest}_100.png", self._files())
+        # The original is untouched
+        self.assertEqual(_decode(handle.base64()).size, (400, 200))
+
+    def test_max_size_never_upscales(self):
+        handle = self.store.put(_image("red"))
+        self.assertEqual(handle.base64(max_size=1000), handle.base64())
+        self.assertEqual(self._files(), [f"{handle.digest}.png"])
+
+    def test_default_root_is_a_temporary_directory(self):
+        store = ImageStore()
+        handle = store.put(_image("red"))
+        self.assertTrue(store._path(handle.digest).exists())
+        self.assertTrue(store.root.name.startswith("agent_images_"))
+        store.clear_caches()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,229 @@
+import asyncio
+import unittest
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from src.lobe_chat_integration import (
+    AsyncChatCache,
+    ChatDatabase,
+    ChatMessage,
+    ChatProvider,
+    ChatSession,
+    ChatWriteBehind,
+    LocalAsyncRedis,
+    MessageType,
+    decode_chat_message,
+    encode_chat_message,
+)
+
+_START = datetime(2024, 1, 1, 12, 0, 0)
+
+
+def _message(index, **kwargs):
+    fields = dict(
+        id=f"m{index}",
+        user_id="u1",
+        conversation_id="c1",
+        message_type=MessageType.USER if index % 2 == 0 else MessageType.ASSISTANT,
+        content=f"message {index}",
+        timestamp=_START + timedelta(seconds=index),
+        metadata={},
+        provider=ChatProvider.LOBE_CHAT,
+    )
+    fields.update(kwargs)
+    return ChatMessage(**fields)
+
+
+class TestChatMessageEncoding(unittest.TestCase):
+
+    def test_round_trip_without_cost(self):
+        message = _message(1, cost=None, token_count=None, response_time_ms=None)
+        self.assertEqual(decode_chat_message(encode_chat_message(message)), message)
+
+    def test_round_trip_with_datetime_metadata(self):
+        metadata = {
+            "seen_at": datetime(2024, 1, 2, 3, 4, 5, 678901),
+            "nested": {"expires": datetime(2024, 1, 2, tzinfo=timezone.utc)},
+        }
+        message = _message(1, metadata=metadata, cost=0.25)
+        self.assertEqual(decode_chat_message(encode_chat_message(message)).metadata, metadata)
+
+    def test_aware_timestamp_is_stored_as_utc(self):
+        aware = datetime(2024, 1, 1, 14, 0, tzinfo=timezone(timedelta(hours=2)))
+        decoded = decode_chat_message(encode_chat_message(_message(1, timestamp=aware)))
+        self.assertEqual(decoded.timestamp, _START)
+
+
+class TestAsyncChatCache(unittest.TestCase):
+
+    def setUp(self):
+        config = SimpleNamespace(redis_config={"max_conversation_length": 5})
+        self.cache = AsyncChatCache(config, client=LocalAsyncRedis())
+
+    def _ids(self, messages):
+        return [message.id for message in messages]
+
+    def test_append_and_tail(self):
+        async def run():
+            await self.cache.append_messages("c1", [_message(0), _message(1)])
+            await self.cache.append_messages("c1", [_message(2)])
+            return (
+                await self.cache.get_cached_conversation("c1"),
+                await self.cache.get_cached_conversation("c1", tail=2),
+                await self.cache.get_cached_conversation("c1", tail=0),
+            )
+
+        full, tail, empty = asyncio.run(run())
+        self.assertEqual(self._ids(full), ["m0", "m1", "m2"])
+        self.assertEqual(self._ids(tail), ["m1", "m2"])
+        self.assertEqual(empty, [])
+
+    def test_append_trims_oldest_messages(self):
+        async def run():
+            for index in range(7):
+                await self.cache.append_messages("c1", [_message(index)])
+            return await self.cache.get_cached_conversation("c1")
+
+        self.assertEqual(self._ids(asyncio.run(run())), ["m2", "m3", "m4", "m5", "m6"])
+
+    def test_seeding_from_newest_first_history_keeps_chronological_order(self):
+        async def run():
+            newest_first = [_message(index) for index in (3, 2, 1, 0)]
+            await self.cache.cache_conversation("c1", newest_first)
+            await self.cache.append_messages("c1", [_message(4)])
+            return await self.cache.get_cached_conversation("c1")
+
+        self.assertEqual(self._ids(asyncio.run(run())), ["m0", "m1", "m2", "m3", "m4"])
+
+    def test_missing_conversation(self):
+        self.assertIsNone(asyncio.run(self.cache.get_cached_conversation("unknown")))
+
+
+def _session(session_id, message_count):
+    return ChatSession(
+        id=session_id,
+        user_id="u1",
+        session_name="session",
+        created_at=_START,
+        last_activity=_START + timedelta(seconds=message_count),
+        message_count=message_count,
+        total_tokens=0,
+        total_cost=0.0,
+        metadata={},
+    )
+
+
+class _RecordingDatabase:
+
+    def __init__(self, failures=0, poisoned=()):
+        self.batches = []
+        self.failures = failures
+        self.poisoned = set(poisoned)
+
+    def check_batch_writes(self):
+        pass
+
+    def save_batch(self, messages, sessions):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("database unavailable")
+        if self.poisoned.intersection(m.id for m in messages):
+            raise RuntimeError("constraint violated")
+        self.batches.append(([m.id for m in messages], [(s.id, s.message_count) for s in sessions]))
+
+
+class TestChatWriteBehind(unittest.TestCase):
+
+    def _run(self, database, produce, **kwargs):
+        async def run():
+            write_behind = ChatWriteBehind(database, **kwargs)
+            await write_behind.start()
+            await produce(write_behind)
+            await write_behind.stop()
+            return write_behind
+
+        return asyncio.run(run())
+
+    def test_batches_by_size_and_keeps_latest_session(self):
+        async def produce(write_behind):
+            for index in range(5):
+                await write_behind.save_message(_message(index))
+            await write_behind.save_session(_session("s1", 1))
+            await write_behind.save_session(_session("s1", 2))
+
+        database = _RecordingDatabase()
+        write_behind = self._run(database, produce, batch_size=2, max_batch_age_ms=1000)
+        self.assertEqual(
+            [message for messages, _ in database.batches for message in messages],
+            ["m0", "m1", "m2", "m3", "m4"],
+        )
+        self.assertTrue(all(len(messages) <= 2 for messages, _ in database.batches))
+        self.assertEqual([s for _, sessions in database.batches for s in sessions], [("s1", 2)])
+        self.assertEqual(write_behind.stats["messages_flushed"], 5)
+
+    def test_stop_persists_queued_writes(self):
+        async def produce(write_behind):
+            # Stopped before the worker collects anything
+            for index in range(3):
+                write_behind.queue.put_nowait(_message(index))
+
+        database = _RecordingDatabase()
+        self._run(database, produce, max_batch_age_ms=1000)
+        self.assertEqual([m for messages, _ in database.batches for m in messages], ["m0", "m1", "m2"])
+
+    def test_failed_batch_is_retried_in_order(self):
+        async def produce(write_behind):
+            await write_behind.save_message(_message(0))
+            await asyncio.sleep(0.05)
+            await write_behind.save_message(_message(1))
+            await asyncio.sleep(0.05)
+
+        database = _RecordingDatabase(failures=2)
+        write_behind = self._run(
+            database, produce, max_batch_age_ms=1, retry_backoff_ms=5, max_retry_backoff_ms=10
+        )
+        self.assertEqual([m for messages, _ in database.batches for m in messages], ["m0", "m1"])
+        self.assertEqual(write_behind.stats["flush_errors"], 2)
+
+    def test_poisoned_row_is_dead_lettered_after_max_attempts(self):
+        async def produce(write_behind):
+            for index in range(4):
+                await write_behind.save_message(_message(index))
+            await asyncio.sleep(0.1)
+            await write_behind.save_message(_message(4))
+            await asyncio.sleep(0.05)
+
+        database = _RecordingDatabase(poisoned={"m2"})
+        write_behind = self._run(
+            database, produce, max_batch_age_ms=10, retry_backoff_ms=1,
+            max_retry_backoff_ms=1, max_attempts=3
+        )
+        self.assertEqual(
+            sorted(m for messages, _ in database.batches for m in messages),
+            ["m0", "m1", "m3", "m4"],
+        )
+        self.assertEqual([row.id for row, _ in write_behind.dead_letters], ["m2"])
+        self.assertEqual(write_behind.stats["dead_lettered"], 1)
+
+    def test_unsupported_dialect_fails_at_startup(self):
+        database = ChatDatabase.__new__(ChatDatabase)
+        database.engine = SimpleNamespace(dialect=SimpleNamespace(name="mysql"))
+        with self.assertRaises(ValueError):
+            ChatWriteBehind(database)
+
+
+class TestChatDatabaseValidation(unittest.TestCase):
+
+    def test_unsupported_dialect_raises(self):
+        database = ChatDatabase.__new__(ChatDatabase)
+        database.engine = SimpleNamespace(dialect=SimpleNamespace(name="mysql"))
+        with self.assertRaises(ValueError):
+            database._insert(object())
+
+    def test_page_limit_must_be_positive(self):
+        database = ChatDatabase.__new__(ChatDatabase)
+        with self.assertRaises(ValueError):
+            database.get_conversation_page("c1", limit=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
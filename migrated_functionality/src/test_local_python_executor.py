@@ -1,5 +1,7 @@
 import unittest
-from src.tools.executor.local_python_executor import evaluate_python_code, InterpreterError, BASE_PYTHON_TOOLS, BASE_BUILTIN_MODULES, DEFAULT_MAX_LEN_OUTPUT
+from unittest import mock
+from src.tools.executor import local_python_executor
+from src.tools.executor.local_python_executor import evaluate_python_code, parse_code, InterpreterError, BASE_PYTHON_TOOLS, BASE_BUILTIN_MODULES, DEFAULT_MAX_LEN_OUTPUT
 
 # It's good practice to define a small, fixed list for default authorized_imports in tests
 # unless a test specifically needs to modify it.
@@ -220,5 +222,67 @@ finally:
             self._evaluate(code, authorized_imports=[])
 
 
+class TestProgramCache(unittest.TestCase):
+
+    def setUp(self):
+        # Start every test from an empty cache, and put the previous one back afterwards
+        patcher = mock.patch.dict(local_python_executor._program_cache, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _evaluate(self, code, state=None):
+        return evaluate_python_code(code, static_tools=BASE_PYTHON_TOOLS.copy(), custom_tools={}, state=state, authorized_imports=[])
+
+    def test_identical_code_reuses_the_compiled_program(self):
+        code = "x = y * 2\nx + 1"
+        result, _ = self._evaluate(code, state={"y": 2})
+        self.assertEqual(result, 5)
+        module = parse_code(code)
+        self.assertTrue(hasattr(module.body[0], "_evaluate"))
+
+        # A cached program runs again with the state of the new run
+        state = {"y": 10}
+        result, _ = self._evaluate(code, state=state)
+        self.assertEqual(result, 21)
+        self.assertEqual(state["x"], 20)
+        self.assertIs(parse_code(code), module)
+        self.assertEqual(len(local_python_executor._program_cache), 1)
+
+    def test_functions_of_a_cached_program_are_defined_again(self):
+        code = "def double(n):\n    return n * factor\ndouble(3)"
+        self.assertEqual(self._evaluate(code, state={"factor": 2})[0], 6)
+        self.assertEqual(self._evaluate(code, state={"factor": 5})[0], 15)
+
+    def test_dunder_checks_run_on_compiled_nodes(self):
+        code = "x = {}\nx.__dict__"
+        for _ in range(2):
+            with self.assertRaisesRegex(InterpreterError, "Forbidden access to dunder attribute: __dict__"):
+                self._evaluate(code)
+
+        # A branch compiled by an earlier run is still checked when taken
+        code = "if unsafe:\n    y = getattr(type(0), '__subclasses__')\nelse:\n    y = 1\ny"
+        self.assertEqual(self._evaluate(code, state={"unsafe": False})[0], 1)
+        with self.assertRaisesRegex(InterpreterError, "Forbidden access to dunder attribute: __subclasses__"):
+            self._evaluate(code, state={"unsafe": True})
+
+    def test_operation_limit_applies_to_each_run_of_a_cached_program(self):
+        code = "total = 0\nfor i in range(n):\n    total += i\ntotal"
+        with mock.patch.object(local_python_executor, "MAX_OPERATIONS", 200):
+            # Runs within the limit do not add up
+            for _ in range(5):
+                self.assertEqual(self._evaluate(code, state={"n": 10})[0], 45)
+            with self.assertRaisesRegex(InterpreterError, "Reached the max number of operations of 200"):
+                self._evaluate(code, state={"n": 1000})
+
+    def test_least_recently_used_program_is_evicted(self):
+        with mock.patch.object(local_python_executor, "PROGRAM_CACHE_SIZE", 2):
+            first, second = parse_code("a = 1"), parse_code("b = 2")
+            self.assertIs(parse_code("a = 1"), first)
+            parse_code("c = 3")
+            self.assertEqual(len(local_python_executor._program_cache), 2)
+            self.assertIs(parse_code("a = 1"), first)
+            self.assertIsNot(parse_code("b = 2"), second)
+
+
 if __name__ == "__main__":
     unittest.main()
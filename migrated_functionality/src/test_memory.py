@@ -0,0 +1,120 @@
+import unittest
+from src.memory import ActionStep, PlanningStep, SystemPromptStep, TaskStep, ToolCall
+from src.message_manager import MessageManager
+from src.models.base import MessageRole
+
+
+def _action(step_number, **kwargs):
+    return ActionStep(step_number=step_number, timing=None, **kwargs)
+
+
+class _Image:
+    """Stands in for a PIL image; images are compared by identity."""
+
+
+class TestCachedMessages(unittest.TestCase):
+
+    def test_unchanged_step_returns_the_same_messages(self):
+        step = _action(1, model_output="Thinking", observations="Result")
+        messages = step.to_cached_messages()
+        again = step.to_cached_messages()
+        self.assertIsNot(again, messages)
+        self.assertEqual(len(again), 2)
+        for cached, message in zip(again, messages):
+            self.assertIs(cached, message)
+
+        # The returned list is a copy: changing it does not change the cache
+        messages.clear()
+        self.assertEqual(len(step.to_cached_messages()), 2)
+
+    def test_changed_step_is_rendered_again(self):
+        step = _action(1, model_output="Thinking")
+        [thinking] = step.to_cached_messages()
+        step.observations = "Result"
+        messages = step.to_cached_messages()
+        self.assertEqual(len(messages), 2)
+        self.assertIsNot(messages[0], thinking)
+        self.assertEqual(messages[1].content[0]["text"], "Observation:\nResult")
+
+        step.tool_calls = [ToolCall(name="search", arguments={"q": "x"}, id="call_1")]
+        self.assertEqual(step.to_cached_messages()[1].role, MessageRole.TOOL_CALL)
+
+        step.error = "boom"
+        self.assertIn("Call id: call_1", step.to_cached_messages()[-1].content[0]["text"])
+
+    def test_images_are_compared_by_identity(self):
+        first = _Image()
+        step = _action(1, observations_images=[first])
+        [message] = step.to_cached_messages()
+        self.assertIs(step.to_cached_messages()[0], message)
+        step.observations_images = [_Image()]
+        [changed] = step.to_cached_messages()
+        self.assertIsNot(changed, message)
+        self.assertIsNot(changed.content[0]["image"], first)
+
+    def test_summary_mode_is_cached_separately(self):
+        step = _action(1, model_output="Thinking", observations="Result")
+        full = step.to_cached_messages()
+        summary = step.to_cached_messages(summary_mode=True)
+        self.assertEqual(len(full), 2)
+        self.assertEqual(len(summary), 1)
+        self.assertIs(step.to_cached_messages()[0], full[0])
+        self.assertIs(step.to_cached_messages(summary_mode=True)[0], summary[0])
+
+    def test_planning_step_depends_on_the_plan_only(self):
+        step = PlanningStep(model_input_messages=[], model_output_message=None, plan="Plan A", timing=None)
+        messages = step.to_cached_messages()
+        step.model_input_messages = ["ignored"]
+        self.assertIs(step.to_cached_messages()[0], messages[0])
+        step.plan = "Plan B"
+        self.assertEqual(step.to_cached_messages()[0].content[0]["text"], "Plan B")
+
+    def test_task_step_key(self):
+        step = TaskStep(task="Do it")
+        [message] = step.to_cached_messages()
+        self.assertIs(step.to_cached_messages()[0], message)
+        step.task_images = [_Image()]
+        self.assertEqual(len(step.to_cached_messages()[0].content), 2)
+
+
+class TestIncrementalPrompt(unittest.TestCase):
+    """Prompts built from cached step messages render incrementally and match a full render."""
+
+    def _messages(self, steps):
+        return [message for step in steps for message in step.to_cached_messages()]
+
+    def _assert_matches_full_render(self, manager, steps):
+        messages = self._messages(steps)
+        conversions = {MessageRole.TOOL_CALL: MessageRole.ASSISTANT, MessageRole.TOOL_RESPONSE: MessageRole.USER}
+        rendered = manager.get_clean_message_list(messages, role_conversions=conversions)
+        full = MessageManager("gpt-4o").get_clean_message_list(messages, role_conversions=conversions)
+        self.assertEqual(rendered, full)
+
+    def test_appended_and_rewritten_steps(self):
+        manager = MessageManager("gpt-4o")
+        steps = [SystemPromptStep(system_prompt="You are helpful"), TaskStep(task="Do it")]
+        self._assert_matches_full_render(manager, steps)
+
+        for number in range(1, 4):
+            steps.append(_action(number, model_output=f"Step {number}", observations=f"Result {number}"))
+            self._assert_matches_full_render(manager, steps)
+        [prompt] = manager._prompt_cache.values()
+        rendered_inputs = list(prompt.inputs)
+
+        # Rewriting the last step rewinds to the messages of the earlier steps, which stay rendered
+        steps[-1].observations = "Other result"
+        self._assert_matches_full_render(manager, steps)
+        self.assertEqual(len(prompt.inputs), len(rendered_inputs))
+        for entry, rendered in zip(prompt.inputs[:-2], rendered_inputs[:-2]):
+            self.assertIs(entry[0], rendered[0])
+        self.assertIsNot(prompt.inputs[-1][0], rendered_inputs[-1][0])
+
+        # Dropping steps rewinds too
+        del steps[3:]
+        self._assert_matches_full_render(manager, steps)
+        steps.append(PlanningStep(model_input_messages=[], model_output_message=None, plan="New plan", timing=None))
+        self._assert_matches_full_render(manager, steps)
+
+
+if __name__ == "__main__":
+    unittest.main()
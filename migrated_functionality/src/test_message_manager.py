@@ -0,0 +1,233 @@
+import base64
+import io
+import tempfile
+import unittest
+from PIL import Image
+from src.image_store import ImageStore
+from src.message_manager import MessageManager
+from src.models.base import ChatMessage, MessageRole
+
+
+def _text(role, text):
+    return ChatMessage(role=role, content=[{"type": "text", "text": text}])
+
+
+def _conversation():
+    return [
+        _text(MessageRole.SYSTEM, "You are helpful"),
+        _text(MessageRole.USER, "New task"),
+        _text(MessageRole.ASSISTANT, "Thinking"),
+        _text(MessageRole.TOOL_CALL, "Calling tools"),
+        _text(MessageRole.TOOL_RESPONSE, "Observation"),
+    ]
+
+
+class _CountingManager(MessageManager):
+    """Counts the messages rendered, to tell incremental renders from full ones."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.rendered = 0
+
+    def _render_chat_completions_message(self, *args, **kwargs):
+        self.rendered += 1
+        return super()._render_chat_completions_message(*args, **kwargs)
+
+    def _render_responses_message(self, *args, **kwargs):
+        self.rendered += 1
+        return super()._render_responses_message(*args, **kwargs)
+
+
+ROLE_CONVERSIONS = {MessageRole.TOOL_CALL: MessageRole.ASSISTANT, MessageRole.TOOL_RESPONSE: MessageRole.USER}
+
+
+class TestRenderedPrompt(unittest.TestCase):
+
+    def setUp(self):
+        self.manager = _CountingManager("gpt-4o")
+
+    def _render(self, messages, **kwargs):
+        return self.manager.get_clean_message_list(messages, role_conversions=ROLE_CONVERSIONS, **kwargs)
+
+    def _full_render(self, messages, **kwargs):
+        return MessageManager("gpt-4o").get_clean_message_list(messages, role_conversions=ROLE_CONVERSIONS, **kwargs)
+
+    def _assert_same_as_full_render(self, messages, **kwargs):
+        rendered = self._render(messages, **kwargs)
+        self.assertEqual(rendered, self._full_render(messages, **kwargs))
+        return rendered
+
+    def test_appends_only_render_new_messages(self):
+        messages = _conversation()
+        self._assert_same_as_full_render(messages[:2])
+        self.assertEqual(self.manager.rendered, 2)
+        for count in range(3, len(messages) + 1):
+            self._assert_same_as_full_render(messages[:count])
+        self.assertEqual(self.manager.rendered, len(messages))
+
+        # Same list again renders nothing
+        self._assert_same_as_full_render(messages)
+        self.assertEqual(self.manager.rendered, len(messages))
+
+    def test_merged_messages_match_a_full_render(self):
+        messages = _conversation()
+        # The tool call is converted to an assistant message and merged into "Thinking"
+        first = self._assert_same_as_full_render(messages[:4])
+        self.assertEqual(len(first), 3)
+        self.assertEqual(first[-1]["content"][-1]["text"], "Thinking\nCalling tools")
+
+        # Appending the same role again merges into a copy: the earlier result is unchanged
+        more = messages[:4] + [_text(MessageRole.ASSISTANT, "More")]
+        self._assert_same_as_full_render(more)
+        self.assertEqual(first[-1]["content"][-1]["text"], "Thinking\nCalling tools")
+
+    def test_rewind_to_a_shared_prefix(self):
+        messages = _conversation()
+        self._assert_same_as_full_render(messages)
+        rendered = self.manager.rendered
+
+        # Replace the last two messages: only the new ones are rendered
+        retried = messages[:3] + [_text(MessageRole.TOOL_CALL, "Calling other tools"), _text(MessageRole.USER, "Retry")]
+        self._assert_same_as_full_render(retried)
+        self.assertEqual(self.manager.rendered, rendered + 2)
+
+        # Rewind into a merged message, then go back to the first branch
+        self._assert_same_as_full_render(messages[:3])
+        self._assert_same_as_full_render(messages)
+        self._assert_same_as_full_render(messages[:1])
+        self._assert_same_as_full_render(messages)
+
+    def test_content_replaced_in_place_is_rendered_again(self):
+        messages = _conversation()
+        self._assert_same_as_full_render(messages)
+        messages[2].content = [{"type": "text", "text": "Changed"}]
+        rendered = self._assert_same_as_full_render(messages)
+        self.assertEqual(rendered[2]["content"][0]["text"], "Changed\nCalling tools")
+
+        messages[4].content.append({"type": "text", "text": "Appended"})
+        self._assert_same_as_full_render(messages)
+
+    def test_other_formats_match_a_full_render(self):
+        messages = _conversation()
+        for kwargs in ({"flatten_messages_as_text": True}, {"api_type": "responses"}):
+            for count in range(1, len(messages) + 1):
+                self._assert_same_as_full_render(messages[:count], **kwargs)
+            self._assert_same_as_full_render(messages[:2] + [_text(MessageRole.USER, "Other")], **kwargs)
+
+    def test_cache_keys(self):
+        messages = _conversation()
+        self._render(messages)
+        self._render(messages, flatten_messages_as_text=True)
+        self.assertEqual(len(self.manager._prompt_cache), 2)
+
+        # A conversation with a different first message gets its own prompt
+        other = [_text(MessageRole.SYSTEM, "You are terse")] + messages[1:]
+        self._assert_same_as_full_render(other)
+        self.assertEqual(len(self.manager._prompt_cache), 3)
+        rendered = self.manager.rendered
+        self._assert_same_as_full_render(messages)
+        self.assertEqual(self.manager.rendered, rendered)
+
+        self.manager.clear_prompt_cache()
+        self._assert_same_as_full_render(messages)
+        self.assertEqual(self.manager.rendered, rendered + len(messages))
+
+    def test_prompt_cache_is_bounded(self):
+        manager = MessageManager("gpt-4o", prompt_cache_size=2)
+        for index in range(4):
+            manager.get_clean_message_list([_text(MessageRole.SYSTEM, f"prompt {index}")])
+        self.assertEqual(len(manager._prompt_cache), 2)
+
+
+class TestImages(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.store = ImageStore(self._tmp.name)
+        self.handle = self.store.put(Image.new("RGB", (400, 200), "red"))
+
+    def tearDown(self):
+        self.store.clear_caches()
+        self._tmp.cleanup()
+
+    def _rendered_image(self, manager):
+        message = ChatMessage(role=MessageRole.USER, content=[{"type": "image", "image": self.handle}])
+        [rendered] = manager.get_clean_message_list([message], convert_images_to_image_urls=True)
+        return rendered["content"][0]["image_url"]["url"]
+
+    def test_max_image_size_downscales_stored_images(self):
+        url = self._rendered_image(MessageManager("gpt-4o", max_image_size=100))
+        self.assertTrue(url.endswith(self.handle.base64(max_size=100)))
+        encoded = url.split("base64,")[-1]
+        self.assertEqual(Image.open(io.BytesIO(base64.b64decode(encoded))).size, (100, 50))
+
+    def test_images_are_sent_at_full_size_by_default(self):
+        url = self._rendered_image(MessageManager("gpt-4o"))
+        self.assertTrue(url.endswith(self.handle.base64()))
+
+
+class _SearchTool:
+    name = "search"
+    description = "Search the web"
+    parameters = {
+        "type": "object",
+        "properties": {
+            "query": {"type": "string", "description": "What to search for"},
+            "limit": {"type": "any", "description": "Maximum results", "nullable": True},
+        },
+    }
+
+
+class _FetchTool(_SearchTool):
+    name = "fetch"
+    description = "Fetch a page"
+
+
+class TestToolsPayload(unittest.TestCase):
+
+    def setUp(self):
+        self.manager = MessageManager("gpt-4o")
+
+    def test_same_tools_reuse_the_payload(self):
+        tools = [_SearchTool(), _FetchTool()]
+        payload = self.manager.get_tools_payload(tools)
+        self.assertIs(self.manager.get_tools_payload(tools), payload)
+        self.assertEqual(payload.tool_objects, tuple(tools))
+        for tool, schema in zip(tools, payload.tools):
+            self.assertIs(schema, self.manager.get_tool_json_schema(tool))
+
+    def test_chat_completions_schema(self):
+        [schema] = self.manager.get_tools_payload([_SearchTool()]).tools
+        self.assertEqual(schema["type"], "function")
+        self.assertEqual(schema["function"]["name"], "search")
+        parameters = schema["function"]["parameters"]
+        self.assertEqual(parameters["required"], ["query"])
+        self.assertEqual(parameters["properties"]["limit"]["type"], "string")
+        # The tool's own parameters are left untouched
+        self.assertEqual(_SearchTool.parameters["properties"]["limit"]["type"], "any")
+
+    def test_anthropic_schema(self):
+        [schema] = self.manager.get_tools_payload([_SearchTool()], model_id="claude37-sonnet").tools
+        self.assertEqual(schema["name"], "search")
+        self.assertEqual(schema["input_schema"]["required"], ["query"])
+
+    def test_changed_tool_gets_a_new_payload(self):
+        tool = _SearchTool()
+        payload = self.manager.get_tools_payload([tool])
+        tool.description = "Search the news"
+        changed = self.manager.get_tools_payload([tool])
+        self.assertIsNot(changed, payload)
+        self.assertEqual(changed.tools[0]["function"]["description"], "Search the news")
+
+    def test_payloads_are_bounded(self):
+        manager = MessageManager("gpt-4o", prompt_cache_size=2)
+        tools = [_SearchTool() for _ in range(3)]
+        first = manager.get_tools_payload(tools[:1])
+        manager.get_tools_payload(tools[1:2])
+        manager.get_tools_payload(tools[2:])
+        self.assertEqual(len(manager._tools_payloads), 2)
+        self.assertIsNot(manager.get_tools_payload(tools[:1]), first)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,309 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+from src.node_update_manager import LatencyHistogram, NodeUpdateManager
+
+
+class _Emitter:
+    """Records emitted payloads; each emit waits `delay` seconds like a slow consumer."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.payloads = []
+
+    async def emit(self, event, payload):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.payloads.append(payload)
+
+
+class _FailingEmitter(_Emitter):
+    """Raises on the first `failures` emits."""
+
+    def __init__(self, failures=1, delay=0.0):
+        super().__init__(delay)
+        self.failures = failures
+
+    async def emit(self, event, payload):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("client disconnected")
+        self.payloads.append(payload)
+
+
+class _RoomBroadcaster:
+
+    def __init__(self):
+        self.rooms = []
+
+    async def broadcast_to_room(self, room, payload):
+        self.rooms.append((room, payload))
+
+
+def _node(task_id):
+    return SimpleNamespace(task_id=task_id)
+
+
+def _status(old, new):
+    return {"old_status": old, "new_status": new}
+
+
+def _manager(strategy="realtime", handler=None, **kwargs):
+    return NodeUpdateManager(
+        execution_strategy=strategy,
+        broadcast_mode="batch",
+        coalescing_window_ms=kwargs.pop("coalescing_window_ms", 10),
+        websocket_handler=handler,
+        **kwargs
+    )
+
+
+class TestCoalescing(unittest.TestCase):
+
+    def test_updates_of_one_node_and_type_are_merged(self):
+        async def run():
+            handler = _Emitter()
+            manager = _manager(handler=handler)
+            await manager.update_node_state(_node("a"), "progress", {"percent": 10, "step": "plan"})
+            await manager.update_node_state(_node("a"), "progress", {"percent": 50})
+            await manager.update_node_state(_node("a"), "status", _status("READY", "RUNNING"))
+            await manager.update_node_state(_node("b"), "progress", {"percent": 5})
+            self.assertEqual(manager.get_stats()["pending_updates"], 3)
+            await manager.flush()
+            return handler, manager
+
+        handler, manager = asyncio.run(run())
+        self.assertEqual(len(handler.payloads), 1)
+        updates = {(update["node_id"], update["update_type"]): update["data"] for update in handler.payloads[0]["updates"]}
+        self.assertEqual(updates[("a", "progress")], {"percent": 50, "step": "plan"})
+        self.assertEqual(updates[("b", "progress")], {"percent": 5})
+        self.assertEqual(len(updates), 3)
+        self.assertEqual(manager.get_stats()["updates_coalesced"], 4)
+
+    def test_merged_status_keeps_the_first_old_status(self):
+        async def run():
+            handler = _Emitter()
+            manager = _manager(handler=handler)
+            await manager.update_node_state(_node("a"), "status", _status("READY", "RUNNING"))
+            await manager.update_node_state(_node("a"), "status", _status("RUNNING", "DONE"))
+            await manager.flush()
+            return handler
+
+        handler = asyncio.run(run())
+        [update] = handler.payloads[0]["updates"]
+        self.assertEqual(update["data"], {"status": "DONE", "old_status": "READY"})
+
+    def test_batch_payload(self):
+        async def run():
+            handler = _Emitter()
+            manager = _manager(handler=handler)
+            for node_id in ("a", "b"):
+                await manager.update_node_state(_node(node_id), "status", _status("READY", "RUNNING"))
+            await manager.flush()
+            return handler
+
+        handler = asyncio.run(run())
+        [payload] = handler.payloads
+        self.assertEqual(payload["type"], "node_update_batch")
+        self.assertEqual(payload["count"], 2)
+        self.assertEqual([update["node_id"] for update in payload["updates"]], ["a", "b"])
+        self.assertEqual(
+            set(payload["updates"][0]),
+            {"node_id", "update_type", "data", "timestamp"},
+        )
+
+    def test_flush_loop_sends_one_batch_per_window(self):
+        async def run():
+            handler = _Emitter()
+            manager = _manager(handler=handler, coalescing_window_ms=20)
+            for percent in range(5):
+                await manager.update_node_state(_node("a"), "progress", {"percent": percent})
+            await manager._flush_task
+            return handler, manager
+
+        handler, manager = asyncio.run(run())
+        self.assertEqual(len(handler.payloads), 1)
+        self.assertEqual(handler.payloads[0]["updates"][0]["data"], {"percent": 4})
+        self.assertEqual(manager.get_stats()["batches_flushed"], 1)
+
+    def test_non_coalesced_update_types_are_sent_right_away(self):
+        async def run():
+            handler = _RoomBroadcaster()
+            manager = NodeUpdateManager("realtime", "full", websocket_handler=handler)
+            await manager.update_node_state(_node("a"), "result", {"value": 1})
+            return handler, manager
+
+        handler, manager = asyncio.run(run())
+        [(room, payload)] = handler.rooms
+        self.assertEqual(room, "default")
+        self.assertEqual(payload["type"], "node_result")
+        self.assertEqual(payload["data"], {"value": 1})
+        self.assertEqual(manager.get_stats()["pending_updates"], 0)
+
+
+class TestBackpressure(unittest.TestCase):
+
+    def test_producer_waits_for_a_flush_once_max_pending_is_reached(self):
+        async def run():
+            handler = _Emitter(delay=0.05)
+            manager = _manager(handler=handler, max_pending_updates=2)
+            await manager.update_node_state(_node("a"), "progress", {"percent": 1})
+            await manager.update_node_state(_node("b"), "progress", {"percent": 1})
+
+            blocked = asyncio.create_task(manager.update_node_state(_node("c"), "progress", {"percent": 1}))
+            await asyncio.sleep(0)
+            self.assertFalse(blocked.done())
+            await blocked
+            # The waiting update only entered the buffer after the flush took the first two
+            self.assertEqual(manager.get_stats()["pending_updates"], 1)
+            await manager._flush_task
+            return handler, manager
+
+        handler, manager = asyncio.run(run())
+        self.assertEqual([payload["count"] for payload in handler.payloads], [2, 1])
+        self.assertEqual(handler.payloads[1]["updates"][0]["node_id"], "c")
+        self.assertEqual(manager.get_stats()["backpressure_waits"], 1)
+
+    def test_waiting_producers_never_fill_the_buffer_past_the_cap(self):
+        async def run():
+            manager = _manager(handler=_Emitter(delay=0.02), max_pending_updates=3)
+            sizes = []
+            original = manager._coalesce_into
+
+            def coalesce_into(buffer, entry):
+                original(buffer, entry)
+                if buffer is manager._pending:
+                    sizes.append(len(buffer))
+
+            manager._coalesce_into = coalesce_into
+            await asyncio.gather(*(
+                manager.update_node_state(_node(f"n{index}"), "status", _status("READY", "RUNNING"))
+                for index in range(10)
+            ))
+            await manager._flush_task
+            return sizes
+
+        self.assertLessEqual(max(asyncio.run(run())), 3)
+
+    def test_failed_send_does_not_stall_later_updates(self):
+        async def run():
+            handler = _FailingEmitter(delay=0.01)
+            manager = _manager(handler=handler, max_pending_updates=3)
+            await asyncio.wait_for(asyncio.gather(*(
+                manager.update_node_state(_node(f"n{index}"), "status", _status("READY", "RUNNING"))
+                for index in range(10)
+            )), timeout=5)
+            await asyncio.wait_for(manager._flush_task, timeout=5)
+
+            await asyncio.wait_for(manager.update_node_state(_node("late"), "status", _status("READY", "DONE")), timeout=5)
+            await asyncio.wait_for(manager._flush_task, timeout=5)
+            return handler, manager
+
+        handler, manager = asyncio.run(run())
+        stats = manager.get_stats()
+        self.assertEqual(stats["send_errors"], 1)
+        self.assertEqual(stats["pending_updates"], 0)
+        # Only the first batch of three was lost
+        sent = [update["node_id"] for payload in handler.payloads for update in payload["updates"]]
+        self.assertEqual(sent, [f"n{index}" for index in range(3, 10)] + ["late"])
+
+    def test_below_max_pending_producers_do_not_wait(self):
+        async def run():
+            manager = _manager(handler=_Emitter(), max_pending_updates=10)
+            for node_id in "abc":
+                await manager.update_node_state(_node(node_id), "progress", {"percent": 1})
+            await manager.flush()
+            return manager
+
+        self.assertEqual(asyncio.run(run()).get_stats()["backpressure_waits"], 0)
+
+
+class TestDeferredUpdates(unittest.TestCase):
+
+    def test_deferred_updates_are_merged_and_broadcast_on_flush(self):
+        async def run():
+            handler = _Emitter()
+            manager = _manager("deferred", handler=handler)
+            await manager.update_node_state(_node("a"), "status", _status("READY", "RUNNING"))
+            await manager.update_node_state(_node("a"), "status", _status("RUNNING", "DONE"))
+            await manager.update_node_state(_node("b"), "result", {"value": 2})
+            self.assertEqual(handler.payloads, [])
+            self.assertEqual(manager.get_stats()["deferred_updates"], 2)
+            await manager.flush_deferred_updates()
+            return handler, manager
+
+        handler, manager = asyncio.run(run())
+        [payload] = handler.payloads
+        self.assertEqual(payload["type"], "node_update_batch")
+        self.assertEqual(payload["count"], 2)
+        self.assertEqual(payload["updates"][0]["data"], {"status": "DONE", "old_status": "READY"})
+        self.assertEqual(payload["updates"][1]["data"], {"value": 2})
+        stats = manager.get_stats()
+        self.assertEqual(stats["updates_deferred"], 3)
+        self.assertEqual(stats["deferred_updates"], 0)
+        self.assertEqual(stats["broadcasts_sent"], 1)
+
+    def test_flush_without_deferred_updates_sends_nothing(self):
+        async def run():
+            handler = _Emitter()
+            manager = _manager("deferred", handler=handler)
+            await manager.flush_deferred_updates()
+            return handler, manager
+
+        handler, manager = asyncio.run(run())
+        self.assertEqual(handler.payloads, [])
+        self.assertEqual(manager.get_stats()["batches_flushed"], 0)
+
+    def test_broadcast_mode_none_sends_nothing(self):
+        async def run():
+            handler = _Emitter()
+            manager = NodeUpdateManager("deferred", "none", websocket_handler=handler)
+            await manager.update_node_state(_node("a"), "progress", {"percent": 1})
+            await manager.flush_deferred_updates()
+            return handler
+
+        self.assertEqual(asyncio.run(run()).payloads, [])
+
+
+class TestLatencyHistogram(unittest.TestCase):
+
+    def test_quantiles_are_bucket_upper_bounds(self):
+        histogram = LatencyHistogram()
+        for value in [0.5] * 90 + [30] * 9 + [7000]:
+            histogram.observe(value)
+        snapshot = histogram.snapshot()
+        self.assertEqual(snapshot["count"], 100)
+        self.assertEqual(snapshot["p50_ms"], 1.0)
+        self.assertEqual(snapshot["p95_ms"], 50.0)
+        self.assertEqual(snapshot["p99_ms"], 50.0)
+        self.assertEqual(snapshot["max_ms"], 7000)
+        self.assertEqual(snapshot["buckets"]["le_1ms"], 90)
+        self.assertEqual(snapshot["buckets"]["le_50ms"], 9)
+        self.assertEqual(snapshot["buckets"]["inf"], 1)
+        self.assertEqual(histogram.quantile(1.0), 7000)
+
+    def test_empty_histogram(self):
+        snapshot = LatencyHistogram().snapshot()
+        self.assertEqual(snapshot["count"], 0)
+        self.assertEqual(snapshot["mean_ms"], 0.0)
+        self.assertEqual(snapshot["p99_ms"], 0.0)
+
+    def test_flushes_record_flush_and_send_latency(self):
+        async def run():
+            manager = _manager(handler=_Emitter(delay=0.01))
+            await manager.update_node_state(_node("a"), "progress", {"percent": 1})
+            await manager._flush_task
+            return manager.get_stats()
+
+        stats = asyncio.run(run())
+        self.assertEqual(stats["flush_latency_ms"]["count"], 1)
+        self.assertEqual(stats["send_latency_ms"]["count"], 1)
+        # The flush waits out the coalescing window before sending
+        self.assertGreaterEqual(stats["flush_latency_ms"]["max_ms"], 10)
+        self.assertGreaterEqual(stats["send_latency_ms"]["max_ms"], 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
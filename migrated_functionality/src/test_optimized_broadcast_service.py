@@ -0,0 +1,259 @@
+import asyncio
+import base64
+import copy
+import gzip
+import unittest
+from unittest import mock
+from src import optimized_broadcast_service
+from src.optimized_broadcast_service import (
+    DIFF_PROTOCOL_PATCH,
+    RESYNC_EVENT,
+    EncodedPayload,
+    OptimizedBroadcastService,
+    apply_patch,
+    compute_patch,
+    decode_json,
+    encode_json,
+)
+
+
+class TestJsonPatch(unittest.TestCase):
+
+    def _round_trip(self, old, new):
+        ops = compute_patch(old, new)
+        self.assertEqual(apply_patch(copy.deepcopy(old), ops), new)
+        return ops
+
+    def test_nested_change_is_one_operation(self):
+        old = {"nodes": {"a": {"status": "idle", "inputs": [1, 2]}}, "edges": []}
+        new = {"nodes": {"a": {"status": "running", "inputs": [1, 2]}}, "edges": []}
+        self.assertEqual(
+            self._round_trip(old, new),
+            [{"op": "replace", "path": "/nodes/a/status", "value": "running"}],
+        )
+
+    def test_added_and_removed_keys_and_items(self):
+        self._round_trip(
+            {"a": 1, "b": [1, 2, 3, 4], "c": {"d": None}},
+            {"a": 1, "b": [1, 5], "e": {"f": [True]}},
+        )
+        self._round_trip([1], [1, {"x": []}, 3])
+
+    def test_keys_needing_escaping(self):
+        self._round_trip({"a/b": 1, "c~d": {"e": 2}}, {"a/b": 2, "c~d": {"e": 3}, "~/": 0})
+
+    def test_root_replacement(self):
+        self._round_trip({"a": 1}, [1, 2])
+        self._round_trip("old", "new")
+
+    def test_no_change(self):
+        self.assertEqual(self._round_trip({"a": [1, {"b": 2}]}, {"a": [1, {"b": 2}]}), [])
+
+
+class _RecordingSocket:
+
+    def __init__(self, rooms=None):
+        self.sent = []
+        self.handlers = {}
+        self.client_rooms = rooms or {}
+
+    async def emit(self, event, data, room=None):
+        self.sent.append((event, data, room))
+
+    def on(self, event, handler):
+        self.handlers[event] = handler
+
+    def rooms(self, sid):
+        return self.client_rooms.get(sid, [sid])
+
+
+class TestStateVersions(unittest.TestCase):
+
+    def _service(self, socket=None, **kwargs):
+        return OptimizedBroadcastService(
+            socket or _RecordingSocket(), enable_compression=False, binary_frames=False, **kwargs
+        )
+
+    def _update(self, service, data, event="node_update", room="r1"):
+        message = {"event": event, "data": data}
+        return asyncio.run(service._create_diff_update(room, event, message))
+
+    def test_evicted_states_drop_their_versions(self):
+        service = self._service(max_tracked_states=1)
+        self.assertEqual(self._update(service, {"v": 1})["version"], 1)
+        self.assertEqual(self._update(service, {"v": 2})["version"], 2)
+        for index in range(10):
+            self._update(service, {"v": 1}, room=f"other{index}")
+        self.assertEqual(len(service._state_versions), 1)
+        message = self._update(service, {"v": 3})
+        self.assertTrue(message["keyframe"])
+        self.assertEqual(message["version"], 1)
+
+    def test_legacy_diff_format_is_the_default(self):
+        service = self._service()
+        state = {"status": "idle", "log": "x" * 200, "removed": 1}
+        self._update(service, state)
+        message = self._update(service, {"status": "running", "log": "x" * 200, "added": 2})
+        self.assertTrue(message["is_diff"])
+        self.assertEqual(message["data"], {"_type": "diff", "~status": "running", "+added": 2, "-removed": None})
+        self.assertNotIn("protocol", message)
+
+    def test_patch_protocol(self):
+        service = self._service(diff_protocol=DIFF_PROTOCOL_PATCH)
+        self._update(service, {"node": {"status": "idle", "log": "x" * 200}})
+        message = self._update(service, {"node": {"status": "running", "log": "x" * 200}})
+        self.assertEqual(message["protocol"], DIFF_PROTOCOL_PATCH)
+        self.assertEqual(
+            message["data"],
+            {"_type": "patch", "ops": [{"op": "replace", "path": "/node/status", "value": "running"}]},
+        )
+
+    def test_unknown_diff_protocol_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self._service(diff_protocol=3)
+
+    def test_legacy_immediate_state_updates_send_the_bare_data(self):
+        service = self._service()
+        state = {"status": "idle", "log": "x" * 200}
+
+        async def run():
+            await service.emit("node_update", state, room="r1", force_immediate=True)
+            await service.emit("node_update", {**state, "status": "done"}, room="r1")
+            await service.flush_all()
+
+        asyncio.run(run())
+        sent = service.socketio.sent
+        self.assertEqual(sent[0], ("node_update", state, "r1"))
+        [message] = sent[1][1]["messages"]
+        self.assertEqual(message["data"], {"_type": "diff", "~status": "done"})
+        self.assertEqual(message["base_version"], 1)
+
+    def test_immediate_state_updates_are_versioned(self):
+        service = self._service(diff_protocol=DIFF_PROTOCOL_PATCH)
+
+        async def run():
+            await service.emit("node_update", {"v": 1}, room="r1", force_immediate=True)
+            await service.emit("node_update", {"v": 1}, room="r1", force_immediate=True)
+            await service.emit("node_update", {"v": 2}, room="r1")
+            await service.flush_all()
+
+        asyncio.run(run())
+        sent = service.socketio.sent
+        self.assertEqual(len(sent), 2)
+        event, frame, room = sent[0]
+        self.assertEqual((event, room), ("node_update", "r1"))
+        self.assertEqual(frame["version"], 1)
+        self.assertEqual(sent[1][1]["messages"][0]["version"], 2)
+        self.assertEqual(service.get_stats()["skipped_updates"], 1)
+
+    def test_resync_request_sends_the_room_states(self):
+        socket = _RecordingSocket(rooms={"sid1": ["sid1", "r1"]})
+        service = self._service(socket)
+        self._update(service, {"v": 1})
+        handler = socket.handlers[RESYNC_EVENT]
+
+        asyncio.run(handler("sid1", {"room": "r1"}))
+        [(event, payload, room)] = socket.sent
+        self.assertEqual((event, room), ("state_resync", "sid1"))
+        self.assertEqual(payload["states"]["node_update"]["data"], {"v": 1})
+        self.assertEqual(payload["states"]["node_update"]["version"], 1)
+
+        # Clients cannot read rooms they did not join
+        asyncio.run(handler("sid2", {"room": "r1"}))
+        self.assertEqual(len(socket.sent), 1)
+        self.assertEqual(service.get_stats()["resyncs"], 1)
+
+
+class TestEncodedFrames(unittest.TestCase):
+
+    COMPRESSIBLE = {"nodes": [{"id": index, "status": "running", "log": "step done " * 20} for index in range(20)]}
+    # Gzip adds more than it saves on a payload this small
+    INCOMPRESSIBLE = {"id": 1}
+
+    def _service(self, **kwargs):
+        return OptimizedBroadcastService(_RecordingSocket(), enable_diff_updates=False, **kwargs)
+
+    def _emit_to_rooms(self, service, data, rooms=("r1",)):
+        asyncio.run(service.emit_to_rooms("graph_update", data, rooms))
+        return [frame for _, frame, _ in service.socketio.sent]
+
+    def test_binary_frames_hold_the_json_bytes(self):
+        service = self._service(binary_frames=True)
+        [frame] = self._emit_to_rooms(service, self.INCOMPRESSIBLE)
+        self.assertIsInstance(frame, bytes)
+        self.assertEqual(frame, encode_json(self.INCOMPRESSIBLE))
+        self.assertEqual(service.get_stats()["bytes_sent"], len(frame))
+
+    def test_compressed_binary_frames_are_gzipped_json(self):
+        service = self._service(binary_frames=True)
+        [frame] = self._emit_to_rooms(service, self.COMPRESSIBLE)
+        self.assertEqual(frame[:2], b"\x1f\x8b")
+        self.assertEqual(decode_json(gzip.decompress(frame)), self.COMPRESSIBLE)
+        self.assertLess(len(frame), len(encode_json(self.COMPRESSIBLE)) * 0.8)
+
+    def test_compressed_json_frames_carry_base64_data(self):
+        service = self._service()
+        [frame] = self._emit_to_rooms(service, self.COMPRESSIBLE)
+        self.assertTrue(frame["_compressed"])
+        self.assertEqual(frame["original_size"], len(encode_json(self.COMPRESSIBLE)))
+        self.assertEqual(decode_json(gzip.decompress(base64.b64decode(frame["data"]))), self.COMPRESSIBLE)
+
+    def test_payloads_are_compressed_only_when_it_saves_a_fifth(self):
+        service = self._service()
+        [frame] = self._emit_to_rooms(service, self.INCOMPRESSIBLE)
+        self.assertEqual(frame, self.INCOMPRESSIBLE)
+        self.assertEqual(service.get_stats()["compression_ratio"], 0.0)
+
+        payload = EncodedPayload(self.INCOMPRESSIBLE)
+        self.assertFalse(asyncio.run(service._compress_payload(payload)))
+        payload = EncodedPayload(self.COMPRESSIBLE)
+        self.assertTrue(asyncio.run(service._compress_payload(payload)))
+        self.assertEqual(service.get_stats()["compression_ratio"], len(payload.compressed()) / payload.size)
+
+        # Without compression the frame is the data itself
+        service = self._service(enable_compression=False)
+        [frame] = self._emit_to_rooms(service, self.COMPRESSIBLE)
+        self.assertIs(frame, self.COMPRESSIBLE)
+
+    def test_one_frame_is_encoded_for_all_rooms(self):
+        for binary_frames in (False, True):
+            service = self._service(binary_frames=binary_frames)
+            with mock.patch.object(optimized_broadcast_service, "encode_json", wraps=encode_json) as encode, \
+                    mock.patch.object(optimized_broadcast_service.gzip, "compress", wraps=gzip.compress) as compress:
+                frames = self._emit_to_rooms(service, self.COMPRESSIBLE, rooms=("r1", "r2", "r3"))
+            self.assertEqual(encode.call_count, 1)
+            self.assertEqual(compress.call_count, 1)
+            self.assertEqual([room for _, _, room in service.socketio.sent], ["r1", "r2", "r3"])
+            for frame in frames[1:]:
+                self.assertIs(frame, frames[0])
+            stats = service.get_stats()
+            self.assertEqual(stats["messages_sent"], 3)
+            size = len(frames[0]) if binary_frames else len(frames[0]["data"])
+            self.assertEqual(stats["bytes_sent"], 3 * size)
+
+    def test_frames_are_built_once_per_form(self):
+        service = self._service()
+        payload = EncodedPayload(self.COMPRESSIBLE)
+        self.assertIs(service._build_frame(payload, True), service._build_frame(payload, True))
+        self.assertIsNot(service._build_frame(payload, True), service._build_frame(payload, False))
+        service.binary_frames = True
+        self.assertEqual(service._build_frame(payload, True)[0], payload.compressed())
+        self.assertIs(payload.compressed(), payload.compressed())
+
+    def test_batches_use_binary_frames(self):
+        service = self._service(binary_frames=True, enable_compression=False)
+
+        async def run():
+            await service.emit("log", {"line": 1}, room="r1")
+            await service.emit("log", {"line": 2}, room="r1")
+            await service.flush_all()
+
+        asyncio.run(run())
+        [(event, frame, room)] = service.socketio.sent
+        self.assertEqual((event, room), ("batch_update", "r1"))
+        batch = decode_json(frame)
+        self.assertEqual([message["data"] for message in batch["messages"]], [{"line": 1}, {"line": 2}])
+
+
+if __name__ == "__main__":
+    unittest.main()
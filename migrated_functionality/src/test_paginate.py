@@ -0,0 +1,254 @@
+import asyncio
+import threading
+import unittest
+import jmespath
+from src.paginate import Paginator, _compile_expression, _iter_search_results
+
+PAGINATION_CONFIG = {
+    'input_token': 'NextToken',
+    'output_token': 'NextToken',
+    'result_key': 'Items',
+}
+
+
+class _Pages:
+    """Answers list calls with `page_size` items per page, recording the requests."""
+
+    def __init__(self, items=10, page_size=3):
+        if isinstance(items, int):
+            items = [f'item-{index}' for index in range(items)]
+        self.items = items
+        self.page_size = page_size
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def __call__(self, **kwargs):
+        with self._lock:
+            self.requests.append(dict(kwargs))
+        start = int(kwargs.get('NextToken', 0))
+        end = start + self.page_size
+        page = {'Items': self.items[start:end], 'Owner': 'me'}
+        if end < len(self.items):
+            page['NextToken'] = str(end)
+        return page
+
+
+def _paginate(method, **pagination_config):
+    return Paginator(method, PAGINATION_CONFIG, None).paginate(PaginationConfig=pagination_config)
+
+
+def _paginate_async(method, **pagination_config):
+    return Paginator(method, PAGINATION_CONFIG, None).paginate_async(PaginationConfig=pagination_config)
+
+
+async def _collect(page_iterator):
+    return [page async for page in page_iterator]
+
+
+class TestReadAhead(unittest.TestCase):
+    """Pages read ahead are the pages read one at a time."""
+
+    CONFIGS = [
+        {},
+        {'MaxItems': 4},
+        {'MaxItems': 6},
+        {'MaxItems': 100},
+    ]
+
+    def _assert_same_pages(self, config):
+        expected_iterator = _paginate(_Pages(), **config)
+        expected = list(expected_iterator)
+        for read_ahead in (1, 3):
+            page_iterator = _paginate(_Pages(), ReadAhead=read_ahead, **config)
+            self.assertEqual(list(page_iterator), expected)
+            self.assertEqual(page_iterator.resume_token, expected_iterator.resume_token)
+
+            async_iterator = _paginate_async(_Pages(), ReadAhead=read_ahead, **config)
+            self.assertEqual(asyncio.run(_collect(async_iterator)), expected)
+            self.assertEqual(async_iterator.resume_token, expected_iterator.resume_token)
+        return expected, expected_iterator.resume_token
+
+    def test_max_items_and_resume_token(self):
+        for config in self.CONFIGS:
+            with self.subTest(config=config):
+                self._assert_same_pages(config)
+
+        pages, resume_token = self._assert_same_pages({'MaxItems': 4})
+        self.assertEqual([item for page in pages for item in page['Items']], [f'item-{index}' for index in range(4)])
+        self.assertIsNotNone(resume_token)
+        # On a page boundary
+        _, resume_token = self._assert_same_pages({'MaxItems': 6})
+        self.assertIsNotNone(resume_token)
+        _, resume_token = self._assert_same_pages({})
+        self.assertIsNone(resume_token)
+
+    def test_starting_token_resumes_where_max_items_stopped(self):
+        first = _paginate(_Pages(), MaxItems=4)
+        list(first)
+        for config in ({'MaxItems': 4}, {}):
+            pages, _ = self._assert_same_pages({'StartingToken': first.resume_token, **config})
+            self.assertEqual(pages[0]['Items'], ['item-4', 'item-5'])
+
+    def test_build_full_result(self):
+        expected = _paginate(_Pages(), MaxItems=5).build_full_result()
+        self.assertEqual(expected['Items'], [f'item-{index}' for index in range(5)])
+        self.assertIn('NextToken', expected)
+        for read_ahead in (0, 2):
+            result = _paginate(_Pages(), MaxItems=5, ReadAhead=read_ahead).build_full_result()
+            self.assertEqual(result, expected)
+            result = asyncio.run(_paginate_async(_Pages(), MaxItems=5, ReadAhead=read_ahead).build_full_result())
+            self.assertEqual(result, expected)
+
+    def test_requests_stop_at_max_items(self):
+        pages = _Pages()
+        list(_paginate(pages, MaxItems=4, ReadAhead=5))
+        self.assertEqual([request.get('NextToken') for request in pages.requests], [None, '3'])
+
+    def test_errors_reach_the_consumer_in_order(self):
+        pages = _Pages()
+
+        def method(**kwargs):
+            if kwargs.get('NextToken') == '6':
+                raise RuntimeError('throttled')
+            return pages(**kwargs)
+
+        received = []
+        with self.assertRaisesRegex(RuntimeError, 'throttled'):
+            for page in _paginate(method, ReadAhead=3):
+                received.append(page)
+        self.assertEqual(len(received), 2)
+
+        received = []
+
+        async def run():
+            async for page in _paginate_async(method, ReadAhead=3):
+                received.append(page)
+
+        with self.assertRaisesRegex(RuntimeError, 'throttled'):
+            asyncio.run(run())
+        self.assertEqual(len(received), 2)
+
+    def test_coroutine_methods_are_awaited(self):
+        pages = _Pages()
+
+        async def method(**kwargs):
+            return pages(**kwargs)
+
+        result = asyncio.run(_collect(_paginate_async(method, ReadAhead=2)))
+        self.assertEqual(result, list(_paginate(_Pages())))
+
+    def test_closing_the_iterator_waits_for_the_cancelled_prefetch(self):
+        pages = _Pages()
+        started = []
+        cancelled = []
+
+        async def method(**kwargs):
+            if kwargs.get('NextToken'):
+                started.append(kwargs['NextToken'])
+                try:
+                    await asyncio.Event().wait()
+                except asyncio.CancelledError:
+                    await asyncio.sleep(0)
+                    cancelled.append(kwargs['NextToken'])
+                    raise
+            return pages(**kwargs)
+
+        async def run():
+            page_iterator = _paginate_async(method, ReadAhead=2).__aiter__()
+            await page_iterator.__anext__()
+            while not started:
+                await asyncio.sleep(0)
+            await page_iterator.aclose()
+            # The prefetch has finished cancelling once the iterator is closed
+            self.assertEqual(cancelled, ['3'])
+
+        asyncio.run(run())
+
+
+def _object(index):
+    item = {'Key': f'key-{index}', 'Size': index % 3, 'Tags': [{'Value': f'tag-{index}'}] * (index % 2)}
+    if index % 4 == 0:
+        item['Owner'] = {'Name': '' if index % 8 else f'owner-{index}'}
+    return item
+
+
+OBJECTS = [_object(index) for index in range(10)] + [None, 'not an object', [1, 2]]
+
+
+class TestSearch(unittest.TestCase):
+    """Streamed search results are those of jmespath.search on each page."""
+
+    EXPRESSIONS = [
+        'Items[*]',
+        'Items[*].Key',
+        'Items[*].Size',
+        'Items[*].Owner.Name',
+        'Items[*].Tags[*].Value',
+        'Items[*].[Key, Size]',
+        'Items[*].{k: Key}',
+        'Items[?Size > `0`].Key',
+        'Items[?Size]',
+        'Items[?Owner.Name]',
+        'Items[?Size == `0`].Tags',
+        'Items[?!Tags].Key',
+        'Items[].Key',
+        'Items[*] | [0]',
+        'length(Items)',
+        'Owner',
+        'Owner[*].Name',
+        'Missing[*].Key',
+        'Items[0:2].Key',
+        '*.Key',
+    ]
+
+    def _expected(self, expression, pages):
+        results = []
+        for page in pages:
+            result = jmespath.search(expression, page)
+            if isinstance(result, list):
+                results.extend(result)
+            else:
+                results.append(result)
+        return results
+
+    def test_streamed_results_match_jmespath(self):
+        pages = list(_paginate(_Pages(OBJECTS, page_size=4)))
+        for expression in self.EXPRESSIONS:
+            with self.subTest(expression=expression):
+                compiled = _compile_expression(expression)
+                streamed = [result for page in pages for result in _iter_search_results(compiled, page)]
+                self.assertEqual(streamed, self._expected(expression, pages))
+
+    def test_paginator_search(self):
+        pages = list(_paginate(_Pages(OBJECTS, page_size=4)))
+        for expression in ('Items[?Size > `0`].Key', 'Items[*].Tags[*].Value', 'Owner'):
+            with self.subTest(expression=expression):
+                expected = self._expected(expression, pages)
+                self.assertEqual(list(_paginate(_Pages(OBJECTS, page_size=4)).search(expression)), expected)
+                self.assertEqual(
+                    list(_paginate(_Pages(OBJECTS, page_size=4), ReadAhead=2).search(expression)), expected
+                )
+
+                async def run():
+                    page_iterator = _paginate_async(_Pages(OBJECTS, page_size=4), ReadAhead=2)
+                    return [result async for result in page_iterator.search(expression)]
+
+                self.assertEqual(asyncio.run(run()), expected)
+
+    def test_results_are_yielded_as_found(self):
+        def items():
+            yield {'Key': 'first'}
+            raise AssertionError('read past the first result')
+
+        class _LazyList(list):
+            # A list whose elements are only produced when iterated
+            def __iter__(self):
+                return items()
+
+        compiled = _compile_expression('Items[*].Key')
+        results = _iter_search_results(compiled, {'Items': _LazyList([None])})
+        self.assertEqual(next(results), 'first')
+
+
+if __name__ == "__main__":
+    unittest.main()
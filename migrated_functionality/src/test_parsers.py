@@ -0,0 +1,199 @@
+import unittest
+from unittest import mock
+import botocore.session
+from botocore.model import ServiceModel
+from src.parsers import PROTOCOL_PARSERS, BaseXMLResponseParser, ResponseParserFactory
+
+S3_NAMESPACE = 'http://s3.amazonaws.com/doc/2006-03-01/'
+IAM_NAMESPACE = 'https://iam.amazonaws.com/doc/2010-05-08/'
+EC2_NAMESPACE = 'http://ec2.amazonaws.com/doc/2016-11-15/'
+
+_service_models = {}
+
+
+def _service_model(service_name):
+    if service_name not in _service_models:
+        loader = botocore.session.get_session().get_component('data_loader')
+        _service_models[service_name] = ServiceModel(
+            loader.load_service_model(service_name, 'service-2'), service_name
+        )
+    return _service_models[service_name]
+
+
+def _walking_parser(protocol):
+    class WalkingParser(PROTOCOL_PARSERS[protocol]):
+        @classmethod
+        def _supports_compiled_shapes(cls):
+            return False
+
+    return WalkingParser()
+
+
+def _response(body, status_code=200, headers=None):
+    return {
+        'body': body.encode('utf-8'),
+        'headers': headers or {'x-amzn-requestid': 'request-id'},
+        'status_code': status_code,
+        'context': {},
+    }
+
+
+def _s3_list_objects(items):
+    contents = ''.join(
+        f'<Contents><Key>photos/{i:04d}.jpg</Key>'
+        f'<LastModified>2024-01-02T03:04:05.000Z</LastModified>'
+        f'<ETag>&quot;{i:032x}&quot;</ETag><Size>{i * 37}</Size>'
+        f'<StorageClass>STANDARD</StorageClass>'
+        f'<Owner><ID>owner-{i}</ID><DisplayName>owner</DisplayName></Owner></Contents>'
+        for i in range(items)
+    )
+    return (
+        f'<?xml version="1.0" encoding="UTF-8"?>'
+        f'<ListBucketResult xmlns="{S3_NAMESPACE}"><Name>bucket</Name><Prefix>photos/</Prefix>'
+        f'<KeyCount>{items}</KeyCount><MaxKeys>1000</MaxKeys><IsTruncated>true</IsTruncated>'
+        f'{contents}<CommonPrefixes><Prefix>photos/a/</Prefix></CommonPrefixes>'
+        f'<CommonPrefixes><Prefix>photos/b/</Prefix></CommonPrefixes>'
+        f'<NextContinuationToken>token</NextContinuationToken></ListBucketResult>'
+    )
+
+
+def _iam_list_roles(items):
+    roles = ''.join(
+        f'<member><Path>/</Path><RoleName>role-{i}</RoleName><RoleId>AROA{i:016d}</RoleId>'
+        f'<Arn>arn:aws:iam::123456789012:role/role-{i}</Arn>'
+        f'<CreateDate>2024-01-02T03:04:05Z</CreateDate><MaxSessionDuration>3600</MaxSessionDuration>'
+        f'<Tags><member><Key>team</Key><Value>t{i}</Value></member></Tags></member>'
+        for i in range(items)
+    )
+    return (
+        f'<ListRolesResponse xmlns="{IAM_NAMESPACE}"><ListRolesResult>'
+        f'<IsTruncated>false</IsTruncated><Roles>{roles}</Roles></ListRolesResult>'
+        f'<ResponseMetadata><RequestId>request-id</RequestId></ResponseMetadata>'
+        f'</ListRolesResponse>'
+    )
+
+
+def _ec2_describe_instances(items):
+    instances = ''.join(
+        f'<item><instanceId>i-{i:017x}</instanceId><instanceType>t3.micro</instanceType>'
+        f'<instanceState><code>16</code><name>running</name></instanceState>'
+        f'<tagSet><item><key>Name</key><value>instance-{i}</value></item></tagSet></item>'
+        for i in range(items)
+    )
+    return (
+        f'<DescribeInstancesResponse xmlns="{EC2_NAMESPACE}"><requestId>request-id</requestId>'
+        f'<reservationSet><item><reservationId>r-1</reservationId><ownerId>123456789012</ownerId>'
+        f'<instancesSet>{instances}</instancesSet></item></reservationSet>'
+        f'</DescribeInstancesResponse>'
+    )
+
+
+class TestIncrementalXMLParsing(unittest.TestCase):
+    """The compiled and incremental XML parsers give the results of the shape walker."""
+
+    def _assert_parsers_agree(self, service_name, shape, response):
+        protocol = _service_model(service_name).metadata['protocol']
+        expected = _walking_parser(protocol).parse(response, shape)
+        compiled = PROTOCOL_PARSERS[protocol]().parse(response, shape)
+        incremental_parser = PROTOCOL_PARSERS[protocol](incremental_parse_threshold=0)
+        with mock.patch.object(
+            incremental_parser,
+            '_parse_xml_string_incrementally',
+            wraps=incremental_parser._parse_xml_string_incrementally,
+        ) as parse_incrementally:
+            incremental = incremental_parser.parse(response, shape)
+        self.assertEqual(compiled, expected)
+        self.assertEqual(incremental, expected)
+        return expected, parse_incrementally.called
+
+    def _output_shape(self, service_name, operation_name):
+        return _service_model(service_name).operation_model(operation_name).output_shape
+
+    def test_rest_xml_flattened_lists(self):
+        shape = self._output_shape('s3', 'ListObjectsV2')
+        parsed, incremental = self._assert_parsers_agree('s3', shape, _response(_s3_list_objects(20)))
+        self.assertTrue(incremental)
+        self.assertEqual(len(parsed['Contents']), 20)
+        self.assertEqual(parsed['Contents'][3]['Owner']['ID'], 'owner-3')
+        self.assertEqual([prefix['Prefix'] for prefix in parsed['CommonPrefixes']], ['photos/a/', 'photos/b/'])
+
+    def test_query_result_wrapper_and_nested_lists(self):
+        shape = self._output_shape('iam', 'ListRoles')
+        parsed, incremental = self._assert_parsers_agree('iam', shape, _response(_iam_list_roles(20)))
+        self.assertTrue(incremental)
+        self.assertEqual(parsed['Roles'][5]['Tags'], [{'Key': 'team', 'Value': 't5'}])
+        self.assertEqual(parsed['ResponseMetadata']['RequestId'], 'request-id')
+
+    def test_ec2_lists_of_lists(self):
+        shape = self._output_shape('ec2', 'DescribeInstances')
+        parsed, incremental = self._assert_parsers_agree('ec2', shape, _response(_ec2_describe_instances(10)))
+        self.assertTrue(incremental)
+        instances = parsed['Reservations'][0]['Instances']
+        self.assertEqual(len(instances), 10)
+        self.assertEqual(instances[2]['Tags'], [{'Key': 'Name', 'Value': 'instance-2'}])
+
+    def test_empty_lists(self):
+        shape = self._output_shape('s3', 'ListObjectsV2')
+        parsed, _ = self._assert_parsers_agree('s3', shape, _response(_s3_list_objects(0)))
+        self.assertNotIn('Contents', parsed)
+        shape = self._output_shape('iam', 'ListRoles')
+        parsed, _ = self._assert_parsers_agree('iam', shape, _response(_iam_list_roles(0)))
+        self.assertEqual(parsed['Roles'], [])
+
+    def test_rest_xml_error_response(self):
+        body = (
+            '<?xml version="1.0" encoding="UTF-8"?><Error><Code>NoSuchKey</Code>'
+            '<Message>The specified key does not exist.</Message><Key>photos/0001.jpg</Key>'
+            '<RequestId>request-id</RequestId><HostId>host-id</HostId></Error>'
+        )
+        response = _response(body, 404, {'x-amz-request-id': 'request-id', 'x-amz-id-2': 'host-id'})
+        parsed, _ = self._assert_parsers_agree('s3', self._output_shape('s3', 'GetObject'), response)
+        self.assertEqual(parsed['Error']['Code'], 'NoSuchKey')
+        self.assertEqual(parsed['ResponseMetadata']['HostId'], 'host-id')
+
+    def test_query_error_responses(self):
+        body = (
+            f'<ErrorResponse xmlns="{IAM_NAMESPACE}"><Error><Type>Sender</Type>'
+            f'<Code>NoSuchEntity</Code><Message>The role cannot be found.</Message></Error>'
+            f'<RequestId>request-id</RequestId></ErrorResponse>'
+        )
+        parsed, _ = self._assert_parsers_agree('iam', self._output_shape('iam', 'GetRole'), _response(body, 404))
+        self.assertEqual(parsed['Error']['Code'], 'NoSuchEntity')
+
+        # Modeled errors are parsed with the shape of the error
+        error_shape = _service_model('iam').shape_for('NoSuchEntityException')
+        self._assert_parsers_agree('iam', error_shape, _response(body, 404))
+
+    def test_smaller_bodies_build_the_whole_tree(self):
+        body = _iam_list_roles(3)
+        parser = PROTOCOL_PARSERS['query'](incremental_parse_threshold=len(body) + 1)
+        with mock.patch.object(parser, '_parse_xml_string_incrementally') as parse_incrementally:
+            parsed = parser.parse(_response(body), self._output_shape('iam', 'ListRoles'))
+        parse_incrementally.assert_not_called()
+        self.assertEqual(len(parsed['Roles']), 3)
+
+
+class TestIncrementalParseThreshold(unittest.TestCase):
+
+    def test_defaults_to_the_class_attribute(self):
+        self.assertIsNone(PROTOCOL_PARSERS['rest-xml']()._incremental_parse_threshold)
+        self.assertEqual(PROTOCOL_PARSERS['rest-xml'](incremental_parse_threshold=0)._incremental_parse_threshold, 0)
+
+        class EagerParser(PROTOCOL_PARSERS['query']):
+            INCREMENTAL_PARSE_THRESHOLD = 1024
+
+        self.assertEqual(EagerParser()._incremental_parse_threshold, 1024)
+
+    def test_factory_default_applies_to_xml_protocols_only(self):
+        factory = ResponseParserFactory()
+        factory.set_parser_defaults(incremental_parse_threshold=4096)
+        for protocol in PROTOCOL_PARSERS:
+            parser = factory.create_parser(protocol)
+            if isinstance(parser, BaseXMLResponseParser):
+                self.assertEqual(parser._incremental_parse_threshold, 4096)
+            else:
+                self.assertFalse(hasattr(parser, '_incremental_parse_threshold'))
+
+
+if __name__ == "__main__":
+    unittest.main()
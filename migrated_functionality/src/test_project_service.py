@@ -0,0 +1,322 @@
+import json
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from src.project_service import ProjectPersistenceWorker, ProjectService, TaskStatus
+from src.project_snapshot import ProjectSnapshotCodec
+
+
+class _RecordingSave:
+
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, project_id, data):
+        with self.lock:
+            self.calls.append((project_id, data))
+
+
+class TestProjectPersistenceWorker(unittest.TestCase):
+
+    def test_rapid_saves_are_coalesced_into_one_write_of_the_latest_state(self):
+        save = _RecordingSave()
+        worker = ProjectPersistenceWorker(save, debounce_seconds=0.05, max_delay_seconds=5)
+        for version in range(10):
+            worker.submit("p1", {"version": version})
+        self.assertTrue(worker.flush(timeout=5))
+        worker.shutdown()
+
+        self.assertEqual(save.calls, [("p1", {"version": 9})])
+        self.assertEqual(worker.stats["coalesced"], 9)
+        self.assertEqual(worker.stats["written"], 1)
+
+    def test_projects_are_written_separately(self):
+        save = _RecordingSave()
+        worker = ProjectPersistenceWorker(save, debounce_seconds=0.01)
+        worker.submit("p1", {"version": 1})
+        worker.submit("p2", {"version": 1})
+        worker.flush(timeout=5)
+        worker.shutdown()
+        self.assertEqual(sorted(project_id for project_id, _ in save.calls), ["p1", "p2"])
+
+    def test_shutdown_writes_pending_snapshots(self):
+        save = _RecordingSave()
+        worker = ProjectPersistenceWorker(save, debounce_seconds=60, max_delay_seconds=60)
+        worker.submit("p1", {"version": 1})
+        worker.submit("p1", {"version": 2})
+        worker.shutdown(timeout=5)
+        self.assertEqual(save.calls, [("p1", {"version": 2})])
+
+        # After shutdown a submitted snapshot is written right away
+        worker.submit("p1", {"version": 3})
+        self.assertEqual(save.calls[-1], ("p1", {"version": 3}))
+
+    def test_failed_write_is_counted(self):
+        def fail(project_id, data):
+            raise OSError("disk full")
+
+        worker = ProjectPersistenceWorker(fail, debounce_seconds=0.01)
+        worker.submit("p1", {})
+        worker.flush(timeout=5)
+        worker.shutdown()
+        self.assertEqual(worker.stats["failed"], 1)
+
+
+class _ProjectManager:
+
+    def __init__(self):
+        self.saved_states = []
+
+    def save_project_state(self, project_id, data):
+        self.saved_states.append((project_id, data))
+
+    def load_project_state(self, project_id):
+        return None
+
+    def get_project(self, project_id):
+        return None
+
+
+def _project_service(results_dir):
+    """A ProjectService with only its persistence state set up."""
+    service = ProjectService.__new__(ProjectService)
+    service.project_manager = _ProjectManager()
+    service.results_dir = Path(results_dir)
+    service.results_compact_every = 50
+    service._results_baselines = {}
+    service._results_delta_counts = {}
+    service._results_seqs = {}
+    service._results_locks = {}
+    service._results_locks_guard = threading.Lock()
+    service._state_fingerprints = {}
+    service.snapshot_codec = ProjectSnapshotCodec([TaskStatus])
+    service._unloaded_subgraphs = {}
+    return service
+
+
+def _state(**nodes):
+    return {
+        "all_nodes": {node_id: {"task_id": node_id, "status": status} for node_id, status in nodes.items()},
+        "graphs": {"root": {"nodes": list(nodes), "edges": []}},
+        "overall_project_goal": "goal",
+        "root_graph_id": "root",
+    }
+
+
+class TestProjectServicePersistence(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.results_dir = Path(self._tmp.name)
+        self.service = _project_service(self.results_dir)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_unchanged_state_is_not_saved_again(self):
+        self.service.save_project_state("p1", _state(a="READY"))
+        self.service.save_project_state("p1", _state(a="READY"))
+        self.assertEqual(len(self.service.project_manager.saved_states), 1)
+
+        self.service.save_project_state("p1", _state(a="DONE"))
+        self.assertEqual(len(self.service.project_manager.saved_states), 2)
+
+    def test_changed_state_removes_the_stale_graph_snapshot(self):
+        snapshot = self.service._snapshot_file("p1")
+        snapshot.write_bytes(b"stale")
+        self.service.save_project_state("p1", _state(a="READY"))
+        self.assertFalse(snapshot.exists())
+
+    def test_deltas_replay_into_the_latest_nodes(self):
+        self.service._save_results_snapshot("p1", _state(a="READY", b="READY"))
+        self.service._save_results_snapshot("p1", _state(a="DONE", b="READY", c="RUNNING"))
+        latest = _state(a="DONE", c="DONE")
+        self.service._save_results_snapshot("p1", latest)
+
+        self.assertTrue(self.service._results_delta_file("p1").exists())
+        results = self.service.load_project_results("p1")
+        self.assertEqual(results["basic_state"]["all_nodes"], latest["all_nodes"])
+        self.assertEqual(results["metadata"]["completion_status"], "completed")
+
+    def test_results_are_numbered_per_project(self):
+        for status in ("READY", "RUNNING", "DONE"):
+            self.service._save_results_snapshot("p1", _state(a=status))
+        self.service._save_results_snapshot("p2", _state(a="READY"))
+
+        package = json.loads((self.results_dir / "p1_results.json").read_text())
+        self.assertEqual(package["save_metadata"]["delta_seq"], 1)
+        with open(self.service._results_delta_file("p1")) as f:
+            self.assertEqual([json.loads(line)["seq"] for line in f], [2, 3])
+        package = json.loads((self.results_dir / "p2_results.json").read_text())
+        self.assertEqual(package["save_metadata"]["delta_seq"], 1)
+
+    def test_numbering_resumes_after_the_delta_log_of_an_earlier_run(self):
+        for status in ("READY", "RUNNING", "DONE"):
+            self.service._save_results_snapshot("p1", _state(a=status))
+
+        # A full package saved by the next run replaces the deltas of this one
+        restarted = _project_service(self.results_dir)
+        restarted.save_project_results("p1", {"basic_state": _state(a="FAILED")})
+        package = json.loads((self.results_dir / "p1_results.json").read_text())
+        self.assertEqual(package["save_metadata"]["delta_seq"], 4)
+        self.assertEqual(
+            restarted.load_project_results("p1")["basic_state"]["all_nodes"]["a"]["status"], "FAILED"
+        )
+
+    def test_full_package_is_rewritten_after_compact_every_deltas(self):
+        self.service.results_compact_every = 1
+        self.service._save_results_snapshot("p1", _state(a="READY"))
+        self.service._save_results_snapshot("p1", _state(a="RUNNING"))
+        self.assertTrue(self.service._results_delta_file("p1").exists())
+
+        self.service._save_results_snapshot("p1", _state(a="DONE"))
+        self.assertFalse(self.service._results_delta_file("p1").exists())
+        results = self.service.load_project_results("p1")
+        self.assertEqual(results["basic_state"]["all_nodes"]["a"]["status"], "DONE")
+
+    def test_results_are_replaced_atomically(self):
+        self.service.save_project_results("p1", {"basic_state": _state(a="READY")})
+        self.service.save_project_results("p1", {"basic_state": _state(a="DONE")})
+        self.assertEqual([path.name for path in self.results_dir.iterdir()], ["p1_results.json"])
+        self.assertEqual(
+            self.service.load_project_results("p1")["basic_state"]["all_nodes"]["a"]["status"], "DONE"
+        )
+
+    def test_worker_writes_the_graph_snapshot_of_the_saved_state(self):
+        self.service._persist_project_snapshot("p1", _state(a="READY"))
+        self.assertTrue(self.service._snapshot_file("p1").exists())
+
+        # A newer state saved directly makes the snapshot stale until the worker writes it again
+        self.service.save_project_state("p1", _state(a="DONE"))
+        self.assertFalse(self.service._snapshot_file("p1").exists())
+        self.service._persist_project_snapshot("p1", _state(a="DONE"))
+        self.assertTrue(self.service._snapshot_file("p1").exists())
+
+    def test_worker_writes_state_and_results_once(self):
+        worker = ProjectPersistenceWorker(self.service._persist_project_snapshot, debounce_seconds=0.05)
+        for status in ("READY", "RUNNING", "DONE"):
+            worker.submit("p1", _state(a=status))
+        worker.shutdown(timeout=5)
+
+        self.assertEqual(len(self.service.project_manager.saved_states), 1)
+        self.assertEqual(
+            self.service.load_project_results("p1")["basic_state"]["all_nodes"]["a"]["status"], "DONE"
+        )
+
+
+class _TaskGraph:
+
+    def __init__(self):
+        self.nodes = {}
+        self.graphs = {}
+        self.root_graph_id = None
+        self.overall_project_goal = None
+
+    def to_visualization_dict(self):
+        return {
+            "all_nodes": {node_id: {"task_id": node_id, "status": node.status.value} for node_id, node in self.nodes.items()},
+            "graphs": {graph_id: {"nodes": list(graph.nodes), "edges": list(graph.edges)} for graph_id, graph in self.graphs.items()},
+            "overall_project_goal": self.overall_project_goal,
+            "root_graph_id": self.root_graph_id,
+        }
+
+
+class TestProjectServiceSnapshotLoading(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.service = _project_service(self._tmp.name)
+        self.service.project_graphs = {}
+        self.service.current_display_project_id = None
+        self.service.persistence_worker = SimpleNamespace(submit=self.service.project_manager.save_project_state)
+
+        def get_or_create_project_graph(project_id):
+            return self.service.project_graphs.setdefault(project_id, {"task_graph": _TaskGraph()})
+
+        self.service.get_or_create_project_graph = get_or_create_project_graph
+        state = _state(a="DONE", b="READY", c="RUNNING", d="DONE")
+        state["graphs"] = {
+            "root": {"nodes": ["a", "b"], "edges": [{"source": "a", "target": "b"}]},
+            "sub": {"nodes": ["c"], "edges": []},
+        }
+        self.assertTrue(self.service.save_project_snapshot("p1", state))
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _nodes(self):
+        return self.service.project_graphs["p1"]["task_graph"].nodes
+
+    def test_full_load_from_snapshot(self):
+        self.assertTrue(self.service.load_project_into_graph("p1"))
+        task_graph = self.service.project_graphs["p1"]["task_graph"]
+        self.assertEqual(sorted(task_graph.nodes), ["a", "b", "c", "d"])
+        self.assertIs(task_graph.nodes["a"].status, TaskStatus.DONE)
+        self.assertEqual(task_graph.root_graph_id, "root")
+        self.assertEqual(task_graph.overall_project_goal, "goal")
+        self.assertEqual(sorted(task_graph.graphs), ["root", "sub"])
+
+    def _graphs(self):
+        return sorted(self.service.project_graphs["p1"]["task_graph"].graphs)
+
+    def test_lazy_load_defers_subgraphs_until_expanded(self):
+        self.assertTrue(self.service.load_project_into_graph("p1", lazy=True))
+        self.assertEqual(sorted(self._nodes()), ["a", "b", "d"])
+        self.assertEqual(self._graphs(), ["root"])
+        self.assertEqual(self.service._unloaded_subgraphs, {"p1": {"sub"}})
+
+        self.assertTrue(self.service.expand_project_subgraph("p1", "sub"))
+        self.assertEqual(sorted(self._nodes()), ["a", "b", "c", "d"])
+        self.assertEqual(self._graphs(), ["root", "sub"])
+        self.assertEqual(self.service._unloaded_subgraphs, {})
+
+    def test_lazy_load_followed_by_full_load(self):
+        self.service.load_project_into_graph("p1", lazy=True)
+        self.assertTrue(self.service.load_project_into_graph("p1"))
+        self.assertEqual(sorted(self._nodes()), ["a", "b", "c", "d"])
+        self.assertEqual(self.service._unloaded_subgraphs, {})
+
+    def test_expanding_without_a_snapshot_loads_the_saved_state(self):
+        self.service.load_project_into_graph("p1", lazy=True)
+        self.service._snapshot_file("p1").unlink()
+        self.service.project_manager.load_project_state = lambda project_id: _state(a="DONE", c="RUNNING")
+        self.assertTrue(self.service.expand_project_subgraph("p1", "sub"))
+        self.assertEqual(sorted(self._nodes()), ["a", "c"])
+        self.assertEqual(self.service._unloaded_subgraphs, {})
+
+    def test_display_preparation_loads_only_the_root_subgraph(self):
+        self.service._load_and_prepare_project_display("p1")
+        self.assertEqual(sorted(self._nodes()), ["a", "b", "d"])
+        self.assertEqual(self.service._unloaded_subgraphs, {"p1": {"sub"}})
+
+    def test_display_data_lists_the_deferred_subgraphs(self):
+        data = self.service.get_project_display_data("p1")
+        self.assertEqual(sorted(data["all_nodes"]), ["a", "b", "d"])
+        self.assertEqual(data["unloaded_subgraphs"], ["sub"])
+
+        self.service.expand_project_subgraph("p1", "sub")
+        data = self.service.get_project_display_data("p1")
+        self.assertEqual(sorted(data["all_nodes"]), ["a", "b", "c", "d"])
+        self.assertNotIn("unloaded_subgraphs", data)
+
+    def test_switching_away_from_a_lazily_loaded_project_saves_nothing(self):
+        self.service._load_and_prepare_project_display("p1")
+        self.service.current_display_project_id = "p1"
+        self.service._save_current_display_state()
+        self.assertEqual(self.service.project_manager.saved_states, [])
+        self.assertEqual(self.service._unloaded_subgraphs, {"p1": {"sub"}})
+
+    def test_switching_away_from_a_loaded_project_queues_its_state(self):
+        self.service.load_project_into_graph("p1")
+        self.service.current_display_project_id = "p1"
+        self.service._save_current_display_state()
+        [(project_id, data)] = self.service.project_manager.saved_states
+        self.assertEqual(project_id, "p1")
+        self.assertEqual(sorted(data["all_nodes"]), ["a", "b", "c", "d"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from enum import Enum
+from pathlib import Path
+from src.project_snapshot import (
+    ORPHAN_BLOCK,
+    ProjectSnapshotCodec,
+    ProjectSnapshotReader,
+    SnapshotFormatError,
+    write_project_snapshot,
+)
+
+
+class _Status(Enum):
+    READY = "READY"
+    DONE = "DONE"
+
+
+class _Layer(Enum):
+    TOP = 1
+
+
+class TestProjectSnapshotCodec(unittest.TestCase):
+
+    def setUp(self):
+        self.codec = ProjectSnapshotCodec([_Status, _Layer])
+
+    def _round_trip(self, value):
+        return self.codec.decode(self.codec.encode(value))
+
+    def test_enums(self):
+        self.assertEqual(
+            self._round_trip({"status": _Status.DONE, "layer": _Layer.TOP}),
+            {"status": _Status.DONE, "layer": _Layer.TOP},
+        )
+
+    def test_naive_datetime(self):
+        value = datetime(2024, 5, 6, 7, 8, 9, 123456)
+        decoded = self._round_trip(value)
+        self.assertEqual(decoded, value)
+        self.assertIsNone(decoded.tzinfo)
+
+    def test_aware_datetime_is_restored_in_utc(self):
+        value = datetime(2024, 5, 6, 9, 0, tzinfo=timezone(timedelta(hours=2)))
+        decoded = self._round_trip(value)
+        self.assertEqual(decoded, value)
+        self.assertEqual(decoded.tzinfo, timezone.utc)
+
+    def test_datetime_before_epoch(self):
+        value = datetime(1950, 1, 1)
+        self.assertEqual(self._round_trip(value), value)
+
+    def test_sets_and_tuples_become_lists(self):
+        self.assertEqual(self._round_trip({"ids": ("a", "b"), "one": {"c"}}), {"ids": ["a", "b"], "one": ["c"]})
+
+    def test_unregistered_enum_is_rejected(self):
+        with self.assertRaises(TypeError):
+            ProjectSnapshotCodec([_Status]).encode(_Layer.TOP)
+
+
+def _node(node_id, status, created):
+    return {"task_id": node_id, "status": status, "timestamp_created": created, "aux_data": {}}
+
+
+class TestProjectSnapshotFile(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self._tmp.name) / "p1_graph.snap"
+        self.codec = ProjectSnapshotCodec([_Status])
+        created = datetime(2024, 1, 1, 12, 0)
+        self.nodes = {
+            "a": _node("a", _Status.DONE, created),
+            "b": _node("b", _Status.READY, created),
+            "c": _node("c", _Status.READY, created + timedelta(minutes=1)),
+            "d": _node("d", _Status.DONE, created),
+        }
+        self.graphs = {
+            "root": {"nodes": ["a", "b"], "edges": [{"source": "a", "target": "b"}]},
+            # "b" also appears here, but belongs to the first subgraph that lists it
+            "sub": {"nodes": ["b", "c"], "edges": [["b", "c"]]},
+        }
+        write_project_snapshot(
+            self.path, self.codec, self.nodes, self.graphs,
+            {"overall_project_goal": "goal", "root_graph_id": "root"},
+        )
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_index(self):
+        with ProjectSnapshotReader(self.path, self.codec) as reader:
+            self.assertEqual(reader.state, {"overall_project_goal": "goal", "root_graph_id": "root"})
+            self.assertEqual(reader.block_ids(), ["root", "sub", ORPHAN_BLOCK])
+            self.assertEqual(reader.node_count, 4)
+            self.assertEqual(reader.graphs["root"], {"nodes": ["a", "b"], "edges": [["a", "b"]]})
+            self.assertEqual(reader.graphs["sub"]["edges"], [["b", "c"]])
+
+    def test_blocks_are_read_per_subgraph(self):
+        with ProjectSnapshotReader(self.path, self.codec) as reader:
+            self.assertEqual(reader.load_block("root"), {"a": self.nodes["a"], "b": self.nodes["b"]})
+            self.assertEqual(reader.load_block("sub"), {"c": self.nodes["c"]})
+            self.assertEqual(reader.load_block(ORPHAN_BLOCK), {"d": self.nodes["d"]})
+            self.assertEqual(reader.load_block("unknown"), {})
+
+    def test_iter_blocks_round_trips_all_nodes(self):
+        with ProjectSnapshotReader(self.path, self.codec) as reader:
+            loaded = {}
+            for _, nodes in reader.iter_blocks():
+                loaded.update(nodes)
+        self.assertEqual(loaded, self.nodes)
+        self.assertIs(loaded["a"]["status"], _Status.DONE)
+
+    def test_rewrite_replaces_the_file_atomically(self):
+        write_project_snapshot(self.path, self.codec, {}, {}, {"root_graph_id": None})
+        self.assertEqual([path.name for path in self.path.parent.iterdir()], [self.path.name])
+        with ProjectSnapshotReader(self.path, self.codec) as reader:
+            self.assertEqual(reader.node_count, 0)
+
+    def test_not_a_snapshot(self):
+        self.path.write_bytes(b"{\"all_nodes\": {}}")
+        with self.assertRaises(SnapshotFormatError):
+            ProjectSnapshotReader(self.path, self.codec)
+
+    def test_empty_file(self):
+        self.path.write_bytes(b"")
+        with self.assertRaises(SnapshotFormatError):
+            ProjectSnapshotReader(self.path, self.codec)
+
+
+if __name__ == "__main__":
+    unittest.main()
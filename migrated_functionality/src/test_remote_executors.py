@@ -0,0 +1,204 @@
+import unittest
+from unittest.mock import patch
+from src.base.code_agent import CodeAgent
+from src.base.multistep_agent import MultiStepAgent
+from src.exception import AgentError
+from src.tools.executor import remote_executors
+from src.tools.executor.remote_executors import KernelPool, PooledPythonExecutor, SubprocessKernelBackend
+
+
+class _Logger:
+
+    def __init__(self):
+        self.errors = []
+
+    def log(self, *args, **kwargs):
+        pass
+
+    def log_error(self, message):
+        self.errors.append(message)
+
+
+SEARCH_TOOL_CODE = "def search(query):\n    return 'warm ' + query"
+
+
+class TestKernelPool(unittest.TestCase):
+
+    def setUp(self):
+        self.logger = _Logger()
+        self.pools = []
+
+    def tearDown(self):
+        for pool in self.pools:
+            pool.close()
+
+    def _pool(self, **kwargs):
+        pool = KernelPool(SubprocessKernelBackend(self.logger), self.logger, **kwargs)
+        self.pools.append(pool)
+        return pool
+
+    def _warm_pool(self, **kwargs):
+        """A pool whose kernels are warmed with a `search` tool."""
+        with patch.object(remote_executors, "get_tools_definition_code", return_value=SEARCH_TOOL_CODE):
+            return self._pool(tools={"search": None}, **kwargs)
+
+    def _output(self, pooled, code):
+        return pooled.run_code_raise_errors(code)[1].strip()
+
+    def test_each_lease_gets_a_new_kernel_by_default(self):
+        pool = self._pool(size=1)
+        with pool.lease(timeout=30) as first:
+            first.run_code_raise_errors("import os\nos.environ['POOL_SECRET'] = 'secret'")
+        with pool.lease(timeout=30) as second:
+            self.assertIsNot(second, first)
+            self.assertEqual(self._output(second, "import os\nprint(os.environ.get('POOL_SECRET'))"), "None")
+        self.assertIsNotNone(first.kernel.process.poll())
+
+    def test_globals_are_reset_between_leases(self):
+        pool = self._pool(size=1, max_uses=2)
+        with pool.lease(timeout=30) as pooled:
+            pooled.run_code_raise_errors("x = 1\nimport json")
+            self.assertEqual(self._output(pooled, "print(x)"), "1")
+        with pool.lease(timeout=30) as pooled:
+            self.assertEqual(self._output(pooled, "print('x' in globals(), 'json' in globals())"), "False False")
+
+    def test_rebound_warm_globals_are_restored(self):
+        pool = self._warm_pool(size=1, max_uses=2)
+        with pool.lease(timeout=30) as pooled:
+            pooled.run_code_raise_errors("search = 'shadowed'")
+        with pool.lease(timeout=30) as pooled:
+            self.assertEqual(self._output(pooled, "print(search('query'))"), "warm query")
+
+    def test_reused_kernel_keeps_nothing_of_the_lease_in_its_namespace(self):
+        pool = self._warm_pool(size=1, max_uses=2)
+        with pool.lease(timeout=30) as first:
+            first.run_code_raise_errors("search.leak = 'secret'\n__doc__ = 'secret'")
+        with pool.lease(timeout=30) as second:
+            self.assertIs(second, first)
+            self.assertEqual(
+                self._output(second, "print(getattr(search, 'leak', None), globals().get('__doc__'))"),
+                "None None",
+            )
+            self.assertEqual(self._output(second, "print(sorted(globals()))"), "['__builtins__', '__name__', 'search']")
+
+    def test_user_errors_keep_the_kernel(self):
+        pool = self._pool(size=1, max_uses=2)
+        with pool.lease(timeout=30) as first:
+            with self.assertRaises(AgentError):
+                first.run_code_raise_errors("1 / 0")
+            self.assertFalse(first.broken)
+        with pool.lease(timeout=30) as second:
+            self.assertIs(second, first)
+
+    def test_broken_kernel_is_replaced(self):
+        pool = self._pool(size=1)
+        with pool.lease(timeout=30) as first:
+            first.kernel.process.kill()
+            first.kernel.process.wait()
+            with self.assertRaises((RuntimeError, OSError)):
+                first.run_code_raise_errors("print(1)")
+            self.assertTrue(first.broken)
+        with pool.lease(timeout=30) as second:
+            self.assertIsNot(second, first)
+            self.assertEqual(self._output(second, "print(2)"), "2")
+
+    def test_kernel_is_recycled_after_max_uses(self):
+        pool = self._pool(size=1, max_uses=2)
+        with pool.lease(timeout=30) as first:
+            pass
+        with pool.lease(timeout=30) as second:
+            self.assertIs(second, first)
+            self.assertEqual(second.uses, 2)
+        with pool.lease(timeout=30) as third:
+            self.assertIsNot(third, first)
+            self.assertEqual(third.uses, 1)
+        self.assertIsNotNone(first.kernel.process.poll())
+
+    def test_acquire_times_out_when_no_kernel_is_free(self):
+        pool = self._pool(size=1)
+        with pool.lease(timeout=30):
+            with self.assertRaises(TimeoutError):
+                pool.acquire(timeout=0.1)
+
+    def test_acquire_fails_once_closed(self):
+        pool = self._pool(size=1)
+        pool.close()
+        with self.assertRaises(RuntimeError):
+            pool.acquire(timeout=1)
+
+
+class TestPooledPythonExecutor(unittest.TestCase):
+
+    def setUp(self):
+        self.logger = _Logger()
+        self.pool = KernelPool(SubprocessKernelBackend(self.logger), self.logger, size=1, max_uses=10)
+        self.executor = PooledPythonExecutor([], self.logger, pool=self.pool, lease_timeout=30)
+
+    def tearDown(self):
+        self.executor.cleanup()
+        self.pool.close()
+
+    def test_final_answer_is_unpickled(self):
+        self.executor("values = {'a': [1, 2]}")
+        output, logs, is_final_answer = self.executor("print('done')\nfinal_answer(values)")
+        self.assertTrue(is_final_answer)
+        self.assertEqual(output, {"a": [1, 2]})
+        self.assertEqual(logs.strip(), "done")
+
+    def test_release_returns_the_kernel(self):
+        self.executor("x = 1")
+        leased = self.executor.kernel
+        self.executor.release()
+        self.assertIsNone(self.executor.kernel)
+        # Released kernels are reset, so the next lease starts without x
+        output, _, _ = self.executor("final_answer('x' in globals())")
+        self.assertIs(self.executor.kernel, leased)
+        self.assertFalse(output)
+
+    def _agent(self):
+        agent = CodeAgent.__new__(CodeAgent)
+        agent.python_executor = self.executor
+        return agent
+
+    def test_code_agent_run_releases_the_kernel(self):
+        def run(agent, *args, **kwargs):
+            agent.python_executor("x = 1")
+            return "answer"
+
+        with patch.object(MultiStepAgent, "run", run):
+            self.assertEqual(self._agent().run("task"), "answer")
+        self.assertIsNone(self.executor.kernel)
+        self.assertEqual(len(self.pool._idle), 1)
+
+    def test_code_agent_run_releases_the_kernel_on_error(self):
+        def run(agent, *args, **kwargs):
+            agent.python_executor("x = 1")
+            raise ValueError("failed")
+
+        with patch.object(MultiStepAgent, "run", run):
+            with self.assertRaises(ValueError):
+                self._agent().run("task")
+        self.assertIsNone(self.executor.kernel)
+
+    def test_code_agent_stream_releases_the_kernel_when_exhausted_or_closed(self):
+        def run(agent, *args, **kwargs):
+            def steps():
+                agent.python_executor("x = 1")
+                yield "step 1"
+                yield "step 2"
+            return steps()
+
+        with patch.object(MultiStepAgent, "run", run):
+            steps = self._agent().run("task", stream=True)
+            self.assertEqual(list(steps), ["step 1", "step 2"])
+            self.assertIsNone(self.executor.kernel)
+
+            steps = self._agent().run("task", stream=True)
+            self.assertEqual(next(steps), "step 1")
+            self.assertIsNotNone(self.executor.kernel)
+            steps.close()
+            self.assertIsNone(self.executor.kernel)
+
+
+if __name__ == "__main__":
+    unittest.main()
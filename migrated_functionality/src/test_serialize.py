@@ -0,0 +1,222 @@
+import datetime
+import unittest
+from collections import OrderedDict
+import botocore.session
+from botocore.model import ServiceModel
+from src.serialize import SERIALIZERS
+
+_service_models = {}
+
+
+def _operation_model(service_name, operation_name):
+    if service_name not in _service_models:
+        loader = botocore.session.get_session().get_component('data_loader')
+        _service_models[service_name] = ServiceModel(
+            loader.load_service_model(service_name, 'service-2'), service_name
+        )
+    return _service_models[service_name].operation_model(operation_name)
+
+
+def _walking_serializer(protocol):
+    class WalkingSerializer(SERIALIZERS[protocol]):
+        @classmethod
+        def _supports_compiled_shapes(cls):
+            return False
+
+    return WalkingSerializer()
+
+
+CREATED = datetime.datetime(2024, 1, 2, 3, 4, 5, 678000, tzinfo=datetime.timezone.utc)
+
+# (service, operation, parameters) per protocol, using lists, maps, nested structures, blobs and timestamps
+CASES = {
+    'query': [
+        ('sns', 'Publish', {
+            'TopicArn': 'arn:aws:sns:us-east-1:123456789012:topic',
+            'Message': 'hello & goodbye',
+            'MessageAttributes': {
+                'text': {'DataType': 'String', 'StringValue': 'café'},
+                'binary': {'DataType': 'Binary', 'BinaryValue': b'\x00\xff binary'},
+            },
+        }),
+        ('sns', 'CreateTopic', {
+            'Name': 'topic',
+            'Attributes': {'DisplayName': 'Topic', 'FifoTopic': 'false'},
+            'Tags': [{'Key': 'team', 'Value': 'a'}, {'Key': 'env', 'Value': 'prod'}],
+        }),
+        ('iam', 'CreateRole', {
+            'RoleName': 'role',
+            'AssumeRolePolicyDocument': '{"Version": "2012-10-17"}',
+            'MaxSessionDuration': 3600,
+            'Tags': [{'Key': 'team', 'Value': 'a'}],
+        }),
+        ('iam', 'ListRoles', {}),
+    ],
+    'ec2': [
+        ('ec2', 'RunInstances', {
+            'ImageId': 'ami-12345678',
+            'MinCount': 1,
+            'MaxCount': 2,
+            'ClientToken': 'token',
+            'SecurityGroupIds': ['sg-1', 'sg-2'],
+            'BlockDeviceMappings': [
+                {'DeviceName': '/dev/sda1', 'Ebs': {'VolumeSize': 8, 'DeleteOnTermination': True}},
+                {'DeviceName': '/dev/sdb', 'NoDevice': ''},
+            ],
+            'TagSpecifications': [{'ResourceType': 'instance', 'Tags': [{'Key': 'Name', 'Value': 'web'}]}],
+        }),
+        ('ec2', 'DescribeSpotPriceHistory', {
+            'StartTime': CREATED,
+            'EndTime': CREATED + datetime.timedelta(days=1),
+            'InstanceTypes': ['t3.micro'],
+            'Filters': [{'Name': 'availability-zone', 'Values': ['us-east-1a', 'us-east-1b']}],
+        }),
+    ],
+    'json': [
+        ('dynamodb', 'PutItem', {
+            'TableName': 'table',
+            'Item': {
+                'id': {'S': 'item-1'},
+                'count': {'N': '42'},
+                'data': {'B': b'\x00\x01binary'},
+                'tags': {'SS': ['a', 'b']},
+                'nested': {'M': {'list': {'L': [{'BOOL': True}, {'NULL': True}, {'N': '1.5'}]}}},
+            },
+            'ConditionExpression': 'attribute_not_exists(id)',
+            'ReturnValues': 'ALL_OLD',
+        }),
+        ('dynamodb', 'Query', {
+            'TableName': 'table',
+            'KeyConditionExpression': 'id = :id',
+            'ExpressionAttributeValues': {':id': {'S': 'item-1'}},
+            'Limit': 10,
+            'ExclusiveStartKey': {'id': {'S': 'item-0'}},
+        }),
+        ('kinesis', 'PutRecords', {
+            'StreamName': 'stream',
+            'Records': [{'Data': b'one', 'PartitionKey': '1'}, {'Data': b'\xfftwo', 'PartitionKey': '2'}],
+        }),
+        ('kinesis', 'GetShardIterator', {
+            'StreamName': 'stream',
+            'ShardId': 'shard-0',
+            'ShardIteratorType': 'AT_TIMESTAMP',
+            'Timestamp': CREATED,
+        }),
+    ],
+    'rest-json': [
+        ('lambda', 'CreateFunction', {
+            'FunctionName': 'function',
+            'Runtime': 'python3.12',
+            'Role': 'arn:aws:iam::123456789012:role/role',
+            'Handler': 'app.handler',
+            'Code': {'ZipFile': b'PK\x03\x04 zip'},
+            'Timeout': 30,
+            'Environment': {'Variables': {'A': '1', 'B': 'two'}},
+            'Tags': {'team': 'a'},
+            'Layers': ['arn:aws:lambda:us-east-1:123456789012:layer:layer:1'],
+        }),
+        ('lambda', 'ListFunctions', {'MaxItems': 10, 'Marker': 'marker'}),
+        ('lambda', 'TagResource', {
+            'Resource': 'arn:aws:lambda:us-east-1:123456789012:function:function',
+            'Tags': {'team': 'a', 'env': 'prod'},
+        }),
+    ],
+    'rest-xml': [
+        ('s3', 'PutObject', {
+            'Bucket': 'bucket',
+            'Key': 'photos/2024/a b.jpg',
+            'Body': b'body',
+            'Metadata': {'owner': 'me'},
+            'Expires': CREATED,
+            'ContentLength': 4,
+        }),
+        ('s3', 'PutBucketTagging', {
+            'Bucket': 'bucket',
+            'Tagging': {'TagSet': [{'Key': 'team', 'Value': 'a'}, {'Key': 'env', 'Value': 'prod & test'}]},
+        }),
+        ('route53', 'ChangeResourceRecordSets', {
+            'HostedZoneId': 'Z123',
+            'ChangeBatch': {
+                'Comment': 'update',
+                'Changes': [{
+                    'Action': 'UPSERT',
+                    'ResourceRecordSet': {
+                        'Name': 'www.example.com',
+                        'Type': 'A',
+                        'TTL': 300,
+                        'ResourceRecords': [{'Value': '192.0.2.1'}, {'Value': '192.0.2.2'}],
+                    },
+                }],
+            },
+        }),
+    ],
+}
+
+
+def _comparable(request):
+    """The request with its ordering made visible: a query body is sent in the order of its items."""
+    request = dict(request)
+    if isinstance(request['body'], dict):
+        request['body'] = list(request['body'].items())
+    request['headers'] = list(request['headers'].items())
+    return request
+
+
+class TestCompiledSerializers(unittest.TestCase):
+    """Compiled serializers produce the requests of the serializers walking the shapes."""
+
+    def _assert_same_requests(self, protocol, serializer):
+        walker = _walking_serializer(protocol)
+        walker.MAP_TYPE = serializer.MAP_TYPE
+        for service_name, operation_name, parameters in CASES[protocol]:
+            with self.subTest(operation=f'{service_name}.{operation_name}'):
+                operation_model = _operation_model(service_name, operation_name)
+                expected = _comparable(walker.serialize_to_request(dict(parameters), operation_model))
+                # The second request reuses the compiled serializer of the shape
+                for _ in range(2):
+                    request = _comparable(serializer.serialize_to_request(dict(parameters), operation_model))
+                    self.assertEqual(request, expected)
+
+    def test_requests_are_identical_to_the_shape_walker(self):
+        for protocol in CASES:
+            with self.subTest(protocol=protocol):
+                self._assert_same_requests(protocol, SERIALIZERS[protocol]())
+
+    def test_compiled_serializers_are_used(self):
+        for protocol in ('query', 'ec2', 'json', 'rest-json'):
+            serializer = SERIALIZERS[protocol]()
+            self.assertTrue(serializer._supports_compiled_shapes())
+            service_name, operation_name, parameters = CASES[protocol][0]
+            operation_model = _operation_model(service_name, operation_name)
+            serializer.serialize_to_request(dict(parameters), operation_model)
+            self.assertTrue(serializer._compiled_shapes)
+
+    def test_map_type_gets_its_own_compiled_serializers(self):
+        for protocol in ('query', 'json'):
+            serializer = SERIALIZERS[protocol]()
+            self._assert_same_requests(protocol, serializer)
+            serializer.MAP_TYPE = OrderedDict
+            self._assert_same_requests(protocol, serializer)
+            self.assertEqual({map_type for _, map_type in serializer._compiled_shapes}, {dict, OrderedDict})
+
+    def test_overridden_serialization_walks_the_shapes(self):
+        class UpperCaseSerializer(SERIALIZERS['query']):
+            def _serialize_type_string(self, serialized, value, shape, prefix=''):
+                serialized[prefix] = value.upper()
+
+        serializer = UpperCaseSerializer()
+        self.assertFalse(serializer._supports_compiled_shapes())
+        request = serializer.serialize_to_request({'RoleName': 'role'}, _operation_model('iam', 'GetRole'))
+        self.assertEqual(request['body']['RoleName'], 'ROLE')
+
+    def test_unknown_members_are_rejected_like_the_shape_walker(self):
+        operation_model = _operation_model('dynamodb', 'Query')
+        parameters = {'TableName': 'table', 'Unknown': 1}
+        with self.assertRaises(KeyError):
+            _walking_serializer('json').serialize_to_request(dict(parameters), operation_model)
+        with self.assertRaises(KeyError):
+            SERIALIZERS['json']().serialize_to_request(dict(parameters), operation_model)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+from src.token_utils import TokenizerRegistry
+
+
+class _WordEncoding:
+    """One token per whitespace-separated word, recording how it was called."""
+
+    def __init__(self):
+        self.encoded = 0
+        self.batches = 0
+
+    def encode(self, text):
+        self.encoded += 1
+        return text.split()
+
+    def encode_batch(self, texts, num_threads=8):
+        self.batches += 1
+        return [text.split() for text in texts]
+
+
+class TestTokenizerRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = TokenizerRegistry(batch_threshold=4)
+        self.encoding = _WordEncoding()
+        self.other_encoding = _WordEncoding()
+        self.registry._encodings["word"] = self.encoding
+        self.registry._encodings["other"] = self.other_encoding
+
+    def test_small_batches_are_encoded_sequentially(self):
+        self.assertEqual(self.registry.count_batch(["a b", "c", ""], "word"), [2, 1, 0])
+        self.assertEqual((self.encoding.encoded, self.encoding.batches), (3, 0))
+
+    def test_large_batches_use_the_thread_pool(self):
+        self.assertEqual(self.registry.count_batch(["a"] * 4, "word"), [1] * 4)
+        self.assertEqual((self.encoding.encoded, self.encoding.batches), (0, 1))
+
+    def test_empty_batch(self):
+        self.assertEqual(self.registry.count_batch([], "unknown-model"), [])
+
+    def test_memo_hit(self):
+        self.assertEqual(self.registry.count_message("m1", ["a b", "c"], "word"), 3)
+        self.assertEqual(self.registry.count_message("m1", ["a b", "c"], "word"), 3)
+        self.assertEqual(self.encoding.encoded, 2)
+
+    def test_reused_id_with_new_content_is_recounted(self):
+        # Messages without an id are keyed by id(), which can be reused by a new object
+        key = id(object())
+        self.assertEqual(self.registry.count_message(key, ["a b"], "word"), 2)
+        self.assertEqual(self.registry.count_message(key, ["a b c d"], "word"), 4)
+        self.assertEqual(self.encoding.encoded, 2)
+
+    def test_models_are_memoized_separately(self):
+        self.registry.count_message("m1", ["a b"], "word")
+        self.registry.count_message("m1", ["a b"], "other")
+        self.assertEqual((self.encoding.encoded, self.other_encoding.encoded), (1, 1))
+
+        self.registry.clear("other")
+        self.registry.count_message("m1", ["a b"], "word")
+        self.registry.count_message("m1", ["a b"], "other")
+        self.assertEqual((self.encoding.encoded, self.other_encoding.encoded), (1, 2))
+
+    def test_memo_is_bounded(self):
+        registry = TokenizerRegistry(memo_size=2)
+        registry._encodings["word"] = self.encoding
+        for index in range(3):
+            registry.count_message(f"m{index}", ["a"], "word")
+        self.assertEqual(len(registry._memo), 2)
+        registry.count_message("m0", ["a"], "word")
+        self.assertEqual(self.encoding.encoded, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+from src.web_searcher import WebSearcherTool
+
+
+def _items(*urls):
+    return [SimpleNamespace(url=url, title=f"Title of {url}", description="") for url in urls]
+
+
+class _Engine:
+    """Answers after `delay` seconds, or when `release` is set."""
+
+    def __init__(self, items=(), delay=0.0, release=None):
+        self.items = list(items)
+        self.delay = delay
+        self.release = release
+        self.started = 0
+        self.cancelled = 0
+
+    async def perform_search(self, query, num_results, lang=None, country=None, filter_year=None):
+        self.started += 1
+        try:
+            if self.release is not None:
+                await self.release.wait()
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return self.items
+
+
+def _searcher(engines, **kwargs):
+    names = list(engines)
+    searcher = WebSearcherTool(engine=names[0], fallback_engines=names[1:], **kwargs)
+    searcher._search_engine = dict(engines)
+    return searcher
+
+
+def _search(searcher, num_results=5):
+    return asyncio.run(searcher._try_all_engines("query", num_results, {}))
+
+
+class TestHedgedSearch(unittest.TestCase):
+
+    def test_fast_primary_engine_answers_alone(self):
+        primary, fallback = _Engine(_items("https://a.com")), _Engine(_items("https://b.com"))
+        results = _search(_searcher({"primary": primary, "fallback": fallback}, hedge_delay=1.0))
+        self.assertEqual([result.url for result in results], ["https://a.com"])
+        self.assertEqual(results[0].source, "primary")
+        self.assertEqual(fallback.started, 0)
+
+    def test_slow_engine_is_hedged_and_cancelled(self):
+        primary = _Engine(_items("https://a.com"), delay=5.0)
+        fallback = _Engine(_items("https://b.com"))
+        searcher = _searcher({"primary": primary, "fallback": fallback}, hedge_delay=0.05)
+
+        async def run():
+            results = await searcher._try_all_engines("query", 5, {})
+            # The losing search has finished cancelling by the time the search returns
+            self.assertEqual(primary.cancelled, 1)
+            return results
+
+        results = asyncio.run(run())
+        self.assertEqual([result.source for result in results], ["fallback"])
+        stats = searcher.get_engine_stats()
+        self.assertEqual(stats["primary"]["cancellations"], 1)
+        self.assertEqual(stats["primary"]["samples"], 0)
+        self.assertEqual(stats["fallback"]["successes"], 1)
+
+    def test_failed_engine_starts_the_next_one_right_away(self):
+        primary, fallback = _Engine(), _Engine(_items("https://b.com"))
+        searcher = _searcher({"primary": primary, "fallback": fallback}, hedge_delay=60)
+        results = asyncio.run(asyncio.wait_for(searcher._try_all_engines("query", 5, {}), timeout=5))
+        self.assertEqual([result.source for result in results], ["fallback"])
+        self.assertEqual(searcher.get_engine_stats()["primary"]["success_rate"], 0.0)
+
+    def test_all_engines_failing(self):
+        self.assertEqual(_search(_searcher({"primary": _Engine(), "fallback": _Engine()}, hedge_delay=0.05)), [])
+
+    def test_answers_of_one_round_are_cut_to_num_results(self):
+        async def run():
+            release = asyncio.Event()
+            primary = _Engine(_items("https://a.com", "https://b.com"), release=release)
+            fallback = _Engine(_items("https://c.com", "https://d.com"), release=release)
+            searcher = _searcher({"primary": primary, "fallback": fallback}, hedge_delay=0.01)
+            search = asyncio.create_task(searcher._try_all_engines("query", 3, {}))
+            while not fallback.started:
+                await asyncio.sleep(0.01)
+            release.set()
+            return await search
+
+        results = asyncio.run(run())
+        self.assertEqual([result.url for result in results], ["https://a.com", "https://b.com", "https://c.com"])
+        self.assertEqual([result.position for result in results], [1, 2, 3])
+
+    def test_merged_results_are_deduplicated_by_url(self):
+        primary = _Engine(_items("https://a.com/", "https://b.com"), delay=0.1)
+        fallback = _Engine(_items("https://a.com", "https://c.com", "https://b.com/"))
+        searcher = _searcher({"primary": primary, "fallback": fallback}, hedge_delay=0.01, merge_results=True)
+        results = _search(searcher)
+        self.assertEqual([result.url for result in results], ["https://a.com/", "https://b.com", "https://c.com"])
+        self.assertEqual([result.source for result in results], ["primary", "primary", "fallback"])
+        self.assertEqual(primary.cancelled, 0)
+
+        self.assertEqual(len(_search(searcher, num_results=2)), 2)
+
+
+class TestEngineRanking(unittest.TestCase):
+
+    def _record(self, searcher, engine_name, latency, success=True, times=3):
+        for _ in range(times):
+            searcher._engine_stats[engine_name].record(success, latency)
+
+    def test_configured_order_until_stats_are_known(self):
+        searcher = _searcher({"primary": _Engine(), "second": _Engine(), "third": _Engine()}, min_engine_samples=3)
+        self.assertEqual(searcher._get_engine_order(), ["primary", "second", "third"])
+        self._record(searcher, "third", 0.1, times=2)
+        self.assertEqual(searcher._get_engine_order(), ["primary", "second", "third"])
+
+    def test_engines_are_ranked_by_expected_time_to_an_answer(self):
+        searcher = _searcher({"primary": _Engine(), "second": _Engine(), "third": _Engine()}, min_engine_samples=3)
+        self._record(searcher, "primary", 2.0)
+        self._record(searcher, "third", 0.5)
+        # The unmeasured engine is assumed as good as the preferred one
+        self.assertEqual(searcher._get_engine_order(), ["third", "primary", "second"])
+
+        # A fast engine that keeps failing ranks last
+        self._record(searcher, "third", 0.5, success=False, times=10)
+        self.assertEqual(searcher._get_engine_order()[-1], "third")
+
+
+if __name__ == "__main__":
+    unittest.main()
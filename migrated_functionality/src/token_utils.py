@@ -1,5 +1,114 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
 import tiktoken
 
+
+class TokenizerRegistry:
+    """
+    Process-wide cache of tiktoken encoders, with batch counting and a
+    per-message token count memo.
+    """
+
+    def __init__(self, num_threads: int = 8, memo_size: int = 65536, batch_threshold: int = 64):
+        """
+        :param num_threads: Threads used by tiktoken for batch encoding.
+        :param memo_size: Maximum number of memoized message counts.
+        :param batch_threshold: Number of texts from which a batch is encoded on
+            tiktoken's thread pool. tiktoken starts a new pool for every batch,
+            so smaller batches are encoded one text at a time.
+        """
+        self.num_threads = num_threads
+        self.batch_threshold = batch_threshold
+        self.memo_size = memo_size
+        self._encodings: Dict[str, tiktoken.Encoding] = {}
+        self._memo: "OrderedDict[Tuple[Hashable, str], Tuple[int, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_encoding(self, model: str) -> tiktoken.Encoding:
+        """
+        Get the cached encoder for a model, resolving it on first use.
+        :param model: The model name.
+        :return: The tiktoken encoding for the model.
+        :raises KeyError: If tiktoken does not know the model.
+        """
+        encoding = self._encodings.get(model)
+        if encoding is None:
+            encoding = tiktoken.encoding_for_model(model)
+            with self._lock:
+                encoding = self._encodings.setdefault(model, encoding)
+        return encoding
+
+    def count(self, text: str, model: str = "gpt-4o") -> int:
+        """
+        Count the tokens in a text.
+        :param text: The text to count tokens for.
+        :param model: The model to use for tokenization.
+        :return: The number of tokens in the text.
+        """
+        return len(self.get_encoding(model).encode(text))
+
+    def count_batch(self, texts: Sequence[str], model: str = "gpt-4o") -> List[int]:
+        """
+        Count the tokens of many texts at once, encoding them on tiktoken's
+        thread pool when there are at least `batch_threshold` of them.
+        :param texts: The texts to count tokens for.
+        :param model: The model to use for tokenization.
+        :return: The number of tokens of each text, in order.
+        """
+        if not texts:
+            return []
+        encoding = self.get_encoding(model)
+        if len(texts) < self.batch_threshold:
+            return [len(encoding.encode(text)) for text in texts]
+        encoded = encoding.encode_batch(list(texts), num_threads=self.num_threads)
+        return [len(tokens) for tokens in encoded]
+
+    def count_message(self, message_id: Hashable, parts: Sequence[str], model: str = "gpt-4o") -> int:
+        """
+        Count the tokens of a message made of one or more text parts. The
+        result is memoized by message id and content hash, so a message is
+        only tokenized again when its content changes.
+        :param message_id: A stable identifier of the message.
+        :param parts: The text parts of the message (content, tool call names and arguments, ...).
+        :param model: The model to use for tokenization.
+        :return: The total number of tokens of all parts.
+        """
+        key = (message_id, model)
+        content_hash = hash(tuple(parts))
+
+        with self._lock:
+            cached = self._memo.get(key)
+            if cached is not None and cached[0] == content_hash:
+                self._memo.move_to_end(key)
+                return cached[1]
+
+        total = sum(self.count_batch(parts, model))
+
+        with self._lock:
+            self._memo[key] = (content_hash, total)
+            self._memo.move_to_end(key)
+            while len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+        return total
+
+    def clear(self, model: Optional[str] = None) -> None:
+        """
+        Drop memoized counts, for one model or all of them.
+        :param model: The model whose counts to drop. Drops everything when None.
+        """
+        with self._lock:
+            if model is None:
+                self._memo.clear()
+            else:
+                for key in [key for key in self._memo if key[1] == model]:
+                    del self._memo[key]
+
+
+tokenizer_registry = TokenizerRegistry()
+
+
 def get_token_count(prompt: str, model: str = "gpt-4o") -> int:
     """
     Get the number of tokens in a prompt.
@@ -7,5 +116,14 @@ def get_token_count(prompt: str, model: str = "gpt-4o") -> int:
     :param model: The model to use for tokenization. Default is "gpt-4o".
     :return: The number of tokens in the prompt.
     """
-    encoding = tiktoken.encoding_for_model(model)
-    return len(encoding.encode(prompt))
\ No newline at end of file
+    return tokenizer_registry.count(prompt, model)
+
+
+def get_token_counts(prompts: List[str], model: str = "gpt-4o") -> List[int]:
+    """
+    Get the number of tokens of each prompt in a batch.
+    :param prompts: The prompts to count tokens for.
+    :param model: The model to use for tokenization. Default is "gpt-4o".
+    :return: The number of tokens of each prompt, in order.
+    """
+    return tokenizer_registry.count_batch(prompts, model)
@@ -24,6 +24,7 @@ import tempfile
 import textwrap
 import types
 from contextlib import contextmanager
+from copy import deepcopy
 from functools import wraps
 from pathlib import Path
 from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Union
@@ -989,7 +990,8 @@ def tool(tool_function: Callable) -> Tool:
             Should also have a docstring including the description of the function
             and an 'Args:' part where each argument is described.
     """
-    tool_json_schema = get_json_schema(tool_function)["function"]
+    # The cached schema is read-only; the tool class gets its own copy of the inputs
+    tool_json_schema = deepcopy(get_json_schema(tool_function)["function"])
     if "return" not in tool_json_schema:
         raise TypeHintParsingException("Tool return type not found: make sure your function has a return type hint!")
 
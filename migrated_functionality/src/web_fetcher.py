@@ -2,6 +2,7 @@ from typing import Optional
 from markitdown._base_converter import DocumentConverterResult
 
 from src.tools import AsyncTool
+from src.tools.http_fetcher import HttpFetcher, http_fetcher
 from src.utils import fetch_url
 from src.logger import logger
 from src.registry import TOOL
@@ -25,12 +26,23 @@ class WebFetcherTool(AsyncTool):
     }
     output_type = "any"
 
-    def __init__(self):
+    def __init__(self, fetcher: Optional[HttpFetcher] = None, min_markdown_length: int = 200):
         super(WebFetcherTool, self).__init__()
+        self.fetcher = fetcher or http_fetcher
+        # Shorter direct conversions are likely pages rendered by JavaScript
+        self.min_markdown_length = min_markdown_length
 
     async def forward(self, url: str) -> Optional[DocumentConverterResult]:
         """Fetch content from a given URL."""
 
+        # Direct HTTP fetch first: pooled, cached and revalidated
+        try:
+            res = await self.fetcher.fetch_markdown(url, min_length=self.min_markdown_length)
+            if res:
+                return res
+        except Exception as e:
+            logger.warning(f"Direct fetch of {url} failed, falling back to crawlers: {e}")
+
         # try to use asyncio to fetch the URL content
         try:
             res = await fetch_url(url)
@@ -1,3 +1,4 @@
+from collections import defaultdict
 from typing import Any, Dict, List, Optional
 from pydantic import BaseModel, ConfigDict, Field, model_validator
 from tenacity import retry, stop_after_attempt, wait_exponential
@@ -96,6 +97,46 @@ class SearchResponse(ToolResult):
         self.output = "\n".join(result_text)
         return self
 
+class EngineStats:
+    """Success rate and latency of a search engine, as exponential moving averages."""
+
+    def __init__(self, alpha: float = 0.3):
+        self.alpha = alpha
+        self.samples = 0
+        self.successes = 0
+        # Searches cancelled because another engine answered first
+        self.cancellations = 0
+        self.success_rate = 1.0
+        self.latency = 0.0
+
+    def record(self, success: bool, latency: float) -> None:
+        if self.samples == 0:
+            self.success_rate = float(success)
+            self.latency = latency
+        else:
+            self.success_rate += self.alpha * (float(success) - self.success_rate)
+            self.latency += self.alpha * (latency - self.latency)
+        self.samples += 1
+        self.successes += int(success)
+
+    def record_cancelled(self) -> None:
+        self.cancellations += 1
+
+    @property
+    def score(self) -> float:
+        """Expected seconds to get a good answer from this engine, lower is better."""
+        return self.latency / max(self.success_rate, 0.05)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "samples": self.samples,
+            "successes": self.successes,
+            "cancellations": self.cancellations,
+            "success_rate": self.success_rate,
+            "latency": self.latency,
+        }
+
+
 @TOOL.register_module(name="web_searcher_tool", force=True)
 class WebSearcherTool(AsyncTool):
     """Search the web for information using various search engines."""
@@ -130,6 +171,10 @@ class WebSearcherTool(AsyncTool):
                  country: str = "us",
                  num_results: int = 5,
                  fetch_content: bool = False,
+                 hedge_delay: float = 2.0,
+                 merge_results: bool = False,
+                 min_engine_samples: int = 3,
+                 max_concurrent_fetches: int = 8,
                  **kwargs
                  ):
         super(WebSearcherTool, self).__init__()
@@ -146,6 +191,14 @@ class WebSearcherTool(AsyncTool):
         self.country = country
         self.num_results = num_results
         self.fetch_content = fetch_content
+        # Seconds to wait for an engine before also querying the next one
+        self.hedge_delay = hedge_delay
+        # Merge the results of all queried engines instead of taking the first good answer
+        self.merge_results = merge_results
+        # Samples needed before an engine is ranked by its stats
+        self.min_engine_samples = min_engine_samples
+        self._engine_stats: Dict[str, EngineStats] = defaultdict(EngineStats)
+        self.max_concurrent_fetches = max_concurrent_fetches
 
         self._search_engine: dict[str, WebSearchEngine] = {
             "firecrawl": FirecrawlSearchEngine(),
@@ -198,7 +251,7 @@ class WebSearcherTool(AsyncTool):
                 # All engines failed, wait and retry
                 res = f"All search engines failed. Waiting {self.retry_delay} seconds before retry {retry_count + 1}/{self.max_retries}..."
                 logger.warning(res)
-                time.sleep(self.retry_delay)
+                await asyncio.sleep(self.retry_delay)
             else:
                 res = f"All search engines failed after {self.max_retries} retries. Giving up."
                 logger.error(res)
@@ -212,41 +265,121 @@ class WebSearcherTool(AsyncTool):
     async def _try_all_engines(
         self, query: str, num_results: int, search_params: Dict[str, Any]
     ) -> List[SearchResult]:
-        """Try all search engines in the configured order."""
+        """
+        Run a hedged search over the search engines.
+
+        Engines are queried in the order of `_get_engine_order`. The next
+        engine is started when all running engines have failed, or when none
+        answered within `hedge_delay` seconds, so slow engines race against
+        the fallbacks. The first good answer wins, unless `merge_results` is
+        set, in which case the answers of all started engines are merged.
+        """
         engine_order = self._get_engine_order()
+        running: Dict[asyncio.Task, str] = {}
+        answers: Dict[str, List[SearchItem]] = {}
         failed_engines = []
+        next_engine = 0
 
-        for engine_name in engine_order:
-            engine = self._search_engine[engine_name]
+        def start_next_engine():
+            nonlocal next_engine
+            engine_name = engine_order[next_engine]
+            next_engine += 1
             logger.info(f"🔎 Attempting search with {engine_name.capitalize()}...")
-            search_items = await self._perform_search_with_engine(
-                engine, query, num_results, search_params
+            task = asyncio.create_task(
+                self._timed_search(engine_name, query, num_results, search_params)
             )
-
-            if not search_items:
-                continue
-
-            if failed_engines:
-                logger.info(
-                    f"Search successful with {engine_name.capitalize()} after trying: {', '.join(failed_engines)}"
+            running[task] = engine_name
+
+        try:
+            if engine_order:
+                start_next_engine()
+            while running:
+                can_hedge = next_engine < len(engine_order)
+                done, _ = await asyncio.wait(
+                    running,
+                    timeout=self.hedge_delay if can_hedge else None,
+                    return_when=asyncio.FIRST_COMPLETED,
                 )
+                if not done:
+                    start_next_engine()
+                    continue
+
+                for task in done:
+                    engine_name = running.pop(task)
+                    search_items = task.result()
+                    if search_items:
+                        answers[engine_name] = search_items
+                    else:
+                        failed_engines.append(engine_name)
+
+                if answers:
+                    if not self.merge_results or not running:
+                        break
+                elif not running and can_hedge:
+                    start_next_engine()
+        finally:
+            for task in running:
+                task.cancel()
+            # Let the losing searches finish cancelling before returning
+            await asyncio.gather(*running, return_exceptions=True)
+
+        if not answers:
+            if failed_engines:
+                logger.error(f"All search engines failed: {', '.join(failed_engines)}")
+            return []
+
+        if failed_engines:
+            logger.info(
+                f"Search successful with {', '.join(e.capitalize() for e in answers)} after trying: {', '.join(failed_engines)}"
+            )
 
-            # Transform search items into structured results
-            return [
-                SearchResult(
-                    position=i + 1,
-                    url=item.url,
-                    title=item.title
-                    or f"Result {i+1}",  # Ensure we always have a title
-                    description=item.description or "",
-                    source=engine_name,
+        # Transform search items into structured results, de-duplicated by URL
+        results = []
+        seen_urls = set()
+        for engine_name in engine_order:
+            for item in answers.get(engine_name, []):
+                url_key = (item.url or "").rstrip("/")
+                if url_key and url_key in seen_urls:
+                    continue
+                seen_urls.add(url_key)
+                position = len(results) + 1
+                results.append(
+                    SearchResult(
+                        position=position,
+                        url=item.url,
+                        title=item.title
+                        or f"Result {position}",  # Ensure we always have a title
+                        description=item.description or "",
+                        source=engine_name,
+                    )
                 )
-                for i, item in enumerate(search_items)
-            ]
+        # Engines finishing in the same round are all kept, so cut in both modes
+        return results[:num_results]
 
-        if failed_engines:
-            logger.error(f"All search engines failed: {', '.join(failed_engines)}")
-        return []
+    async def _timed_search(
+        self, engine_name: str, query: str, num_results: int, search_params: Dict[str, Any]
+    ) -> List[SearchItem]:
+        """Search with one engine, recording its latency and success. Never raises on engine errors."""
+        engine = self._search_engine[engine_name]
+        start = time.monotonic()
+        try:
+            search_items = await self._perform_search_with_engine(
+                engine, query, num_results, search_params
+            )
+        except asyncio.CancelledError:
+            # Lost the race against a faster engine, which says nothing about
+            # whether this one would have answered
+            self._engine_stats[engine_name].record_cancelled()
+            raise
+        except Exception as e:
+            logger.warning(f"Search with {engine_name.capitalize()} failed: {e}")
+            search_items = []
+        self._engine_stats[engine_name].record(bool(search_items), time.monotonic() - start)
+        return search_items
+
+    def get_engine_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Latency and success statistics per search engine."""
+        return {name: stats.to_dict() for name, stats in self._engine_stats.items()}
 
     async def _fetch_content_for_results(
             self, results: List[SearchResult]
@@ -255,10 +388,15 @@ class WebSearcherTool(AsyncTool):
         if not results:
             return []
 
-        # Create tasks for each result
-        # fetched_results = [await self._fetch_single_result_content(result) for result in results]
+        # Create tasks for each result, with at most max_concurrent_fetches running
+        semaphore = asyncio.Semaphore(self.max_concurrent_fetches)
+
+        async def fetch_with_limit(result: SearchResult) -> SearchResult:
+            async with semaphore:
+                return await self._fetch_single_result_content(result)
+
         fetched_results = await asyncio.gather(
-            *[self._fetch_single_result_content(result) for result in results]
+            *[fetch_with_limit(result) for result in results]
         )
 
         # Explicit validation of return type
@@ -300,7 +438,25 @@ class WebSearcherTool(AsyncTool):
         )
         engine_order.extend([e for e in self._search_engine if e not in engine_order])
 
-        return engine_order
+        # Rank engines with enough samples by expected time to a good answer.
+        # Engines without enough samples are assumed as good as the preferred
+        # engine, so the stable sort keeps the configured order until the
+        # stats show the preferred engine is worse than another one
+        def score(engine_name: str) -> Optional[float]:
+            stats = self._engine_stats.get(engine_name)
+            if stats is None or stats.samples < self.min_engine_samples:
+                return None
+            return stats.score
+
+        baseline = score(preferred) if preferred in engine_order else None
+        if baseline is None:
+            baseline = 0.0
+
+        def rank(engine_name: str) -> float:
+            engine_score = score(engine_name)
+            return baseline if engine_score is None else engine_score
+
+        return sorted(engine_order, key=rank)
 
     @retry(
         stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=1, max=10)